@@ -0,0 +1 @@
+"""Benchmarks for the synca MCP servers."""
@@ -0,0 +1,138 @@
+"""Recorded and synthetic tool outputs for benchmarks.
+
+The recorded outputs in `corpus/` were captured from real runs of the
+tools. The synthetic outputs scale them up to realistic sizes, so that
+the parsers see the same line shapes they see in the wild.
+"""
+
+import pathlib
+import random
+
+CORPUS = pathlib.Path(__file__).parent / "corpus"
+STATUS_PREFIXES = ("Compiling ", "Checking ", "Finished ")
+
+
+def recorded(name: str) -> str:
+    """Get a recorded output by name."""
+    return (CORPUS / f"{name}.txt").read_text()
+
+
+def cargo(
+        name: str,
+        verb: str,
+        lines: int,
+        seed: int = 0) -> str:
+    """A cargo workspace run of `lines` lines, with each crate
+    `Compiling`/`Checking` and every third crate repeating the recorded
+    diagnostics.
+    """
+    rand = random.Random(seed)
+    diagnostics = [
+        line
+        for line
+        in recorded(name).splitlines()
+        if not line.strip().startswith(STATUS_PREFIXES)]
+    output: list[str] = []
+    crate = 0
+    while len(output) < lines:
+        crate_name = f"crate_{crate:05d}"
+        output.append(
+            f"{verb:>12} {crate_name} v0.{crate % 10}.{rand.randrange(20)} "
+            f"(/home/dev/workspace/{crate_name})")
+        if not crate % 3:
+            output.extend(
+                line
+                .replace("alpha", crate_name)
+                .replace("beta", crate_name)
+                .replace("gamma", crate_name)
+                for line
+                in diagnostics)
+        crate += 1
+    output.append(
+        "    Finished `dev` profile [unoptimized + debuginfo] "
+        f"target(s) in {rand.uniform(60, 600):.2f}s")
+    return "\n".join(output) + "\n"
+
+
+def cargo_build(lines: int = 50_000) -> str:
+    """A cargo workspace build."""
+    return cargo("cargo-build", "Compiling", lines)
+
+
+def cargo_clippy(lines: int = 50_000) -> str:
+    """A cargo workspace clippy run."""
+    return cargo("cargo-clippy", "Checking", lines)
+
+
+def grep(size: int = 200 * 1024 * 1024) -> str:
+    """A recursive grep result of (at least) `size` bytes."""
+    matches = recorded("grep").splitlines(keepends=True)
+    prefix = "pkg_{:06d}/"
+    chunk = sum(len(prefix.format(0)) + len(line) for line in matches)
+    return "".join(
+        prefix.format(i) + line
+        for i
+        in range(size // chunk + 1)
+        for line
+        in matches)
+
+
+def pytest_cov(files: int = 5000, seed: int = 0) -> str:
+    """A pytest run with a coverage table of `files` files, using the
+    recorded session header.
+    """
+    rand = random.Random(seed)
+    header = recorded("pytest-cov").split("Name ", 1)[0]
+    paths = [
+        f"src/pkg_{i // 50:03d}/module_{i % 50:02d}.py"
+        for i
+        in range(files)]
+    width = max(len(path) for path in paths) + 2
+    rows = []
+    total = missed = 0
+    for path in paths:
+        stmts = rand.randrange(1, 400)
+        miss = rand.randrange(0, stmts // 4 + 1)
+        total += stmts
+        missed += miss
+        missing = ", ".join(
+            f"{line}-{line + rand.randrange(1, 5)}"
+            for line
+            in sorted(rand.sample(range(1, stmts * 2 + 10), min(miss, 6))))
+        rows.append(
+            f"{path:<{width}}{stmts:>6}{miss:>7}"
+            f"{100 * (stmts - miss) // stmts:>6}%   {missing}")
+    rule = "-" * (width + 19)
+    cover = 100 * (total - missed) / total
+    return "\n".join([
+        header.rstrip("\n"),
+        f"{'Name':<{width}} Stmts   Miss  Cover   Missing",
+        rule,
+        *rows,
+        rule,
+        f"{'TOTAL':<{width}}{total:>6}{missed:>7}{int(cover):>6}%",
+        "FAIL Required test coverage of 100% not reached. "
+        f"Total coverage: {cover:.2f}%",
+        f"{'=' * 20} {files * 12} passed, 3 failed, 41 skipped, "
+        f"2 xfailed in 58.31s {'=' * 20}"]) + "\n"
+
+
+def flake8(errors: int = 50) -> str:
+    """A flake8 run reporting `errors` errors."""
+    return "".join(
+        f"./pkg/module_{i:02d}.py:{i + 1}:1: E302 expected 2 blank lines, "
+        "found 1\n"
+        for i
+        in range(errors))
+
+
+def mypy(errors: int = 50) -> str:
+    """A mypy run reporting `errors` errors."""
+    return "".join(
+        f"pkg/module_{i:02d}.py:{i + 1}: error: Incompatible types in "
+        'assignment (expression has type "int", variable has type "str")  '
+        "[assignment]\n"
+        for i
+        in range(errors)) + (
+            f"Found {errors} errors in {errors} files "
+            f"(checked {errors * 2} source files)\n")
@@ -0,0 +1,471 @@
+"""Throughput, latency and memory growth of the MCP servers under load.
+
+Each server is driven in this process over the in-memory MCP transport,
+by `--clients` concurrent client sessions each making `--calls` tool
+calls drawn from a weighted mix of its tools, for `--repeat` rounds.
+
+The CLI tools run stub executables, which print recorded or synthetic
+tool outputs after `--delay` seconds, in a scratch project, and the
+GitHub tools call a local fake of the GitHub API, so no toolchains,
+network access or token are needed.
+
+Run from the repository root, with the packages installed:
+
+    $ python -m bench.load -o load.json
+    $ python -m bench.load -k cargo --clients 32 --mix cargo_check=1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import os
+import pathlib
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+import anyio
+from mcp import ClientSession
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_client_server_memory_streams
+from mcp.types import CallToolResult
+
+from synca.mcp.common.util.history import percentile
+
+from bench import corpus, measure
+
+SERVERS = dict(
+    cargo="synca.mcp.cargo.server",
+    python="synca.mcp.python.server",
+    fs_extra="synca.mcp.fs_extra.server",
+    gh_extra="synca.mcp.gh_extra.server",
+    combined="synca.mcp.combined.server")
+# server: namespace of its tools in the combined server
+NAMESPACES = dict(
+    cargo="cargo",
+    python="python",
+    fs_extra="fs",
+    gh_extra="gh")
+REPO = dict(owner="synca", repo="bench")
+# server: tool: (weight, arguments), with `cwd` set to the scratch
+# project for the tools that take one
+MIXES: dict[str, dict[str, tuple[int, dict[str, Any]]]] = dict(
+    cargo=dict(
+        cargo_check=(4, {}),
+        cargo_clippy=(2, {}),
+        cargo_build=(1, {}),
+        cargo_test=(1, {})),
+    python=dict(
+        pytest=(2, {}),
+        mypy=(3, {}),
+        flake8=(3, {})),
+    fs_extra=dict(
+        fs_grep=(2, dict(grep_args=["-rn", "warning", "src"])),
+        fs_head=(3, dict(head_args=["-n", "100", "build.log"])),
+        fs_tail=(3, dict(tail_args=["-n", "100", "build.log"]))),
+    gh_extra=dict(
+        list_workflow_runs=(3, dict(**REPO, per_page=30)),
+        get_workflow_run=(2, dict(**REPO, run_id=1)),
+        list_check_suites_for_ref=(2, dict(**REPO, ref="main")),
+        list_check_runs_for_ref=(2, dict(**REPO, ref="main"))))
+# executable: (output, stream, return code) of its stub
+STUBS = dict(
+    cargo=(corpus.recorded("cargo-clippy"), 2, 0),
+    pytest=(corpus.recorded("pytest-cov"), 1, 1),
+    mypy=(corpus.mypy(), 1, 1),
+    flake8=(corpus.flake8(), 1, 1))
+# path of the fake GitHub API: key of the listed items, or None for an
+# item
+ROUTES = (
+    (re.compile(r"/repos/[^/]+/[^/]+/commits/[^/]+/check-runs"),
+     "check_runs"),
+    (re.compile(r"/repos/[^/]+/[^/]+/check-suites/\d+/check-runs"),
+     "check_runs"),
+    (re.compile(r"/repos/[^/]+/[^/]+/commits/[^/]+/check-suites"),
+     "check_suites"),
+    (re.compile(r"/repos/[^/]+/[^/]+/actions/runs"),
+     "workflow_runs"),
+    (re.compile(r"/repos/[^/]+/[^/]+/actions/runs/\d+"),
+     None))
+
+
+class LoadSession(ClientSession):
+    """Client session that does not validate tool results against their
+    output schemas, as the clients run in the event loop of the servers
+    being measured.
+    """
+
+    async def _validate_tool_result(
+            self,
+            name: str,
+            result: CallToolResult) -> None:
+        pass
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Fake of the GitHub API endpoints used by the GitHub tools, with
+    every request taking `delay` seconds.
+    """
+    delay = 0.0
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        for pattern, key in ROUTES:
+            if pattern.fullmatch(url.path):
+                break
+        else:
+            return self.respond(404, dict(message="Not Found"))
+        time.sleep(self.delay)
+        if key is None:
+            return self.respond(200, self.item(1))
+        per_page = int(parse_qs(url.query).get("per_page", ["30"])[0])
+        return self.respond(
+            200,
+            {"total_count": per_page,
+             key: [self.item(i) for i in range(1, per_page + 1)]})
+
+    def item(self, id: int) -> dict[str, Any]:
+        """A check run, check suite or workflow run."""
+        return dict(
+            id=id,
+            name=f"job {id}",
+            status="completed",
+            conclusion="failure" if id % 5 else "success",
+            head_branch="main",
+            head_sha="0" * 40,
+            html_url=(
+                f"https://github.com/{REPO['owner']}/{REPO['repo']}"
+                f"/actions/runs/{id}/job/{id}"),
+            created_at="2025-01-01T00:00:00Z")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def respond(self, status: int, data: dict[str, Any]) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@contextlib.asynccontextmanager
+async def connect(server: FastMCP) -> AsyncIterator[ClientSession]:
+    """Connect a client session to the server over the in-memory
+    transport.
+    """
+    lowlevel = server._mcp_server
+    async with create_client_server_memory_streams() as streams:
+        (client_read, client_write), (server_read, server_write) = streams
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(
+                lowlevel.run,
+                server_read,
+                server_write,
+                lowlevel.create_initialization_options())
+            try:
+                async with LoadSession(client_read, client_write) as session:
+                    await session.initialize()
+                    yield session
+            finally:
+                tasks.cancel_scope.cancel()
+
+
+@contextlib.contextmanager
+def environment(delay: float) -> Iterator[pathlib.Path]:
+    """Set up the stubs, fake GitHub API and scratch project, yielding
+    the project path.
+
+    The history and spill files of the tools are kept in the scratch
+    dir, so this must be entered before the servers are imported.
+    """
+    env = dict(os.environ)
+    FakeGitHub.delay = delay
+    api = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+    thread = threading.Thread(target=api.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="synca-load-") as tmp:
+            work = pathlib.Path(tmp)
+            os.environ.update(
+                PATH=f"{stubs(work / 'bin', delay)}{os.pathsep}"
+                     f"{os.environ.get('PATH', '')}",
+                GITHUB_API_URL=f"http://127.0.0.1:{api.server_address[1]}",
+                GITHUB_TOKEN="bench",
+                SYNCA_MCP_HISTORY_FILE=str(work / "history.sqlite3"),
+                SYNCA_MCP_SPILL_DIR=str(work / "spill"))
+            yield project(work / "project")
+    finally:
+        os.environ.clear()
+        os.environ.update(env)
+        api.shutdown()
+        api.server_close()
+
+
+def mix(
+        server: str,
+        weights: dict[str, int] | None = None) -> dict[
+            str, tuple[int, dict[str, Any]]]:
+    """The tool call mix of a server, with the tools of the combined
+    server namespaced.
+
+    `weights` replaces the weights of the mix, so that only the tools
+    they name are called, with no arguments for those not in the mix.
+    """
+    if server == "combined":
+        from synca.mcp.combined.server import namespaced
+
+        calls = {
+            namespaced(NAMESPACES[name], tool): call
+            for name, tools
+            in MIXES.items()
+            for tool, call
+            in tools.items()}
+    else:
+        calls = MIXES[server]
+    if weights is None:
+        return calls
+    return {
+        tool: (weight, calls.get(tool, (0, {}))[1])
+        for tool, weight
+        in weights.items()
+        if weight}
+
+
+def project(path: pathlib.Path) -> pathlib.Path:
+    """Create a scratch Rust and Python project, with sources to grep
+    and a build log to slice.
+    """
+    (path / "src").mkdir(parents=True)
+    (path / "pkg").mkdir()
+    (path / "Cargo.toml").write_text(
+        '[package]\nname = "bench"\nversion = "0.1.0"\n')
+    (path / "build.log").write_text(corpus.cargo_build(5000))
+    matches = corpus.recorded("grep")
+    for i in range(50):
+        (path / "src" / f"mod_{i:02d}.rs").write_text(matches)
+        (path / "pkg" / f"module_{i:02d}.py").write_text(f"X = {i}\n")
+    return path
+
+
+async def client(
+        session: ClientSession,
+        calls: list[tuple[str, dict[str, Any]]],
+        latencies: list[float],
+        counts: dict[str, int]) -> None:
+    """Make the calls in turn, recording their latencies and outcomes."""
+    for name, arguments in calls:
+        start = time.perf_counter()
+        result = await session.call_tool(name, arguments)
+        latencies.append(time.perf_counter() - start)
+        info = (
+            (result.structuredContent or {}).get("data") or {}).get(
+                "info") or {}
+        counts["errors"] += bool(result.isError)
+        counts["cache_hits"] += info.get("cache") == "hit"
+        counts["coalesced"] += bool(info.get("coalesced"))
+
+
+async def load(
+        server: FastMCP,
+        calls: list[list[tuple[str, dict[str, Any]]]],
+        latencies: list[float],
+        counts: dict[str, int]) -> float:
+    """Run a round of calls with a client session for each list of
+    calls, returning the time taken.
+    """
+    async with contextlib.AsyncExitStack() as stack:
+        sessions = [
+            await stack.enter_async_context(connect(server))
+            for _ in calls]
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client(session, client_calls, latencies, counts)
+            for session, client_calls
+            in zip(sessions, calls)))
+        return time.perf_counter() - start
+
+
+async def run(
+        name: str,
+        tools: dict[str, tuple[int, dict[str, Any]]],
+        project: pathlib.Path,
+        clients: int,
+        calls: int,
+        repeat: int,
+        seed: int) -> dict[str, float] | None:
+    """Load a server for `repeat` rounds, after a round calling each of
+    the tools once to warm it up.
+
+    Tools in the mix that the server does not have are left out, and the
+    server is not loaded if none are left.
+    """
+    server: FastMCP = importlib.import_module(SERVERS[name]).mcp
+    schemas = {
+        tool.name: tool.inputSchema["properties"]
+        for tool
+        in await server.list_tools()}
+    tools = {
+        tool: call
+        for tool, call
+        in tools.items()
+        if tool in schemas}
+    if not tools:
+        return None
+    names = list(tools)
+    arguments = {
+        tool: (
+            dict(call, cwd=str(project))
+            if "cwd" in schemas[tool]
+            else call)
+        for tool, (_, call)
+        in tools.items()}
+    rand = random.Random(seed)
+    warmup: dict[str, int] = dict(errors=0, cache_hits=0, coalesced=0)
+    await load(
+        server,
+        [[(tool, arguments[tool]) for tool in names]],
+        [],
+        warmup)
+    rss = measure.rss(os.getpid())
+    latencies: list[float] = []
+    counts = dict(errors=0, cache_hits=0, coalesced=0)
+    elapsed = 0.0
+    for _ in range(repeat):
+        elapsed += await load(
+            server,
+            [[(tool, arguments[tool])
+              for tool
+              in rand.choices(
+                  names,
+                  [weight for weight, _ in tools.values()],
+                  k=calls)]
+             for _ in range(clients)],
+            latencies,
+            counts)
+    latencies.sort()
+    return dict(
+        calls=len(latencies),
+        **counts,
+        warmup_errors=warmup["errors"],
+        throughput=len(latencies) / elapsed,
+        min=latencies[0],
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        max=latencies[-1],
+        mean=statistics.fmean(latencies),
+        rss=rss,
+        rss_growth=measure.rss(os.getpid()) - rss)
+
+
+def stubs(path: pathlib.Path, delay: float) -> pathlib.Path:
+    """Write the stub executables, returning their dir."""
+    path.mkdir(parents=True)
+    for executable, (output, stream, returncode) in STUBS.items():
+        (output_path := path / f"{executable}.out").write_text(output)
+        stub = path / executable
+        stub.write_text(
+            "#!/bin/sh\n"
+            f"sleep {delay}\n"
+            f"cat '{output_path}' >&{stream}\n"
+            f"exit {returncode}\n")
+        stub.chmod(0o755)
+    return path
+
+
+def weights(mix: str | None) -> dict[str, int] | None:
+    """Tool weights from a comma-separated list of `tool=weight`."""
+    if mix is None:
+        return None
+    return {
+        tool.strip(): int(weight or 1)
+        for tool, _, weight
+        in (call.partition("=") for call in mix.split(","))
+        if tool.strip()}
+
+
+async def benchmark(
+        options: argparse.Namespace,
+        path: pathlib.Path) -> dict[str, dict[str, float]]:
+    """Load the selected servers in turn.
+
+    The servers share the tool scheduler and caches, so are all loaded
+    in one event loop.
+    """
+    results = {}
+    for name in measure.selected(list(SERVERS), options.filter):
+        print(f"{name}...", file=sys.stderr)
+        result = await run(
+            name,
+            mix(name, weights(options.mix)),
+            path,
+            options.clients,
+            options.calls,
+            options.repeat,
+            options.seed)
+        if result is None:
+            print(f"{name}: no tools in the mix, skipping", file=sys.stderr)
+            continue
+        results[name] = result
+    return results
+
+
+def main(*args: str) -> int:
+    """Load the selected servers, emitting JSON results."""
+    parser = measure.parser(__doc__.splitlines()[0])
+    parser.set_defaults(repeat=3)
+    parser.add_argument(
+        "--clients",
+        type=int,
+        default=8,
+        help="Number of concurrent client sessions")
+    parser.add_argument(
+        "--calls",
+        type=int,
+        default=25,
+        help="Number of tool calls made by each client in each round")
+    parser.add_argument(
+        "--mix",
+        help=(
+            "Tools to call as comma-separated tool=weight, eg "
+            "cargo_check=3,cargo_test=1, rather than each server's "
+            "default mix"))
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.05,
+        help="Seconds the stub executables and fake GitHub API take")
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the random tool call mix")
+    options = parser.parse_args(args)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    with environment(options.delay) as path:
+        results = asyncio.run(benchmark(options, path))
+    return measure.report(
+        "load",
+        options,
+        results,
+        metrics=("p50", "p95"),
+        clients=options.clients,
+        calls=options.calls,
+        mix=options.mix,
+        delay=options.delay)
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
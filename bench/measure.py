@@ -0,0 +1,160 @@
+"""Measurement, reporting and comparison of benchmark results."""
+
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+
+def measure(
+        run: Callable[[], object],
+        repeat: int) -> dict[str, float]:
+    """Time `repeat` calls of `run`, and trace the peak memory allocated
+    by one further call, and the memory still held by its result.
+
+    Memory is traced separately, as tracing slows allocation-heavy code
+    enough to skew the timings.
+    """
+    run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        result = run()
+        retained, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return dict(
+        min=min(timings),
+        median=statistics.median(timings),
+        mean=statistics.fmean(timings),
+        peak_memory=peak,
+        retained_memory=retained)
+
+
+def compare(
+        results: dict[str, dict[str, float]],
+        baseline: dict[str, dict[str, float]],
+        threshold: float,
+        metrics: tuple[str, ...] = ("median", "peak_memory")) -> list[str]:
+    """Compare results with a baseline, listing the cases where any of
+    the `metrics` (by default the median time and peak memory) grew by
+    more than `threshold`.
+    """
+    regressions = []
+    for name, result in results.items():
+        if not (base := baseline.get(name)):
+            continue
+        for metric in metrics:
+            if not base[metric]:
+                continue
+            ratio = result[metric] / base[metric]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{name}: {metric} {base[metric]:.6g} -> "
+                    f"{result[metric]:.6g} ({ratio:.2f}x)")
+    return regressions
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    """Argument parser with the options common to all benchmarks."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "-k", "--filter",
+        action="append",
+        default=[],
+        help="Only run cases whose name contains this (repeatable)")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of timed runs of each case")
+    parser.add_argument(
+        "-o", "--output",
+        type=pathlib.Path,
+        help="Write the JSON results to this file, rather than stdout")
+    parser.add_argument(
+        "--compare",
+        type=pathlib.Path,
+        help="Baseline JSON results to check for regressions")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed growth in time or memory over the baseline")
+    return parser
+
+
+def report(
+        benchmark: str,
+        options: argparse.Namespace,
+        results: dict[str, dict[str, float]],
+        metrics: tuple[str, ...] = ("median", "peak_memory"),
+        **meta: object) -> int:
+    """Emit the results as JSON and check them against the baseline,
+    returning the exit code.
+    """
+    output = json.dumps(
+        dict(
+            benchmark=benchmark,
+            created=datetime.datetime.now(datetime.UTC).isoformat(),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            repeat=options.repeat,
+            **meta,
+            results=results),
+        indent=2)
+    if options.output:
+        options.output.write_text(output + "\n")
+    else:
+        print(output)
+    if not options.compare:
+        return 0
+    baseline = json.loads(options.compare.read_text())
+    for key, value in meta.items():
+        if baseline.get(key) != value:
+            print(
+                f"WARNING baseline {key} is {baseline.get(key)}, not {value}",
+                file=sys.stderr)
+    regressions = compare(
+        results,
+        baseline["results"],
+        options.threshold,
+        metrics)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def rss(pid: int) -> int:
+    """Resident set size of a process in bytes, or 0 if unknown (only
+    Linux is supported).
+    """
+    status = pathlib.Path(f"/proc/{pid}/status")
+    if not status.exists():
+        return 0
+    for line in status.read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def selected(names: list[str], filters: list[str]) -> list[str]:
+    """Names matching any of the filters, or all names if there are
+    none.
+    """
+    return [
+        name
+        for name
+        in names
+        if not filters or any(f in name for f in filters)]
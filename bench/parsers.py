@@ -0,0 +1,108 @@
+"""Throughput and peak memory of the tool output parsers.
+
+Run from the repository root, with the packages installed:
+
+    $ python -m bench.parsers -o parsers.json
+    $ python -m bench.parsers --compare parsers.json
+"""
+
+import sys
+from typing import Callable
+
+from synca.mcp.cargo.tool.build import BuildTool
+from synca.mcp.cargo.tool.clippy import ClippyTool
+from synca.mcp.fs_extra.tool.grep import GrepTool
+from synca.mcp.python.tool.pytest import PytestTool
+from synca.mcp.python.util.coverage import CoverageParser
+
+from bench import corpus, measure
+
+# Parsers do not use the context, path or args of the tools.
+build = BuildTool(None, ".", {})  # type:ignore[arg-type]
+clippy = ClippyTool(None, ".", {})  # type:ignore[arg-type]
+grep = GrepTool(None, ".", {})  # type:ignore[arg-type]
+pytest = PytestTool(None, ".", {})  # type:ignore[arg-type]
+
+
+def categorize(output: str) -> Callable[[], object]:
+    """Categorize the warnings, which are split out of the output
+    before timing.
+    """
+    warnings = clippy.parse_issues(output)[0]
+    return lambda: clippy._categorize_issues(warnings, "warning")
+
+
+# name: (corpus, corpus size at scale 1, parser of the corpus)
+CASES: dict[
+        str,
+        tuple[Callable[[int], str],
+              int,
+              Callable[[str], Callable[[], object]]]] = {
+    "cargo.build": (
+        corpus.cargo_build,
+        50_000,
+        lambda output: lambda: build.parse_output("", output, 0)),
+    "cargo.clippy": (
+        corpus.cargo_clippy,
+        50_000,
+        lambda output: lambda: clippy.parse_output("", output, 0)),
+    "cargo.clippy.categorize": (
+        corpus.cargo_clippy,
+        50_000,
+        categorize),
+    "fs_extra.grep": (
+        corpus.grep,
+        200 * 1024 * 1024,
+        lambda output: lambda: grep.parse_output(output, "", 0)),
+    "python.coverage": (
+        corpus.pytest_cov,
+        5000,
+        lambda output: lambda: CoverageParser(output).data),
+    "python.pytest": (
+        corpus.pytest_cov,
+        5000,
+        lambda output: lambda: pytest.parse_output(output, "", 1)),
+    "python.pytest.summary": (
+        corpus.pytest_cov,
+        5000,
+        lambda output: lambda: pytest._parse_summary(output)),
+}
+
+
+def run(name: str, scale: float, repeat: int) -> dict[str, float]:
+    """Benchmark a case on its corpus at `scale`."""
+    make_corpus, size, parser = CASES[name]
+    output = make_corpus(max(1, int(size * scale)))
+    result = measure.measure(parser(output), repeat)
+    size_bytes = len(output.encode())
+    lines = output.count("\n")
+    return dict(
+        bytes=size_bytes,
+        lines=lines,
+        **result,
+        mb_per_s=size_bytes / result["median"] / 1e6,
+        lines_per_s=lines / result["median"])
+
+
+def main(*args: str) -> int:
+    """Run the selected cases, emitting JSON results."""
+    parser = measure.parser(__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Scale the corpus sizes, eg 0.01 for a quick run")
+    options = parser.parse_args(args)
+    results = {}
+    for name in measure.selected(list(CASES), options.filter):
+        print(f"{name}...", file=sys.stderr)
+        results[name] = run(name, options.scale, options.repeat)
+    return measure.report(
+        "parsers",
+        options,
+        results,
+        scale=options.scale)
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,150 @@
+"""Cold start time and idle memory of the MCP servers.
+
+Each server is started over stdio as it would be by a client, timing
+the `initialize` and first `tools/list` responses from the spawn, and
+reading the idle RSS of the server process (Linux only) once it has
+listed its tools.
+
+Run from the repository root, with the packages installed:
+
+    $ python -m bench.startup -o startup.json
+    $ python -m bench.startup --compare startup.json --budget 1.5
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from mcp.types import LATEST_PROTOCOL_VERSION
+
+from bench import measure
+
+SERVERS = (
+    "synca.mcp.cargo",
+    "synca.mcp.python",
+    "synca.mcp.fs_extra",
+    "synca.mcp.gh_extra",
+    "synca.mcp.combined")
+
+
+async def request(
+        process: asyncio.subprocess.Process,
+        id: int,
+        method: str,
+        params: dict | None = None) -> dict:
+    """Send a JSON-RPC request to the server and wait for its response."""
+    assert process.stdin and process.stdout
+    message = dict(jsonrpc="2.0", id=id, method=method)
+    if params is not None:
+        message["params"] = params
+    process.stdin.write(json.dumps(message).encode() + b"\n")
+    await process.stdin.drain()
+    while line := await process.stdout.readline():
+        response = json.loads(line)
+        if response.get("id") == id:
+            return response
+    raise RuntimeError(f"Server exited before responding to {method}")
+
+
+async def start(module: str, idle: float) -> dict[str, float]:
+    """Start a server, timing its first responses and reading its idle
+    RSS.
+    """
+    spawned = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", module,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=16 * 1024 * 1024)
+    try:
+        await request(
+            process,
+            1,
+            "initialize",
+            dict(
+                protocolVersion=LATEST_PROTOCOL_VERSION,
+                capabilities={},
+                clientInfo=dict(name="bench", version="0")))
+        initialized = time.perf_counter() - spawned
+        assert process.stdin
+        process.stdin.write(
+            json.dumps(
+                dict(
+                    jsonrpc="2.0",
+                    method="notifications/initialized")).encode()
+            + b"\n")
+        response = await request(process, 2, "tools/list")
+        listed = time.perf_counter() - spawned
+        await asyncio.sleep(idle)
+        return dict(
+            initialize=initialized,
+            list_tools=listed,
+            tools=len(response["result"]["tools"]),
+            rss=measure.rss(process.pid))
+    finally:
+        if process.stdin:
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), 5)
+        except TimeoutError:
+            process.kill()
+            await process.wait()
+
+
+async def run(module: str, repeat: int, idle: float) -> dict[str, float]:
+    """Start the server `repeat` times, summarizing the runs."""
+    runs = [await start(module, idle) for _ in range(repeat)]
+    listed = [run["list_tools"] for run in runs]
+    return dict(
+        min=min(listed),
+        median=statistics.median(listed),
+        mean=statistics.fmean(listed),
+        initialize=statistics.median(run["initialize"] for run in runs),
+        tools=runs[-1]["tools"],
+        rss=statistics.median(run["rss"] for run in runs))
+
+
+def main(*args: str) -> int:
+    """Start the selected servers, emitting JSON results."""
+    parser = measure.parser(__doc__.splitlines()[0])
+    parser.add_argument(
+        "--idle",
+        type=float,
+        default=0.5,
+        help="Seconds to leave the server idle before reading its RSS")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Fail if the median time to list tools exceeds this")
+    options = parser.parse_args(args)
+    results = {}
+    for module in measure.selected(list(SERVERS), options.filter):
+        print(f"{module}...", file=sys.stderr)
+        results[module] = asyncio.run(
+            run(module, options.repeat, options.idle))
+    code = measure.report(
+        "startup",
+        options,
+        results,
+        metrics=("median", "rss"),
+        idle=options.idle)
+    if options.budget is None:
+        return code
+    over = [
+        module
+        for module, result
+        in results.items()
+        if result["median"] > options.budget]
+    for module in over:
+        print(
+            f"OVER BUDGET {module}: {results[module]['median']:.3f}s > "
+            f"{options.budget}s",
+            file=sys.stderr)
+    return 1 if over else code
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
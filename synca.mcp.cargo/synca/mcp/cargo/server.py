@@ -1,12 +1,13 @@
 from mcp.server.fastmcp import Context, FastMCP
 
+from synca.mcp.common.server import register
 from synca.mcp.common.types import ResultDict
 from synca.mcp.cargo.tool import (
     ClippyTool, BuildTool, CheckTool,
     FmtTool, TestTool, TarpaulinTool, RunTool)
 from synca.mcp.cargo.tool.doc import DocTool
 
-mcp = FastMCP("Cargo")
+mcp = register(FastMCP("Cargo"))
 
 
 # TOOLS
@@ -16,7 +17,8 @@ mcp = FastMCP("Cargo")
 async def cargo_clippy(
         ctx: Context,
         cwd: str,
-        clippy_args: tuple[str, ...] | None = None) -> ResultDict:
+        clippy_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run cargo clippy on a Rust project
 
     Executes clippy linter on the specified Rust project path.
@@ -25,6 +27,8 @@ async def cargo_clippy(
         cwd: Path to a Rust project containing a Cargo.toml file
         clippy_args: Optional list of additional arguments to pass to clippy
              Examples: ["--no-deps", "--workspace", "--", "-D", "warnings"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -48,14 +52,18 @@ async def cargo_clippy(
             "error": str | None
         }
     """
-    return await ClippyTool(ctx, cwd, dict(args=clippy_args)).run()
+    return await ClippyTool(
+        ctx,
+        cwd,
+        dict(args=clippy_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def cargo_check(
         ctx: Context,
         cwd: str,
-        check_args: tuple[str, ...] | None = None) -> ResultDict:
+        check_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run cargo check on a Rust project
 
     Checks a package for errors without building it.
@@ -64,6 +72,8 @@ async def cargo_check(
         path: Path to a Rust project containing a Cargo.toml file
         args: Optional list of additional arguments to pass to cargo check
              Examples: ["--all-features", "--workspace", "--lib"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -83,14 +93,18 @@ async def cargo_check(
             "error": str | None
         }
     """
-    return await CheckTool(ctx, cwd, dict(args=check_args)).run()
+    return await CheckTool(
+        ctx,
+        cwd,
+        dict(args=check_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def cargo_build(
         ctx: Context,
         cwd: str,
-        build_args: tuple[str, ...] | None = None) -> ResultDict:
+        build_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Build a Rust project
 
     Compiles a package and all of its dependencies.
@@ -100,6 +114,8 @@ async def cargo_build(
         build_args: Optional list of additional arguments to pass
                     to cargo build
              Examples: ["--release", "--workspace", "--all-features", "--lib"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -121,14 +137,18 @@ async def cargo_build(
             "error": str | None
         }
     """
-    return await BuildTool(ctx, cwd, dict(args=build_args)).run()
+    return await BuildTool(
+        ctx,
+        cwd,
+        dict(args=build_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def cargo_test(
         ctx: Context,
         cwd: str,
-        test_args: tuple[str, ...] | None = None) -> ResultDict:
+        test_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run tests for a Rust project
 
     Executes all unit and integration tests for a package.
@@ -138,6 +158,8 @@ async def cargo_test(
         test_args: Optional list of additional arguments to pass to cargo test
              Examples: ["--release", "--no-fail-fast", "--verbose"]
              Test name patterns can also be passed directly in args
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -168,14 +190,18 @@ async def cargo_test(
             "error": str | None
         }
     """
-    return await TestTool(ctx, cwd, dict(args=test_args)).run()
+    return await TestTool(
+        ctx,
+        cwd,
+        dict(args=test_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def cargo_fmt(
         ctx: Context,
         cwd: str,
-        fmt_args: tuple[str, ...] | None = None) -> ResultDict:
+        fmt_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Format Rust code using rustfmt
 
     Formats Rust code according to style guidelines using rustfmt.
@@ -185,6 +211,8 @@ async def cargo_fmt(
         fmt_args: Optional list of additional arguments to pass to cargo fmt
              Examples:
                  ["--manifest-path=path/to/Cargo.toml", "--all", "--check"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -206,14 +234,18 @@ async def cargo_fmt(
             "error": str | None
         }
     """
-    return await FmtTool(ctx, cwd, dict(args=fmt_args)).run()
+    return await FmtTool(
+        ctx,
+        cwd,
+        dict(args=fmt_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def cargo_doc(
         ctx: Context,
         cwd: str,
-        doc_args: tuple[str, ...] | None = None) -> ResultDict:
+        doc_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Generate documentation for a Rust project
 
     Builds documentation for the local package and all dependencies.
@@ -223,6 +255,8 @@ async def cargo_doc(
         doc_args: Optional list of additional arguments to pass to cargo doc
              Examples:
                  ["--no-deps", "--document-private-items", "--lib", "--open"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -246,14 +280,18 @@ async def cargo_doc(
             "error": str | None
         }
     """
-    return await DocTool(ctx, cwd, dict(args=doc_args)).run()
+    return await DocTool(
+        ctx,
+        cwd,
+        dict(args=doc_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def cargo_run(
         ctx: Context,
         cwd: str,
-        run_args: tuple[str, ...] | None = None) -> ResultDict:
+        run_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run a Rust project binary
 
     Compiles and runs the main binary or a specified binary.
@@ -263,6 +301,8 @@ async def cargo_run(
         args: Optional list of arguments to pass to the binary
              These are arguments for the binary itself, not for cargo
              Can include flags like "--release" or "--bin=name" for cargo
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -290,14 +330,18 @@ async def cargo_run(
             "error": str | None
         }
     """
-    return await RunTool(ctx, cwd, dict(args=run_args)).run()
+    return await RunTool(
+        ctx,
+        cwd,
+        dict(args=run_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def cargo_tarpaulin(
         ctx: Context,
         cwd: str,
-        tarpaulin_args: tuple[str, ...] | None = None) -> ResultDict:
+        tarpaulin_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run code coverage analysis using cargo-tarpaulin
 
     Measures code coverage of tests in a Rust project.
@@ -308,6 +352,8 @@ async def cargo_tarpaulin(
                         to tarpaulin
           Examples:
             ["--workspace", "--exclude-files=**/tests/**", "--fail-under=80"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -334,4 +380,7 @@ async def cargo_tarpaulin(
             "error": str | None
         }
     """
-    return await TarpaulinTool(ctx, cwd, dict(args=tarpaulin_args)).run()
+    return await TarpaulinTool(
+        ctx,
+        cwd,
+        dict(args=tarpaulin_args, timeout=timeout)).run()
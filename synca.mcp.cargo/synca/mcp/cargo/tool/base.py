@@ -3,11 +3,32 @@
 import pathlib
 
 from synca.mcp.common.tool import CLICheckTool
-from synca.mcp.common.types import CommandTuple, IssuesTuple
+from synca.mcp.common.types import CommandTuple, IssuesTuple, ProgressTuple
+from synca.mcp.common.util import Diagnostics
 
 
 class CargoTool(CLICheckTool):
-    """Base class for Cargo tools."""
+    """Base class for Cargo tools.
+
+    Cargo tools in the same path take turns, as they would otherwise wait
+    on the lock of its build dir while holding a slot.
+    """
+    path_group = "cargo"
+    fingerprint_patterns = (
+        "*.rs",
+        "Cargo.lock",
+        "Cargo.toml",
+        "clippy.toml",
+        ".clippy.toml",
+        "config.toml",
+        "rust-toolchain",
+        "rust-toolchain.toml")
+    _progress_count = 0
+    _progress_verbs = (
+        "Checking",
+        "Compiling",
+        "Documenting",
+        "Running")
 
     @property
     def command(self) -> CommandTuple:
@@ -28,26 +49,41 @@ class CargoTool(CLICheckTool):
             additional_errors: list[str] | None = None) -> IssuesTuple:
         """Extract warnings, errors, and notes from the build output.
         """
-        warnings, errors, notes = [], [], []
+        diagnostics = Diagnostics("warning", "error", "note")
         for line in combined_output.splitlines():
             line = line.strip()
             if not line:
                 continue
+            lower = line.lower()
             has_additional_error = (
                 additional_errors
                 and any(
-                    err in line.lower()
+                    err in lower
                     for err in additional_errors))
             if has_additional_error:
-                errors.append(line)
+                diagnostics.add("error", line)
             # Then standard error/warning/note patterns
-            elif "error:" in line.lower():
-                errors.append(line)
-            elif "warning:" in line.lower():
-                warnings.append(line)
-            elif "note:" in line.lower():
-                notes.append(line)
-        return warnings, errors, notes
+            elif "error:" in lower:
+                diagnostics.add("error", line)
+            elif "warning:" in lower:
+                diagnostics.add("warning", line)
+            elif "note:" in lower:
+                diagnostics.add("note", line)
+        return (
+            diagnostics["warning"],
+            diagnostics["error"],
+            diagnostics["note"])
+
+    def parse_progress(
+            self,
+            stream: str,
+            line: str) -> ProgressTuple | None:
+        """Count the targets cargo has started building or running."""
+        verb, _, target = line.strip().partition(" ")
+        if verb not in self._progress_verbs or not target:
+            return None
+        self._progress_count += 1
+        return self._progress_count, None, f"{verb} {target}"
 
     def validate_path(self, path: pathlib.Path) -> None:
         """Validate that the project path contains a Cargo.toml file."""
@@ -59,7 +59,9 @@ class BuildTool(CargoTool):
                 return "release"
         return None
 
-    def _extract_timing(self, combined_output: str) -> TimingInfoDict:
+    def _extract_timing(
+            self,
+            combined_output: str) -> TimingInfoDict | None:
         """Extract build timing information if available."""
         timing_info: TimingInfoDict = dict(total="")
         for line in combined_output.splitlines():
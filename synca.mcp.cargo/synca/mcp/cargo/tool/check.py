@@ -2,10 +2,12 @@
 
 from synca.mcp.cargo.tool.base import CargoTool
 from synca.mcp.common.types import IssuesTuple, OutputInfoDict, OutputTuple
+from synca.mcp.common.util import Diagnostics
 
 
 class CheckTool(CargoTool):
     """Tool for running cargo check on a Rust project."""
+    cacheable = True
 
     @property
     def tool_name(self) -> str:
@@ -74,16 +76,17 @@ class CheckTool(CargoTool):
             - List of error messages
             - List of resolution suggestions
         """
-        warnings = []
-        errors = []
-        resolutions = []
+        diagnostics = Diagnostics("warning", "error", "resolution")
         for line in combined_output.splitlines():
             line = line.strip()
             if "cargo fix" in line:
-                resolutions.append(line)
+                diagnostics.add("resolution", line)
             elif "warning:" in line:
-                warnings.append(line)
+                diagnostics.add("warning", line)
             elif "error:" in line:
-                errors.append(line)
+                diagnostics.add("error", line)
 
-        return warnings, errors, resolutions
+        return (
+            diagnostics["warning"],
+            diagnostics["error"],
+            diagnostics["resolution"])
@@ -2,10 +2,12 @@
 
 from synca.mcp.cargo.tool.base import CargoTool
 from synca.mcp.common.types import IssuesTuple, OutputInfoDict, OutputTuple
+from synca.mcp.common.util import Diagnostics
 
 
 class ClippyTool(CargoTool):
     """Tool for running cargo clippy on a Rust project."""
+    cacheable = True
 
     @property
     def tool_name(self) -> str:
@@ -54,31 +56,31 @@ class ClippyTool(CargoTool):
             issues: list[str],
             issue_type: str) -> dict[str, int]:
         """Categorize clippy warnings or errors by their type."""
-        categories: dict[str, int] = {}
-        for issue in issues:
-            parts = issue.split(f"{issue_type}: ", 1)
+        separator = f"{issue_type}: "
+
+        def category(issue: str) -> str | None:
+            parts = issue.split(separator, 1)
             if len(parts) <= 1:
-                continue
-            category_part = parts[1]
-            category = (
-                category_part.split(":", 1)[0]
-                if ":" in category_part
-                else category_part)
-            categories[category] = categories.get(category, 0) + 1
-        return categories
+                return None
+            return parts[1].split(":", 1)[0]
+
+        return Diagnostics.count(issues, category)
 
     def parse_issues(
             self,
             combined_output: str,
             additional_errors: list[str] | None = None) -> IssuesTuple:
         """Parse warnings, errors, and resolutions from clippy output."""
-        warnings, errors, resolutions = [], [], []
+        diagnostics = Diagnostics("warning", "error", "resolution")
         for line in combined_output.splitlines():
             if "cargo clippy --fix" in line:
-                resolutions.append(line)
+                diagnostics.add("resolution", line)
             elif "error:" in line:
-                errors.append(line)
+                diagnostics.add("error", line)
             elif "warning:" in line:
-                warnings.append(line)
+                diagnostics.add("warning", line)
 
-        return warnings, errors, resolutions
+        return (
+            diagnostics["warning"],
+            diagnostics["error"],
+            diagnostics["resolution"])
@@ -7,6 +7,9 @@ from synca.mcp.common.types import OutputTuple, OutputInfoDict
 class RunTool(CargoTool):
     """Tool for running cargo run on a Rust project."""
 
+    # The program may have side effects, so every run is its own
+    coalesce = False
+
     @property
     def tool_name(self) -> str:
         """Return the name of the tool."""
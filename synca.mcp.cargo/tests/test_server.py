@@ -20,8 +20,9 @@ def test_fastmcp_initialization():
 
 
 @pytest.mark.parametrize("clippy_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_clippy(patches, clippy_args):
+async def test_cargo_clippy(patches, clippy_args, timeout):
     """Test that cargo_clippy uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -29,7 +30,9 @@ async def test_cargo_clippy(patches, clippy_args):
         dict(clippy_args=clippy_args)
         if clippy_args is not None
         else {})
-    expected = dict(args=clippy_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=clippy_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "ClippyTool",
@@ -50,8 +53,9 @@ async def test_cargo_clippy(patches, clippy_args):
 
 
 @pytest.mark.parametrize("check_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_check(patches, check_args):
+async def test_cargo_check(patches, check_args, timeout):
     """Test that cargo_check uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -59,7 +63,9 @@ async def test_cargo_check(patches, check_args):
         dict(check_args=check_args)
         if check_args is not None
         else {})
-    expected = dict(args=check_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=check_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "CheckTool",
@@ -80,8 +86,9 @@ async def test_cargo_check(patches, check_args):
 
 
 @pytest.mark.parametrize("build_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_build(patches, build_args):
+async def test_cargo_build(patches, build_args, timeout):
     """Test that cargo_build uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -89,7 +96,9 @@ async def test_cargo_build(patches, build_args):
         dict(build_args=build_args)
         if build_args is not None
         else {})
-    expected = dict(args=build_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=build_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "BuildTool",
@@ -110,8 +119,9 @@ async def test_cargo_build(patches, build_args):
 
 
 @pytest.mark.parametrize("test_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_test(patches, test_args):
+async def test_cargo_test(patches, test_args, timeout):
     """Test that cargo_test uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -119,7 +129,9 @@ async def test_cargo_test(patches, test_args):
         dict(test_args=test_args)
         if test_args is not None
         else {})
-    expected = dict(args=test_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=test_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "TestTool",
@@ -140,8 +152,9 @@ async def test_cargo_test(patches, test_args):
 
 
 @pytest.mark.parametrize("fmt_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_fmt(patches, fmt_args):
+async def test_cargo_fmt(patches, fmt_args, timeout):
     """Test that cargo_fmt uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -149,7 +162,9 @@ async def test_cargo_fmt(patches, fmt_args):
         dict(fmt_args=fmt_args)
         if fmt_args is not None
         else {})
-    expected = dict(args=fmt_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=fmt_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "FmtTool",
@@ -170,8 +185,9 @@ async def test_cargo_fmt(patches, fmt_args):
 
 
 @pytest.mark.parametrize("doc_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_doc(patches, doc_args):
+async def test_cargo_doc(patches, doc_args, timeout):
     """Test that cargo_doc uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -179,7 +195,9 @@ async def test_cargo_doc(patches, doc_args):
         dict(doc_args=doc_args)
         if doc_args is not None
         else {})
-    expected = dict(args=doc_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=doc_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "DocTool",
@@ -200,8 +218,9 @@ async def test_cargo_doc(patches, doc_args):
 
 
 @pytest.mark.parametrize("run_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_run(patches, run_args):
+async def test_cargo_run(patches, run_args, timeout):
     """Test that cargo_run uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -209,7 +228,9 @@ async def test_cargo_run(patches, run_args):
         dict(run_args=run_args)
         if run_args is not None
         else {})
-    expected = dict(args=run_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=run_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "RunTool",
@@ -230,8 +251,9 @@ async def test_cargo_run(patches, run_args):
 
 
 @pytest.mark.parametrize("tarpaulin_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_cargo_tarpaulin(patches, tarpaulin_args):
+async def test_cargo_tarpaulin(patches, tarpaulin_args, timeout):
     """Test that cargo_tarpaulin uses the correct tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -239,7 +261,9 @@ async def test_cargo_tarpaulin(patches, tarpaulin_args):
         dict(tarpaulin_args=tarpaulin_args)
         if tarpaulin_args is not None
         else {})
-    expected = dict(args=tarpaulin_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=tarpaulin_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "TarpaulinTool",
@@ -19,6 +19,10 @@ def test_tool_base_constructor():
     assert tool.ctx == ctx
     assert tool._path_str == path
     assert tool._args == args
+    assert tool.cacheable is False
+    assert tool.path_group == "cargo"
+    assert "*.rs" in tool.fingerprint_patterns
+    assert "Cargo.toml" in tool.fingerprint_patterns
 
 
 def test_tool_path(patches):
@@ -140,3 +144,50 @@ def test_base_parse_issues(
         == (expected_with_additional
             if additional_errors
             else expected_base))
+
+
+def test_base_parse_issues_shared():
+    """Test repeated issues share the same line."""
+    tool = CargoTool(MagicMock(), MagicMock(), MagicMock())
+    warnings, errors, notes = tool.parse_issues(
+        "\n".join(
+            ["warning: unused variable", "note: on by default"] * 3))
+    assert len(warnings) == len(notes) == 3
+    assert errors == []
+    for issues in (warnings, notes):
+        assert all(issue is issues[0] for issue in issues)
+
+
+@pytest.mark.parametrize(
+    "lines,expected",
+    [(["   Compiling foo v0.1.0 (/src/foo)"],
+      [(1, None, "Compiling foo v0.1.0 (/src/foo)")]),
+     (["    Checking bar v1.0.0",
+       "warning: unused variable",
+       "   Compiling baz v0.2.0",
+       "    Finished `dev` profile"],
+      [(1, None, "Checking bar v1.0.0"),
+       None,
+       (2, None, "Compiling baz v0.2.0"),
+       None]),
+     (["     Running `target/debug/foo`",
+       " Documenting foo v0.1.0"],
+      [(1, None, "Running `target/debug/foo`"),
+       (2, None, "Documenting foo v0.1.0")]),
+     (["Compiling", ""],
+      [None, None])])
+def test_base_parse_progress(lines, expected):
+    """Test parse_progress counts the targets cargo works through."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = CargoTool(ctx, path, args)
+    stream = MagicMock()
+
+    assert (
+        [tool.parse_progress(stream, line)
+         for line in lines]
+        == expected)
+    assert (
+        tool._progress_count
+        == len([x for x in expected if x]))
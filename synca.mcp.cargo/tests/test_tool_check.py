@@ -21,6 +21,7 @@ def test_tool_check_constructor():
     assert tool.tool_name == "check"
     assert "tool_name" not in tool.__dict__
     assert tool._args == args
+    assert tool.cacheable is True
 
 
 @pytest.mark.parametrize("return_code", [0, 1, None])
@@ -21,6 +21,7 @@ def test_tool_clippy_constructor():
     assert tool.tool_name == "clippy"
     assert "tool_name" not in tool.__dict__
     assert tool._args == args
+    assert tool.cacheable is True
 
 
 @pytest.mark.parametrize("args", [True, False])
@@ -21,6 +21,7 @@ def test_tool_run_constructor():
     assert tool.tool_name == "run"
     assert "tool_name" not in tool.__dict__
     assert tool._args == args
+    assert tool.coalesce is False
 
 
 @pytest.mark.parametrize("return_code", [0, 1, None])
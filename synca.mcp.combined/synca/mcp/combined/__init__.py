@@ -0,0 +1 @@
+"""Combined MCP server package."""
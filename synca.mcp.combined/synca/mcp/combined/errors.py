@@ -0,0 +1,2 @@
+class UnknownServerError(ValueError):
+    pass
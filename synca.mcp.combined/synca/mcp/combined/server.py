@@ -0,0 +1,79 @@
+"""MCP server hosting the tools of the synca MCP servers in one process.
+
+Running the servers in one process means they share one copy of the
+mcp stack, and the tool cache, timings and subprocess scheduler.
+"""
+
+import importlib
+import os
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.tools import Tool
+
+from synca.mcp.common.server import SHARED_TOOLS, register
+from synca.mcp.combined.errors import UnknownServerError
+
+# namespace: server module
+SERVERS = dict(
+    cargo="synca.mcp.cargo.server",
+    fs="synca.mcp.fs_extra.server",
+    gh="synca.mcp.gh_extra.server",
+    python="synca.mcp.python.server")
+
+
+def create(namespaces: tuple[str, ...]) -> FastMCP:
+    """Create a server with the tools of the namespaced servers."""
+    return register(
+        FastMCP(
+            "Synca",
+            tools=[
+                tool
+                for namespace
+                in namespaces
+                for tool
+                in tools(namespace)]))
+
+
+def namespaced(namespace: str, name: str) -> str:
+    """Prefix a tool name with its namespace, unless it already is."""
+    return (
+        name
+        if name.startswith(f"{namespace}_")
+        else f"{namespace}_{name}")
+
+
+def selected(servers: str | None = None) -> tuple[str, ...]:
+    """Namespaces of the servers to load, from a comma-separated list,
+    `SYNCA_MCP_SERVERS`, or all servers.
+    """
+    servers = (
+        servers
+        if servers is not None
+        else os.environ.get("SYNCA_MCP_SERVERS", ""))
+    namespaces = tuple(
+        namespace
+        for server in servers.split(",")
+        if (namespace := server.strip()))
+    if not namespaces:
+        return tuple(SERVERS)
+    if unknown := [n for n in namespaces if n not in SERVERS]:
+        raise UnknownServerError(
+            f"Unknown servers {unknown}, must be in {list(SERVERS)}")
+    return namespaces
+
+
+def tools(namespace: str) -> list[Tool]:
+    """Tools of a server, with namespaced names.
+
+    Only the selected servers' modules are imported. The tools shared by
+    all servers are left out, as the combined server has its own.
+    """
+    server: FastMCP = importlib.import_module(SERVERS[namespace]).mcp
+    return [
+        tool.model_copy(update=dict(name=namespaced(namespace, tool.name)))
+        for tool
+        in server._tool_manager.list_tools()
+        if tool.name not in SHARED_TOOLS]
+
+
+mcp = create(selected())
@@ -0,0 +1 @@
+"""Tests for synca.mcp.combined."""
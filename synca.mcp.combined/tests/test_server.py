@@ -0,0 +1,158 @@
+"""Isolated tests for synca.mcp.combined.server."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+
+from synca.mcp.combined import server
+from synca.mcp.combined.errors import UnknownServerError
+
+
+def test_server_mcp():
+    """Test the combined server hosts the namespaced tools."""
+    assert isinstance(server.mcp, FastMCP)
+    assert server.mcp.name == "Synca"
+    names = [tool.name for tool in asyncio.run(server.mcp.list_tools())]
+    assert len(names) == len(set(names))
+    assert (
+        {"cargo_build", "fs_grep", "gh_list_workflow_runs", "python_pytest"}
+        <= set(names))
+    assert all(
+        names.count(name) == 1
+        for name
+        in server.SHARED_TOOLS)
+    assert all(
+        name.split("_", 1)[0] in server.SERVERS
+        for name
+        in names
+        if name not in server.SHARED_TOOLS)
+    assert (
+        [str(resource.uri)
+         for resource
+         in asyncio.run(server.mcp.list_resources())]
+        == ["synca://metrics"])
+
+
+def test_server_create(patches):
+    """Test create builds a server with the tools of each namespace."""
+    namespaces = ("A", "B")
+    patched = patches(
+        "FastMCP",
+        "register",
+        "tools",
+        prefix="synca.mcp.combined.server")
+
+    with patched as (m_fastmcp, m_register, m_tools):
+        m_tools.side_effect = lambda namespace: [f"{namespace}1", "X"]
+        assert (
+            server.create(namespaces)
+            == m_register.return_value)
+
+    assert (
+        m_tools.call_args_list
+        == [[("A", ), {}], [("B", ), {}]])
+    assert (
+        m_fastmcp.call_args
+        == [("Synca", ), dict(tools=["A1", "X", "B1", "X"])])
+    assert (
+        m_register.call_args
+        == [(m_fastmcp.return_value, ), {}])
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [("build", "ns_build"),
+     ("ns_build", "ns_build"),
+     ("nsbuild", "ns_nsbuild"),
+     ("other_ns_build", "ns_other_ns_build")])
+def test_server_namespaced(name, expected):
+    """Test namespaced prefixes tool names that are not already."""
+    assert server.namespaced("ns", name) == expected
+
+
+@pytest.mark.parametrize(
+    "servers,env,expected",
+    [(None, None, tuple(server.SERVERS)),
+     (None, "", tuple(server.SERVERS)),
+     ("", "cargo", tuple(server.SERVERS)),
+     (None, "cargo", ("cargo", )),
+     (None, " gh , python,", ("gh", "python")),
+     ("fs", "cargo", ("fs", )),
+     ("fs,nope,other", None, UnknownServerError),
+     (None, "nope", UnknownServerError)])
+def test_server_selected(patches, servers, env, expected):
+    """Test selected parses the servers to load."""
+    patched = patches(
+        "os",
+        prefix="synca.mcp.combined.server")
+
+    with patched as (m_os, ):
+        m_os.environ = (
+            dict(SYNCA_MCP_SERVERS=env)
+            if env is not None
+            else {})
+        if expected is UnknownServerError:
+            with pytest.raises(UnknownServerError) as e:
+                server.selected(servers)
+        else:
+            assert server.selected(servers) == expected
+
+    if expected is UnknownServerError:
+        assert (
+            e.value.args[0]
+            == ("Unknown servers "
+                f"{['nope', 'other'] if servers else ['nope']}, "
+                f"must be in {list(server.SERVERS)}"))
+
+
+def test_server_tools(patches):
+    """Test tools copies a server's tools with namespaced names, leaving
+    out its shared tools.
+    """
+    tools = [MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock()]
+    for i, tool in enumerate(tools):
+        tool.name = f"TOOL{i}"
+    tools[1].name = "batch"
+    tools[3].name = "output"
+    tools[4].name = "history"
+    patched = patches(
+        "importlib",
+        "namespaced",
+        prefix="synca.mcp.combined.server")
+
+    with patched as (m_importlib, m_namespaced):
+        mcp = m_importlib.import_module.return_value.mcp
+        mcp._tool_manager.list_tools.return_value = tools
+        assert (
+            server.tools("cargo")
+            == [tools[0].model_copy.return_value,
+                tools[2].model_copy.return_value])
+
+    assert (
+        m_importlib.import_module.call_args
+        == [("synca.mcp.cargo.server", ), {}])
+    assert (
+        m_namespaced.call_args_list
+        == [[("cargo", "TOOL0"), {}], [("cargo", "TOOL2"), {}]])
+    assert not tools[1].model_copy.called
+    assert not tools[3].model_copy.called
+    assert not tools[4].model_copy.called
+    for tool in (tools[0], tools[2]):
+        assert (
+            tool.model_copy.call_args
+            == [(), dict(update=dict(name=m_namespaced.return_value))])
+
+
+def test_server_tools_shared():
+    """Test the namespaced tools call the original tool functions."""
+    from synca.mcp.cargo.server import cargo_build, mcp
+
+    (build, ) = [
+        tool
+        for tool
+        in server.tools("cargo")
+        if tool.name == "cargo_build"]
+    assert build.fn is cargo_build
+    assert mcp._tool_manager.get_tool("cargo_build").name == "cargo_build"
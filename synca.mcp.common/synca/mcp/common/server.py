@@ -0,0 +1,269 @@
+"""Resources and tools shared by the Synca MCP servers."""
+
+import asyncio
+import json
+from typing import cast
+
+from mcp.server.fastmcp import FastMCP
+
+from synca.mcp.common import errors
+from synca.mcp.common.tool import CLITool, Tool
+from synca.mcp.common.tool.base import batched
+from synca.mcp.common.types import (
+    BatchCallDict,
+    BatchResultDict,
+    HistoryResultDict,
+    ResultDict,
+    SpillPageDict)
+
+MAX_BATCH = 64
+MAX_HISTORY = 1000
+# Tools added to each server by `register`
+SHARED_TOOLS = ("batch", "history", "output")
+
+
+async def batch(
+        mcp: FastMCP,
+        calls: list[BatchCallDict]) -> BatchResultDict:
+    """Run calls to the server's tools concurrently, returning their
+    results in order.
+    """
+    if len(calls) > MAX_BATCH:
+        raise errors.ArgValueError(
+            f"Too many calls in batch ({len(calls)}), "
+            f"the maximum is {MAX_BATCH}")
+    return BatchResultDict(
+        results=list(
+            await asyncio.gather(
+                *(batch_call(mcp, call)
+                  for call
+                  in calls))))
+
+
+async def batch_call(mcp: FastMCP, call: BatchCallDict) -> ResultDict:
+    """Run a call in a batch, returning any error as its result.
+
+    The call is run as `batched`, so that it does not send progress on
+    the progress token of the batch.
+    """
+    if call["tool"] == "batch":
+        return ResultDict(error="Batches cannot be nested")
+    token = batched.set(True)
+    try:
+        result = await mcp.call_tool(
+            call["tool"],
+            call.get("arguments") or {})
+    except Exception as e:
+        return ResultDict(error=str(e))
+    finally:
+        batched.reset(token)
+    structured = result[1] if isinstance(result, tuple) else result
+    if not isinstance(structured, dict):
+        return ResultDict(
+            error=f"Tool '{call['tool']}' returned no structured result")
+    return cast(
+        ResultDict,
+        {key: value
+         for key, value
+         in structured.items()
+         if value is not None})
+
+
+def history(
+        tool: str | None,
+        cwd: str | None,
+        days: float,
+        group_by: str | None,
+        order: str,
+        limit: int) -> HistoryResultDict:
+    """Query the run history, for runs or for statistics of groups of
+    runs.
+    """
+    if not 0 < limit <= MAX_HISTORY:
+        raise errors.ArgValueError(
+            f"Limit must be between 1 and {MAX_HISTORY}: {limit}")
+    Tool.history.flush()
+    if group_by:
+        return HistoryResultDict(
+            groups=Tool.history.groups(group_by, tool, cwd, days, limit))
+    return HistoryResultDict(
+        runs=Tool.history.runs(tool, cwd, days, order, limit))
+
+
+def metrics() -> str:
+    """Tool phase timing histograms, and the subprocess scheduler queues.
+    """
+    return json.dumps(
+        dict(
+            timings=Tool.timings.as_dict,
+            scheduler=CLITool.scheduler.metrics))
+
+
+def output(
+        handle: str,
+        offset: int,
+        limit: int | None = None) -> SpillPageDict:
+    """Read a page of a spilled tool output."""
+    if offset < 0:
+        raise errors.ArgValueError(f"Offset must not be negative: {offset}")
+    if limit is not None and limit < 1:
+        raise errors.ArgValueError(f"Limit must be positive: {limit}")
+    return Tool.spill.read(handle, offset, limit)
+
+
+def register(mcp: FastMCP) -> FastMCP:
+    """Add the shared Synca resources and tools to a server."""
+    mcp.resource(
+        "synca://metrics",
+        name="metrics",
+        description=(
+            "Tool phase timing histograms and subprocess scheduler "
+            "queue metrics"),
+        mime_type="application/json")(metrics)
+
+    @mcp.tool(name="batch")
+    async def batch_tool(calls: list[BatchCallDict]) -> BatchResultDict:
+        """Run many calls to this server's tools concurrently
+
+        Use this to save round trips when making several independent
+        calls, eg `fs_head` on many files, or `mypy`, `flake8` and
+        `pytest` on one project. Subprocesses still run under the shared
+        concurrency limits. Calls in a batch do not send progress
+        notifications.
+
+        Args:
+            calls: List of tool calls (at most 64), each with the `tool`
+                 name and its `arguments`
+                 Examples: [{"tool": "fs_head",
+                             "arguments": {"cwd": "/src",
+                                           "head_args": ["README.md"]}}]
+
+        Returns:
+            A dictionary with the following structure:
+            {
+                # The result of each call, in the order of `calls`. A
+                # call that fails, eg with an unknown tool or invalid
+                # arguments, has its own `error`
+                "results": list[dict]
+            }
+        """
+        return await batch(mcp, calls)
+
+    @mcp.tool(name="history")
+    async def history_tool(
+            tool: str | None = None,
+            cwd: str | None = None,
+            days: float = 30,
+            group_by: str | None = None,
+            order: str = "recent",
+            limit: int = 50) -> HistoryResultDict:
+        """Query the history of tool runs, for trends and regressions
+
+        Every run of a tool is recorded, with its command, path, git
+        commit, duration, return code, output size and issue counts.
+
+        Use `group_by` for statistics of the runs in each group, eg
+        `group_by="day"` with `tool="PytestTool"` for the p95 duration of
+        test runs over time, `group_by="commit"` with `tool="ClippyTool"`
+        for the warning counts of each commit, or `group_by="tool"` for
+        the p95 duration of each tool.
+
+        Args:
+            tool: Only runs of this tool class, eg "ClippyTool",
+                 "PytestTool" or "GrepTool"
+            cwd: Only runs in this path
+            days: Only runs in this many past days (default: 30)
+            group_by: Group runs by "tool", "cwd", "commit" or "day",
+                 or list the runs if not set
+            order: Order of listed runs, "recent" or "slowest"
+                 (default: "recent")
+            limit: Maximum number of runs or groups, at most 1000
+                 (default: 50)
+
+        Returns:
+            A dictionary with the following structure:
+            {
+                # Without `group_by`, the matching runs
+                "runs": [
+                    {
+                        "started": float,  # Unix time the run started
+                        "tool": str,
+                        "command": str | None,
+                        "cwd": str | None,
+                        "git_commit": str | None,
+                        "duration": float, # Seconds
+                        "return_code": int | None,
+                        "output_bytes": int,
+                        "errors": int | None,
+                        "warnings": int | None,
+                        "issues": int | None,
+                        "failed": bool,
+                        "cache": str | None,
+                        "coalesced": bool,
+                        "phases": dict,    # Seconds spent in each phase
+                        "summary": dict | None
+                    }
+                ],
+                # With `group_by`, statistics of each group, latest first
+                "groups": [
+                    {
+                        "key": Any,        # The tool, cwd, commit or day
+                        "runs": int,
+                        "failed": int,
+                        "first": float,    # Unix times of first/last run
+                        "last": float,
+                        "mean": float,     # Durations in seconds
+                        "p50": float,
+                        "p95": float,
+                        "max": float,
+                        "output_bytes": int,
+                        "last_errors": int | None,
+                        "last_warnings": int | None,
+                        "last_issues": int | None
+                    }
+                ]
+            }
+        """
+        return await asyncio.to_thread(
+            history,
+            tool,
+            cwd,
+            days,
+            group_by,
+            order,
+            limit)
+
+    @mcp.tool(name="output")
+    async def output_tool(
+            handle: str,
+            offset: int = 0,
+            limit: int | None = None) -> SpillPageDict:
+        """Page through the full output of a tool run that was shaped
+
+        Tool outputs over the output budget are cut down to their first
+        and last lines, and any error or warning lines between them, or
+        left out entirely if they are JSON. The full output can then be
+        read with the `handle` in the result's `info.spill`.
+
+        Pages end at the last whole line that fits in them, and the next
+        page starts at `offset` plus the `bytes` of the page.
+
+        Args:
+            handle: Output handle, from `info.spill.handle` of a result
+            offset: Byte to start reading from (default: 0)
+            limit: Maximum number of bytes to read, at most the output
+                budget (default: the output budget)
+
+        Returns:
+            A dictionary with the following structure:
+            {
+                "handle": str,     # The output handle
+                "offset": int,     # The byte the page starts from
+                "bytes": int,      # Number of bytes in the page
+                "output": str,     # The text of the page
+                "more": bool       # Whether there is output after the page
+            }
+        """
+        return output(handle, offset, limit)
+
+    return mcp
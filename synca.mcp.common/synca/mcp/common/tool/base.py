@@ -1,27 +1,96 @@
-
+import asyncio
+import contextvars
+import time
 import traceback
-from typing import Any
+from typing import Any, ClassVar, Hashable
 
 from mcp.server.fastmcp import Context
 
 from synca.mcp.common.types import (
+    HistoryRunDict,
     OutputTuple,
     OutputInfoDict,
     ResultDict)
+from synca.mcp.common.util.cache import ResultCache
+from synca.mcp.common.util.history import History
+from synca.mcp.common.util.spill import Spill
+from synca.mcp.common.util.timing import Timings, phase
+
+# Set while a tool runs as a call in a batch. The calls of a batch share
+# its progress token, so their progress is not sent.
+batched: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "synca_mcp_batched",
+    default=False)
 
 
 class Tool:
     """Base class for MCP server tools."""
+    cache: ClassVar[ResultCache] = ResultCache()
+    cacheable = False
+    history: ClassVar[History] = History()
+    spill: ClassVar[Spill] = Spill()
+    timings: ClassVar[Timings] = Timings()
+    # Outputs of this many characters or more are parsed in a thread
+    parse_threshold: int | None = 256 * 1024
 
     def __init__(self, ctx: Context, **kwargs: Any) -> None:
         """Initialize the tool with context and path.
         """
         self.ctx = ctx
 
+    @property
+    def invocation(self) -> tuple[str | None, str | None]:
+        """Command line and working directory of a run, for its history."""
+        return None, None
+
     @property
     def tool_name(self) -> str:
         raise NotImplementedError
 
+    async def cache_key(self) -> Hashable | None:
+        """Key identifying the inputs of a run, or `None` if the run
+        cannot be cached.
+        """
+        return None
+
+    async def cached_pipeline(self, key: Hashable) -> ResultDict:
+        """Run the pipeline, or return the cached result for `key`."""
+        if cached := self.cache.get(key):
+            return self.cache_status(cached, "hit")
+        result = await self.pipeline()
+        if (data := result.get("data")) and not data["info"].get("timed_out"):
+            self.cache.set(key, result)
+        return self.cache_status(result, "miss")
+
+    def cache_status(self, result: ResultDict, status: str) -> ResultDict:
+        """Report whether the result was served from the cache."""
+        if data := result.get("data"):
+            data["info"]["cache"] = status
+        return result
+
+    async def parse(
+            self,
+            stdout: str,
+            stderr: str,
+            returncode: int) -> OutputTuple:
+        """Parse the tool output, in a thread if it is large.
+
+        Small outputs are parsed on the event loop, timed as the `parse`
+        phase, which blocks any other requests to the server. Large
+        outputs are parsed in a thread, timed as the `parse_thread` phase,
+        so that the loop can serve other requests meanwhile.
+        """
+        if (self.parse_threshold is None
+                or len(stdout) + len(stderr) < self.parse_threshold):
+            with phase("parse"):
+                return self.parse_output(stdout, stderr, returncode)
+        with phase("parse_thread"):
+            return await asyncio.to_thread(
+                self.parse_output,
+                stdout,
+                stderr,
+                returncode)
+
     async def pipeline(self) -> ResultDict:
         """Run tool on a project handling the results."""
         raise NotImplementedError
@@ -34,13 +103,25 @@ class Tool:
         """Parse the tool output."""
         raise NotImplementedError
 
-    def response(
+    async def response(
             self,
             return_code: int,
             message: str,
             output: str,
             info: OutputInfoDict) -> ResultDict:
-        """Format the final response."""
+        """Format the final response.
+
+        Outputs over the output budget are shaped to fit it, with the full
+        output spilled to a file that can be paged through. Outputs are
+        shaped and spilled in a thread, timed as the `spill` phase.
+        """
+        if not self.spill.fits(output):
+            with phase("spill"):
+                output, spilled = await asyncio.to_thread(
+                    self.spill.shape,
+                    output)
+            if spilled:
+                info["spill"] = spilled
         return {
             "data": {
                 "return_code": return_code,
@@ -49,9 +130,70 @@ class Tool:
                 "info": info,
             }}
 
+    async def send_progress(
+            self,
+            progress: float,
+            total: float | None = None,
+            message: str | None = None) -> None:
+        """Send a progress notification to the client, unless the run is
+        a call in a batch.
+        """
+        if not batched.get():
+            await self.ctx.report_progress(progress, total, message)
+
+    def record(
+            self,
+            result: ResultDict,
+            started: float,
+            phases: dict[str, float]) -> None:
+        """Queue a run to be recorded in the history, along with the
+        commit checked out in its working directory.
+        """
+        data = result.get("data")
+        info: OutputInfoDict = data["info"] if data else {}
+        command, cwd = self.invocation if data else (None, None)
+        spill = info.get("spill")
+        self.history.record(
+            HistoryRunDict(
+                started=started,
+                tool=self.__class__.__name__,
+                command=command,
+                cwd=cwd,
+                git_commit=None,
+                duration=phases.get("total", 0.0),
+                return_code=data["return_code"] if data else None,
+                output_bytes=(
+                    spill["bytes"]
+                    if spill
+                    else len(data["output"].encode()) if data else 0),
+                errors=info.get("errors_count"),
+                warnings=info.get("warnings_count"),
+                issues=info.get("issues_count"),
+                failed=not data or data["return_code"] != 0,
+                cache=info.get("cache"),
+                coalesced=bool(info.get("coalesced")),
+                phases=phases,
+                summary=info.get("summary")))
+
     async def run(self) -> ResultDict:
-        """Run the tool and handle exceptions."""
+        """Run the tool, recording the time spent in each phase, and the
+        run in the history.
+        """
+        started = time.time()
+        with self.timings.timer(self.__class__.__name__) as timer:
+            result = await self.run_pipeline()
+        if self.history.path:
+            self.record(result, started, timer.phases)
+        return self.timing_info(result, timer.phases)
+
+    async def run_pipeline(self) -> ResultDict:
+        """Run the tool pipeline and handle exceptions."""
         try:
+            if self.cacheable and self.cache.enabled:
+                with phase("cache_key"):
+                    key = await self.cache_key()
+                if key:
+                    return await self.cached_pipeline(key)
             return await self.pipeline()
         except BaseException as e:
             trace = traceback.format_exc()
@@ -59,3 +201,18 @@ class Tool:
             error_msg = f"Failed to run {tool_name}: {str(e)}\n{trace}"
             return {
                 "error": error_msg}
+
+    def timing_info(
+            self,
+            result: ResultDict,
+            phases: dict[str, float]) -> ResultDict:
+        """Add the phase timings to the result info, if enabled."""
+        if not (self.timings.report and (data := result.get("data"))):
+            return result
+        timing = data["info"].get("timing") or {}
+        timing["phases"] = {
+            name: round(seconds, 6)
+            for name, seconds
+            in phases.items()}
+        data["info"]["timing"] = timing
+        return result
@@ -1,6 +1,13 @@
 import asyncio
+import contextlib
+import copy
+import os
 import pathlib
+import shlex
+import signal
+import time
 from functools import cached_property
+from typing import ClassVar, Hashable
 
 from mcp.server.fastmcp import Context
 
@@ -9,12 +16,48 @@ from synca.mcp.common.types import (
     ArgTuple,
     CLIArgDict,
     CommandTuple,
+    OutputInfoDict,
+    OutputTuple,
+    ProgressTuple,
+    ResourcesDict,
     ResponseTuple,
-    ResultDict)
+    ResultDict,
+    SlotLimitTuple)
+from synca.mcp.common.util.fingerprint import Fingerprint
+from synca.mcp.common.util.flight import SingleFlight
+from synca.mcp.common.util.process import RLIMITS, Process, env_limit
+from synca.mcp.common.util.scheduler import Scheduler
+from synca.mcp.common.util.stream import OutputStream
+from synca.mcp.common.util.timing import add_phase, phase
+from synca.mcp.common.util.watch import Watcher
 
 
 class CLITool(Tool):
     """Base class for MCP server tools."""
+    stream_output = False
+    stream_chunk_size = 65536
+    output_limit: int | None = None
+    progress_interval = 0.5
+    _progress: ProgressTuple | None = None
+    _progress_sent = 0.0
+    fingerprint_patterns: tuple[str, ...] = ()
+    default_timeout: float | None = None
+    timed_out = False
+    streams: dict[str, OutputStream]
+    scheduler: ClassVar[Scheduler] = Scheduler()
+    lane = "default"
+    max_concurrency: int | None = None
+    path_concurrency: int | None = None
+    # Tools sharing state in their path, eg a build dir and its lock,
+    # share a group of the path limit. By default each tool class has
+    # its own.
+    path_group: str | None = None
+    coalesce = False
+    flights: ClassVar[SingleFlight[ResultDict]] = SingleFlight()
+    watcher: ClassVar[Watcher] = Watcher()
+    # Resource limits for the process, by name in `RLIMITS`
+    rlimits: dict[str, int] = {}
+    resources: ResourcesDict | None = None
 
     def __init__(self, ctx: Context, path: str, args: CLIArgDict) -> None:
         """Initialize the tool with context and path.
@@ -34,6 +77,63 @@ class CLITool(Tool):
         self.validate_path(path)
         return path
 
+    @property
+    def invocation(self) -> tuple[str | None, str | None]:
+        """Command line and working directory of a run, for its history."""
+        return shlex.join(self.command), str(self.path)
+
+    @property
+    def flight_key(self) -> Hashable:
+        """Key identifying identical runs, which are coalesced while in
+        flight.
+        """
+        return (
+            self.__class__.__name__,
+            str(self.path),
+            self.command,
+            self.timeout)
+
+    @property
+    def limits(self) -> dict[str, int]:
+        """Resource limits for the process, the lower of the tool's
+        `rlimits` and any set for all tools with `SYNCA_MCP_RLIMIT_<NAME>`,
+        eg `SYNCA_MCP_RLIMIT_ADDRESS_SPACE`. Values that are not whole
+        numbers are ignored.
+        """
+        limits = dict(self.rlimits)
+        for name in RLIMITS:
+            env = os.environ.get(f"SYNCA_MCP_RLIMIT_{name.upper()}")
+            if env and (limit := env_limit(name, env)) is not None:
+                limits[name] = min(limit, limits.get(name, limit))
+        return limits
+
+    @property
+    def slot_limits(self) -> tuple[SlotLimitTuple, ...]:
+        """Scheduler limits for runs of this tool class, and for runs of
+        the tools of its path group in the same path.
+        """
+        return (
+            (("tool", self.__class__.__name__), self.max_concurrency),
+            (("path",
+              str(self.path),
+              self.path_group or self.__class__.__name__),
+             self.path_concurrency))
+
+    @property
+    def timeout(self) -> float | None:
+        """Timeout in seconds for the run, set per call or per tool."""
+        return self._args.get("timeout") or self.default_timeout
+
+    @property
+    def truncated(self) -> bool:
+        """Whether output was dropped from the middle of the streams to
+        keep them within `output_limit`, so that it was not parsed.
+        """
+        return any(
+            stream.buffer.dropped
+            for stream
+            in getattr(self, "streams", {}).values())
+
     @property
     def tool_path(self) -> str:
         return self.tool_name
@@ -43,23 +143,207 @@ class CLITool(Tool):
         """Build the tool command."""
         return (self.tool_path, *self.args)
 
+    async def cache_key(self) -> Hashable | None:
+        """Key the run on the command, the path, and a fingerprint of the
+        files in the path matching `fingerprint_patterns`.
+        """
+        return (
+            self.__class__.__name__,
+            str(self.path),
+            self.command,
+            await asyncio.to_thread(self.fingerprint))
+
+    def fingerprint(self) -> str:
+        """Fingerprint of the files in the path matching
+        `fingerprint_patterns`, reused for as long as the watcher sees
+        nothing change in the path.
+        """
+        root = self.watcher.root(self.path)
+        key = ("fingerprint", self.fingerprint_patterns)
+        recalled: str | None = root.recall(key)
+        if recalled is not None:
+            return recalled
+        generation = root.generation
+        digest = Fingerprint(self.path, self.fingerprint_patterns).digest
+        root.remember(key, generation, digest)
+        return digest
+
+    async def communicate(
+            self,
+            process: Process) -> ResponseTuple:
+        """Read the process output until it exits.
+
+        Runs with a timeout are always streamed, so that the output read
+        before the timeout can be returned.
+        """
+        if self.stream_output or self.timeout:
+            return await self.stream(process)
+        stdout, stderr = await process.communicate()
+        with phase("decode"):
+            return stdout.decode(), stderr.decode(), process.returncode or 0
+
     async def execute(
             self,
             cmd: CommandTuple) -> ResponseTuple:
-        """Execute the tool command."""
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            cwd=str(self.path),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE)
-        stdout, stderr = await process.communicate()
-        return stdout.decode(), stderr.decode(), process.returncode or 0
+        """Execute the tool command once the scheduler has a slot for it.
+        """
+        slot = self.scheduler.slot(self.lane, self.slot_limits)
+        async with slot as waited:
+            add_phase("queue", waited)
+            return await self.spawn(cmd)
+
+    async def handle_timeout(
+            self,
+            process: Process) -> ResponseTuple:
+        """Kill a timed out process, returning the output read so far."""
+        self.kill(process)
+        returncode = await process.wait()
+        self.timed_out = True
+        for stream in self.streams.values():
+            stream.close()
+        return (
+            self.streams["stdout"].text,
+            self.streams["stderr"].text,
+            returncode)
+
+    def handle_line(self, stream: str, line: str) -> None:
+        """Dispatch a streamed line to the progress hook."""
+        if progress := self.parse_progress(stream, line):
+            self._progress = progress
+
+    def kill(self, process: Process) -> None:
+        """Kill the process group of the process."""
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(process.pid, signal.SIGKILL)
+
+    def output_stream(self, name: str) -> OutputStream:
+        """Create a reader for one of the process output streams."""
+        return OutputStream(
+            name,
+            self.handle_line,
+            limit=self.output_limit,
+            chunk_size=self.stream_chunk_size,
+            on_chunk=self.report_progress)
+
+    def parse_progress(
+            self,
+            stream: str,
+            line: str) -> ProgressTuple | None:
+        """Extract a (progress, total, message) tuple from a streamed line.
+
+        Tools override this to report progress from their output, eg
+        crates compiled, or the percentage of tests run.
+        """
+        return None
 
     async def pipeline(self) -> ResultDict:
-        """Run CLI command on a project handling the results."""
-        return self.response(
-            *self.parse_output(
-                *await self.execute(self.command)))
+        """Run CLI command on a project handling the results.
+
+        If `coalesce` is set, a run identical to one already in flight
+        awaits the result of that run instead.
+        """
+        if not self.coalesce:
+            return await self.command_pipeline()
+        result, shared = await self.flights.run(
+            self.flight_key,
+            self.command_pipeline)
+        if not shared:
+            return result
+        result = copy.deepcopy(result)
+        if data := result.get("data"):
+            data["info"]["coalesced"] = True
+        return result
+
+    async def command_pipeline(self) -> ResultDict:
+        """Run the command and parse its output."""
+        response = await self.execute(self.command)
+        output = await self.parse(*response)
+        if self.timed_out:
+            output = self.timeout_output(*output)
+        if self.resources:
+            output[3]["resources"] = self.resources
+        if self.truncated:
+            output[3]["truncated"] = True
+        return await self.response(*output)
+
+    async def spawn(
+            self,
+            cmd: CommandTuple) -> ResponseTuple:
+        """Start the process and collect its output.
+
+        The command runs in a new session, so that it can be killed along
+        with any child processes if it times out or the run is cancelled,
+        in which case it is reaped before the cancellation is raised. Its
+        resource usage is kept in `resources` once it exits.
+        """
+        with phase("spawn"):
+            process = await Process.create(
+                *cmd,
+                cwd=str(self.path),
+                limits=self.limits)
+        try:
+            async with asyncio.timeout(self.timeout):
+                with phase("process"):
+                    response = await self.communicate(process)
+        except TimeoutError:
+            response = await self.handle_timeout(process)
+        except asyncio.CancelledError:
+            self.kill(process)
+            # Reap the killed process, so that it is not left a zombie.
+            # `wait` is shielded, so it is reaped even if this is
+            # cancelled again.
+            await process.wait()
+            raise
+        finally:
+            process.close()
+        self.resources = process.resources
+        return response
+
+    async def stream(
+            self,
+            process: Process) -> ResponseTuple:
+        """Read the process output in chunks, feeding each line to
+        `parse_progress` and retaining at most `output_limit` characters
+        per stream.
+        """
+        self.streams = dict(
+            stdout=self.output_stream("stdout"),
+            stderr=self.output_stream("stderr"))
+        stdout, stderr = await asyncio.gather(
+            self.streams["stdout"].consume(process.stdout),
+            self.streams["stderr"].consume(process.stderr))
+        returncode = await process.wait()
+        await self.report_progress(flush=True)
+        return stdout, stderr, returncode or 0
+
+    async def report_progress(self, flush: bool = False) -> None:
+        """Send the latest progress to the client as a notification.
+
+        Notifications are sent at most once every `progress_interval`
+        seconds, unless `flush` is set.
+        """
+        if not (progress := self._progress):
+            return
+        now = time.monotonic()
+        if not flush and now - self._progress_sent < self.progress_interval:
+            return
+        self._progress = None
+        self._progress_sent = now
+        await self.send_progress(*progress)
+
+    def timeout_output(
+            self,
+            return_code: int,
+            message: str,
+            output: str,
+            info: OutputInfoDict) -> OutputTuple:
+        """Mark the parsed output of a timed out run as partial."""
+        info["timed_out"] = True
+        return (
+            return_code,
+            f"Timed out after {self.timeout}s, output is partial. {message}",
+            output,
+            info)
 
     def validate_path(self, path: pathlib.Path) -> None:
         """Validate that the project path exists and is a directory.
@@ -71,4 +355,9 @@ class CLITool(Tool):
 
 
 class CLICheckTool(CLITool):
-    pass
+    """Base class for long-running build, test and lint tools."""
+    stream_output = True
+    output_limit = 16 * 1024 * 1024
+    default_timeout = 30 * 60.0
+    path_concurrency = 1
+    coalesce = True
@@ -7,6 +7,7 @@ from synca.mcp.common.types import (
     RequestDict,
     ResponseTuple,
     ResultDict)
+from synca.mcp.common.util.timing import phase
 
 T = TypeVar("T", bound=RequestDict)
 
@@ -30,9 +31,10 @@ class HTTPTool(Tool, Generic[T]):
 
     async def pipeline(self) -> ResultDict:
         """Run HTTP command handling the results."""
-        return self.response(
-            *self.parse_output(
-                *await self.request(self.request_data)))
+        with phase("request"):
+            response = await self.request(self.request_data)
+        output = await self.parse(*response)
+        return await self.response(*output)
 
     async def request(
             self,
@@ -1,17 +1,29 @@
 """Type definitions for the MCP common package."""
 
-from typing import Any, Callable, TypeAlias, TypedDict, NotRequired
+from typing import (
+    Any, Callable, Hashable, TypeAlias, TypedDict, NotRequired)
 
 from uritemplate import variable
 
 ArgTuple: TypeAlias = tuple[str, ...]
 CommandTuple: TypeAlias = tuple[str, ...]
 ResponseTuple: TypeAlias = tuple[str, str, int]
+ProgressTuple: TypeAlias = tuple[float, float | None, str | None]
+SlotLimitTuple: TypeAlias = tuple[Hashable, int | None]
 IssuesTuple: TypeAlias = tuple[list[str], list[str], list[str]]
+JSONValue: TypeAlias = (
+    dict[str, "JSONValue"]
+    | list["JSONValue"]
+    | str
+    | int
+    | float
+    | bool
+    | None)
 
 
 class CLIArgDict(TypedDict):
     args: NotRequired[ArgTuple | None]
+    timeout: NotRequired[float | None]
 
 
 class RequestDict(TypedDict):
@@ -24,9 +36,18 @@ class RequestDict(TypedDict):
 
 class APIRequestDict(RequestDict):
     iterable_key: NotRequired[str | None]
+    jq: NotRequired[str | None]
     pages: NotRequired[int | None]
 
 
+class LaneMetricsDict(TypedDict):
+    waiting: int
+    running: int
+    started: int
+    wait_total: float
+    wait_max: float
+
+
 class StatusDict(TypedDict):
     status: str
     version: NotRequired[str | None]
@@ -39,7 +60,120 @@ class CoverageDict(TypedDict):
 
 
 class TimingInfoDict(TypedDict):
-    total: str
+    total: NotRequired[str]
+    # Seconds spent in each phase of the run (if timing info is enabled)
+    phases: NotRequired[dict[str, float]]
+
+
+class HistogramDict(TypedDict):
+    count: int
+    sum: float
+    buckets: dict[str, int]
+
+
+class HistoryRunDict(TypedDict):
+    # Unix time the run started
+    started: float
+    tool: str
+    command: str | None
+    cwd: str | None
+    git_commit: str | None
+    duration: float
+    return_code: int | None
+    output_bytes: int
+    errors: int | None
+    warnings: int | None
+    issues: int | None
+    # Whether the run errored, or its command failed
+    failed: bool
+    cache: str | None
+    coalesced: bool
+    phases: dict[str, float]
+    summary: dict[str, int | str] | None
+
+
+class HistoryStatsDict(TypedDict):
+    # tool, cwd, commit or day of the group
+    key: str | None
+    runs: int
+    failed: int
+    # Unix times the first and last runs started
+    first: float
+    last: float
+    # Run durations, in seconds
+    mean: float
+    p50: float
+    p95: float
+    max: float
+    output_bytes: int
+    # Issue counts of the last run
+    last_errors: int | None
+    last_warnings: int | None
+    last_issues: int | None
+
+
+class HistoryResultDict(TypedDict):
+    runs: NotRequired[list[HistoryRunDict] | None]
+    groups: NotRequired[list[HistoryStatsDict] | None]
+
+
+class ResourcesDict(TypedDict):
+    # CPU seconds used by the process and the children it waited for
+    user_time: float
+    system_time: float
+    # Peak resident memory of the process or any such child, in bytes
+    max_rss: int
+    # Block I/O operations
+    read_blocks: int
+    write_blocks: int
+
+
+class SpillInfoDict(TypedDict):
+    handle: str
+    bytes: int
+    lines: int
+
+
+class SpillPageDict(TypedDict):
+    handle: str
+    offset: int
+    bytes: int
+    output: str
+    more: bool
+
+
+class IndexInfoDict(TypedDict):
+    # Files indexed under the dirs searched, and those left to search
+    files: int
+    candidates: int
+    candidate_ratio: float
+    # Seconds taken to build the index, or to bring it up to date
+    build_time: float | None
+    refresh_time: float | None
+    # Files read into the index
+    indexed: int
+
+
+class FollowInfoDict(TypedDict):
+    # Lines and bytes read while following, after the initial slice
+    lines: int
+    bytes: int
+    # Times the file was replaced, or truncated, while it was followed
+    rotations: int
+    truncations: int
+    # Progress notifications sent with the lines read
+    notifications: int
+    # Why following stopped: "lines", "bytes", "idle" or "timeout"
+    stopped: str
+
+
+class LineIndexInfoDict(TypedDict):
+    # Lines of the file indexed
+    lines: int
+    # Whether the index was "cached", "extended" or "built", and the
+    # seconds it took
+    refresh: str
+    refresh_time: float
 
 
 class OutputInfoDict(TypedDict, total=False):
@@ -70,10 +204,38 @@ class OutputInfoDict(TypedDict, total=False):
     warning_types: dict[str, int]
     error_types: dict[str, int]
 
+    # Set on results of cacheable tools ("hit" or "miss")
+    cache: NotRequired[str]
+
+    # Set on partial results of CLI tools that timed out
+    timed_out: NotRequired[bool]
+
+    # Set on results of CLI tools whose streamed output was cut to the
+    # output limit, so that counts parsed from it may be short
+    truncated: NotRequired[bool]
+
+    # Set on results shared from an identical run that was in flight
+    coalesced: NotRequired[bool]
+
+    # Set on results of CLI tools, where the platform reports them
+    resources: NotRequired[ResourcesDict]
+
+    # Set on results whose output was shaped to fit the output budget
+    spill: NotRequired[SpillInfoDict]
+
     # Specific to fs-extra tools (head, tail, etc.)
     lines_read: NotRequired[int]
     bytes_read: NotRequired[int]
 
+    # Set on results of grep searches narrowed by an index
+    index: NotRequired[IndexInfoDict]
+
+    # Set on results of tail runs that followed a file
+    follow: NotRequired[FollowInfoDict]
+
+    # Set on results of line ranges read through a line index
+    line_index: NotRequired[LineIndexInfoDict]
+
 
 OutputTuple: TypeAlias = tuple[int, str, str, OutputInfoDict]
 
@@ -90,6 +252,15 @@ class ResultDict(TypedDict):
     error: NotRequired[str | None]
 
 
+class BatchCallDict(TypedDict):
+    tool: str
+    arguments: NotRequired[dict[str, Any] | None]
+
+
+class BatchResultDict(TypedDict):
+    results: list[ResultDict]
+
+
 class ArgConfig(TypedDict):
     required: NotRequired[bool]
     default: NotRequired[Any]
@@ -1,10 +1,34 @@
 """Utility modules for Synca MCP Common."""
 
-from synca.mcp.common.util.args import ArgParser
+from synca.mcp.common.util.args import ArgParser, ArgSchema
+from synca.mcp.common.util.cache import ResultCache
+from synca.mcp.common.util.diagnostic import Diagnostics
 from synca.mcp.common.util.file import FileInfo
+from synca.mcp.common.util.fingerprint import Fingerprint
+from synca.mcp.common.util.flight import SingleFlight
+from synca.mcp.common.util.history import History
 from synca.mcp.common.util.jq import JQFilter
+from synca.mcp.common.util.process import Process
+from synca.mcp.common.util.scheduler import Scheduler
+from synca.mcp.common.util.spill import Spill
+from synca.mcp.common.util.stream import OutputBuffer, OutputStream
+from synca.mcp.common.util.timing import Timings
+from synca.mcp.common.util.watch import Watcher
 
 __all__ = (
     "ArgParser",
+    "ArgSchema",
+    "Diagnostics",
     "FileInfo",
-    "JQFilter")
+    "Fingerprint",
+    "History",
+    "JQFilter",
+    "OutputBuffer",
+    "OutputStream",
+    "Process",
+    "ResultCache",
+    "Scheduler",
+    "SingleFlight",
+    "Spill",
+    "Timings",
+    "Watcher")
@@ -1,61 +1,102 @@
 """Argument parsing utilities for Synca MCP."""
 
-from typing import Any, cast
+from functools import cached_property
+from typing import Any, Callable, cast
 
 from synca.mcp.common import errors, types
 
 
-class ArgParser:
-    """Dictionary-based argument parser for Synca MCP tools."""
+class ArgSchema:
+    """Argument configs compiled into lookup tables.
 
-    def __init__(self) -> None:
-        """Initialize the argument parser."""
-        self.arguments: dict[str, types.ArgConfig] = {}
+    Required names, defaults, choices and type converters are collected
+    once, so that validating a request is a set of table lookups.
+    """
 
-    def add_argument(self, name: str, **kwargs: Any) -> None:
-        """Add an argument to the parser.
-        """
-        self.arguments[name] = cast(types.ArgConfig, kwargs)
+    def __init__(self, arguments: dict[str, types.ArgConfig]) -> None:
+        self.arguments = arguments
+        self.names = frozenset(arguments)
+        self.required = frozenset(
+            name
+            for name, config
+            in arguments.items()
+            if config.get("required", False))
+        self.defaults: types.ArgsDict = {
+            name: config["default"]
+            for name, config
+            in arguments.items()
+            if "default" in config}
+        self.choices: dict[str, frozenset] = {
+            name: frozenset(config["choices"])
+            for name, config
+            in arguments.items()
+            if "choices" in config}
+        self.types: dict[str, Callable[[Any], Any]] = {
+            name: config["type"]
+            for name, config
+            in arguments.items()
+            if "type" in config}
 
-    def parse_dict(self, args_dict: types.ArgsDict) -> types.ArgsDict:
+    def parse(self, args_dict: types.ArgsDict) -> types.ArgsDict:
         """Parse and validate a dictionary of arguments.
         """
         result: types.ArgsDict = {}
-        for name, config in self.arguments.items():
-            if value := self._handle_argument(args_dict, name, config):
+        for name in self.arguments:
+            if value := self._handle_argument(args_dict, name):
                 result[name] = value
         for name, value in args_dict.items():
-            if name not in self.arguments and value is not None:
+            if value is not None and name not in self.names:
                 result[name] = value
         return result
 
-    def _handle_argument(
-            self,
-            args_dict: types.ArgsDict,
-            name: str,
-            config: types.ArgConfig) -> Any:
-        if args_dict.get(name) is not None:
-            return self._type_argument(args_dict[name], name, config)
-        elif config.get("required", False):
+    def _handle_argument(self, args_dict: types.ArgsDict, name: str) -> Any:
+        if (value := args_dict.get(name)) is not None:
+            return self._type_argument(value, name)
+        elif name in self.required:
             raise errors.ArgValueError(f"Required argument '{name}' is missing")
-        elif "default" in config:
-            return config["default"]
-        return None
-
-    def _type_argument(
-            self,
-            value: Any,
-            name: str,
-            config: types.ArgConfig) -> Any:
-        if 'choices' in config and value not in config['choices']:
+        return self.defaults.get(name)
+
+    def _is_choice(self, value: Any, name: str) -> bool:
+        try:
+            return value in self.choices[name]
+        except TypeError:
+            # Unhashable values can only be compared with the listed choices
+            return value in self.arguments[name]["choices"]
+
+    def _type_argument(self, value: Any, name: str) -> Any:
+        if name in self.choices and not self._is_choice(value, name):
             raise errors.ArgValueError(
-                f"Argument '{name}' must be one of {config['choices']}, "
-                f"got '{value}'")
-        if "type" in config and value is not None:
+                f"Argument '{name}' must be one of "
+                f"{self.arguments[name]['choices']}, got '{value}'")
+        if converter := self.types.get(name):
             try:
-                return config["type"](value)
+                return converter(value)
             except (ValueError, TypeError) as e:
                 raise errors.ArgValueError(
                     f"Failed to convert '{name}' to "
-                    f"{config['type'].__name__}: {e}")
+                    f"{converter.__name__}: {e}")
         return value
+
+
+class ArgParser:
+    """Dictionary-based argument parser for Synca MCP tools."""
+
+    def __init__(self) -> None:
+        """Initialize the argument parser."""
+        self.arguments: dict[str, types.ArgConfig] = {}
+
+    @cached_property
+    def schema(self) -> ArgSchema:
+        """Compiled schema of the arguments, rebuilt when one is added."""
+        return ArgSchema(self.arguments)
+
+    def add_argument(self, name: str, **kwargs: Any) -> None:
+        """Add an argument to the parser.
+        """
+        self.arguments[name] = cast(types.ArgConfig, kwargs)
+        self.__dict__.pop("schema", None)
+
+    def parse_dict(self, args_dict: types.ArgsDict) -> types.ArgsDict:
+        """Parse and validate a dictionary of arguments.
+        """
+        return self.schema.parse(args_dict)
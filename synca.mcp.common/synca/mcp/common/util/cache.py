@@ -0,0 +1,69 @@
+"""In-memory cache for tool results."""
+
+import copy
+import json
+import os
+from collections import OrderedDict
+from typing import Hashable
+
+from synca.mcp.common.types import ResultDict
+
+
+class ResultCache:
+    """LRU cache of `ResultDict`s, bounded by entry count and by the
+    total serialized size of the cached results.
+
+    Results are only cached if `enabled`, by default if
+    `SYNCA_MCP_CACHE` is set. Keys only cover the files of a project, not
+    its installed dependencies or toolchain, so caching is opt-in.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = 128,
+            max_size: int = 64 * 1024 * 1024,
+            enabled: bool | None = None) -> None:
+        self.enabled = (
+            enabled
+            if enabled is not None
+            else bool(os.environ.get("SYNCA_MCP_CACHE")))
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict[Hashable, tuple[ResultDict, int]] = (
+            OrderedDict())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def get(self, key: Hashable) -> ResultDict | None:
+        """Get a copy of a cached result, marking it as recently used."""
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(self._entries[key][0])
+
+    def set(self, key: Hashable, result: ResultDict) -> None:
+        """Cache a copy of a result, evicting the least recently used
+        results until the cache is within its bounds.
+        """
+        self.pop(key)
+        size = len(json.dumps(result))
+        if size > self.max_size:
+            return
+        self._entries[key] = (copy.deepcopy(result), size)
+        self.size += size
+        while (len(self._entries) > self.max_entries
+               or self.size > self.max_size):
+            self.pop(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> None:
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
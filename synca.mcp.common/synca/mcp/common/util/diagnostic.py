@@ -0,0 +1,41 @@
+"""Compact storage of the diagnostics parsed from tool output."""
+
+import collections
+from typing import Callable
+
+
+class Diagnostics:
+    """Diagnostic lines of a tool output, by kind.
+
+    Tool outputs repeat the same diagnostics many times over, eg a note
+    for every crate of a workspace, so each distinct line is stored once
+    and shared by the lists of each kind. The lists are already in the
+    form that results are serialized in, so need no conversion.
+    """
+    __slots__ = ("kinds", "_lines")
+
+    def __init__(self, *kinds: str) -> None:
+        self.kinds: dict[str, list[str]] = {kind: [] for kind in kinds}
+        self._lines: dict[str, str] = {}
+
+    def __getitem__(self, kind: str) -> list[str]:
+        return self.kinds[kind]
+
+    def add(self, kind: str, line: str) -> None:
+        """Add a line of a kind, sharing any identical line already
+        added.
+        """
+        self.kinds[kind].append(self._lines.setdefault(line, line))
+
+    @staticmethod
+    def count(
+            lines: list[str],
+            code: Callable[[str], str | None]) -> dict[str, int]:
+        """Count lines by their code, parsing the code of each distinct
+        line once. Lines without a code are not counted.
+        """
+        counts: dict[str, int] = {}
+        for line, repeats in collections.Counter(lines).items():
+            if (key := code(line)) is not None:
+                counts[key] = counts.get(key, 0) + repeats
+        return counts
@@ -0,0 +1,75 @@
+"""Fingerprinting of the input files in a directory tree."""
+
+import fnmatch
+import hashlib
+import os
+import pathlib
+import re
+from functools import cached_property
+
+EXCLUDED_DIRS = (
+    ".git",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".tox",
+    ".venv",
+    "__pycache__",
+    "node_modules",
+    "target",
+    "venv")
+
+
+class Fingerprint:
+    """Digest of the files under `path` with names matching `patterns`.
+
+    By default each file contributes its relative path, size and mtime.
+    With `hash_content` set, the file contents are hashed as well.
+    """
+
+    def __init__(
+            self,
+            path: pathlib.Path,
+            patterns: tuple[str, ...],
+            excluded: tuple[str, ...] = EXCLUDED_DIRS,
+            hash_content: bool = False) -> None:
+        self.path = path
+        self.patterns = patterns
+        self.excluded = excluded
+        self.hash_content = hash_content
+
+    @cached_property
+    def digest(self) -> str:
+        """Hex digest of the matching files."""
+        digest = hashlib.blake2b(digest_size=20)
+        for path in self.files:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            digest.update(
+                f"{path.relative_to(self.path)}\0"
+                f"{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+            if self.hash_content:
+                digest.update(hashlib.blake2b(path.read_bytes()).digest())
+        return digest.hexdigest()
+
+    @property
+    def files(self) -> list[pathlib.Path]:
+        """Sorted list of the matching files."""
+        files: list[pathlib.Path] = []
+        for root, dirs, names in os.walk(self.path):
+            dirs[:] = [d for d in dirs if d not in self.excluded]
+            files.extend(
+                pathlib.Path(root, name)
+                for name in names
+                if self.matcher.match(name))
+        return sorted(files)
+
+    @cached_property
+    def matcher(self) -> re.Pattern:
+        return re.compile(
+            "|".join(
+                fnmatch.translate(pattern)
+                for pattern
+                in self.patterns)
+            or "(?!)")
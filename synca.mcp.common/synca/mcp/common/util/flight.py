@@ -0,0 +1,62 @@
+"""Coalescing of identical concurrent calls."""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class Flight(Generic[T]):
+    """A call in flight, and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Future[T]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Runs one call at a time for each key.
+
+    Callers with the key of a call that is already in flight await its
+    result, rather than making the call again. The call runs in its own
+    task, and is cancelled only once all of its callers are cancelled.
+
+    Results are not kept once a call completes, that is left to caches.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, Flight[T]] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(
+            self,
+            key: Hashable,
+            call: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Make the call, or await the call in flight for `key`,
+        returning its result and whether it was shared.
+        """
+        if shared := key in self._flights:
+            flight = self._flights[key]
+        else:
+            flight = self._flights[key] = Flight(
+                asyncio.ensure_future(call()))
+            flight.task.add_done_callback(
+                lambda _: self._land(key, flight))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                flight.waiters -= 1
+                if not flight.waiters:
+                    flight.task.cancel()
+            raise
+
+    def _land(self, key: Hashable, flight: Flight[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
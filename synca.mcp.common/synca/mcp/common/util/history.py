@@ -0,0 +1,374 @@
+"""Persistent history of tool runs."""
+
+import atexit
+import contextlib
+import json
+import math
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+from typing import Iterator, cast
+
+from synca.mcp.common import errors
+from synca.mcp.common.types import HistoryRunDict, HistoryStatsDict
+
+COLUMNS = (
+    "started",
+    "tool",
+    "command",
+    "cwd",
+    "git_commit",
+    "duration",
+    "return_code",
+    "output_bytes",
+    "errors",
+    "warnings",
+    "issues",
+    "failed",
+    "cache",
+    "coalesced",
+    "phases",
+    "summary")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    tool TEXT NOT NULL,
+    command TEXT,
+    cwd TEXT,
+    git_commit TEXT,
+    duration REAL NOT NULL,
+    return_code INTEGER,
+    output_bytes INTEGER NOT NULL,
+    errors INTEGER,
+    warnings INTEGER,
+    issues INTEGER,
+    failed INTEGER NOT NULL,
+    cache TEXT,
+    coalesced INTEGER NOT NULL,
+    phases TEXT NOT NULL,
+    summary TEXT);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_tool_started ON runs (tool, started);
+"""
+# group: SQL expression of the group key
+GROUPS = dict(
+    tool="tool",
+    cwd="cwd",
+    commit="git_commit",
+    day="date(started, 'unixepoch')")
+ORDERS = dict(
+    recent="started DESC",
+    slowest="duration DESC")
+
+
+def git_commit(cwd: str | None) -> str | None:
+    """Commit checked out in the git repository containing `cwd`, read
+    from the repository files rather than by running git.
+    """
+    if not cwd:
+        return None
+    path = pathlib.Path(cwd).absolute()
+    for parent in (path, *path.parents):
+        if (git := parent / ".git").exists():
+            break
+    else:
+        return None
+    try:
+        return head_commit(git)
+    except OSError:
+        return None
+
+
+def head_commit(git: pathlib.Path) -> str | None:
+    """Commit of the HEAD of a `.git` dir, or of a worktree's `.git` file.
+    """
+    if git.is_file():
+        gitdir = git.read_text().strip().removeprefix("gitdir:").strip()
+        git = (git.parent / gitdir).resolve()
+    head = (git / "HEAD").read_text().strip()
+    if not head.startswith("ref:"):
+        return head or None
+    ref = head.removeprefix("ref:").strip()
+    common = git
+    if (commondir := git / "commondir").exists():
+        common = (git / commondir.read_text().strip()).resolve()
+    for base in (git, common):
+        if (ref_path := base / ref).exists():
+            return ref_path.read_text().strip() or None
+    if (packed := common / "packed-refs").exists():
+        for line in packed.read_text().splitlines():
+            sha, _, name = line.partition(" ")
+            if name == ref:
+                return sha
+    return None
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+class History:
+    """Store of tool runs in a local SQLite database.
+
+    The database is at `path`, by default from `SYNCA_MCP_HISTORY_FILE`, or
+    in the user's state dir. Setting `SYNCA_MCP_HISTORY_FILE` to an empty
+    string disables the history.
+
+    Runs are recorded by a writer thread, with a connection of its own,
+    so that writing them does not hold up the tool calls. Runs are only
+    kept for `max_age` seconds (by default 90 days), with older runs
+    dropped by the writer at most once every `prune_interval` seconds.
+    """
+
+    def __init__(
+            self,
+            path: str | None = None,
+            max_age: float = 90 * 24 * 60 * 60,
+            prune_interval: float = 60 * 60) -> None:
+        self.path = (
+            path
+            if path is not None
+            else os.environ.get(
+                "SYNCA_MCP_HISTORY_FILE",
+                str(self.default_path)))
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._created = False
+        self.lock = threading.Lock()
+        # monotonic time the runs were last pruned
+        self.pruned = float("-inf")
+        # runs waiting to be written, and `None` to stop the writer
+        self.queue: queue.Queue[HistoryRunDict | None] = queue.Queue()
+        self.writer: threading.Thread | None = None
+
+    @property
+    def default_path(self) -> pathlib.Path:
+        """Database path in the user's state dir."""
+        state = (
+            os.environ.get("XDG_STATE_HOME")
+            or pathlib.Path.home() / ".local" / "state")
+        return pathlib.Path(state) / "synca-mcp" / "history.sqlite3"
+
+    def close(self) -> None:
+        """Write any queued runs, and stop the writer thread."""
+        with self.lock:
+            if not self.writer:
+                return
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+            atexit.unregister(self.close)
+
+    @contextlib.contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Connect to the database, and commit any changes made with the
+        connection.
+        """
+        db = self.open()
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def filters(
+            self,
+            tool: str | None,
+            cwd: str | None,
+            days: float) -> tuple[str, list[float | str]]:
+        """SQL condition and parameters matching runs of `tool` in `cwd`,
+        in the last `days`.
+        """
+        where = ["started >= ?"]
+        params: list[float | str] = [time.time() - days * 24 * 60 * 60]
+        for column, value in (("tool", tool), ("cwd", cwd)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        return " AND ".join(where), params
+
+    def groups(
+            self,
+            group_by: str,
+            tool: str | None = None,
+            cwd: str | None = None,
+            days: float = 30,
+            limit: int = 50) -> list[HistoryStatsDict]:
+        """Statistics of the matching runs grouped by `group_by`, latest
+        group first.
+        """
+        if group_by not in GROUPS:
+            raise errors.ArgValueError(
+                f"Unknown group_by '{group_by}', must be in {list(GROUPS)}")
+        where, params = self.filters(tool, cwd, days)
+        with self.connect() as db:
+            rows = db.execute(
+                f"SELECT {GROUPS[group_by]} AS key, * FROM runs "
+                f"WHERE {where} ORDER BY started",
+                params).fetchall()
+        return self.stats(rows)[:limit]
+
+    def flush(self) -> None:
+        """Wait for the queued runs to be written."""
+        self.queue.join()
+
+    def insert(
+            self,
+            db: sqlite3.Connection,
+            runs: list[HistoryRunDict]) -> None:
+        """Add runs to the database, dropping runs `max_age` older than the
+        latest of them if runs have not been dropped for `prune_interval`.
+        """
+        with db:
+            db.executemany(
+                f"INSERT INTO runs ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                [self.values(run) for run in runs])
+            if time.monotonic() - self.pruned < self.prune_interval:
+                return
+            db.execute(
+                "DELETE FROM runs WHERE started < ?",
+                (max(run["started"] for run in runs) - self.max_age, ))
+        self.pruned = time.monotonic()
+
+    def open(self) -> sqlite3.Connection:
+        """Open a connection to the database, creating it if need be."""
+        if not self.path:
+            raise errors.ArgValueError("Run history is disabled")
+        if not self._created:
+            pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=5)
+        try:
+            db.row_factory = sqlite3.Row
+            if not self._created:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.executescript(SCHEMA)
+                self._created = True
+        except BaseException:
+            db.close()
+            raise
+        return db
+
+    def record(self, run: HistoryRunDict) -> None:
+        """Queue a run to be added to the history by the writer thread,
+        starting it if need be.
+        """
+        if not self.path:
+            return
+        with self.lock:
+            if not self.writer:
+                self.writer = threading.Thread(
+                    target=self.write,
+                    name="synca-mcp-history",
+                    daemon=True)
+                self.writer.start()
+                atexit.register(self.close)
+        self.queue.put(run)
+
+    def run(self, row: sqlite3.Row) -> HistoryRunDict:
+        """A run from its database row."""
+        run = {column: row[column] for column in COLUMNS}
+        run["failed"] = bool(run["failed"])
+        run["coalesced"] = bool(run["coalesced"])
+        run["phases"] = json.loads(run["phases"])
+        if run["summary"] is not None:
+            run["summary"] = json.loads(run["summary"])
+        return cast(HistoryRunDict, run)
+
+    def runs(
+            self,
+            tool: str | None = None,
+            cwd: str | None = None,
+            days: float = 30,
+            order: str = "recent",
+            limit: int = 50) -> list[HistoryRunDict]:
+        """The matching runs, ordered by `order`."""
+        if order not in ORDERS:
+            raise errors.ArgValueError(
+                f"Unknown order '{order}', must be in {list(ORDERS)}")
+        where, params = self.filters(tool, cwd, days)
+        with self.connect() as db:
+            return [
+                self.run(row)
+                for row
+                in db.execute(
+                    f"SELECT * FROM runs WHERE {where} "
+                    f"ORDER BY {ORDERS[order]} LIMIT ?",
+                    (*params, limit))]
+
+    def stats(self, rows: list[sqlite3.Row]) -> list[HistoryStatsDict]:
+        """Statistics of the runs of each group, from rows ordered by
+        start time.
+        """
+        groups: dict[str | None, list[sqlite3.Row]] = {}
+        for row in rows:
+            groups.setdefault(row["key"], []).append(row)
+        stats = []
+        for key, runs in groups.items():
+            durations = sorted(run["duration"] for run in runs)
+            last = runs[-1]
+            stats.append(
+                HistoryStatsDict(
+                    key=key,
+                    runs=len(runs),
+                    failed=sum(run["failed"] for run in runs),
+                    first=runs[0]["started"],
+                    last=last["started"],
+                    mean=sum(durations) / len(durations),
+                    p50=percentile(durations, 50),
+                    p95=percentile(durations, 95),
+                    max=durations[-1],
+                    output_bytes=max(run["output_bytes"] for run in runs),
+                    last_errors=last["errors"],
+                    last_warnings=last["warnings"],
+                    last_issues=last["issues"]))
+        return sorted(stats, key=lambda s: s["last"], reverse=True)
+
+    def values(self, run: HistoryRunDict) -> list[object]:
+        """Column values of a run, looking up the commit checked out in
+        its `cwd` if it is not set.
+        """
+        values = dict(
+            run,
+            git_commit=run["git_commit"] or git_commit(run["cwd"]),
+            phases=json.dumps(run["phases"]),
+            summary=(
+                json.dumps(run["summary"])
+                if run["summary"] is not None
+                else None))
+        return [values[column] for column in COLUMNS]
+
+    def write(self) -> None:
+        """Write queued runs with one connection, until `None` is queued.
+
+        The runs queued at once are written together. Failing to write
+        runs, eg if the database is locked for too long or cannot be
+        written, is not an error of the runs, which are dropped.
+        """
+        db: sqlite3.Connection | None = None
+        try:
+            while True:
+                queued = [self.queue.get()]
+                while not self.queue.empty():
+                    queued.append(self.queue.get_nowait())
+                try:
+                    if runs := [run for run in queued if run]:
+                        db = db or self.open()
+                        self.insert(db, runs)
+                except (sqlite3.Error, OSError):
+                    if db:
+                        db.close()
+                    db = None
+                finally:
+                    for _ in queued:
+                        self.queue.task_done()
+                if None in queued:
+                    return
+        finally:
+            if db:
+                db.close()
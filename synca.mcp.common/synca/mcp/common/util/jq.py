@@ -1,11 +1,47 @@
 """jq filter utility for processing JSON output."""
 
-import jq  # type:ignore
+import json
+from functools import lru_cache
+from typing import Protocol
+
+from synca.mcp.common.types import JSONValue
+from synca.mcp.common.util.timing import phase
+
+
+class JQOutput(Protocol):
+
+    def text(self) -> str:
+        ...
+
+
+class JQProgram(Protocol):
+
+    def input_text(self, text: str) -> JQOutput:
+        ...
+
+    def input_value(self, value: JSONValue) -> JQOutput:
+        ...
 
 
 class JQFilter:
     """Filter class for processing JSON with jq."""
 
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def compile(jq_filter: str) -> JQProgram:
+        """Compile a jq filter, caching the most recently used programs.
+
+        Args:
+            jq_filter: jq filter to compile
+
+        Returns:
+            Compiled jq program
+        """
+        import jq  # type:ignore
+
+        program: JQProgram = jq.compile(jq_filter)
+        return program
+
     @classmethod
     def apply(
             cls,
@@ -22,4 +58,25 @@ class JQFilter:
         """
         if not jq_filter:
             return json_str
-        return str(jq.compile(jq_filter).input_text(json_str).text())
+        with phase("filter"):
+            return str(cls.compile(jq_filter).input_text(json_str).text())
+
+    @classmethod
+    def apply_data(
+            cls,
+            data: JSONValue,
+            jq_filter: str | None) -> str:
+        """Apply a jq filter to parsed JSON data.
+
+        Args:
+            data: Python object to filter
+            jq_filter: jq filter to apply
+
+        Returns:
+            Filtered JSON string
+        """
+        if not jq_filter:
+            with phase("serialize"):
+                return json.dumps(data)
+        with phase("filter"):
+            return str(cls.compile(jq_filter).input_value(data).text())
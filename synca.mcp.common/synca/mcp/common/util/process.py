@@ -0,0 +1,191 @@
+"""Subprocesses whose resource usage is accounted for."""
+
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+import resource
+import subprocess
+import sys
+from typing import IO, cast
+
+from synca.mcp.common.types import ResourcesDict
+
+# name: resource, of the limits that can be set on a process
+RLIMITS = dict(
+    address_space=resource.RLIMIT_AS,
+    cpu=resource.RLIMIT_CPU,
+    open_files=resource.RLIMIT_NOFILE)
+# ru_maxrss is in bytes on macOS, and in KiB elsewhere
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache
+def env_limit(name: str, value: str) -> int | None:
+    """The limit of a resource set by `SYNCA_MCP_RLIMIT_<NAME>`, or `None`
+    if the value is not a whole number, which is warned about once.
+    """
+    if value.isascii() and value.isdigit():
+        return int(value)
+    logger.warning(
+        "Ignoring SYNCA_MCP_RLIMIT_%s=%r, which is not a whole number",
+        name.upper(),
+        value)
+    return None
+
+
+class Process:
+    """A child process, reaped with `os.wait4` to collect its resource
+    usage.
+
+    asyncio reaps the processes it starts with `waitpid`, which discards
+    their resource usage, so this provides the parts of
+    `asyncio.subprocess.Process` that CLI tools use instead.
+
+    The exit of the process is awaited with a pidfd where the platform
+    has them, or else by polling.
+    """
+    poll_interval = 0.05
+
+    def __init__(
+            self,
+            popen: subprocess.Popen,
+            stdout: asyncio.StreamReader,
+            stderr: asyncio.StreamReader) -> None:
+        self.popen = popen
+        self.stdout = stdout
+        self.stderr = stderr
+        self.resources: ResourcesDict | None = None
+        self.transports: list[asyncio.BaseTransport] = []
+        self._waiter: asyncio.Future[None] | None = None
+
+    @classmethod
+    async def create(
+            cls,
+            *cmd: str,
+            cwd: str,
+            limits: dict[str, int] | None = None) -> "Process":
+        """Start a command in a new session, with its output piped.
+
+        `limits` are applied with `prlimit` as soon as the process has
+        started, as setting them in the child before it executes the
+        command is not safe in a threaded server. Limits above the hard
+        limits of this process are lowered to them. Platforms without
+        `prlimit` do not limit the process.
+        """
+        popen = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True)
+        for name, limit in (limits or {}).items():
+            cls.limit(popen.pid, RLIMITS[name], limit)
+        process = cls(popen, asyncio.StreamReader(), asyncio.StreamReader())
+        for pipe, reader in ((popen.stdout, process.stdout),
+                             (popen.stderr, process.stderr)):
+            process.transports.append(
+                await process.connect(cast(IO[bytes], pipe), reader))
+        return process
+
+    @staticmethod
+    def limit(pid: int, rlimit: int, limit: int) -> None:
+        """Limit a resource of a running process."""
+        if not hasattr(resource, "prlimit"):
+            return
+        with contextlib.suppress(ProcessLookupError):
+            hard = resource.prlimit(pid, rlimit)[1]
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.prlimit(pid, rlimit, (limit, limit))
+
+    @property
+    def pid(self) -> int:
+        return self.popen.pid
+
+    @property
+    def returncode(self) -> int | None:
+        return self.popen.returncode
+
+    def close(self) -> None:
+        """Close the pipes of the process output."""
+        for transport in self.transports:
+            transport.close()
+
+    async def communicate(self) -> tuple[bytes, bytes]:
+        """Read the process output until it exits."""
+        stdout, stderr = await asyncio.gather(
+            self.stdout.read(),
+            self.stderr.read())
+        await self.wait()
+        return stdout, stderr
+
+    async def connect(
+            self,
+            pipe: IO[bytes],
+            reader: asyncio.StreamReader) -> asyncio.BaseTransport:
+        """Feed a pipe to a stream reader."""
+        transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader),
+            pipe)
+        return transport
+
+    def pidfd(self) -> int | None:
+        """Open a pidfd for the process, if the platform supports them."""
+        if not hasattr(os, "pidfd_open"):
+            return None
+        try:
+            return os.pidfd_open(self.pid)
+        except OSError:
+            return None
+
+    async def readable(self, fd: int) -> None:
+        """Wait for a file descriptor to be readable."""
+        loop = asyncio.get_running_loop()
+        ready: asyncio.Future[None] = loop.create_future()
+
+        def set_ready() -> None:
+            if not ready.done():
+                ready.set_result(None)
+
+        loop.add_reader(fd, set_ready)
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+
+    def reap(self) -> bool:
+        """Collect the exit status and resource usage of the process, if
+        it has exited.
+        """
+        pid, status, rusage = os.wait4(self.pid, os.WNOHANG)
+        if not pid:
+            return False
+        self.popen.returncode = os.waitstatus_to_exitcode(status)
+        self.resources = ResourcesDict(
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            max_rss=rusage.ru_maxrss * MAXRSS_UNIT,
+            read_blocks=rusage.ru_inblock,
+            write_blocks=rusage.ru_oublock)
+        return True
+
+    async def wait(self) -> int:
+        """Wait for the process to exit, returning its return code."""
+        if self.popen.returncode is None:
+            if not self._waiter:
+                self._waiter = asyncio.ensure_future(self._wait())
+            await asyncio.shield(self._waiter)
+        return cast(int, self.popen.returncode)
+
+    async def _wait(self) -> None:
+        if (pidfd := self.pidfd()) is not None:
+            try:
+                await self.readable(pidfd)
+            finally:
+                os.close(pidfd)
+        while not self.reap():
+            await asyncio.sleep(self.poll_interval)
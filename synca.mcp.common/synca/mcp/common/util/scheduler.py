@@ -0,0 +1,117 @@
+"""Admission control for tool subprocesses."""
+
+import asyncio
+import contextlib
+import copy
+import os
+import time
+from typing import AsyncIterator, Hashable, Sequence
+
+from synca.mcp.common.types import LaneMetricsDict, SlotLimitTuple
+
+
+class Scheduler:
+    """Limits how many tool processes run at once.
+
+    Each run takes a slot in its lane, and in each of its keyed limits (eg
+    per tool class, or per working directory). Lightweight tools use the
+    `fast` lane so that they are not queued behind long-running builds.
+
+    The semaphore of a keyed limit is dropped once no run holds or waits
+    on it, so that keys such as working directories do not accumulate.
+
+    Lane sizes default to the `SYNCA_MCP_SLOTS` and `SYNCA_MCP_FAST_SLOTS`
+    environment variables, or to the number of CPUs and 16 respectively.
+    """
+
+    def __init__(
+            self,
+            slots: int | None = None,
+            fast_slots: int | None = None) -> None:
+        self.slots = dict(
+            default=(
+                slots
+                or int(os.environ.get("SYNCA_MCP_SLOTS", 0))
+                or os.cpu_count()
+                or 1),
+            fast=(
+                fast_slots
+                or int(os.environ.get("SYNCA_MCP_FAST_SLOTS", 0))
+                or 16))
+        self._lanes = {
+            lane: asyncio.Semaphore(count)
+            for lane, count
+            in self.slots.items()}
+        self._limits: dict[Hashable, asyncio.Semaphore] = {}
+        # runs holding or waiting on each keyed limit
+        self._users: dict[Hashable, int] = {}
+        self._metrics = {
+            lane: LaneMetricsDict(
+                waiting=0,
+                running=0,
+                started=0,
+                wait_total=0.0,
+                wait_max=0.0)
+            for lane
+            in self.slots}
+
+    @property
+    def metrics(self) -> dict[str, LaneMetricsDict]:
+        """Queue depth, running count and wait times for each lane."""
+        return copy.deepcopy(self._metrics)
+
+    def limit(self, key: Hashable, slots: int) -> asyncio.Semaphore:
+        """Get the semaphore for a keyed limit, creating it on first use."""
+        if key not in self._limits:
+            self._limits[key] = asyncio.Semaphore(slots)
+        return self._limits[key]
+
+    def release(self, keys: Sequence[Hashable]) -> None:
+        """Drop the semaphores of keyed limits that no run holds or waits
+        on any more.
+        """
+        for key in keys:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._limits[key]
+
+    @contextlib.asynccontextmanager
+    async def slot(
+            self,
+            lane: str,
+            limits: Sequence[SlotLimitTuple] = ()) -> AsyncIterator[float]:
+        """Wait for a slot in the lane and in each of the `limits`,
+        yielding the time spent waiting.
+
+        Keyed limits are acquired before the lane, so that a run waiting
+        on eg its working directory does not hold a lane slot.
+        """
+        metrics = self._metrics[lane]
+        keys = [key for key, slots in limits if slots]
+        semaphores = [
+            *(self.limit(key, slots)
+              for key, slots
+              in limits
+              if slots),
+            self._lanes[lane]]
+        for key in keys:
+            self._users[key] = self._users.get(key, 0) + 1
+        async with contextlib.AsyncExitStack() as stack:
+            stack.callback(self.release, keys)
+            start = time.monotonic()
+            metrics["waiting"] += 1
+            try:
+                for semaphore in semaphores:
+                    await stack.enter_async_context(semaphore)
+            finally:
+                metrics["waiting"] -= 1
+            waited = time.monotonic() - start
+            metrics["started"] += 1
+            metrics["wait_total"] += waited
+            metrics["wait_max"] = max(metrics["wait_max"], waited)
+            metrics["running"] += 1
+            try:
+                yield waited
+            finally:
+                metrics["running"] -= 1
@@ -0,0 +1,276 @@
+"""Shaping of large tool outputs, spilling them in full to files."""
+
+import codecs
+import collections
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+import stat
+import tempfile
+import time
+from typing import Iterable
+
+from synca.mcp.common import errors
+from synca.mcp.common.types import SpillInfoDict, SpillPageDict
+
+HANDLE_RE = re.compile(r"[0-9a-f]{32}")
+RELEVANT_RE = re.compile(
+    r"\b(error|errors|fail|failed|failure|failures|panic|panicked"
+    r"|exception|traceback|warning|warnings)\b",
+    re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+class Spill:
+    """Keeps tool outputs within a byte budget.
+
+    An output over the budget is cut down to its first and last lines,
+    and the lines between that look like errors or warnings. Structured
+    (JSON) outputs cannot be cut down like this, and are left out of the
+    result entirely. The full output is written to a spill file, which can
+    be read back in pages of at most the budget with the handle returned
+    in the result info. If the output cannot be spilled, it is returned
+    unshaped.
+
+    The budget defaults to `SYNCA_MCP_OUTPUT_BUDGET`, or 64KiB, and `0`
+    disables shaping. Spill files are written to `SYNCA_MCP_SPILL_DIR`,
+    by default in the user's runtime or cache dir, which must be owned by
+    the user and private to them. Only the most recent `max_files` spilled
+    by this process are kept, and files spilled by any process are removed
+    once they are `max_age` seconds old.
+    """
+
+    def __init__(
+            self,
+            budget: int | None = None,
+            directory: str | None = None,
+            max_files: int = 64,
+            line_limit: int = 2048,
+            max_age: float = 24 * 60 * 60) -> None:
+        self.budget = (
+            budget
+            if budget is not None
+            else int(os.environ.get("SYNCA_MCP_OUTPUT_BUDGET", 64 * 1024)))
+        self.directory = pathlib.Path(
+            directory
+            or os.environ.get("SYNCA_MCP_SPILL_DIR")
+            or self.default_directory)
+        self.max_files = max_files
+        self.line_limit = line_limit
+        self.max_age = max_age
+        # handles spilled by this process, oldest first
+        self.written: collections.OrderedDict[str, None] = (
+            collections.OrderedDict())
+
+    @property
+    def default_directory(self) -> pathlib.Path:
+        """Spill dir in the user's runtime dir, or else their cache dir."""
+        if runtime := os.environ.get("XDG_RUNTIME_DIR"):
+            return pathlib.Path(runtime) / "synca-mcp" / "spill"
+        cache = (
+            os.environ.get("XDG_CACHE_HOME")
+            or pathlib.Path.home() / ".cache")
+        return pathlib.Path(cache) / "synca-mcp" / "spill"
+
+    def ensure_directory(self) -> None:
+        """Create the spill dir, checking that it is a dir owned by the
+        user and private to them, so that other users cannot read or
+        replace the outputs in it.
+        """
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        info = os.lstat(self.directory)
+        private = (
+            stat.S_ISDIR(info.st_mode)
+            and info.st_uid == os.getuid()
+            and stat.S_IMODE(info.st_mode) == 0o700)
+        if not private:
+            raise PermissionError(
+                f"Spill dir '{self.directory}' must be a dir owned by the "
+                "current user, with mode 0700")
+
+    def fitting(
+            self,
+            lines: list[str],
+            indices: Iterable[int],
+            budget: int) -> list[int]:
+        """Take indices of lines for as long as they fit in the budget."""
+        taken: list[int] = []
+        for i in indices:
+            budget -= self.size(lines[i])
+            if budget < 0:
+                break
+            taken.append(i)
+        return taken
+
+    def kept(self, lines: list[str]) -> list[int]:
+        """Indices of the lines to keep, within the budget.
+
+        A quarter of the budget goes to the first lines, a quarter to the
+        last lines, and the rest to relevant lines between them.
+        """
+        head = self.fitting(lines, range(len(lines)), self.budget // 4)
+        tail = self.fitting(
+            lines,
+            range(len(lines) - 1, len(head) - 1, -1),
+            self.budget // 4)[::-1]
+        budget = self.budget - sum(
+            self.size(lines[i])
+            for i
+            in head + tail)
+        relevant = self.fitting(
+            lines,
+            (i
+             for i
+             in range(len(head), tail[0] if tail else len(lines))
+             if RELEVANT_RE.search(lines[i])),
+            budget)
+        return head + relevant + tail
+
+    def path(self, handle: str) -> pathlib.Path:
+        """Path to the spill file of a handle."""
+        if not HANDLE_RE.fullmatch(handle):
+            raise errors.ArgValueError(f"Invalid output handle: {handle}")
+        return self.directory / f"{handle}.txt"
+
+    def fits(self, output: str) -> bool:
+        """Whether an output fits the budget, and so is not shaped."""
+        return not self.budget or len(output.encode()) <= self.budget
+
+    def prune(self) -> None:
+        """Remove the oldest spill files of this process, keeping
+        `max_files`, and the spill files of any process that are older
+        than `max_age`.
+
+        Files may be removed by another process as they are pruned.
+        """
+        while len(self.written) > self.max_files:
+            handle, _ = self.written.popitem(last=False)
+            self.path(handle).unlink(missing_ok=True)
+        expired = time.time() - self.max_age
+        for path in self.directory.glob("*.txt"):
+            with contextlib.suppress(FileNotFoundError):
+                if path.stat().st_mtime < expired:
+                    path.unlink()
+
+    @property
+    def page_size(self) -> int:
+        """Maximum size of a page read from a spill file."""
+        return self.budget or 64 * 1024
+
+    def read(
+            self,
+            handle: str,
+            offset: int = 0,
+            limit: int | None = None) -> SpillPageDict:
+        """Read a page of a spill file, from a byte offset.
+
+        Pages are at most `page_size` bytes, and end at the last line
+        that fits in them, or else at the last whole character.
+        """
+        path = self.path(handle)
+        if not path.exists():
+            raise errors.ArgValueError(
+                f"Unknown or expired output handle: {handle}")
+        limit = min(limit or self.page_size, self.page_size)
+        with path.open("rb") as f:
+            f.seek(offset)
+            data = f.read(limit)
+            more = bool(f.read(1))
+        if more and (end := data.rfind(b"\n") + 1):
+            data = data[:end]
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        output = decoder.decode(data, final=not more)
+        if data and not output:
+            # the page is too small for a whole character
+            output = decoder.decode(b"", final=True)
+        else:
+            data = data[:len(data) - len(decoder.getstate()[0])]
+        return SpillPageDict(
+            handle=handle,
+            offset=offset,
+            bytes=len(data),
+            output=output,
+            more=more)
+
+    def render(self, lines: list[str], kept: list[int]) -> str:
+        """Join the kept lines, marking where lines were left out."""
+        shaped: list[str] = []
+        last = -1
+        for i in kept:
+            if i > last + 1:
+                shaped.append(f"[... {i - last - 1} lines omitted ...]")
+            line = lines[i]
+            if len(line) > self.line_limit:
+                line = f"{line[:self.line_limit]} [... line truncated ...]"
+            shaped.append(line)
+            last = i
+        if last < len(lines) - 1:
+            shaped.append(f"[... {len(lines) - last - 1} lines omitted ...]")
+        return "\n".join(shaped)
+
+    def shape(self, output: str) -> tuple[str, SpillInfoDict | None]:
+        """Shape an output to fit the budget, spilling it in full to a file
+        if it does not.
+
+        Structured outputs are spilled whole, leaving only the handle.
+        """
+        if self.fits(output):
+            return output, None
+        try:
+            handle = self.write(output)
+        except OSError as e:
+            logger.warning("Unable to spill output, not shaping it: %s", e)
+            return output, None
+        lines = output.splitlines()
+        return (
+            (""
+             if self.structured(output)
+             else self.render(lines, self.kept(lines))),
+            SpillInfoDict(
+                handle=handle,
+                bytes=len(output.encode()),
+                lines=len(lines)))
+
+    def size(self, line: str) -> int:
+        """Size of a line in the shaped output."""
+        return min(len(line.encode()), self.line_limit) + 1
+
+    def structured(self, output: str) -> bool:
+        """Whether an output is a JSON object or array."""
+        if not output.lstrip().startswith(("{", "[")):
+            return False
+        try:
+            json.loads(output)
+        except ValueError:
+            return False
+        return True
+
+    def write(self, output: str) -> str:
+        """Write an output to a spill file, returning its handle.
+
+        The output is written to a temp file with an unpredictable name,
+        which then replaces the spill file.
+        """
+        handle = hashlib.sha256(output.encode()).hexdigest()[:32]
+        self.ensure_directory()
+        path = self.path(handle)
+        fd, tmp = tempfile.mkstemp(
+            prefix=f".{handle}.",
+            suffix=".tmp",
+            dir=self.directory)
+        try:
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(output)
+            os.replace(tmp, path)
+        except BaseException:
+            pathlib.Path(tmp).unlink(missing_ok=True)
+            raise
+        self.written[handle] = None
+        self.written.move_to_end(handle)
+        self.prune()
+        return handle
@@ -0,0 +1,139 @@
+"""Incremental, memory-bounded reading of subprocess output."""
+
+import asyncio
+import codecs
+from collections import deque
+from typing import Awaitable, Callable
+
+ChunkHandler = Callable[[], Awaitable[None]]
+LineHandler = Callable[[str, str], None]
+
+
+class OutputBuffer:
+    """Text buffer that retains at most `limit` characters.
+
+    Once the limit is reached the head and the tail of the output are
+    kept, and the middle is dropped.
+    """
+
+    def __init__(self, limit: int | None = None) -> None:
+        self.limit = limit
+        self.dropped = 0
+        self._head: list[str] = []
+        self._head_closed = False
+        self._head_size = 0
+        self._tail: deque[str] = deque()
+        self._tail_size = 0
+
+    @property
+    def head_limit(self) -> int:
+        return (self.limit or 0) // 2
+
+    @property
+    def tail_limit(self) -> int:
+        return (self.limit or 0) - self.head_limit
+
+    @property
+    def text(self) -> str:
+        """The retained output, with a marker where output was dropped."""
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self.dropped:
+            return head + tail
+        return (
+            f"{head}\n... [{self.dropped} characters truncated] ...\n"
+            f"{tail}")
+
+    def append(self, text: str) -> None:
+        """Append text, evicting from the middle if over the limit."""
+        if self.limit is None:
+            self._head.append(text)
+            return
+        if not self._head_closed:
+            if self._head_size + len(text) <= self.head_limit:
+                self._head.append(text)
+                self._head_size += len(text)
+                return
+            self._head_closed = True
+        self._tail.append(text)
+        self._tail_size += len(text)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._tail_size > self.tail_limit:
+            first = self._tail.popleft()
+            excess = self._tail_size - self.tail_limit
+            if len(first) > excess:
+                self._tail.appendleft(first[excess:])
+                self._tail_size -= excess
+                self.dropped += excess
+                continue
+            self._tail_size -= len(first)
+            self.dropped += len(first)
+
+
+class OutputStream:
+    """Reads a subprocess stream in chunks, dispatching complete lines.
+
+    Each line is passed (without its newline) to `on_line`, and retained
+    in a bounded `OutputBuffer`. Lines longer than `max_line` are
+    dispatched in fragments so that a stream with no newlines cannot grow
+    without bound.
+
+    If set, `on_chunk` is awaited after each chunk has been dispatched.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            on_line: LineHandler | None = None,
+            limit: int | None = None,
+            chunk_size: int = 65536,
+            max_line: int = 1024 * 1024,
+            on_chunk: ChunkHandler | None = None) -> None:
+        self.name = name
+        self.on_line = on_line
+        self.on_chunk = on_chunk
+        self.chunk_size = chunk_size
+        self.max_line = max_line
+        self.buffer = OutputBuffer(limit)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(
+            errors="replace")
+        self._partial = ""
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text
+
+    def close(self) -> None:
+        """Flush any trailing output that did not end with a newline."""
+        remaining = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if remaining:
+            self._dispatch(remaining)
+
+    async def consume(self, reader: asyncio.StreamReader) -> str:
+        """Read the stream to EOF, returning the retained output."""
+        while chunk := await reader.read(self.chunk_size):
+            self.feed(chunk)
+            if self.on_chunk:
+                await self.on_chunk()
+        self.close()
+        return self.text
+
+    def feed(self, chunk: bytes) -> None:
+        """Decode a chunk of output and dispatch any complete lines."""
+        *lines, partial = (
+            self._partial
+            + self._decoder.decode(chunk)).split("\n")
+        for line in lines:
+            self._dispatch(f"{line}\n")
+        while len(partial) > self.max_line:
+            self._dispatch(partial[:self.max_line])
+            partial = partial[self.max_line:]
+        self._partial = partial
+
+    def _dispatch(self, line: str) -> None:
+        self.buffer.append(line)
+        if self.on_line:
+            self.on_line(self.name, line.rstrip("\n"))
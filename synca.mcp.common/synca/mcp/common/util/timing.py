@@ -0,0 +1,212 @@
+"""Per-phase timing of tool runs."""
+
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Iterator
+
+from synca.mcp.common.types import HistogramDict
+
+_timer: contextvars.ContextVar["PhaseTimer | None"] = contextvars.ContextVar(
+    "synca_mcp_timer",
+    default=None)
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Cumulative histogram of durations, in seconds."""
+    buckets = (
+        0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+        0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    @property
+    def as_dict(self) -> HistogramDict:
+        """Count, sum and cumulative bucket counts."""
+        return HistogramDict(
+            count=self.count,
+            sum=self.sum,
+            buckets=dict(zip(self.labels, self.cumulative)))
+
+    @property
+    def cumulative(self) -> list[int]:
+        """Count of observations in or below each bucket."""
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    @property
+    def labels(self) -> list[str]:
+        """Upper bound label of each bucket."""
+        return [*(str(bucket) for bucket in self.buckets), "+Inf"]
+
+    def observe(self, seconds: float) -> None:
+        """Add a duration to the histogram."""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class PhaseTimer:
+    """Accumulates the time spent in each phase of a single run."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a phase."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the body as a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+
+class Timings:
+    """Histograms of phase timings, by tool and phase.
+
+    If `path` is set (by default from `SYNCA_MCP_METRICS_FILE`), the
+    histograms are written there in Prometheus text format after runs,
+    in a thread, at most once every `write_interval` seconds. If `report`
+    is set (by default from `SYNCA_MCP_TIMING_INFO`), the
+    phase timings of each run are added to its result info.
+    """
+    metric = "synca_mcp_tool_phase_seconds"
+    write_interval = 5.0
+
+    def __init__(
+            self,
+            path: str | None = None,
+            report: bool | None = None) -> None:
+        self.path = path or os.environ.get("SYNCA_MCP_METRICS_FILE")
+        self.report = (
+            report
+            if report is not None
+            else bool(os.environ.get("SYNCA_MCP_TIMING_INFO")))
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.lock = threading.Lock()
+        # monotonic time of the last write, the write waiting for the
+        # interval to pass, and the write in progress
+        self.written = float("-inf")
+        self.pending: asyncio.TimerHandle | None = None
+        self.writing: asyncio.Future[None] | None = None
+
+    @property
+    def as_dict(self) -> dict[str, dict[str, HistogramDict]]:
+        """Histograms by tool and phase."""
+        timings: dict[str, dict[str, HistogramDict]] = {}
+        for (tool, phase), histogram in sorted(self.histograms.items()):
+            timings.setdefault(tool, {})[phase] = histogram.as_dict
+        return timings
+
+    @property
+    def prometheus(self) -> str:
+        """Histograms in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {self.metric} Time spent in each phase of tool runs.",
+            f"# TYPE {self.metric} histogram"]
+        for (tool, phase), histogram in sorted(self.histograms.items()):
+            labels = f'tool="{tool}",phase="{phase}"'
+            lines.extend(
+                f'{self.metric}_bucket{{{labels},le="{label}"}} {count}'
+                for label, count
+                in zip(histogram.labels, histogram.cumulative))
+            lines.append(f"{self.metric}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{self.metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def record(self, tool: str, phases: dict[str, float]) -> None:
+        """Add the phase timings of a run to the histograms."""
+        for phase, seconds in phases.items():
+            if (tool, phase) not in self.histograms:
+                self.histograms[(tool, phase)] = Histogram()
+            self.histograms[(tool, phase)].observe(seconds)
+        if self.path:
+            self.schedule(pathlib.Path(self.path))
+
+    def flush(self, path: pathlib.Path) -> None:
+        """Write the metrics as they are now to `path`, in a thread."""
+        self.pending = None
+        self.written = time.monotonic()
+        self.writing = asyncio.ensure_future(
+            asyncio.to_thread(self.write, path, self.prometheus))
+
+    def schedule(self, path: pathlib.Path) -> None:
+        """Write the metrics to `path` once `write_interval` seconds have
+        passed since the last write, unless a write is already waiting.
+
+        Without a running event loop the metrics are written at once.
+        """
+        if self.pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.write(path, self.prometheus)
+            return
+        self.pending = loop.call_later(
+            max(0.0, self.written + self.write_interval - time.monotonic()),
+            self.flush,
+            path)
+
+    @contextlib.contextmanager
+    def timer(self, tool: str) -> Iterator[PhaseTimer]:
+        """Time a run of `tool`, making its timer current so that nested
+        code can time phases with `phase`.
+        """
+        timer = PhaseTimer()
+        token = _timer.set(timer)
+        try:
+            with timer.phase("total"):
+                yield timer
+        finally:
+            _timer.reset(token)
+            self.record(tool, timer.phases)
+
+    def write(self, path: pathlib.Path, text: str) -> None:
+        """Atomically write Prometheus metrics to `path`.
+
+        Failing to write the metrics is not an error of the runs.
+        """
+        tmp = path.with_name(f".{path.name}.tmp")
+        with self.lock:
+            try:
+                tmp.write_text(text, encoding="utf-8")
+                tmp.replace(path)
+            except OSError as e:
+                logger.warning("Failed to write metrics to %s: %s", path, e)
+
+
+def add_phase(name: str, seconds: float) -> None:
+    """Add time to a phase of the current run, if there is one."""
+    if timer := _timer.get():
+        timer.add(name, seconds)
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the current run, if there is one."""
+    if not (timer := _timer.get()):
+        yield
+        return
+    with timer.phase(name):
+        yield
@@ -0,0 +1,428 @@
+"""Watching of directory trees for changes."""
+
+import collections
+import ctypes
+import ctypes.util
+import errno
+import os
+import pathlib
+import struct
+import sys
+import threading
+from typing import Any, Hashable
+
+from synca.mcp.common.util.fingerprint import EXCLUDED_DIRS
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+    | IN_EXCL_UNLINK)
+# wd, mask, cookie and name length of an inotify event
+EVENT = struct.Struct("iIII")
+METHODS = ("auto", "inotify", "poll", "off")
+
+
+class Root:
+    """Changes seen under a watched directory.
+
+    `generation` counts the changes seen, and `dirty` holds the paths
+    changed, with the generation of their last change. Only the
+    `max_dirty` most recent paths are kept, so a path is taken to have
+    changed since any generation before the last one forgotten.
+
+    Changes are only `exact` if the watcher sees them as they are made,
+    rather than by polling. A polled tree is `swept` while its last sync
+    scanned all of its dirs, so that it saw every change made before it.
+    """
+
+    def __init__(
+            self,
+            path: pathlib.Path,
+            exact: bool,
+            max_dirty: int = 4096) -> None:
+        self.path = path
+        self.exact = exact
+        self.max_dirty = max_dirty
+        self.generation = 0
+        self.forgotten = 0
+        self.dirty: dict[str, int] = {}
+        self.memo: dict[Hashable, tuple[int, Any]] = {}
+        self.swept = False
+
+    @property
+    def current(self) -> bool:
+        """Whether every change made before the last sync was seen."""
+        return self.exact or self.swept
+
+    def change(self, path: str) -> None:
+        """Record a change to a path."""
+        self.generation += 1
+        self.dirty.pop(path, None)
+        self.dirty[path] = self.generation
+        if len(self.dirty) > self.max_dirty:
+            self.forgotten = self.dirty.pop(next(iter(self.dirty)))
+
+    def changed(self, since: int, path: str | None = None) -> bool:
+        """Whether anything, or `path`, changed after generation
+        `since`.
+        """
+        if path is None:
+            return self.generation > since
+        return self.dirty.get(path, 0) > since or self.forgotten > since
+
+    def recall(self, key: Hashable) -> Any:
+        """A value remembered for the tree, if its changes are current
+        and it has not changed since.
+        """
+        if not self.current or key not in self.memo:
+            return None
+        generation, value = self.memo[key]
+        return None if self.changed(generation) else value
+
+    def remember(self, key: Hashable, generation: int, value: Any) -> None:
+        """Remember a value computed from the tree as it was at
+        `generation`.
+        """
+        self.memo[key] = (generation, value)
+
+    def reset(self) -> None:
+        """Record that anything may have changed."""
+        self.generation += 1
+        self.dirty.clear()
+        self.forgotten = self.generation
+
+
+class Inotify:
+    """Watches of directory trees with inotify.
+
+    Events are read when the trees are synced, rather than as they
+    arrive, so that nothing runs between queries. If the event queue
+    overflows in between, every tree is taken to have changed.
+    """
+
+    def __init__(self, excluded: tuple[str, ...]) -> None:
+        self.excluded = excluded
+        self.libc = self.load()
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: dict[int, tuple[Root, pathlib.Path]] = {}
+
+    @staticmethod
+    def load() -> ctypes.CDLL:
+        """Load the C library, if it has inotify."""
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6",
+            use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        return libc
+
+    def add(self, root: Root) -> None:
+        """Watch the dirs of a tree, undoing the watches if they run
+        out.
+        """
+        if not root.path.is_dir():
+            raise NotADirectoryError(
+                errno.ENOTDIR,
+                os.strerror(errno.ENOTDIR),
+                str(root.path))
+        try:
+            self.add_tree(root, root.path, initial=True)
+        except OSError:
+            self.remove(root)
+            raise
+
+    def add_tree(
+            self,
+            root: Root,
+            path: pathlib.Path,
+            initial: bool = False) -> None:
+        """Watch the dirs under `path`, recording the files found in
+        them as changed unless the tree is first being watched.
+        """
+        for dirpath, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d not in self.excluded]
+            wd = self.libc.inotify_add_watch(
+                self.fd,
+                os.fsencode(dirpath),
+                IN_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, os.strerror(error), dirpath)
+            self.watches[wd] = (root, pathlib.Path(dirpath))
+            if not initial:
+                for name in files:
+                    root.change(os.path.join(dirpath, name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+        self.watches.clear()
+
+    def handle(self, wd: int, mask: int, name: str) -> Root | None:
+        """Record the change of an event to its tree, returning the tree
+        if it is no longer watched in full, as its own dir is gone or a new
+        dir could not be watched.
+        """
+        if not (watch := self.watches.get(wd)):
+            return None
+        root, path = watch
+        if mask & IN_IGNORED:
+            del self.watches[wd]
+            return root if path == root.path else None
+        if mask & IN_ISDIR and name in self.excluded:
+            return None
+        changed = path / name if name else path
+        root.change(str(changed))
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            try:
+                self.add_tree(root, changed)
+            except OSError:
+                return root
+        return None
+
+    def read(self) -> set[Root]:
+        """Read and handle the queued events, returning the trees that
+        are no longer watched, which is all of them if the queue
+        overflowed.
+        """
+        lost: set[Root] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return lost
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = os.fsdecode(
+                    data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    lost.update(root for root, _ in self.watches.values())
+                elif root := self.handle(wd, mask, name):
+                    lost.add(root)
+
+    def remove(self, root: Root) -> None:
+        """Stop watching a tree."""
+        for wd, (watched, _) in list(self.watches.items()):
+            if watched is root:
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+
+class Poller:
+    """Incremental polling of directory trees with `os.scandir`.
+
+    Each sync scans the next `batch` dirs of a tree, so a change is only
+    seen once the scan gets to its dir. A sync that scans a whole pass,
+    starting and finishing it, leaves the tree `swept`. Changes made
+    before a tree is first scanned in full are not seen.
+    """
+
+    def __init__(self, excluded: tuple[str, ...], batch: int) -> None:
+        self.excluded = excluded
+        self.batch = batch
+        # root: (dirs left to scan, dirs scanned in this pass)
+        self.passes: dict[
+            Root,
+            tuple[collections.deque[str], set[str]]] = {}
+        # root: dir: name: (mtime, size), or None for dirs
+        self.listings: dict[
+            Root,
+            dict[str, dict[str, tuple[int, int] | None]]] = {}
+        # roots scanned in full at least once
+        self.scanned: set[Root] = set()
+
+    def add(self, root: Root) -> None:
+        self.listings[root] = {}
+        self.passes[root] = (collections.deque([str(root.path)]), set())
+
+    def poll(self, root: Root) -> None:
+        """Scan the next batch of dirs of a tree, starting another pass
+        if the last one was finished, and marking whether this one was
+        swept whole.
+        """
+        pending, scanned = self.passes[root]
+        if not pending:
+            pending.append(str(root.path))
+            scanned.clear()
+        started = not scanned
+        for _ in range(self.batch):
+            if not pending:
+                break
+            path = pending.popleft()
+            scanned.add(path)
+            pending.extend(self.scan(root, path))
+        if not pending:
+            listings = self.listings[root]
+            for path in set(listings) - scanned:
+                del listings[path]
+            self.scanned.add(root)
+        root.swept = started and not pending
+
+    def remove(self, root: Root) -> None:
+        self.listings.pop(root, None)
+        self.passes.pop(root, None)
+        self.scanned.discard(root)
+
+    def scan(self, root: Root, path: str) -> list[str]:
+        """Compare a dir with its last listing, returning its subdirs."""
+        listings = self.listings[root]
+        listing: dict[str, tuple[int, int] | None] = {}
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.excluded:
+                            listing[entry.name] = None
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    listing[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            if listings.pop(path, None) is not None:
+                root.change(path)
+            return []
+        known = listings.get(path)
+        listings[path] = listing
+        if known is None:
+            if root in self.scanned:
+                for name in listing:
+                    root.change(os.path.join(path, name))
+        else:
+            for name in known.keys() | listing.keys():
+                if known.get(name, ()) != listing.get(name, ()):
+                    root.change(os.path.join(path, name))
+        return [
+            os.path.join(path, name)
+            for name, stat
+            in listing.items()
+            if stat is None]
+
+
+class Watcher:
+    """Watcher of the directory trees that tools run in, to tell cheaply
+    whether anything in them has changed.
+
+    Trees are watched from when they are first synced, with inotify
+    where it is available, or else by polling them incrementally. The
+    method can be set with `SYNCA_MCP_WATCH` (`auto`, `inotify`, `poll`
+    or `off`). Only the `max_roots` most recently synced trees are
+    watched.
+    """
+
+    def __init__(
+            self,
+            method: str | None = None,
+            max_roots: int = 16,
+            batch: int = 64,
+            excluded: tuple[str, ...] = EXCLUDED_DIRS) -> None:
+        self.method = (
+            method
+            or os.environ.get("SYNCA_MCP_WATCH")
+            or "auto")
+        if self.method not in METHODS:
+            raise ValueError(
+                f"Unknown watch method '{self.method}', "
+                f"must be in {list(METHODS)}")
+        self.max_roots = max_roots
+        self.batch = batch
+        self.excluded = excluded
+        self.roots: collections.OrderedDict[str, Root] = (
+            collections.OrderedDict())
+        self.lock = threading.Lock()
+        self._inotify: Inotify | None = None
+        self._poller: Poller | None = None
+
+    @property
+    def inotify(self) -> Inotify | None:
+        """Inotify watches, if the method and the platform allow them."""
+        if self._inotify is None and self.method in ("auto", "inotify"):
+            try:
+                self._inotify = Inotify(self.excluded)
+            except OSError:
+                self.method = "poll"
+        return self._inotify
+
+    @property
+    def poller(self) -> Poller:
+        if self._poller is None:
+            self._poller = Poller(self.excluded, self.batch)
+        return self._poller
+
+    def close(self) -> None:
+        """Stop watching all trees."""
+        with self.lock:
+            self.roots.clear()
+            if self._inotify:
+                self._inotify.close()
+                self._inotify = None
+            self._poller = None
+
+    def root(self, path: pathlib.Path) -> Root:
+        """The changes seen under a dir, watching it if it is not
+        already, once any changes made since the last sync have been
+        seen.
+        """
+        key = str(path)
+        with self.lock:
+            while True:
+                if not (root := self.roots.get(key)):
+                    root = self.roots[key] = self.watch(path)
+                    while len(self.roots) > self.max_roots:
+                        self.unwatch(self.roots.popitem(last=False)[1])
+                self.roots.move_to_end(key)
+                self.sync(root)
+                if key in self.roots:
+                    return root
+
+    def sync(self, root: Root) -> None:
+        """See the changes made since the last sync."""
+        if not root.exact:
+            if self.method != "off":
+                self.poller.poll(root)
+            return
+        assert self._inotify
+        for lost in self._inotify.read():
+            self.unwatch(lost)
+            lost.reset()
+            self.roots.pop(str(lost.path), None)
+
+    def unwatch(self, root: Root) -> None:
+        if self._inotify:
+            self._inotify.remove(root)
+        if self._poller:
+            self._poller.remove(root)
+
+    def watch(self, path: pathlib.Path) -> Root:
+        """Start watching a dir, with inotify if possible."""
+        if self.method != "off" and (inotify := self.inotify):
+            root = Root(path, exact=True)
+            try:
+                inotify.add(root)
+            except OSError:
+                pass
+            else:
+                return root
+        root = Root(path, exact=False)
+        if self.method != "off":
+            self.poller.add(root)
+        return root
@@ -1,8 +1,11 @@
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, PropertyMock
 
-from synca.mcp.common.tool import CLITool, Tool
+from synca.mcp.common.tool import CLICheckTool, CLITool, Tool
+from synca.mcp.common.util import Scheduler, SingleFlight, Watcher
 
 
 # CLITool
@@ -17,6 +20,27 @@ def test_cli_tool_constructor():
     assert tool.ctx == ctx
     assert tool._path_str == path
     assert tool._args == args
+    assert tool.stream_output is False
+    assert tool.stream_chunk_size == 65536
+    assert tool.output_limit is None
+    assert tool.progress_interval == 0.5
+    assert tool._progress is None
+    assert tool._progress_sent == 0.0
+    assert tool.fingerprint_patterns == ()
+    assert tool.default_timeout is None
+    assert tool.timed_out is False
+    assert isinstance(tool.scheduler, Scheduler)
+    assert tool.scheduler is CLITool.scheduler
+    assert tool.lane == "default"
+    assert tool.max_concurrency is None
+    assert tool.path_concurrency is None
+    assert tool.path_group is None
+    assert tool.coalesce is False
+    assert tool.rlimits == {}
+    assert tool.resources is None
+    assert isinstance(tool.flights, SingleFlight)
+    assert isinstance(tool.watcher, Watcher)
+    assert tool.flights is CLITool.flights
     with pytest.raises(NotImplementedError):
         tool.tool_name
 
@@ -101,52 +125,488 @@ def test_cli_tool_command(patches):
     assert "command" not in tool.__dict__
 
 
+@pytest.mark.asyncio
+async def test_cli_tool_cache_key(patches):
+    """Test cache_key method."""
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    patched = patches(
+        "asyncio",
+        ("CLITool.command",
+         dict(new_callable=PropertyMock)),
+        ("CLITool.path",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_aio, m_command, m_path):
+        m_aio.to_thread = AsyncMock()
+        assert (
+            await tool.cache_key()
+            == ("CLITool",
+                str(m_path.return_value),
+                m_command.return_value,
+                m_aio.to_thread.return_value))
+
+    assert (
+        m_aio.to_thread.call_args
+        == [(tool.fingerprint, ), {}])
+
+
+@pytest.mark.parametrize("recalled", [None, "DIGEST"])
+def test_cli_tool_fingerprint(patches, recalled):
+    """Test fingerprint reuses the digest while the path is unchanged."""
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    tool.fingerprint_patterns = MagicMock()
+    patched = patches(
+        "Fingerprint",
+        ("CLITool.watcher",
+         dict(new_callable=PropertyMock)),
+        ("CLITool.path",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_fingerprint, m_watcher, m_path):
+        root = m_watcher.return_value.root.return_value
+        root.recall.return_value = recalled
+        assert (
+            tool.fingerprint()
+            == (recalled
+                or m_fingerprint.return_value.digest))
+
+    key = ("fingerprint", tool.fingerprint_patterns)
+    assert (
+        m_watcher.return_value.root.call_args
+        == [(m_path.return_value, ), {}])
+    assert (
+        root.recall.call_args
+        == [(key, ), {}])
+    if recalled:
+        assert not m_fingerprint.called
+        assert not root.remember.called
+        return
+    assert (
+        m_fingerprint.call_args
+        == [(m_path.return_value, tool.fingerprint_patterns), {}])
+    assert (
+        root.remember.call_args
+        == [(key, root.generation, m_fingerprint.return_value.digest),
+            {}])
+
+
+def test_cli_tool_fingerprint_watched(tmp_path):
+    """Test fingerprint is recomputed once the watcher sees a change."""
+    tool = CLITool(MagicMock(), str(tmp_path), MagicMock())
+    tool.fingerprint_patterns = ("*.py", )
+    tool.watcher = Watcher("inotify")
+    (tmp_path / "a.py").write_text("A")
+    try:
+        digest = tool.fingerprint()
+        assert tool.fingerprint() == digest
+        (tmp_path / "a.py").write_text("AB")
+        changed = tool.fingerprint()
+        assert changed != digest
+        assert tool.fingerprint() == changed
+    finally:
+        tool.watcher.close()
+
+
+@pytest.mark.parametrize("stream_output", [True, False])
+@pytest.mark.parametrize("timeout", [None, 0, 23])
+@pytest.mark.asyncio
+async def test_cli_tool_communicate(patches, stream_output, timeout):
+    """Test communicate method."""
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    tool.stream_output = stream_output
+    process = MagicMock()
+    stdout = MagicMock()
+    stderr = MagicMock()
+    process.communicate = AsyncMock(return_value=(stdout, stderr))
+    streamed = bool(stream_output or timeout)
+    patched = patches(
+        ("CLITool.timeout",
+         dict(new_callable=PropertyMock)),
+        "CLITool.stream",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_timeout, m_stream):
+        m_timeout.return_value = timeout
+        assert (
+            await tool.communicate(process)
+            == (m_stream.return_value
+                if streamed
+                else (stdout.decode.return_value,
+                      stderr.decode.return_value,
+                      process.returncode)))
+
+    if streamed:
+        assert (
+            m_stream.call_args
+            == [(process, ), {}])
+        assert not process.communicate.called
+        return
+    assert not m_stream.called
+    assert (
+        process.communicate.call_args
+        == [(), {}])
+
+
 @pytest.mark.asyncio
 async def test_cli_tool_execute(patches):
     """Test execute method."""
+    cmd = MagicMock()
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    tool.scheduler = MagicMock()
+    tool.lane = MagicMock()
+    patched = patches(
+        ("CLITool.slot_limits",
+         dict(new_callable=PropertyMock)),
+        "CLITool.spawn",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_limits, m_spawn):
+        assert (
+            await tool.execute(cmd)
+            == m_spawn.return_value)
+
+    assert (
+        tool.scheduler.slot.call_args
+        == [(tool.lane, m_limits.return_value), {}])
+    assert (
+        m_spawn.call_args
+        == [(cmd, ), {}])
+    slot = tool.scheduler.slot.return_value
+    assert (
+        slot.__aenter__.call_args
+        == [(), {}])
+    assert slot.__aexit__.called
+
+
+@pytest.mark.parametrize(
+    "raises",
+    [None, TimeoutError, asyncio.CancelledError, Exception])
+@pytest.mark.asyncio
+async def test_cli_tool_spawn(patches, raises):
+    """Test spawn method."""
     cmd = (MagicMock(), MagicMock(), MagicMock())
     ctx = MagicMock()
     path = MagicMock()
     args = MagicMock()
     tool = CLITool(ctx, path, args)
-    stdout = MagicMock()
-    stderr = MagicMock()
     patched = patches(
         "asyncio",
         "str",
+        "Process",
+        ("CLITool.limits",
+         dict(new_callable=PropertyMock)),
         ("CLITool.path",
          dict(new_callable=PropertyMock)),
+        ("CLITool.timeout",
+         dict(new_callable=PropertyMock)),
+        "CLITool.communicate",
+        "CLITool.handle_timeout",
+        "CLITool.kill",
         prefix="synca.mcp.common.tool.cli")
 
-    with patched as (m_aio, m_str, m_path):
-        m_subproc = m_aio.create_subprocess_exec = AsyncMock()
-        proc = m_subproc.return_value
-        proc.communicate.return_value = (stdout, stderr)
-        assert (
-            await tool.execute(cmd)
-            == (stdout.decode.return_value,
-                stderr.decode.return_value,
-                proc.returncode))
+    with patched as patchy:
+        (m_aio, m_str, m_process, m_limits, m_path, m_timeout,
+         m_communicate, m_handle, m_kill) = patchy
+        m_aio.CancelledError = asyncio.CancelledError
+        proc = MagicMock()
+        proc.wait = AsyncMock()
+        m_process.create = AsyncMock(return_value=proc)
+        if raises:
+            m_communicate.side_effect = raises
+        if raises in [asyncio.CancelledError, Exception]:
+            with pytest.raises(raises):
+                await tool.spawn(cmd)
+        else:
+            assert (
+                await tool.spawn(cmd)
+                == (m_handle.return_value
+                    if raises
+                    else m_communicate.return_value))
 
     assert (
-        m_subproc.call_args
+        m_process.create.call_args
         == [cmd,
             dict(
                 cwd=m_str.return_value,
-                stdout=m_aio.subprocess.PIPE,
-                stderr=m_aio.subprocess.PIPE)])
+                limits=m_limits.return_value)])
     assert (
         m_str.call_args
         == [(m_path.return_value, ), {}])
+    assert (
+        m_aio.timeout.call_args
+        == [(m_timeout.return_value, ), {}])
+    assert (
+        m_communicate.call_args
+        == [(proc, ), {}])
+    assert (
+        proc.close.call_args
+        == [(), {}])
+    assert (
+        tool.resources
+        == (proc.resources
+            if raises in [None, TimeoutError]
+            else None))
+    if raises is TimeoutError:
+        assert (
+            m_handle.call_args
+            == [(proc, ), {}])
+    else:
+        assert not m_handle.called
+    if raises is asyncio.CancelledError:
+        assert (
+            m_kill.call_args
+            == [(proc, ), {}])
+        assert (
+            proc.wait.call_args
+            == [(), {}])
+    else:
+        assert not m_kill.called
+        assert not proc.wait.called
+
+
+@pytest.mark.parametrize("rlimits", [{}, dict(cpu=10, open_files=100)])
+@pytest.mark.parametrize(
+    "env",
+    [{},
+     dict(SYNCA_MCP_RLIMIT_CPU="5"),
+     dict(SYNCA_MCP_RLIMIT_CPU="50", SYNCA_MCP_RLIMIT_ADDRESS_SPACE="7"),
+     dict(SYNCA_MCP_RLIMIT_OPEN_FILES=""),
+     dict(SYNCA_MCP_RLIMIT_CPU="5s", SYNCA_MCP_RLIMIT_OPEN_FILES="7")])
+def test_cli_tool_limits(patches, rlimits, env):
+    """Test limits property."""
+    tool = CLITool(MagicMock(), MagicMock(), MagicMock())
+    tool.rlimits = rlimits
+    patched = patches(
+        "os",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_os, ):
+        m_os.environ = env
+        limits = tool.limits
+
+    expected = dict(rlimits)
+    for name in ("address_space", "cpu", "open_files"):
+        value = env.get(f"SYNCA_MCP_RLIMIT_{name.upper()}")
+        if value and value.isdigit():
+            expected[name] = min(int(value), rlimits.get(name, int(value)))
+    assert limits == expected
+    assert tool.rlimits == rlimits
+    assert "limits" not in tool.__dict__
+
+
+@pytest.mark.asyncio
+async def test_cli_tool_handle_timeout(patches):
+    """Test handle_timeout method."""
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    process = MagicMock()
+    process.wait = AsyncMock()
+    tool.streams = dict(stdout=MagicMock(), stderr=MagicMock())
+    patched = patches(
+        "CLITool.kill",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_kill, ):
+        assert (
+            await tool.handle_timeout(process)
+            == (tool.streams["stdout"].text,
+                tool.streams["stderr"].text,
+                process.wait.return_value))
+
+    assert tool.timed_out is True
+    assert (
+        m_kill.call_args
+        == [(process, ), {}])
+    assert (
+        process.wait.call_args
+        == [(), {}])
+    for stream in tool.streams.values():
+        assert (
+            stream.close.call_args
+            == [(), {}])
+
+
+@pytest.mark.parametrize("exists", [True, False])
+def test_cli_tool_kill(patches, exists):
+    """Test kill method."""
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    process = MagicMock()
+    patched = patches(
+        "os",
+        "signal",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_os, m_signal):
+        if not exists:
+            m_os.killpg.side_effect = ProcessLookupError
+        assert not tool.kill(process)
+
+    assert (
+        m_os.killpg.call_args
+        == [(process.pid, m_signal.SIGKILL), {}])
+
+
+def test_cli_tool_output_stream(patches):
+    """Test output_stream method."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = CLITool(ctx, path, args)
+    tool.output_limit = MagicMock()
+    tool.stream_chunk_size = MagicMock()
+    name = MagicMock()
+    patched = patches(
+        "OutputStream",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_stream, ):
+        assert (
+            tool.output_stream(name)
+            == m_stream.return_value)
+
+    assert (
+        m_stream.call_args
+        == [(name, tool.handle_line),
+            dict(limit=tool.output_limit,
+                 chunk_size=tool.stream_chunk_size,
+                 on_chunk=tool.report_progress)])
+
+
+@pytest.mark.parametrize("progress", [None, (), (1, 2, "MSG")])
+def test_cli_tool_handle_line(patches, progress):
+    """Test handle_line method."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = CLITool(ctx, path, args)
+    stream = MagicMock()
+    line = MagicMock()
+    patched = patches(
+        "CLITool.parse_progress",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_progress, ):
+        m_progress.return_value = progress
+        assert not tool.handle_line(stream, line)
+
+    assert (
+        m_progress.call_args
+        == [(stream, line), {}])
+    assert (
+        tool._progress
+        == (progress or None))
+
+
+def test_cli_tool_parse_progress():
+    """Test parse_progress method."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = CLITool(ctx, path, args)
+    assert not tool.parse_progress(MagicMock(), MagicMock())
 
 
+@pytest.mark.parametrize("has_progress", [True, False])
+@pytest.mark.parametrize("flush", [True, False])
+@pytest.mark.parametrize("elapsed", [0.1, 0.5, 1.0])
 @pytest.mark.asyncio
-async def test_cli_tool_pipeline(patches):
-    """Test pipeline method with various parameters."""
+async def test_cli_tool_report_progress(
+        patches, has_progress, flush, elapsed):
+    """Test report_progress method."""
     ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
     path = MagicMock()
     args = MagicMock()
     tool = CLITool(ctx, path, args)
+    progress = (MagicMock(), MagicMock(), MagicMock())
+    if has_progress:
+        tool._progress = progress
+    tool._progress_sent = 23.0
+    patched = patches(
+        "time",
+        prefix="synca.mcp.common.tool.cli")
+    sends = (
+        has_progress
+        and (flush or elapsed >= tool.progress_interval))
+
+    with patched as (m_time, ):
+        m_time.monotonic.return_value = 23.0 + elapsed
+        assert not await tool.report_progress(flush=flush)
+
+    if not has_progress:
+        assert not m_time.monotonic.called
+    if not sends:
+        assert not ctx.report_progress.called
+        assert tool._progress_sent == 23.0
+        assert (
+            tool._progress
+            == (progress if has_progress else None))
+        return
+    assert tool._progress is None
+    assert tool._progress_sent == 23.0 + elapsed
+    assert (
+        ctx.report_progress.call_args
+        == [progress, {}])
+
+
+@pytest.mark.parametrize("coalesce", [True, False])
+@pytest.mark.parametrize("shared", [True, False])
+@pytest.mark.parametrize(
+    "result",
+    [dict(error="BOOM"),
+     dict(data=dict(info=dict(returncode=0)))])
+@pytest.mark.asyncio
+async def test_cli_tool_pipeline(patches, coalesce, shared, result):
+    """Test pipeline coalesces identical runs if enabled."""
+    tool = CLITool(MagicMock(), MagicMock(), MagicMock())
+    tool.coalesce = coalesce
+    patched = patches(
+        ("CLITool.flight_key",
+         dict(new_callable=PropertyMock)),
+        "CLITool.command_pipeline",
+        "CLITool.flights",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_key, m_command, m_flights):
+        m_flights.run = AsyncMock(return_value=(result, shared))
+        response = await tool.pipeline()
+
+    if not coalesce:
+        assert response == m_command.return_value
+        assert not m_flights.run.called
+        return
+    assert not m_command.called
+    assert (
+        m_flights.run.call_args
+        == [(m_key.return_value, m_command), {}])
+    if not shared:
+        assert response is result
+        return
+    assert response is not result
+    assert "coalesced" not in result.get("data", {}).get("info", {})
+    if "error" in result:
+        assert response == result
+        return
+    assert (
+        response
+        == dict(data=dict(info=dict(returncode=0, coalesced=True))))
+
+
+@pytest.mark.asyncio
+async def test_cli_tool_pipeline_coalesced(patches, tmp_path):
+    """Test concurrent identical runs share one execution."""
+    tools = [
+        CLITool(MagicMock(), str(tmp_path), {})
+        for _ in range(3)]
+    started = asyncio.Event()
+    release = asyncio.Event()
     patched = patches(
         ("CLITool.command",
          dict(new_callable=PropertyMock)),
@@ -155,23 +615,283 @@ async def test_cli_tool_pipeline(patches):
         "CLITool.response",
         prefix="synca.mcp.common.tool.cli")
 
+    async def execute(cmd):
+        started.set()
+        await release.wait()
+        return ("OUT", "ERR", 0)
+
     with patched as (m_command, m_exec, m_parse, m_format):
+        m_command.return_value = ("cmd", )
+        m_exec.side_effect = execute
+        m_format.side_effect = lambda *output: dict(
+            data=dict(info=dict(returncode=0)))
+        for tool in tools:
+            tool.coalesce = True
+        runs = [
+            asyncio.create_task(tool.pipeline())
+            for tool
+            in tools]
+        await started.wait()
+        await asyncio.sleep(0)
+        assert len(CLITool.flights) == 1
+        release.set()
+        results = await asyncio.gather(*runs)
+
+    assert m_exec.call_count == 1
+    assert m_parse.call_count == 1
+    assert (
+        [result["data"]["info"].get("coalesced") for result in results]
+        == [None, True, True])
+    assert len(CLITool.flights) == 0
+
+
+@pytest.mark.parametrize("timed_out", [True, False])
+@pytest.mark.parametrize("resources", [None, dict(user_time=1.0)])
+@pytest.mark.parametrize("truncated", [True, False])
+@pytest.mark.asyncio
+async def test_cli_tool_command_pipeline(
+        patches, timed_out, resources, truncated):
+    """Test command_pipeline method with various parameters."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = CLITool(ctx, path, args)
+    patched = patches(
+        ("CLITool.command",
+         dict(new_callable=PropertyMock)),
+        "CLITool.execute",
+        "CLITool.parse",
+        "CLITool.timeout_output",
+        "CLITool.response",
+        ("CLITool.truncated",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as patchy:
+        (m_command, m_exec, m_parse, m_timeout, m_format,
+         m_truncated) = patchy
+        m_truncated.return_value = truncated
         m_exec.return_value = (MagicMock(), MagicMock(), MagicMock())
-        m_parse.return_value = (
+        info = dict(returncode=0)
+        m_parse.return_value = (MagicMock(), MagicMock(), MagicMock(), info)
+        m_timeout.return_value = (
             MagicMock(), MagicMock(), MagicMock(), MagicMock())
+
+        async def execute(cmd):
+            tool.timed_out = timed_out
+            return m_exec.return_value
+
+        m_exec.side_effect = execute
+        tool.resources = resources
         assert (
-            await tool.pipeline()
+            await tool.command_pipeline()
             == m_format.return_value)
 
+    expected = dict(returncode=0)
+    if not timed_out:
+        if resources:
+            expected["resources"] = resources
+        if truncated:
+            expected["truncated"] = True
+    assert info == expected
     assert (
         m_exec.call_args
         == [(m_command.return_value, ), {}])
     assert (
         m_parse.call_args
         == [m_exec.return_value, {}])
+    if not timed_out:
+        assert not m_timeout.called
+        assert (
+            m_format.call_args
+            == [m_parse.return_value, {}])
+        return
     assert (
-        m_format.call_args
+        m_timeout.call_args
         == [m_parse.return_value, {}])
+    assert (
+        m_format.call_args
+        == [m_timeout.return_value, {}])
+
+
+@pytest.mark.parametrize(
+    "streams, expected",
+    [(None, False),
+     (dict(stdout=0, stderr=0), False),
+     (dict(stdout=0, stderr=5), True)])
+def test_cli_tool_truncated(streams, expected):
+    """Test output is truncated if either stream dropped any of it."""
+    tool = CLITool(MagicMock(), MagicMock(), MagicMock())
+    if streams is not None:
+        tool.streams = {
+            name: MagicMock(buffer=MagicMock(dropped=dropped))
+            for name, dropped
+            in streams.items()}
+    assert tool.truncated is expected
+    assert "truncated" not in tool.__dict__
+
+
+@pytest.mark.parametrize("returncode", [None, 0, 23])
+@pytest.mark.asyncio
+async def test_cli_tool_stream(patches, returncode):
+    """Test stream method."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = CLITool(ctx, path, args)
+    process = MagicMock()
+    process.wait = AsyncMock(return_value=returncode)
+    streams = dict(stdout=MagicMock(), stderr=MagicMock())
+    for name, stream in streams.items():
+        stream.consume = AsyncMock(return_value=f"{name.upper()} OUTPUT")
+    patched = patches(
+        "CLITool.output_stream",
+        "CLITool.report_progress",
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_stream, m_report):
+        m_stream.side_effect = lambda name: streams[name]
+        assert (
+            await tool.stream(process)
+            == ("STDOUT OUTPUT",
+                "STDERR OUTPUT",
+                returncode or 0))
+
+    assert (
+        m_stream.call_args_list
+        == [[("stdout", ), {}], [("stderr", ), {}]])
+    assert tool.streams == streams
+    assert (
+        streams["stdout"].consume.call_args
+        == [(process.stdout, ), {}])
+    assert (
+        streams["stderr"].consume.call_args
+        == [(process.stderr, ), {}])
+    assert (
+        process.wait.call_args
+        == [(), {}])
+    assert (
+        m_report.call_args
+        == [(), dict(flush=True)])
+
+
+@pytest.mark.parametrize("info", [{}, dict(errors_count=23)])
+def test_cli_tool_timeout_output(patches, info):
+    """Test timeout_output method."""
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    return_code = MagicMock()
+    output = MagicMock()
+    patched = patches(
+        ("CLITool.timeout",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_timeout, ):
+        m_timeout.return_value = 23.5
+        assert (
+            tool.timeout_output(return_code, "MESSAGE", output, info)
+            == (return_code,
+                "Timed out after 23.5s, output is partial. MESSAGE",
+                output,
+                info))
+
+    assert info["timed_out"] is True
+
+
+def test_cli_tool_invocation(patches):
+    """Test invocation property."""
+    tool = CLITool(MagicMock(), MagicMock(), MagicMock())
+    patched = patches(
+        "shlex",
+        "str",
+        ("CLITool.path",
+         dict(new_callable=PropertyMock)),
+        ("CLITool.command",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_shlex, m_str, m_path, m_command):
+        assert (
+            tool.invocation
+            == (m_shlex.join.return_value, m_str.return_value))
+
+    assert (
+        m_shlex.join.call_args
+        == [(m_command.return_value, ), {}])
+    assert (
+        m_str.call_args
+        == [(m_path.return_value, ), {}])
+    assert "invocation" not in tool.__dict__
+
+
+def test_cli_tool_flight_key(patches):
+    """Test flight_key property."""
+    tool = CLITool(MagicMock(), MagicMock(), MagicMock())
+    patched = patches(
+        "str",
+        ("CLITool.path",
+         dict(new_callable=PropertyMock)),
+        ("CLITool.command",
+         dict(new_callable=PropertyMock)),
+        ("CLITool.timeout",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_str, m_path, m_command, m_timeout):
+        assert (
+            tool.flight_key
+            == ("CLITool",
+                m_str.return_value,
+                m_command.return_value,
+                m_timeout.return_value))
+
+    assert (
+        m_str.call_args
+        == [(m_path.return_value, ), {}])
+    assert "flight_key" not in tool.__dict__
+
+
+@pytest.mark.parametrize("path_group", [None, "GROUP"])
+def test_cli_tool_slot_limits(patches, path_group):
+    """Test slot_limits property."""
+    ctx = MagicMock()
+    tool = CLITool(ctx, MagicMock(), MagicMock())
+    tool.max_concurrency = MagicMock()
+    tool.path_concurrency = MagicMock()
+    tool.path_group = path_group
+    patched = patches(
+        "str",
+        ("CLITool.path",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.cli")
+
+    with patched as (m_str, m_path):
+        assert (
+            tool.slot_limits
+            == ((("tool", "CLITool"), tool.max_concurrency),
+                (("path", m_str.return_value, path_group or "CLITool"),
+                 tool.path_concurrency)))
+
+    assert (
+        m_str.call_args
+        == [(m_path.return_value, ), {}])
+    assert "slot_limits" not in tool.__dict__
+
+
+@pytest.mark.parametrize("timeout", [None, 0, 7])
+@pytest.mark.parametrize("default_timeout", [None, 23])
+def test_cli_tool_timeout(timeout, default_timeout):
+    """Test timeout property."""
+    ctx = MagicMock()
+    args = (
+        dict(timeout=timeout)
+        if timeout is not None
+        else {})
+    tool = CLITool(ctx, MagicMock(), args)
+    tool.default_timeout = default_timeout
+    assert tool.timeout == (timeout or default_timeout)
+    assert "timeout" not in tool.__dict__
 
 
 @pytest.mark.parametrize(
@@ -221,3 +941,19 @@ def test_cli_tool_validate_path(patches, exists, is_dir):
         assert (
             e.value.args[0]
             == f"Path '{path}' is not a directory")
+
+
+# CLICheckTool
+
+def test_cli_check_tool_constructor():
+    """Test CLICheckTool class initialization."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = CLICheckTool(ctx, path, args)
+    assert isinstance(tool, CLITool)
+    assert tool.stream_output is True
+    assert tool.output_limit == 16 * 1024 * 1024
+    assert tool.default_timeout == 30 * 60
+    assert tool.path_concurrency == 1
+    assert tool.coalesce is True
@@ -37,7 +37,7 @@ async def test_http_tool_pipeline(patches):
         ("HTTPTool.request_data",
          dict(new_callable=PropertyMock)),
         "HTTPTool.request",
-        "HTTPTool.parse_output",
+        "HTTPTool.parse",
         "HTTPTool.response",
         prefix="synca.mcp.common.tool.http")
 
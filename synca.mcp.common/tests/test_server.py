@@ -0,0 +1,376 @@
+"""Isolated tests for synca.mcp.common.server."""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import jsonschema
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+
+from synca.mcp.common import errors, server
+from synca.mcp.common.types import ResultDict
+from synca.mcp.common.util import History, Spill
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [0, 3, 64, 65])
+async def test_server_batch(patches, count):
+    """Test batch runs the calls concurrently, in order."""
+    mcp = MagicMock()
+    calls = [MagicMock() for _ in range(count)]
+    started = []
+    patched = patches(
+        "batch_call",
+        prefix="synca.mcp.common.server")
+
+    async def batch_call(mcp, call):
+        started.append(call)
+        await asyncio.sleep(0)
+        # all calls have started before any returns
+        assert len(started) == count
+        return call.result
+
+    with patched as (m_call, ):
+        m_call.side_effect = batch_call
+        if count > server.MAX_BATCH:
+            with pytest.raises(errors.ArgValueError) as e:
+                await server.batch(mcp, calls)
+        else:
+            assert (
+                await server.batch(mcp, calls)
+                == dict(results=[call.result for call in calls]))
+
+    if count > server.MAX_BATCH:
+        assert not m_call.called
+        assert (
+            e.value.args[0]
+            == f"Too many calls in batch ({count}), the maximum is 64")
+        return
+    assert (
+        m_call.call_args_list
+        == [[(mcp, call), {}] for call in calls])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tool", ["TOOL", "batch"])
+@pytest.mark.parametrize("arguments", [None, {}, dict(ARG="VALUE")])
+@pytest.mark.parametrize("error", [None, ToolError, ValueError])
+@pytest.mark.parametrize(
+    "result, expected",
+    [((["CONTENT"], dict(data=None, error="ERROR")), dict(error="ERROR")),
+     (dict(data="DATA", error=None), dict(data="DATA")),
+     (["CONTENT"],
+      dict(error="Tool 'TOOL' returned no structured result"))])
+async def test_server_batch_call(tool, arguments, error, result, expected):
+    """Test batch_call calls the tool as batched, returning its
+    structured result, or any error as its result.
+    """
+    mcp = MagicMock()
+    call = dict(tool=tool)
+    if arguments is not None:
+        call["arguments"] = arguments
+    batched = []
+
+    async def call_tool(*args):
+        batched.append(server.batched.get())
+        if error:
+            raise error("BOOM")
+        return result
+
+    mcp.call_tool = AsyncMock(side_effect=call_tool)
+
+    returned = await server.batch_call(mcp, call)
+
+    assert server.batched.get() is False
+    if tool == "batch":
+        assert returned == dict(error="Batches cannot be nested")
+        assert not mcp.call_tool.called
+        return
+    assert batched == [True]
+    assert (
+        mcp.call_tool.call_args
+        == [(tool, arguments or {}), {}])
+    assert (
+        returned
+        == (dict(error="BOOM")
+            if error
+            else expected))
+
+
+@pytest.mark.asyncio
+async def test_server_batch_tool():
+    """Test the batch tool runs calls to the server's tools."""
+    mcp = server.register(FastMCP("Test"))
+
+    @mcp.tool()
+    async def echo(value: str) -> ResultDict:
+        return ResultDict(error=value)
+
+    _, result = await mcp.call_tool(
+        "batch",
+        dict(calls=[
+            dict(tool="echo", arguments=dict(value="A")),
+            dict(tool="missing"),
+            dict(tool="echo", arguments=dict(value="B"))]))
+    assert (
+        result["results"]
+        == [dict(error="A"),
+            dict(error="Unknown tool: missing"),
+            dict(error="B")])
+
+
+@pytest.mark.parametrize("group_by", [None, "", "tool"])
+@pytest.mark.parametrize("limit", [0, 1, 1000, 1001])
+def test_server_history(patches, group_by, limit):
+    """Test history queries the runs, or groups of runs."""
+    patched = patches(
+        "Tool",
+        prefix="synca.mcp.common.server")
+    args = ("TOOL", "CWD", 7, group_by, "ORDER", limit)
+
+    with patched as (m_tool, ):
+        if not 0 < limit <= server.MAX_HISTORY:
+            with pytest.raises(errors.ArgValueError) as e:
+                server.history(*args)
+        else:
+            result = server.history(*args)
+
+    if not 0 < limit <= server.MAX_HISTORY:
+        assert (
+            e.value.args[0]
+            == f"Limit must be between 1 and 1000: {limit}")
+        assert not m_tool.history.flush.called
+        assert not m_tool.history.groups.called
+        assert not m_tool.history.runs.called
+        return
+    assert (
+        m_tool.history.flush.call_args
+        == [(), {}])
+    if group_by:
+        assert result == dict(groups=m_tool.history.groups.return_value)
+        assert (
+            m_tool.history.groups.call_args
+            == [(group_by, "TOOL", "CWD", 7, limit), {}])
+        assert not m_tool.history.runs.called
+        return
+    assert result == dict(runs=m_tool.history.runs.return_value)
+    assert (
+        m_tool.history.runs.call_args
+        == [("TOOL", "CWD", 7, "ORDER", limit), {}])
+    assert not m_tool.history.groups.called
+
+
+@pytest.mark.asyncio
+async def test_server_history_tool(patches, tmp_path):
+    """Test the history tool queries the run history."""
+    mcp = server.register(FastMCP("Test"))
+    history = History(str(tmp_path / "history.sqlite3"))
+    run = dict(
+        started=time.time(),
+        tool="BuildTool",
+        command="cargo build",
+        cwd="/src",
+        git_commit=None,
+        duration=1.5,
+        return_code=0,
+        output_bytes=100,
+        errors=0,
+        warnings=2,
+        issues=None,
+        failed=False,
+        cache=None,
+        coalesced=False,
+        phases=dict(total=1.5),
+        summary=None)
+    history.record(run)
+    patched = patches(
+        ("Tool.history",
+         dict(new=history)),
+        prefix="synca.mcp.common.server")
+
+    with patched:
+        _, runs = await mcp.call_tool("history", {})
+        _, groups = await mcp.call_tool(
+            "history",
+            dict(group_by="tool", tool="BuildTool"))
+        with pytest.raises(ToolError) as e:
+            await mcp.call_tool("history", dict(group_by="nope"))
+    history.close()
+
+    schema = mcp._tool_manager.get_tool("history").output_schema
+    jsonschema.validate(runs, schema)
+    jsonschema.validate(groups, schema)
+    assert runs == dict(runs=[run], groups=None)
+    assert (
+        groups
+        == dict(runs=None, groups=[dict(
+            key="BuildTool",
+            runs=1,
+            failed=0,
+            first=run["started"],
+            last=run["started"],
+            mean=1.5,
+            p50=1.5,
+            p95=1.5,
+            max=1.5,
+            output_bytes=100,
+            last_errors=0,
+            last_warnings=2,
+            last_issues=None)]))
+    assert "Unknown group_by 'nope'" in str(e.value)
+
+
+def test_server_metrics(patches):
+    """Test the metrics resource."""
+    patched = patches(
+        "json",
+        "CLITool",
+        "Tool",
+        prefix="synca.mcp.common.server")
+
+    with patched as (m_json, m_cli, m_tool):
+        assert (
+            server.metrics()
+            == m_json.dumps.return_value)
+
+    metrics = dict(
+        timings=m_tool.timings.as_dict,
+        scheduler=m_cli.scheduler.metrics)
+    assert (
+        m_json.dumps.call_args
+        == [(metrics, ), {}])
+
+
+def test_server_metrics_json():
+    """Test the metrics resource is serializable."""
+    metrics = json.loads(server.metrics())
+    assert set(metrics) == {"timings", "scheduler"}
+    assert set(metrics["scheduler"]) == {"default", "fast"}
+
+
+@pytest.mark.parametrize(
+    "offset,limit,error",
+    [(0, None, None),
+     (0, 200, None),
+     (7, 1, None),
+     (-1, 200, "Offset must not be negative: -1"),
+     (0, 0, "Limit must be positive: 0"),
+     (0, -1, "Limit must be positive: -1")])
+def test_server_output(patches, offset, limit, error):
+    """Test output reads a page of a spilled output."""
+    patched = patches(
+        "Tool",
+        prefix="synca.mcp.common.server")
+
+    with patched as (m_tool, ):
+        if error:
+            with pytest.raises(errors.ArgValueError) as e:
+                server.output("HANDLE", offset, limit)
+        else:
+            assert (
+                server.output("HANDLE", offset, limit)
+                == m_tool.spill.read.return_value)
+
+    if error:
+        assert e.value.args[0] == error
+        assert not m_tool.spill.read.called
+        return
+    assert (
+        m_tool.spill.read.call_args
+        == [("HANDLE", offset, limit), {}])
+
+
+@pytest.mark.asyncio
+async def test_server_output_tool(patches, tmp_path):
+    """Test the output tool pages through a spilled output."""
+    mcp = server.register(FastMCP("Test"))
+    spill = Spill(budget=64, directory=str(tmp_path))
+    handle = spill.write("".join(f"line {i}\n" for i in range(5)))
+    patched = patches(
+        "Tool.spill",
+        prefix="synca.mcp.common.server")
+
+    with patched as (m_spill, ):
+        m_spill.read.side_effect = spill.read
+        _, result = await mcp.call_tool(
+            "output",
+            dict(handle=handle, offset=7, limit=16))
+        with pytest.raises(ToolError) as e:
+            await mcp.call_tool("output", dict(handle="nope"))
+
+    assert (
+        result
+        == dict(
+            handle=handle,
+            offset=7,
+            bytes=14,
+            output="line 1\nline 2\n",
+            more=True))
+    assert "Invalid output handle: nope" in str(e.value)
+
+
+@pytest.mark.asyncio
+async def test_server_register(patches):
+    """Test register adds the shared resources and tools to a server."""
+    mcp = MagicMock()
+    calls = MagicMock()
+    patched = patches(
+        "asyncio",
+        "batch",
+        "history",
+        "output",
+        prefix="synca.mcp.common.server")
+
+    assert server.register(mcp) is mcp
+    assert (
+        mcp.tool.call_args_list
+        == [[(), dict(name="batch")],
+            [(), dict(name="history")],
+            [(), dict(name="output")]])
+    batch_tool, history_tool, output_tool = [
+        call[0][0]
+        for call
+        in mcp.tool.return_value.call_args_list]
+    with patched as (m_asyncio, m_batch, m_history, m_output):
+        m_asyncio.to_thread = AsyncMock()
+        assert (
+            await batch_tool(calls)
+            == m_batch.return_value)
+        assert (
+            await history_tool()
+            == m_asyncio.to_thread.return_value)
+        assert (
+            await history_tool("TOOL", "CWD", 7, "day", "slowest", 23)
+            == m_asyncio.to_thread.return_value)
+        assert (
+            await output_tool("HANDLE")
+            == m_output.return_value)
+        assert (
+            await output_tool("HANDLE", 23, 7)
+            == m_output.return_value)
+    assert (
+        m_batch.call_args
+        == [(mcp, calls), {}])
+    assert (
+        m_asyncio.to_thread.call_args_list
+        == [[(m_history, None, None, 30, None, "recent", 50), {}],
+            [(m_history, "TOOL", "CWD", 7, "day", "slowest", 23), {}]])
+    assert (
+        m_output.call_args_list
+        == [[("HANDLE", 0, None), {}],
+            [("HANDLE", 23, 7), {}]])
+    assert (
+        mcp.resource.call_args
+        == [("synca://metrics", ),
+            dict(
+                name="metrics",
+                description=(
+                    "Tool phase timing histograms and subprocess "
+                    "scheduler queue metrics"),
+                mime_type="application/json")])
+    assert (
+        mcp.resource.return_value.call_args
+        == [(server.metrics, ), {}])
@@ -1,9 +1,13 @@
 """Isolated tests for synca.mcp.common.tool."""
 
+import copy
+import threading
+
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, PropertyMock
 
-from synca.mcp.common.tool import Tool
+from synca.mcp.common.tool import Tool, base
+from synca.mcp.common.util import History, ResultCache, Spill, Timings
 
 
 @pytest.mark.asyncio
@@ -12,6 +16,18 @@ async def test_tool_constructor():
     ctx = MagicMock()
     tool = Tool(ctx)
     assert tool.ctx == ctx
+    assert tool.cacheable is False
+    assert isinstance(tool.cache, ResultCache)
+    assert tool.cache is Tool.cache
+    assert isinstance(tool.timings, Timings)
+    assert tool.timings is Tool.timings
+    assert tool.parse_threshold == 256 * 1024
+    assert isinstance(tool.spill, Spill)
+    assert tool.spill is Tool.spill
+    assert isinstance(tool.history, History)
+    assert tool.history is Tool.history
+    assert tool.invocation == (None, None)
+    assert await tool.cache_key() is None
     with pytest.raises(NotImplementedError):
         tool.tool_name
     with pytest.raises(NotImplementedError):
@@ -23,6 +39,137 @@ async def test_tool_constructor():
         await tool.pipeline()
 
 
+@pytest.mark.parametrize("cached", [True, False])
+@pytest.mark.parametrize("has_data", [True, False])
+@pytest.mark.parametrize("timed_out", [True, False])
+@pytest.mark.asyncio
+async def test_tool_cached_pipeline(patches, cached, has_data, timed_out):
+    """Test cached_pipeline method."""
+    ctx = MagicMock()
+    tool = Tool(ctx)
+    key = MagicMock()
+    tool.cache = MagicMock()
+    if not cached:
+        tool.cache.get.return_value = None
+    patched = patches(
+        "Tool.cache_status",
+        "Tool.pipeline",
+        prefix="synca.mcp.common.tool.base")
+
+    with patched as (m_status, m_pipeline):
+        m_pipeline.return_value = MagicMock()
+        data = (
+            dict(info=dict(timed_out=True) if timed_out else {})
+            if has_data
+            else None)
+        m_pipeline.return_value.get.return_value = data
+        assert (
+            await tool.cached_pipeline(key)
+            == m_status.return_value)
+
+    assert (
+        tool.cache.get.call_args
+        == [(key, ), {}])
+    if cached:
+        assert not m_pipeline.called
+        assert not tool.cache.set.called
+        assert (
+            m_status.call_args
+            == [(tool.cache.get.return_value, "hit"), {}])
+        return
+    assert (
+        m_pipeline.call_args
+        == [(), {}])
+    assert (
+        m_pipeline.return_value.get.call_args
+        == [("data", ), {}])
+    assert (
+        m_status.call_args
+        == [(m_pipeline.return_value, "miss"), {}])
+    if has_data and not timed_out:
+        assert (
+            tool.cache.set.call_args
+            == [(key, m_pipeline.return_value), {}])
+    else:
+        assert not tool.cache.set.called
+
+
+@pytest.mark.parametrize(
+    "result",
+    [dict(error="BOOM"),
+     dict(data=None, error="BOOM"),
+     dict(data=dict(info={}))])
+def test_tool_cache_status(result):
+    """Test cache_status method."""
+    ctx = MagicMock()
+    tool = Tool(ctx)
+    status = MagicMock()
+    has_data = bool(result.get("data"))
+    assert tool.cache_status(result, status) is result
+    if has_data:
+        assert result["data"]["info"]["cache"] == status
+    else:
+        assert "cache" not in str(result)
+
+
+@pytest.mark.parametrize("threshold", [None, 0, 7, 8, 9])
+@pytest.mark.asyncio
+async def test_tool_parse(patches, threshold):
+    """Test parse runs large outputs in a thread."""
+    ctx = MagicMock()
+    tool = Tool(ctx)
+    tool.parse_threshold = threshold
+    returncode = MagicMock()
+    patched = patches(
+        "asyncio",
+        "phase",
+        "Tool.parse_output",
+        prefix="synca.mcp.common.tool.base")
+
+    with patched as (m_asyncio, m_phase, m_parse):
+        m_asyncio.to_thread = AsyncMock()
+        result = await tool.parse("STDOUT", "ERR", returncode)
+
+    threaded = threshold is not None and threshold <= 9
+    assert (
+        m_phase.call_args
+        == [("parse_thread" if threaded else "parse", ), {}])
+    if not threaded:
+        assert result == m_parse.return_value
+        assert (
+            m_parse.call_args
+            == [("STDOUT", "ERR", returncode), {}])
+        assert not m_asyncio.to_thread.called
+        return
+    assert result == m_asyncio.to_thread.return_value
+    assert not m_parse.called
+    assert (
+        m_asyncio.to_thread.call_args
+        == [(m_parse, "STDOUT", "ERR", returncode), {}])
+
+
+@pytest.mark.asyncio
+async def test_tool_parse_thread():
+    """Test large outputs are parsed off the event loop thread."""
+    tool = Tool(MagicMock())
+    tool.parse_threshold = 4
+    threads = []
+
+    def parse_output(stdout, stderr, returncode):
+        threads.append(threading.current_thread())
+        return (returncode, stdout, stderr, {})
+
+    tool.parse_output = parse_output  # type:ignore
+    assert (
+        await tool.parse("OUT", "", 0)
+        == (0, "OUT", "", {}))
+    assert (
+        await tool.parse("OUTPUT", "", 0)
+        == (0, "OUTPUT", "", {}))
+    assert threads[0] is threading.current_thread()
+    assert threads[1] is not threading.current_thread()
+
+
 def test_tool_parse_output(patches):
     """Test parse_output method."""
     ctx = MagicMock()
@@ -32,58 +179,279 @@ def test_tool_parse_output(patches):
             MagicMock(), MagicMock(), MagicMock())
 
 
-def test_tool_response(patches):
+@pytest.mark.parametrize("fits", [True, False])
+@pytest.mark.parametrize("spilled", [True, False])
+@pytest.mark.asyncio
+async def test_tool_response(patches, fits, spilled):
     """Test response method with parametrized inputs."""
     ctx = MagicMock()
     output = MagicMock()
     tool = Tool(ctx)
-    info = MagicMock()
+    info: dict = {}
     return_code = MagicMock()
     message = MagicMock()
+    shaped = MagicMock()
+    spill = MagicMock() if spilled else None
+    patched = patches(
+        "asyncio.to_thread",
+        "phase",
+        "Tool.spill",
+        prefix="synca.mcp.common.tool.base")
+
+    with patched as (m_thread, m_phase, m_spill):
+        m_spill.fits.return_value = fits
+        m_thread.return_value = (shaped, spill)
+        assert (
+            await tool.response(
+                return_code, message, output, info)  # type:ignore
+            == {
+                "data": {
+                    "return_code": return_code,
+                    "message": message,
+                    "output": output if fits else shaped,
+                    "info": info,
+                }})
+
+    assert (
+        m_spill.fits.call_args
+        == [(output, ), {}])
+    if fits:
+        assert not m_thread.called
+        assert not m_phase.called
+        assert info == {}
+        return
+    assert (
+        m_thread.call_args
+        == [(m_spill.shape, output), {}])
     assert (
-        tool.response(return_code, message, output, info)
-        == {
-            "data": {
-                "return_code": return_code,
-                "message": message,
-                "output": output,
-                "info": info,
-            }})
+        m_phase.call_args
+        == [("spill", ), {}])
+    assert (
+        info
+        == (dict(spill=spill)
+            if spilled
+            else {}))
 
 
 @pytest.mark.parametrize(
     "error",
     [None,
      BaseException])
+@pytest.mark.parametrize("cacheable", [True, False])
+@pytest.mark.parametrize("enabled", [True, False])
+@pytest.mark.parametrize("cache_key", [None, "KEY"])
 @pytest.mark.asyncio
-async def test_tool_run(patches, iters, error):
-    """Test run() with parametrized arguments."""
+async def test_tool_run_pipeline(
+        patches, iters, error, cacheable, enabled, cache_key):
+    """Test run_pipeline() with parametrized arguments."""
     ctx = MagicMock()
     tool = Tool(ctx)
     tool.__class__.__name__ = "CustomTool"
+    tool.cacheable = cacheable
+    tool.cache = MagicMock()
+    tool.cache.enabled = enabled
     patched = patches(
         "traceback",
+        "Tool.cache_key",
+        "Tool.cached_pipeline",
         "Tool.pipeline",
         prefix="synca.mcp.common.tool.base")
+    cached = cacheable and enabled and cache_key
 
-    with patched as (m_tb, m_pipeline):
+    with patched as (m_tb, m_key, m_cached, m_pipeline):
+        m_key.return_value = cache_key
+        runner = (
+            m_cached
+            if cached
+            else m_pipeline)
         if error:
-            m_pipeline.side_effect = error("Test error")
+            runner.side_effect = error("Test error")
         assert (
-            await tool.run()
-            == (m_pipeline.return_value
+            await tool.run_pipeline()
+            == (runner.return_value
                 if not error
                 else dict(
                     error=(
                         "Failed to run custom: Test error\n"
                         f"{m_tb.format_exc.return_value}"))))
 
-    assert (
-        m_pipeline.call_args
-        == [(), {}])
+    if cacheable and enabled:
+        assert (
+            m_key.call_args
+            == [(), {}])
+    else:
+        assert not m_key.called
+    if cached:
+        assert not m_pipeline.called
+        assert (
+            m_cached.call_args
+            == [(cache_key, ), {}])
+    else:
+        assert not m_cached.called
+        assert (
+            m_pipeline.call_args
+            == [(), {}])
     if error:
         assert (
             m_tb.format_exc.call_args
             == [(), {}])
         return
     assert not m_tb.format_exc.called
+
+
+@pytest.mark.parametrize("batched", [True, False])
+@pytest.mark.asyncio
+async def test_tool_send_progress(batched):
+    """Test progress is sent to the client, unless the run is a call in
+    a batch.
+    """
+    ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
+    tool = Tool(ctx)
+    token = base.batched.set(batched)
+    try:
+        assert not await tool.send_progress(1, 2, "MESSAGE")
+        assert not await tool.send_progress(3)
+    finally:
+        base.batched.reset(token)
+
+    if batched:
+        assert not ctx.report_progress.called
+        return
+    assert (
+        ctx.report_progress.call_args_list
+        == [[(1, 2, "MESSAGE"), {}],
+            [(3, None, None), {}]])
+
+
+@pytest.mark.parametrize(
+    "result",
+    [dict(error="BOOM"),
+     dict(data=dict(
+         return_code=0,
+         output="OUTé",
+         info={})),
+     dict(data=dict(
+         return_code=2,
+         output="OUT",
+         info=dict(
+             errors_count=1,
+             warnings_count=2,
+             issues_count=3,
+             cache="hit",
+             coalesced=True,
+             spill=dict(handle="H", bytes=23, lines=7),
+             summary=dict(passed=5))))])
+@pytest.mark.parametrize("phases", [{}, dict(total=1.5, parse=0.5)])
+def test_tool_record(patches, result, phases):
+    """Test record adds the run to the history."""
+    ctx = MagicMock()
+    tool = Tool(ctx)
+    patched = patches(
+        "Tool.history",
+        ("Tool.invocation",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.tool.base")
+
+    with patched as (m_history, m_invocation):
+        m_invocation.return_value = ("CMD", "CWD")
+        assert not tool.record(result, 23.0, phases)
+
+    data = result.get("data")
+    info = data["info"] if data else {}
+    cwd = "CWD" if data else None
+    assert (
+        m_history.record.call_args
+        == [(dict(
+            started=23.0,
+            tool=tool.__class__.__name__,
+            command="CMD" if data else None,
+            cwd=cwd,
+            git_commit=None,
+            duration=phases.get("total", 0.0),
+            return_code=data["return_code"] if data else None,
+            output_bytes=(
+                info["spill"]["bytes"]
+                if "spill" in info
+                else len(data["output"].encode()) if data else 0),
+            errors=info.get("errors_count"),
+            warnings=info.get("warnings_count"),
+            issues=info.get("issues_count"),
+            failed=not data or data["return_code"] != 0,
+            cache=info.get("cache"),
+            coalesced=bool(info.get("coalesced")),
+            phases=phases,
+            summary=info.get("summary")), ),
+            {}])
+
+
+@pytest.mark.parametrize("history", [None, "", "PATH"])
+@pytest.mark.asyncio
+async def test_tool_run(patches, history):
+    """Test run() times the pipeline, and queues the run to be recorded."""
+    ctx = MagicMock()
+    tool = Tool(ctx)
+    tool.__class__.__name__ = "CustomTool"
+    tool.timings = MagicMock()
+    patched = patches(
+        "time",
+        "Tool.history",
+        "Tool.record",
+        "Tool.run_pipeline",
+        "Tool.timing_info",
+        prefix="synca.mcp.common.tool.base")
+
+    with patched as (m_time, m_history, m_record, m_pipeline, m_info):
+        m_history.path = history
+        assert (
+            await tool.run()
+            == m_info.return_value)
+
+    timer = tool.timings.timer
+    phases = timer.return_value.__enter__.return_value.phases
+    assert (
+        timer.call_args
+        == [("CustomTool", ), {}])
+    assert (
+        m_pipeline.call_args
+        == [(), {}])
+    assert (
+        m_info.call_args
+        == [(m_pipeline.return_value, phases),
+            {}])
+    if not history:
+        assert not m_record.called
+        return
+    assert (
+        m_record.call_args
+        == [(m_pipeline.return_value,
+             m_time.time.return_value,
+             phases),
+            {}])
+
+
+@pytest.mark.parametrize("report", [True, False])
+@pytest.mark.parametrize(
+    "result",
+    [dict(error="BOOM"),
+     dict(data=dict(info={})),
+     dict(data=dict(info=dict(timing=dict(total="1.23s"))))])
+def test_tool_timing_info(report, result):
+    """Test timing_info adds the phase timings to the result info."""
+    ctx = MagicMock()
+    tool = Tool(ctx)
+    tool.timings = MagicMock()
+    tool.timings.report = report
+    result = copy.deepcopy(result)
+    phases = dict(total=1.23456789, process=1.0)
+    assert tool.timing_info(result, phases) is result
+    if not (report and result.get("data")):
+        assert "phases" not in str(result)
+        return
+    timing = result["data"]["info"]["timing"]
+    assert timing["phases"] == dict(total=1.234568, process=1.0)
+    assert (
+        timing.get("total")
+        == ("1.23s"
+            if len(timing) == 2
+            else None))
@@ -5,7 +5,7 @@ import pytest
 from unittest.mock import MagicMock
 
 from synca.mcp.common import errors
-from synca.mcp.common.util import ArgParser
+from synca.mcp.common.util import ArgParser, ArgSchema
 
 
 def test_argparser_constructor():
@@ -18,11 +18,14 @@ def test_argparser_constructor():
     assert len(parser.arguments) == 0
 
 
-def test_argparser_add_argument(patches):
+@pytest.mark.parametrize("has_schema", [True, False])
+def test_argparser_add_argument(patches, has_schema):
     """Test the add_argument method."""
     parser = ArgParser()
     name = "test_name"
     kwargs = {"required": True, "default": "test_value"}
+    if has_schema:
+        parser.__dict__["schema"] = MagicMock()
     patched = patches(
         "cast",
         "types",
@@ -37,36 +40,93 @@ def test_argparser_add_argument(patches):
     assert (
         parser.arguments[name]
         == m_cast.return_value)
+    assert "schema" not in parser.__dict__
+
+
+def test_argparser_schema(patches):
+    """Test the schema cached property."""
+    parser = ArgParser()
+    patched = patches(
+        "ArgSchema",
+        prefix="synca.mcp.common.util.args")
+
+    with patched as (m_schema, ):
+        assert (
+            parser.schema
+            == m_schema.return_value)
+
+    assert (
+        m_schema.call_args
+        == [(parser.arguments, ), {}])
+    assert "schema" in parser.__dict__
+
+
+def test_argparser_schema_rebuilt():
+    """Test the schema is rebuilt when an argument is added."""
+    parser = ArgParser()
+    parser.add_argument("arg1", required=True)
+    assert parser.schema.required == frozenset(["arg1"])
+    parser.add_argument("arg2", required=True)
+    assert parser.schema.required == frozenset(["arg1", "arg2"])
+
+
+def test_argparser_parse_dict():
+    """Test the parse_dict method."""
+    parser = ArgParser()
+    args_dict = MagicMock()
+    parser.__dict__["schema"] = MagicMock()
+    assert (
+        parser.parse_dict(args_dict)
+        == parser.schema.parse.return_value)
+    assert (
+        parser.schema.parse.call_args
+        == [(args_dict, ), {}])
+
+
+# ArgSchema
+
+def test_argschema_constructor():
+    """Test the ArgSchema constructor."""
+    converter = MagicMock()
+    arguments = dict(
+        arg1=dict(required=True, help="ARG1"),
+        arg2=dict(default="DEFAULT", choices=["A", "B", "A"]),
+        arg3=dict(type=converter, required=False),
+        arg4=dict())
+    schema = ArgSchema(arguments)
+    assert schema.arguments is arguments
+    assert schema.names == frozenset(["arg1", "arg2", "arg3", "arg4"])
+    assert schema.required == frozenset(["arg1"])
+    assert schema.defaults == dict(arg2="DEFAULT")
+    assert schema.choices == dict(arg2=frozenset(["A", "B"]))
+    assert isinstance(schema.choices["arg2"], frozenset)
+    assert schema.types == dict(arg3=converter)
 
 
 @pytest.mark.parametrize(
     "args_items",
     [[], [("arg1", "value1")], [("arg1", None)],
-     [("arg1", "value1"), ("arg2", "value2")]])
+     [("arg1", "value1"), ("arg2", "value2")],
+     [("arg2", None), ("arg3", "value3")]])
 @pytest.mark.parametrize(
     "config_items",
     [[], [("arg1", {})], [("arg2", {})], [("arg1", {}), ("arg3", {})]])
-def test_argparser_parse_dict(patches, args_items, config_items):
-    """Test the parse_dict method."""
-    parser = ArgParser()
+def test_argschema_parse(patches, args_items, config_items):
+    """Test the parse method."""
+    schema = ArgSchema(dict(config_items))
     args_dict = dict(args_items)
-    parser.arguments = dict(config_items)
-    expected_handle_calls = []
-    for name, config in config_items:
-        expected_handle_calls.append(
-            [(args_dict, name, config), {}])
     patched = patches(
-        "_handle_argument",
-        prefix="synca.mcp.common.util.args.ArgParser")
+        "ArgSchema._handle_argument",
+        prefix="synca.mcp.common.util.args")
 
     with patched as (m_handle,):
-        def handle_side_effect(args_dict, name, config):
+        def handle_side_effect(args_dict, name):
             if name in args_dict and args_dict[name] is not None:
                 return f"HANDLED_{name}"
             return None
         m_handle.side_effect = handle_side_effect
         assert (
-            parser.parse_dict(args_dict)
+            schema.parse(args_dict)
             == ({name: f"HANDLED_{name}"
                  for name, _
                  in config_items
@@ -75,12 +135,23 @@ def test_argparser_parse_dict(patches, args_items, config_items):
                 | {name: value
                    for name, value
                    in args_items
-                   if (name not in parser.arguments
+                   if (name not in schema.arguments
                        and value is not None)}))
 
     assert (
         m_handle.call_args_list
-        == expected_handle_calls)
+        == [[(args_dict, name), {}] for name, _ in config_items])
+
+
+def test_argschema_parse_order():
+    """Test the parse method keeps the order and falsy-value behaviour."""
+    schema = ArgSchema(dict(
+        b=dict(default=0),
+        a=dict(default="A"),
+        c=dict(type=int)))
+    assert (
+        list(schema.parse(dict(z="Z", c="0", y=None, x="X")).items())
+        == [("a", "A"), ("z", "Z"), ("x", "X")])
 
 
 @pytest.mark.parametrize(
@@ -92,47 +163,63 @@ def test_argparser_parse_dict(patches, args_items, config_items):
 @pytest.mark.parametrize(
     "has_default",
     [True, False])
-def test_argparser_handle_argument(patches, arg_in_dict, required, has_default):
+def test_argschema_handle_argument(
+        patches, arg_in_dict, required, has_default):
     """Test the _handle_argument method."""
-    parser = ArgParser()
     name = "test_arg_name"
+    config = {}
+    if required:
+        config["required"] = True
+    if has_default:
+        config["default"] = "DEFAULT"
+    schema = ArgSchema({name: config})
     value = MagicMock()
-    args_dict = MagicMock()
-    config = MagicMock()
-    args_dict.get.return_value = value if arg_in_dict else None
-    args_dict.__getitem__.return_value = value
-    config.get.return_value = required
-    config.__contains__.return_value = has_default
+    args_dict = (
+        {name: value}
+        if arg_in_dict
+        else {name: None})
     patched = patches(
-        "_type_argument",
-        prefix="synca.mcp.common.util.args.ArgParser")
+        "ArgSchema._type_argument",
+        prefix="synca.mcp.common.util.args")
 
     with patched as (m_type,):
         if not arg_in_dict and required:
             with pytest.raises(errors.ArgValueError) as e:
-                parser._handle_argument(args_dict, name, config)
+                schema._handle_argument(args_dict, name)
         else:
             assert (
-                parser._handle_argument(args_dict, name, config)
+                schema._handle_argument(args_dict, name)
                 == (m_type.return_value if arg_in_dict
-                    else (config["default"] if has_default
+                    else ("DEFAULT" if has_default
                           else None)))
 
-    assert (
-        args_dict.get.call_args
-        == [(name,), {}])
     if not arg_in_dict and required:
-        assert "Required argument" in str(e.value)
-        assert name in str(e.value)
+        assert (
+            e.value.args[0]
+            == f"Required argument '{name}' is missing")
         assert not m_type.called
     elif arg_in_dict:
         assert (
             m_type.call_args
-            == [(args_dict.__getitem__.return_value, name, config), {}])
+            == [(value, name), {}])
     else:
         assert not m_type.called
 
 
+@pytest.mark.parametrize(
+    "value,is_choice",
+    [("A", True),
+     ("C", False),
+     (1, True),
+     (True, True),
+     ([1], False),
+     ({}, False)])
+def test_argschema_is_choice(value, is_choice):
+    """Test the _is_choice method, including unhashable values."""
+    schema = ArgSchema(dict(arg=dict(choices=["A", "B", 1])))
+    assert schema._is_choice(value, "arg") is is_choice
+
+
 @pytest.mark.parametrize(
     "has_choices",
     [True, False])
@@ -145,33 +232,25 @@ def test_argparser_handle_argument(patches, arg_in_dict, required, has_default):
 @pytest.mark.parametrize(
     "error",
     [None, ValueError, TypeError, BaseException])
-def test_argparser_type_argument(
+def test_argschema_type_argument(
         patches, has_choices, value_in_choices, has_type, error):
     """Test the _type_argument method."""
-    parser = ArgParser()
-    name = MagicMock()
+    name = "NAME"
     value = MagicMock()
-    config = MagicMock()
-    config.__contains__.side_effect = lambda k: (
-        (k == "choices" and has_choices)
-        or (k == "type" and has_type))
-    if has_choices:
-        choices = MagicMock()
-        config.__getitem__.return_value = choices
-        choices.__contains__.return_value = (
-            True
-            if value_in_choices
-            else False)
+    choices = ["A", "B"]
     type_mock = MagicMock()
-    config.__getitem__.side_effect = lambda k: (
-        (choices
-         if k == "choices"
-         else (type_mock
-               if k == "type"
-               else MagicMock())))
+    type_mock.__name__ = "test_type"
     if error:
         type_mock.side_effect = error("conversion error")
-    type_mock.__name__ = "test_type"
+    config = {}
+    if has_choices:
+        config["choices"] = choices
+    if has_type:
+        config["type"] = type_mock
+    schema = ArgSchema({name: config})
+    patched = patches(
+        "ArgSchema._is_choice",
+        prefix="synca.mcp.common.util.args")
     will_raise = bool(
         (has_choices and not value_in_choices)
         or (has_type and error))
@@ -182,48 +261,38 @@ def test_argparser_type_argument(
             or (error in [ValueError, TypeError]))
         else error)
 
-    if will_raise and expected_error:
-        with pytest.raises(expected_error) as e:
-            parser._type_argument(value, name, config)
-    else:
-        assert (
-            parser._type_argument(value, name, config)
-            == (type_mock.return_value
-                if has_type and not error
-                else value))
+    with patched as (m_choice, ):
+        m_choice.return_value = value_in_choices
+        if will_raise:
+            with pytest.raises(expected_error) as e:
+                schema._type_argument(value, name)
+        else:
+            assert (
+                schema._type_argument(value, name)
+                == (type_mock.return_value
+                    if has_type
+                    else value))
 
+    if has_choices:
+        assert (
+            m_choice.call_args
+            == [(value, name), {}])
+    else:
+        assert not m_choice.called
     if has_choices and not value_in_choices:
         assert not type_mock.called
         assert (
             e.value.args[0]
             == f"Argument '{name}' must be one of {choices}, got '{value}'")
-    elif has_type and not will_raise:
-        assert (
-            type_mock.call_args
-            == [(value,), {}])
-    elif has_type and error:
-        if error in [ValueError, TypeError]:
-            assert (
-                e.value.args[0]
-                == (f"Failed to convert '{name}' to "
-                    f"{type_mock.__name__}: conversion error"))
-        expected_error = (
-            errors.ArgValueError
-            if error in [ValueError, TypeError]
-            else error)
-        if expected_error is errors.ArgValueError:
-            assert (
-                type_mock.call_args
-                == [(value,), {}])
-    if has_choices and not value_in_choices:
-        assert (
-            config.__contains__.call_args_list
-            == [[("choices", ), {}]])
-    else:
-        assert (
-            config.__contains__.call_args_list
-            == [[("choices", ), {}], [("type", ), {}]])
-    if has_choices:
+        return
+    if not has_type:
+        assert not type_mock.called
+        return
+    assert (
+        type_mock.call_args
+        == [(value,), {}])
+    if error in [ValueError, TypeError]:
         assert (
-            choices.__contains__.call_args
-            == [(value,), {}])
+            e.value.args[0]
+            == (f"Failed to convert '{name}' to "
+                f"{type_mock.__name__}: conversion error"))
@@ -0,0 +1,163 @@
+"""Isolated tests for synca.mcp.common.util.cache."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.common.util import ResultCache
+
+
+@pytest.mark.parametrize("enabled", [None, True, False])
+@pytest.mark.parametrize("env", [{}, dict(SYNCA_MCP_CACHE="1")])
+def test_result_cache_constructor(patches, enabled, env):
+    """Test ResultCache class initialization."""
+    patched = patches(
+        "os",
+        prefix="synca.mcp.common.util.cache")
+
+    with patched as (m_os, ):
+        m_os.environ = env
+        cache = ResultCache(enabled=enabled)
+
+    assert (
+        cache.enabled
+        is (enabled
+            if enabled is not None
+            else bool(env)))
+    assert cache.max_entries == 128
+    assert cache.max_size == 64 * 1024 * 1024
+    assert cache.size == 0
+    assert len(cache) == 0
+    assert "KEY" not in cache
+
+
+def test_result_cache_clear():
+    """Test ResultCache.clear empties the cache."""
+    cache = ResultCache()
+    cache.set("A", dict(data=dict(output="A")))
+    cache.set("B", dict(data=dict(output="B")))
+    assert len(cache) == 2
+    assert not cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_result_cache_get(patches, cached):
+    """Test ResultCache.get returns a copy of a cached result."""
+    cache = ResultCache()
+    result = dict(data=dict(output="OUTPUT"))
+    if cached:
+        cache.set("KEY", result)
+    cache.set("OTHER", dict(data=dict(output="OTHER")))
+    patched = patches(
+        "copy",
+        prefix="synca.mcp.common.util.cache")
+
+    with patched as (m_copy, ):
+        assert (
+            cache.get("KEY")
+            == (m_copy.deepcopy.return_value
+                if cached
+                else None))
+
+    if not cached:
+        assert not m_copy.deepcopy.called
+        return
+    assert (
+        m_copy.deepcopy.call_args
+        == [(result, ), {}])
+    assert list(cache._entries) == ["OTHER", "KEY"]
+
+
+def test_result_cache_get_copy():
+    """Test ResultCache.get results do not share state with the cache."""
+    cache = ResultCache()
+    result = dict(data=dict(output="OUTPUT"))
+    cache.set("KEY", result)
+    result["data"]["output"] = "CHANGED"
+    cached = cache.get("KEY")
+    assert cached == dict(data=dict(output="OUTPUT"))
+    assert cached is not None
+    cached["data"]["output"] = "CHANGED"
+    assert cache.get("KEY") == dict(data=dict(output="OUTPUT"))
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_result_cache_pop(cached):
+    """Test ResultCache.pop removes a result."""
+    cache = ResultCache()
+    result = dict(data=dict(output="OUTPUT"))
+    cache.set("OTHER", result)
+    size = cache.size
+    if cached:
+        cache.set("KEY", result)
+    assert not cache.pop("KEY")
+    assert "KEY" not in cache
+    assert "OTHER" in cache
+    assert cache.size == size
+
+
+def test_result_cache_set():
+    """Test ResultCache.set caches a result and tracks its size."""
+    cache = ResultCache()
+    result = dict(data=dict(output="OUTPUT"))
+    other = dict(data=dict(output="OTHER OUTPUT"))
+    assert not cache.set("KEY", result)
+    assert "KEY" in cache
+    assert cache.size == len(json.dumps(result))
+    assert not cache.set("KEY", other)
+    assert len(cache) == 1
+    assert cache.size == len(json.dumps(other))
+    assert cache.get("KEY") == other
+
+
+def test_result_cache_set_max_entries():
+    """Test ResultCache.set evicts the least recently used results."""
+    cache = ResultCache(max_entries=2)
+    cache.set("A", dict(data=dict(output="A")))
+    cache.set("B", dict(data=dict(output="B")))
+    cache.get("A")
+    cache.set("C", dict(data=dict(output="C")))
+    assert list(cache._entries) == ["A", "C"]
+
+
+def test_result_cache_set_max_size():
+    """Test ResultCache.set evicts results to stay within the size bound."""
+    result = dict(data=dict(output="A"))
+    size = len(json.dumps(result))
+    cache = ResultCache(max_size=size * 2)
+    cache.set("A", result)
+    cache.set("B", result)
+    assert cache.size == size * 2
+    cache.set("C", result)
+    assert list(cache._entries) == ["B", "C"]
+    assert cache.size == size * 2
+    cache.set("BIG", dict(data=dict(output="A" * size * 2)))
+    assert "BIG" not in cache
+    assert list(cache._entries) == ["B", "C"]
+
+
+def test_result_cache_set_copy(patches):
+    """Test ResultCache.set stores a copy of the result."""
+    cache = ResultCache()
+    result = MagicMock()
+    patched = patches(
+        "copy",
+        "json",
+        prefix="synca.mcp.common.util.cache")
+
+    with patched as (m_copy, m_json):
+        m_json.dumps.return_value = "RESULT"
+        assert not cache.set("KEY", result)
+
+    assert (
+        m_json.dumps.call_args
+        == [(result, ), {}])
+    assert (
+        m_copy.deepcopy.call_args
+        == [(result, ), {}])
+    assert (
+        cache._entries["KEY"]
+        == (m_copy.deepcopy.return_value, 6))
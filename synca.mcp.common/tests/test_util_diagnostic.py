@@ -0,0 +1,52 @@
+"""Isolated tests for synca.mcp.common.util.diagnostic."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.common.util import Diagnostics
+
+
+def test_diagnostics_constructor():
+    """Test Diagnostics class initialization."""
+    diagnostics = Diagnostics("warning", "error")
+    assert diagnostics.kinds == dict(warning=[], error=[])
+    assert diagnostics._lines == {}
+    assert not hasattr(diagnostics, "__dict__")
+
+
+def test_diagnostics_add():
+    """Test add shares identical lines between and within kinds."""
+    diagnostics = Diagnostics("warning", "error")
+    lines = "A B A A C".split()
+    for i, line in enumerate(lines):
+        diagnostics.add(
+            "warning" if i % 2 else "error",
+            "".join(["", line]))
+    assert diagnostics["warning"] == ["B", "A"]
+    assert diagnostics["error"] == ["A", "A", "C"]
+    assert list(diagnostics._lines) == ["A", "B", "C"]
+    first = diagnostics["error"][0]
+    assert diagnostics["error"][1] is first
+    assert diagnostics["warning"][1] is first
+    with pytest.raises(KeyError):
+        diagnostics.add("note", "A")
+
+
+@pytest.mark.parametrize(
+    "lines,expected",
+    [([], {}),
+     (["a:X", "b:X", "a:X", "Y", "c:Z"], dict(X=3, Z=1)),
+     (["Y", "Y"], {})])
+def test_diagnostics_count(lines, expected):
+    """Test count counts lines by code, parsing each distinct line
+    once.
+    """
+    code = MagicMock(
+        side_effect=lambda line: (
+            line.split(":")[1]
+            if ":" in line
+            else None))
+    assert Diagnostics.count(lines, code) == expected
+    assert list(Diagnostics.count(lines, code)) == list(expected)
+    assert code.call_count == 2 * len(set(lines))
@@ -0,0 +1,121 @@
+"""Isolated tests for synca.mcp.common.util.fingerprint."""
+
+import os
+import pathlib
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.common.util import Fingerprint
+from synca.mcp.common.util.fingerprint import EXCLUDED_DIRS
+
+
+def test_fingerprint_constructor():
+    """Test Fingerprint class initialization."""
+    path = MagicMock()
+    patterns = MagicMock()
+    fingerprint = Fingerprint(path, patterns)
+    assert fingerprint.path == path
+    assert fingerprint.patterns == patterns
+    assert fingerprint.excluded == EXCLUDED_DIRS
+    assert fingerprint.hash_content is False
+    assert ".git" in EXCLUDED_DIRS
+    assert "target" in EXCLUDED_DIRS
+
+
+@pytest.mark.parametrize("hash_content", [True, False])
+def test_fingerprint_digest(patches, hash_content):
+    """Test Fingerprint.digest hashes the stat of the matching files."""
+    path = MagicMock()
+    fingerprint = Fingerprint(path, (), hash_content=hash_content)
+    files = [MagicMock(), MagicMock(), MagicMock()]
+    files[1].stat.side_effect = FileNotFoundError
+    for i, file in enumerate(files):
+        file.relative_to.return_value = f"FILE{i}"
+        file.stat.return_value.st_size = i
+        file.stat.return_value.st_mtime_ns = i * 10
+    patched = patches(
+        "hashlib",
+        ("Fingerprint.files",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.fingerprint")
+
+    with patched as (m_hash, m_files):
+        m_files.return_value = files
+        assert (
+            fingerprint.digest
+            == m_hash.blake2b.return_value.hexdigest.return_value)
+
+    assert "digest" in fingerprint.__dict__
+    digest = m_hash.blake2b.return_value
+    content = [
+        [(files[0].read_bytes.return_value, ), {}],
+        [(files[2].read_bytes.return_value, ), {}]]
+    assert (
+        m_hash.blake2b.call_args_list
+        == ([[(), dict(digest_size=20)]]
+            + (content if hash_content else [])))
+    updates = [
+        [(b"FILE0\x000\x000\x00", ), {}],
+        [(b"FILE2\x002\x0020\x00", ), {}]]
+    if hash_content:
+        updates.insert(1, [(digest.digest.return_value, ), {}])
+        updates.append([(digest.digest.return_value, ), {}])
+    assert digest.update.call_args_list == updates
+    for file in (files[0], files[2]):
+        assert (
+            file.relative_to.call_args
+            == [(path, ), {}])
+    assert not files[1].relative_to.called
+
+
+def test_fingerprint_digest_changes(tmp_path):
+    """Test Fingerprint.digest changes when matching files change."""
+    (tmp_path / "a.py").write_text("A")
+    (tmp_path / "b.txt").write_text("B")
+
+    def digest(**kwargs):
+        return Fingerprint(tmp_path, ("*.py", ), **kwargs).digest
+
+    initial = digest()
+    assert digest() == initial
+    (tmp_path / "b.txt").write_text("BB")
+    assert digest() == initial
+    (tmp_path / "a.py").write_text("AA")
+    assert digest() != initial
+    content = digest(hash_content=True)
+    stat = (tmp_path / "a.py").stat()
+    (tmp_path / "a.py").write_text("BB")
+    os.utime(tmp_path / "a.py", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert digest(hash_content=True) != content
+
+
+def test_fingerprint_files(tmp_path):
+    """Test Fingerprint.files walks the tree, skipping excluded dirs."""
+    for name in ["b.py", "a.py", "a.txt", "sub/c.py", "sub/c.pyi",
+                 ".git/d.py", "sub/target/e.py"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("")
+    fingerprint = Fingerprint(tmp_path, ("*.py", "*.pyi"))
+    assert (
+        fingerprint.files
+        == [pathlib.Path(tmp_path, name)
+            for name
+            in ["a.py", "b.py", "sub/c.py", "sub/c.pyi"]])
+    assert "files" not in fingerprint.__dict__
+
+
+@pytest.mark.parametrize(
+    "patterns,matches,misses",
+    [((), [], ["a.py", ""]),
+     (("*.py", ), ["a.py", ".py"], ["a.pyi", "a.py.bak"]),
+     (("*.rs", "Cargo.toml"), ["main.rs", "Cargo.toml"], ["Cargo.lock"])])
+def test_fingerprint_matcher(patterns, matches, misses):
+    """Test Fingerprint.matcher matches names against the patterns."""
+    fingerprint = Fingerprint(MagicMock(), patterns)
+    matcher = fingerprint.matcher
+    for name in matches:
+        assert matcher.match(name)
+    for name in misses:
+        assert not matcher.match(name)
+    assert "matcher" in fingerprint.__dict__
@@ -0,0 +1,129 @@
+"""Isolated tests for synca.mcp.common.util.flight."""
+
+import asyncio
+
+import pytest
+
+from synca.mcp.common.util import SingleFlight
+
+
+def test_single_flight_constructor():
+    """Test SingleFlight class initialization."""
+    flights: SingleFlight[str] = SingleFlight()
+    assert flights._flights == {}
+    assert len(flights) == 0
+    assert "KEY" not in flights
+
+
+@pytest.mark.asyncio
+async def test_single_flight_run():
+    """Test calls with the same key share the call in flight."""
+    flights: SingleFlight[str] = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def call(value):
+        calls.append(value)
+        await release.wait()
+        return value
+
+    runs = [
+        asyncio.create_task(flights.run(key, lambda k=key: call(k)))
+        for key
+        in ("A", "A", "B", "A")]
+    while len(calls) < 2:
+        await asyncio.sleep(0)
+    assert calls == ["A", "B"]
+    assert "A" in flights
+    assert "B" in flights
+    assert len(flights) == 2
+    release.set()
+    assert (
+        await asyncio.gather(*runs)
+        == [("A", False), ("A", True), ("B", False), ("A", True)])
+    assert len(flights) == 0
+    assert (
+        await flights.run("A", lambda: call("C"))
+        == ("C", False))
+    assert calls == ["A", "B", "C"]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_run_error():
+    """Test an error in the call is raised to all of its callers."""
+    flights: SingleFlight[str] = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        raise ValueError("BOOM")
+
+    runs = [
+        asyncio.create_task(flights.run("KEY", call))
+        for _
+        in range(2)]
+    await asyncio.sleep(0)
+    assert len(flights) == 1
+    release.set()
+    results = await asyncio.gather(*runs, return_exceptions=True)
+    assert all(
+        isinstance(result, ValueError)
+        and result.args == ("BOOM", )
+        for result
+        in results)
+    assert len(flights) == 0
+
+
+@pytest.mark.parametrize("cancelled", [1, 2])
+@pytest.mark.asyncio
+async def test_single_flight_run_cancelled(cancelled):
+    """Test the call is cancelled only once all of its callers are."""
+    flights: SingleFlight[str] = SingleFlight()
+    release = asyncio.Event()
+    started = asyncio.Event()
+    stopped = asyncio.Event()
+
+    async def call():
+        started.set()
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            stopped.set()
+            raise
+        return "RESULT"
+
+    runs = [
+        asyncio.create_task(flights.run("KEY", call))
+        for _
+        in range(2)]
+    await started.wait()
+    task = flights._flights["KEY"].task
+    for run in runs[:cancelled]:
+        run.cancel()
+    for run in runs[:cancelled]:
+        with pytest.raises(asyncio.CancelledError):
+            await run
+    if cancelled == 2:
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert stopped.is_set()
+        assert len(flights) == 0
+        return
+    assert not stopped.is_set()
+    assert flights._flights["KEY"].waiters == 1
+    release.set()
+    assert await runs[1] == ("RESULT", True)
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_land():
+    """Test a landed call only removes its own flight."""
+    flights: SingleFlight[str] = SingleFlight()
+    flight = object()
+    other = object()
+    flights._flights["KEY"] = other  # type:ignore
+    flights._land("KEY", flight)  # type:ignore
+    assert flights._flights == dict(KEY=other)
+    flights._land("KEY", other)  # type:ignore
+    assert flights._flights == {}
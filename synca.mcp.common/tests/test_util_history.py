@@ -0,0 +1,646 @@
+"""Isolated tests for synca.mcp.common.util.history."""
+
+import pathlib
+import sqlite3
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.common import errors
+from synca.mcp.common.util import History
+from synca.mcp.common.util.history import (
+    COLUMNS, git_commit, head_commit, percentile)
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+def _run(**kwargs):
+    return dict(
+        dict(
+            started=1000.0,
+            tool="BuildTool",
+            command="cargo build",
+            cwd="/src",
+            git_commit=SHA,
+            duration=1.0,
+            return_code=0,
+            output_bytes=100,
+            errors=0,
+            warnings=1,
+            issues=None,
+            failed=False,
+            cache=None,
+            coalesced=False,
+            phases=dict(total=1.0),
+            summary=None),
+        **kwargs)
+
+
+@pytest.mark.parametrize("cwd", [None, "", "CWD"])
+@pytest.mark.parametrize("git", [None, "root", "parent"])
+@pytest.mark.parametrize("raises", [False, True])
+def test_git_commit(patches, tmp_path, cwd, git, raises):
+    """Test git_commit finds the repository containing the path."""
+    path = tmp_path / "repo" / "sub"
+    path.mkdir(parents=True)
+    if git == "root":
+        (path / ".git").mkdir()
+    elif git == "parent":
+        (tmp_path / "repo" / ".git").write_text("")
+    patched = patches(
+        "head_commit",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_head, ):
+        if raises:
+            m_head.side_effect = OSError("BOOM")
+        result = git_commit(str(path) if cwd else cwd)
+
+    if not cwd or not git:
+        assert result is None
+        assert not m_head.called
+        return
+    assert (
+        m_head.call_args
+        == [((path if git == "root" else tmp_path / "repo") / ".git", ),
+            {}])
+    assert result == (None if raises else m_head.return_value)
+
+
+@pytest.mark.parametrize(
+    "head,files,expected",
+    [(SHA, {}, SHA),
+     ("", {}, None),
+     ("ref: refs/heads/main", {"refs/heads/main": SHA}, SHA),
+     ("ref: refs/heads/main", {"refs/heads/main": ""}, None),
+     ("ref: refs/heads/main",
+      {"packed-refs": (
+          "# pack-refs with: peeled\n"
+          f"{'f' * 40} refs/heads/other\n"
+          f"{SHA} refs/heads/main\n")},
+      SHA),
+     ("ref: refs/heads/main",
+      {"packed-refs": f"{SHA} refs/heads/other\n"},
+      None),
+     ("ref: refs/heads/main", {}, None)])
+@pytest.mark.parametrize("worktree", [False, True])
+def test_head_commit(tmp_path, head, files, expected, worktree):
+    """Test head_commit reads the commit of HEAD."""
+    repo = tmp_path / "repo" / ".git"
+    repo.mkdir(parents=True)
+    git = repo
+    for name, content in files.items():
+        (repo / name).parent.mkdir(parents=True, exist_ok=True)
+        (repo / name).write_text(content)
+    if worktree:
+        git = repo / "worktrees" / "wt"
+        git.mkdir(parents=True)
+        (git / "commondir").write_text("../..\n")
+        (tmp_path / "wt").mkdir()
+        (tmp_path / "wt" / ".git").write_text(f"gitdir: {git}\n")
+    (git / "HEAD").write_text(f"{head}\n")
+    assert (
+        head_commit(tmp_path / "wt" / ".git" if worktree else repo)
+        == expected)
+
+
+def test_git_commit_repo():
+    """Test git_commit of this repository."""
+    commit = git_commit(str(pathlib.Path(__file__).parent))
+    assert commit is None or len(commit) == 40
+
+
+@pytest.mark.parametrize(
+    "values,p,expected",
+    [([1.0], 50, 1.0),
+     ([1.0], 95, 1.0),
+     ([1.0, 2.0], 50, 1.0),
+     ([1.0, 2.0], 95, 2.0),
+     ([float(i) for i in range(1, 101)], 95, 95.0),
+     ([float(i) for i in range(1, 101)], 50, 50.0),
+     ([float(i) for i in range(1, 101)], 0, 1.0)])
+def test_percentile(values, p, expected):
+    """Test percentile of sorted values."""
+    assert percentile(values, p) == expected
+
+
+@pytest.mark.parametrize("path", [None, "", "PATH"])
+@pytest.mark.parametrize(
+    "env",
+    [{},
+     dict(SYNCA_MCP_HISTORY_FILE=""),
+     dict(SYNCA_MCP_HISTORY_FILE="ENVPATH")])
+def test_history_constructor(patches, path, env):
+    """Test History class initialization."""
+    patched = patches(
+        "os",
+        ("History.default_path",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_os, m_default):
+        m_os.environ = env
+        m_default.return_value = "DEFAULT"
+        history = History(path)
+
+    assert (
+        history.path
+        == (path
+            if path is not None
+            else env.get("SYNCA_MCP_HISTORY_FILE", "DEFAULT")))
+    assert history.max_age == 90 * 24 * 60 * 60
+    assert history.prune_interval == 60 * 60
+    assert history._created is False
+    assert history.pruned == float("-inf")
+    assert history.queue.empty()
+    assert history.writer is None
+
+
+@pytest.mark.parametrize("state", [None, "", "STATE"])
+def test_history_default_path(patches, state):
+    """Test default_path is in the user's state dir."""
+    history = History("PATH")
+    patched = patches(
+        "os",
+        "pathlib.Path.home",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_os, m_home):
+        m_os.environ = (
+            dict(XDG_STATE_HOME=state)
+            if state is not None
+            else {})
+        m_home.return_value = pathlib.Path("HOME")
+        assert (
+            history.default_path
+            == (pathlib.Path(state or "HOME/.local/state")
+                / "synca-mcp"
+                / "history.sqlite3"))
+
+
+def test_history_connect(tmp_path):
+    """Test connect creates the database once, and commits changes."""
+    path = tmp_path / "state" / "history.sqlite3"
+    history = History(str(path))
+
+    with history.connect() as db:
+        assert db.row_factory is sqlite3.Row
+        db.execute(
+            "INSERT INTO runs (started, tool, duration, output_bytes, "
+            "failed, coalesced, phases) VALUES (1, 'T', 1, 0, 0, 0, '{}')")
+    assert history._created is True
+    assert (
+        sqlite3.connect(path).execute(
+            "PRAGMA journal_mode").fetchone()[0]
+        == "wal")
+    path.parent.rename(tmp_path / "moved")
+
+    with pytest.raises(sqlite3.OperationalError):
+        with history.connect():
+            pass
+    with sqlite3.connect(tmp_path / "moved" / "history.sqlite3") as db:
+        assert db.execute("SELECT count(*) FROM runs").fetchone()[0] == 1
+
+
+def test_history_connect_rollback(tmp_path):
+    """Test connect rolls back changes if the body fails."""
+    history = History(str(tmp_path / "history.sqlite3"))
+
+    with pytest.raises(ValueError):
+        with history.connect() as db:
+            db.execute(
+                "INSERT INTO runs (started, tool, duration, output_bytes, "
+                "failed, coalesced, phases) "
+                "VALUES (1, 'T', 1, 0, 0, 0, '{}')")
+            raise ValueError("BOOM")
+
+    with history.connect() as db:
+        assert db.execute("SELECT count(*) FROM runs").fetchone()[0] == 0
+
+
+def test_history_connect_disabled():
+    """Test connect to a disabled history."""
+    history = History("")
+    with pytest.raises(errors.ArgValueError) as e:
+        with history.connect():
+            pass
+    assert e.value.args[0] == "Run history is disabled"
+
+
+def test_history_open_fails(patches, tmp_path):
+    """Test open closes the connection if the database cannot be set up.
+    """
+    history = History(str(tmp_path / "history.sqlite3"))
+    patched = patches(
+        "sqlite3.connect",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_connect, ):
+        m_connect.return_value.execute.side_effect = (
+            sqlite3.OperationalError("BOOM"))
+        with pytest.raises(sqlite3.OperationalError):
+            history.open()
+
+    assert (
+        m_connect.return_value.close.call_args
+        == [(), {}])
+    assert history._created is False
+
+
+@pytest.mark.parametrize("tool", [None, "TOOL"])
+@pytest.mark.parametrize("cwd", [None, "CWD"])
+@pytest.mark.parametrize("days", [1, 0.5])
+def test_history_filters(patches, tool, cwd, days):
+    """Test filters matches runs of the tool and path, by age."""
+    history = History("PATH")
+    patched = patches(
+        "time",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_time, ):
+        m_time.time.return_value = 100000.0
+        where, params = history.filters(tool, cwd, days)
+
+    expected_where = ["started >= ?"]
+    expected_params: list = [100000.0 - days * 24 * 60 * 60]
+    if tool:
+        expected_where.append("tool = ?")
+        expected_params.append(tool)
+    if cwd:
+        expected_where.append("cwd = ?")
+        expected_params.append(cwd)
+    assert where == " AND ".join(expected_where)
+    assert params == expected_params
+
+
+@pytest.mark.parametrize(
+    "group_by",
+    ["tool", "cwd", "commit", "day", "nope"])
+def test_history_groups(patches, tmp_path, group_by):
+    """Test groups gets statistics of each group of runs."""
+    history = History(str(tmp_path / "history.sqlite3"))
+    patched = patches(
+        "History.filters",
+        "History.stats",
+        prefix="synca.mcp.common.util.history")
+    for run in (_run(), _run(tool="ClippyTool", started=2000.0)):
+        history.record(run)
+    history.close()
+
+    with patched as (m_filters, m_stats):
+        m_filters.return_value = ("tool = ?", ["BuildTool"])
+        m_stats.return_value = list(range(10))
+        if group_by == "nope":
+            with pytest.raises(errors.ArgValueError) as e:
+                history.groups(group_by, "TOOL", "CWD", 7, 3)
+        else:
+            assert (
+                history.groups(group_by, "TOOL", "CWD", 7, 3)
+                == [0, 1, 2])
+
+    if group_by == "nope":
+        assert (
+            e.value.args[0]
+            == ("Unknown group_by 'nope', must be in "
+                "['tool', 'cwd', 'commit', 'day']"))
+        assert not m_filters.called
+        return
+    assert (
+        m_filters.call_args
+        == [("TOOL", "CWD", 7), {}])
+    (rows, ), _ = m_stats.call_args
+    assert len(rows) == 1
+    assert (
+        rows[0]["key"]
+        == dict(
+            tool="BuildTool",
+            cwd="/src",
+            commit=SHA,
+            day="1970-01-01")[group_by])
+
+
+def test_history_record(tmp_path):
+    """Test recorded runs are written by the writer thread."""
+    history = History(str(tmp_path / "history.sqlite3"))
+    runs = [
+        _run(started=1000.0),
+        _run(started=1050.0, summary=dict(passed=3), phases={}),
+        _run(started=1200.0, failed=True, coalesced=True)]
+    for run in runs:
+        history.record(run)
+    writer = history.writer
+    assert writer
+    history.flush()
+    history.record(_run(started=1300.0))
+    assert history.writer is writer
+    history.close()
+    assert not writer.is_alive()
+    assert history.writer is None
+
+    with history.connect() as db:
+        rows = db.execute("SELECT * FROM runs ORDER BY started").fetchall()
+    assert (
+        [history.run(row) for row in rows][:3]
+        == runs)
+    assert len(rows) == 4
+
+
+def test_history_record_queue(patches):
+    """Test record queues runs, starting the writer thread once."""
+    history = History("PATH")
+    patched = patches(
+        "atexit",
+        "threading",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_atexit, m_threading):
+        history.record("RUN1")
+        history.record("RUN2")
+
+    assert history.writer == m_threading.Thread.return_value
+    assert (
+        m_threading.Thread.call_args_list
+        == [[(),
+             dict(target=history.write,
+                  name="synca-mcp-history",
+                  daemon=True)]])
+    assert (
+        m_threading.Thread.return_value.start.call_args_list
+        == [[(), {}]])
+    assert (
+        m_atexit.register.call_args_list
+        == [[(history.close, ), {}]])
+    assert history.queue.get_nowait() == "RUN1"
+    assert history.queue.get_nowait() == "RUN2"
+
+
+def test_history_record_disabled():
+    """Test record to a disabled history."""
+    history = History("")
+    assert not history.record(_run())
+    assert history.writer is None
+    assert history.queue.empty()
+
+
+@pytest.mark.parametrize("writer", [True, False])
+def test_history_close(patches, writer):
+    """Test close stops the writer once its queued runs are written."""
+    history = History("PATH")
+    m_writer = MagicMock() if writer else None
+    history.writer = m_writer
+    patched = patches(
+        "atexit",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_atexit, ):
+        assert not history.close()
+
+    assert history.writer is None
+    if not m_writer:
+        assert history.queue.empty()
+        assert not m_atexit.unregister.called
+        return
+    assert history.queue.get_nowait() is None
+    assert (
+        m_writer.join.call_args
+        == [(), {}])
+    assert (
+        m_atexit.unregister.call_args
+        == [(history.close, ), {}])
+
+
+def test_history_flush():
+    """Test flush waits for the queued runs."""
+    history = History("PATH")
+    history.queue = MagicMock()
+    assert not history.flush()
+    assert (
+        history.queue.join.call_args
+        == [(), {}])
+
+
+@pytest.mark.parametrize("pruned", [None, 100.0, 4000.0])
+def test_history_insert(patches, tmp_path, pruned):
+    """Test insert adds runs, dropping old runs every prune_interval."""
+    history = History(
+        str(tmp_path / "history.sqlite3"),
+        max_age=175,
+        prune_interval=3600)
+    if pruned is not None:
+        history.pruned = pruned
+    old = _run(started=900.0)
+    runs = [_run(started=1100.0), _run(started=1050.0)]
+    patched = patches(
+        "time",
+        prefix="synca.mcp.common.util.history")
+
+    with history.connect() as db:
+        db.execute(
+            f"INSERT INTO runs ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(COLUMNS))})",
+            history.values(old))
+        with patched as (m_time, ):
+            m_time.monotonic.return_value = 5000.0
+            history.insert(db, runs)
+        started = [
+            row["started"]
+            for row
+            in db.execute("SELECT started FROM runs ORDER BY started")]
+
+    prune = pruned is None or pruned == 100.0
+    assert (
+        started
+        == ([1050.0, 1100.0]
+            if prune
+            else [900.0, 1050.0, 1100.0]))
+    assert history.pruned == (5000.0 if prune else pruned)
+
+
+@pytest.mark.parametrize("commit", [None, SHA])
+def test_history_values(patches, commit):
+    """Test the column values of a run."""
+    history = History("PATH")
+    run = _run(git_commit=commit, summary=dict(passed=3))
+    patched = patches(
+        "git_commit",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_commit, ):
+        values = history.values(run)
+
+    assert (
+        values
+        == list(dict(
+            run,
+            git_commit=commit or m_commit.return_value,
+            phases='{"total": 1.0}',
+            summary='{"passed": 3}').values()))
+    if commit:
+        assert not m_commit.called
+        return
+    assert (
+        m_commit.call_args
+        == [("/src", ), {}])
+    assert history.values(_run())[-1] is None
+
+
+def test_history_write(patches):
+    """Test write writes the runs queued at once, with one connection."""
+    history = History("PATH")
+    for run in ("RUN1", "RUN2", None):
+        history.queue.put(run)
+    patched = patches(
+        "History.insert",
+        "History.open",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_insert, m_open):
+        assert not history.write()
+
+    assert (
+        m_open.call_args_list
+        == [[(), {}]])
+    assert (
+        m_insert.call_args_list
+        == [[(m_open.return_value, ["RUN1", "RUN2"]), {}]])
+    assert (
+        m_open.return_value.close.call_args_list
+        == [[(), {}]])
+    assert history.queue.unfinished_tasks == 0
+
+
+@pytest.mark.parametrize("error", [sqlite3.OperationalError, OSError])
+@pytest.mark.parametrize("fails", ["open", "insert"])
+def test_history_write_error(patches, error, fails):
+    """Test write drops runs it cannot write, and reconnects."""
+    history = History("PATH")
+    history.queue.put("RUN1")
+    dbs = [MagicMock(), MagicMock()]
+    patched = patches(
+        "History.insert",
+        "History.open",
+        prefix="synca.mcp.common.util.history")
+
+    def fail(*args):
+        history.queue.put("RUN2")
+        history.queue.put(None)
+        raise error("BOOM")
+
+    with patched as (m_insert, m_open):
+        if fails == "open":
+            opens = iter([fail, lambda: dbs[1]])
+            m_open.side_effect = lambda: next(opens)()
+        else:
+            m_open.side_effect = dbs
+            m_insert.side_effect = (
+                lambda db, runs: fail() if runs == ["RUN1"] else None)
+        assert not history.write()
+
+    assert len(m_open.call_args_list) == 2
+    assert (
+        m_insert.call_args_list
+        == ([[(dbs[1], ["RUN2"]), {}]]
+            if fails == "open"
+            else [[(dbs[0], ["RUN1"]), {}],
+                  [(dbs[1], ["RUN2"]), {}]]))
+    assert (
+        dbs[0].close.call_args_list
+        == ([] if fails == "open" else [[(), {}]]))
+    assert (
+        dbs[1].close.call_args_list
+        == [[(), {}]])
+    assert history.queue.unfinished_tasks == 0
+
+
+@pytest.mark.parametrize("order", ["recent", "slowest", "nope"])
+@pytest.mark.parametrize("limit", [1, 2, 5])
+def test_history_runs(patches, tmp_path, order, limit):
+    """Test runs lists the matching runs in order."""
+    history = History(str(tmp_path / "history.sqlite3"))
+    runs = [
+        _run(started=1000.0, duration=2.0),
+        _run(started=2000.0, duration=1.0),
+        _run(started=3000.0, duration=3.0, tool="ClippyTool")]
+    for run in runs:
+        history.record(run)
+    history.close()
+    patched = patches(
+        "History.filters",
+        prefix="synca.mcp.common.util.history")
+
+    with patched as (m_filters, ):
+        m_filters.return_value = ("tool = ?", ["BuildTool"])
+        if order == "nope":
+            with pytest.raises(errors.ArgValueError) as e:
+                history.runs("TOOL", "CWD", 7, order, limit)
+        else:
+            result = history.runs("TOOL", "CWD", 7, order, limit)
+
+    if order == "nope":
+        assert (
+            e.value.args[0]
+            == "Unknown order 'nope', must be in ['recent', 'slowest']")
+        assert not m_filters.called
+        return
+    assert (
+        m_filters.call_args
+        == [("TOOL", "CWD", 7), {}])
+    expected = (
+        [runs[1], runs[0]]
+        if order == "recent"
+        else [runs[0], runs[1]])
+    assert result == expected[:limit]
+
+
+def test_history_stats(tmp_path):
+    """Test stats of each group of runs, latest group first."""
+    history = History(str(tmp_path / "history.sqlite3"))
+    runs = [
+        _run(started=float(i), duration=float(i % 20 + 1),
+             failed=i == 3, output_bytes=i, errors=i, warnings=None)
+        for i
+        in range(40)]
+    runs.append(_run(started=20.5, tool="ClippyTool", issues=7))
+    for run in runs:
+        history.record(run)
+    history.close()
+
+    with history.connect() as db:
+        rows = db.execute(
+            "SELECT tool AS key, * FROM runs ORDER BY started").fetchall()
+    expected = [
+        dict(
+            key="BuildTool",
+            runs=40,
+            failed=1,
+            first=0.0,
+            last=39.0,
+            mean=10.5,
+            p50=10.0,
+            p95=19.0,
+            max=20.0,
+            output_bytes=39,
+            last_errors=39,
+            last_warnings=None,
+            last_issues=None),
+        dict(
+            key="ClippyTool",
+            runs=1,
+            failed=0,
+            first=20.5,
+            last=20.5,
+            mean=1.0,
+            p50=1.0,
+            p95=1.0,
+            max=1.0,
+            output_bytes=100,
+            last_errors=0,
+            last_warnings=1,
+            last_issues=7)]
+    assert history.stats(rows) == expected
+    assert history.stats([]) == []
+
+
+def test_history_columns():
+    """Test the columns are the fields of a run."""
+    assert list(COLUMNS) == list(_run())
@@ -7,6 +7,27 @@ import pytest
 from synca.mcp.common.util import JQFilter
 
 
+def test_jq_filter_compile(patches):
+    """Test the JQFilter.compile method caches compiled programs."""
+    patched = patches("jq.compile")
+    JQFilter.compile.cache_clear()
+
+    with patched as (m_compile, ):
+        assert (
+            JQFilter.compile("FILTER")
+            == m_compile.return_value)
+        assert (
+            JQFilter.compile("FILTER")
+            == m_compile.return_value)
+        JQFilter.compile("OTHER FILTER")
+
+    JQFilter.compile.cache_clear()
+    assert (
+        m_compile.call_args_list
+        == [[("FILTER",), {}],
+            [("OTHER FILTER",), {}]])
+
+
 @pytest.mark.parametrize("jq_filter", [None, MagicMock()])
 def test_jq_filter_apply(patches, jq_filter):
     """Test the JQFilter.apply method.
@@ -15,11 +36,11 @@ def test_jq_filter_apply(patches, jq_filter):
     """
     json_str = MagicMock()
     patched = patches(
-        "jq",
         "str",
+        "JQFilter.compile",
         prefix="synca.mcp.common.util.jq")
 
-    with patched as (m_jq, m_str):
+    with patched as (m_str, m_compile):
         if jq_filter is None:
             assert (
                 JQFilter.apply(json_str, jq_filter)
@@ -30,17 +51,53 @@ def test_jq_filter_apply(patches, jq_filter):
                 == m_str.return_value)
 
     if jq_filter is None:
-        assert not m_jq.compile.called
+        assert not m_compile.called
         assert not m_str.called
         return
     assert (
-        m_jq.compile.call_args
+        m_compile.call_args
         == [(jq_filter,), {}])
     assert (
-        m_jq.compile.return_value.input_text.call_args
+        m_compile.return_value.input_text.call_args
         == [(json_str,), {}])
+    program = m_compile.return_value
+    assert (
+        m_str.call_args
+        == [(program.input_text.return_value.text.return_value,), {}])
+
+
+@pytest.mark.parametrize("jq_filter", [None, MagicMock()])
+def test_jq_filter_apply_data(patches, jq_filter):
+    """Test the JQFilter.apply_data method."""
+    data = MagicMock()
+    patched = patches(
+        "json",
+        "str",
+        "JQFilter.compile",
+        prefix="synca.mcp.common.util.jq")
+
+    with patched as (m_json, m_str, m_compile):
+        assert (
+            JQFilter.apply_data(data, jq_filter)
+            == (m_json.dumps.return_value
+                if jq_filter is None
+                else m_str.return_value))
+
+    if jq_filter is None:
+        assert (
+            m_json.dumps.call_args
+            == [(data,), {}])
+        assert not m_compile.called
+        assert not m_str.called
+        return
+    assert not m_json.dumps.called
+    assert (
+        m_compile.call_args
+        == [(jq_filter,), {}])
+    assert (
+        m_compile.return_value.input_value.call_args
+        == [(data,), {}])
+    program = m_compile.return_value
     assert (
         m_str.call_args
-        == [((m_jq.compile.return_value
-                  .input_text.return_value
-                  .text.return_value),), {}])
+        == [(program.input_value.return_value.text.return_value,), {}])
@@ -0,0 +1,299 @@
+"""Isolated tests for synca.mcp.common.util.process."""
+
+import asyncio
+import os
+import resource
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.common.util import Process
+from synca.mcp.common.util.process import MAXRSS_UNIT, RLIMITS, env_limit
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("0", 0),
+     ("1024", 1024),
+     ("-1", None),
+     ("1.5", None),
+     ("10k", None),
+     ("١٢", None)])
+def test_env_limit(caplog, value, expected):
+    """Test limits set in the environment are whole numbers, and other
+    values are ignored with a warning, once.
+    """
+    env_limit.cache_clear()
+    assert env_limit("cpu", value) == expected
+    assert env_limit("cpu", value) == expected
+    if expected is not None:
+        assert not caplog.records
+        return
+    assert (
+        [record.getMessage() for record in caplog.records]
+        == [f"Ignoring SYNCA_MCP_RLIMIT_CPU={value!r}, which is not a "
+            "whole number"])
+
+
+def test_process_constructor():
+    """Test Process class initialization."""
+    popen = MagicMock()
+    stdout = MagicMock()
+    stderr = MagicMock()
+    process = Process(popen, stdout, stderr)
+    assert process.popen == popen
+    assert process.stdout == stdout
+    assert process.stderr == stderr
+    assert process.resources is None
+    assert process.transports == []
+    assert process._waiter is None
+    assert process.poll_interval == 0.05
+    assert process.pid == popen.pid
+    assert process.returncode == popen.returncode
+
+
+@pytest.mark.parametrize("limits", [None, {}, dict(cpu=5, open_files=64)])
+@pytest.mark.asyncio
+async def test_process_create(patches, tmp_path, limits):
+    """Test create starts the command and connects its output."""
+    patched = patches(
+        "Process.limit",
+        prefix="synca.mcp.common.util.process")
+
+    with patched as (m_limit, ):
+        process = await Process.create(
+            sys.executable, "-c",
+            "import os, sys; print(os.getcwd()); print('E', file=sys.stderr)",
+            cwd=str(tmp_path),
+            limits=limits)
+        try:
+            assert (
+                await process.communicate()
+                == (f"{tmp_path}\n".encode(), b"E\n"))
+        finally:
+            process.close()
+
+    assert process.returncode == 0
+    assert len(process.transports) == 2
+    assert all(t.is_closing() for t in process.transports)
+    assert (
+        m_limit.call_args_list
+        == [[(process.pid, RLIMITS[name], limit), {}]
+            for name, limit
+            in (limits or {}).items()])
+
+
+@pytest.mark.asyncio
+async def test_process_create_limited(tmp_path):
+    """Test create limits the process resources."""
+    process = await Process.create(
+        sys.executable, "-c",
+        "import resource; print(resource.getrlimit(resource.RLIMIT_NOFILE))",
+        cwd=str(tmp_path),
+        limits=dict(open_files=32))
+    try:
+        stdout, _ = await process.communicate()
+    finally:
+        process.close()
+    if hasattr(resource, "prlimit"):
+        assert stdout == b"(32, 32)\n"
+    assert process.returncode == 0
+
+
+@pytest.mark.parametrize("hard", [resource.RLIM_INFINITY, 10, 1000])
+@pytest.mark.parametrize("raises", [False, True])
+def test_process_limit(patches, hard, raises):
+    """Test limit sets the resource limit of a process, up to the hard
+    limit.
+    """
+    patched = patches(
+        "resource",
+        prefix="synca.mcp.common.util.process")
+
+    with patched as (m_resource, ):
+        m_resource.RLIM_INFINITY = resource.RLIM_INFINITY
+        m_resource.prlimit.side_effect = (
+            ProcessLookupError
+            if raises
+            else [(23, hard), None])
+        assert not Process.limit(7, 13, 100)
+
+    if raises:
+        assert (
+            m_resource.prlimit.call_args_list
+            == [[(7, 13), {}]])
+        return
+    limit = (
+        100
+        if hard == resource.RLIM_INFINITY
+        else min(100, hard))
+    assert (
+        m_resource.prlimit.call_args_list
+        == [[(7, 13), {}],
+            [(7, 13, (limit, limit)), {}]])
+
+
+def test_process_limit_unsupported(patches):
+    """Test limit does nothing without `prlimit`."""
+    patched = patches(
+        "resource",
+        prefix="synca.mcp.common.util.process")
+
+    with patched as (m_resource, ):
+        del m_resource.prlimit
+        assert not Process.limit(7, 13, 100)
+
+
+def test_process_close():
+    """Test close closes the transports."""
+    process = Process(MagicMock(), MagicMock(), MagicMock())
+    process.transports = [MagicMock(), MagicMock()]
+    assert not process.close()
+    for transport in process.transports:
+        assert (
+            transport.close.call_args
+            == [(), {}])
+
+
+@pytest.mark.parametrize("supported", [True, False])
+@pytest.mark.parametrize("raises", [False, True])
+def test_process_pidfd(patches, supported, raises):
+    """Test pidfd opens a pidfd where supported."""
+    popen = MagicMock()
+    process = Process(popen, MagicMock(), MagicMock())
+    patched = patches(
+        "os",
+        prefix="synca.mcp.common.util.process")
+
+    with patched as (m_os, ):
+        if not supported:
+            del m_os.pidfd_open
+        elif raises:
+            m_os.pidfd_open.side_effect = OSError
+        result = process.pidfd()
+
+    if not supported:
+        assert result is None
+        return
+    assert (
+        m_os.pidfd_open.call_args
+        == [(popen.pid, ), {}])
+    assert (
+        result
+        == (None
+            if raises
+            else m_os.pidfd_open.return_value))
+
+
+@pytest.mark.asyncio
+async def test_process_readable():
+    """Test readable waits for a file descriptor to be readable."""
+    process = Process(MagicMock(), MagicMock(), MagicMock())
+    read, write = os.pipe()
+    try:
+        task = asyncio.create_task(process.readable(read))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        os.write(write, b"x")
+        await asyncio.wait_for(task, 1)
+        os.write(write, b"x")
+        await asyncio.wait_for(process.readable(read), 1)
+    finally:
+        os.close(read)
+        os.close(write)
+
+
+@pytest.mark.parametrize("exited", [True, False])
+def test_process_reap(patches, exited):
+    """Test reap collects the exit status and resource usage."""
+    popen = MagicMock()
+    popen.returncode = None
+    process = Process(popen, MagicMock(), MagicMock())
+    rusage = MagicMock()
+    patched = patches(
+        "os",
+        prefix="synca.mcp.common.util.process")
+
+    with patched as (m_os, ):
+        m_os.wait4.return_value = (
+            (popen.pid if exited else 0),
+            MagicMock(),
+            rusage)
+        assert process.reap() == exited
+
+    assert (
+        m_os.wait4.call_args
+        == [(popen.pid, m_os.WNOHANG), {}])
+    if not exited:
+        assert popen.returncode is None
+        assert process.resources is None
+        assert not m_os.waitstatus_to_exitcode.called
+        return
+    assert (
+        m_os.waitstatus_to_exitcode.call_args
+        == [(m_os.wait4.return_value[1], ), {}])
+    assert popen.returncode == m_os.waitstatus_to_exitcode.return_value
+    assert (
+        process.resources
+        == dict(
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            max_rss=rusage.ru_maxrss * MAXRSS_UNIT,
+            read_blocks=rusage.ru_inblock,
+            write_blocks=rusage.ru_oublock))
+
+
+@pytest.mark.parametrize(
+    "pidfd",
+    [pytest.param(
+        True,
+        marks=pytest.mark.skipif(
+            not hasattr(os, "pidfd_open"),
+            reason="os.pidfd_open is only available on Linux")),
+     False])
+@pytest.mark.asyncio
+async def test_process_wait(patches, tmp_path, pidfd):
+    """Test wait reaps the process once it exits, with or without a
+    pidfd.
+    """
+    process = await Process.create(
+        sys.executable, "-c",
+        "import sys, time; time.sleep(0.1); sys.exit(3)",
+        cwd=str(tmp_path))
+    process.close()
+    patched = patches(
+        "Process.pidfd",
+        prefix="synca.mcp.common.util.process")
+
+    with patched as (m_pidfd, ):
+        if pidfd:
+            m_pidfd.side_effect = lambda: os.pidfd_open(process.pid)
+        else:
+            m_pidfd.return_value = None
+        process.poll_interval = 0.01
+        waits = await asyncio.gather(process.wait(), process.wait())
+        assert await process.wait() == 3
+
+    assert waits == [3, 3]
+    assert process.returncode == 3
+    assert m_pidfd.call_count == 1
+    assert process.resources
+    assert process.resources["user_time"] >= 0
+    assert process.resources["max_rss"] > 0
+
+
+@pytest.mark.asyncio
+async def test_process_wait_cancelled(tmp_path):
+    """Test cancelling a wait does not stop the process being reaped."""
+    process = await Process.create(
+        sys.executable, "-c", "import time; time.sleep(0.1)",
+        cwd=str(tmp_path))
+    process.close()
+    waiting = asyncio.create_task(process.wait())
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert await asyncio.wait_for(process.wait(), 5) == 0
+    assert process.resources
@@ -0,0 +1,231 @@
+"""Isolated tests for synca.mcp.common.util.scheduler."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.common.util import Scheduler
+
+
+@pytest.mark.parametrize("slots", [None, 3])
+@pytest.mark.parametrize("fast_slots", [None, 5])
+@pytest.mark.parametrize("env", [{}, dict(SYNCA_MCP_SLOTS="7")])
+@pytest.mark.parametrize("fast_env", [{}, dict(SYNCA_MCP_FAST_SLOTS="9")])
+@pytest.mark.parametrize("cpu_count", [None, 4])
+def test_scheduler_constructor(
+        patches, slots, fast_slots, env, fast_env, cpu_count):
+    """Test Scheduler class initialization."""
+    patched = patches(
+        "os",
+        prefix="synca.mcp.common.util.scheduler")
+
+    with patched as (m_os, ):
+        m_os.environ = env | fast_env
+        m_os.cpu_count.return_value = cpu_count
+        scheduler = Scheduler(slots, fast_slots)
+
+    assert (
+        scheduler.slots
+        == dict(
+            default=(
+                slots
+                or int(env.get("SYNCA_MCP_SLOTS", 0))
+                or cpu_count
+                or 1),
+            fast=(
+                fast_slots
+                or int(fast_env.get("SYNCA_MCP_FAST_SLOTS", 0))
+                or 16)))
+    assert list(scheduler._lanes) == ["default", "fast"]
+    for lane, semaphore in scheduler._lanes.items():
+        assert isinstance(semaphore, asyncio.Semaphore)
+        assert semaphore._value == scheduler.slots[lane]
+    assert scheduler._limits == {}
+    assert scheduler._users == {}
+    empty = dict(
+        waiting=0,
+        running=0,
+        started=0,
+        wait_total=0.0,
+        wait_max=0.0)
+    assert (
+        scheduler.metrics
+        == dict(default=empty, fast=empty))
+
+
+def test_scheduler_metrics(patches):
+    """Test Scheduler.metrics returns a copy of the lane metrics."""
+    scheduler = Scheduler(1, 1)
+    patched = patches(
+        "copy",
+        prefix="synca.mcp.common.util.scheduler")
+
+    with patched as (m_copy, ):
+        assert (
+            scheduler.metrics
+            == m_copy.deepcopy.return_value)
+
+    assert (
+        m_copy.deepcopy.call_args
+        == [(scheduler._metrics, ), {}])
+    assert "metrics" not in scheduler.__dict__
+
+
+def test_scheduler_limit(patches):
+    """Test Scheduler.limit creates a semaphore per key."""
+    scheduler = Scheduler(1, 1)
+    key = MagicMock()
+    patched = patches(
+        "asyncio",
+        prefix="synca.mcp.common.util.scheduler")
+
+    with patched as (m_aio, ):
+        assert (
+            scheduler.limit(key, 23)
+            == m_aio.Semaphore.return_value)
+        assert (
+            scheduler.limit(key, 7)
+            == m_aio.Semaphore.return_value)
+
+    assert (
+        m_aio.Semaphore.call_args_list
+        == [[(23, ), {}]])
+    assert scheduler._limits == {key: m_aio.Semaphore.return_value}
+
+
+def test_scheduler_release():
+    """Test Scheduler.release drops limits once no run uses them."""
+    scheduler = Scheduler(1, 1)
+    scheduler._limits = dict(A="SEM_A", B="SEM_B")
+    scheduler._users = dict(A=2, B=1)
+    assert not scheduler.release(["A", "B"])
+    assert scheduler._limits == dict(A="SEM_A")
+    assert scheduler._users == dict(A=1)
+    assert not scheduler.release(["A"])
+    assert scheduler._limits == {}
+    assert scheduler._users == {}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_slot():
+    """Test Scheduler.slot records waiting and running counts."""
+    scheduler = Scheduler(1, 1)
+    metrics = scheduler._metrics["default"]
+
+    async with scheduler.slot("default") as waited:
+        assert waited >= 0
+        assert metrics["running"] == 1
+        assert metrics["waiting"] == 0
+        assert scheduler._lanes["default"].locked()
+        assert not scheduler._lanes["fast"].locked()
+
+    assert not scheduler._lanes["default"].locked()
+    assert metrics["running"] == 0
+    assert metrics["started"] == 1
+    assert metrics["wait_max"] == metrics["wait_total"] == waited
+    assert scheduler._limits == {}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_slot_lane():
+    """Test Scheduler.slot queues runs beyond the lane size."""
+    scheduler = Scheduler(1, 1)
+    metrics = scheduler._metrics["default"]
+    order = []
+    release = asyncio.Event()
+
+    async def run(name):
+        async with scheduler.slot("default"):
+            order.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(run("first"))
+    second = asyncio.create_task(run("second"))
+    await asyncio.sleep(0)
+    assert order == ["first"]
+    assert metrics["waiting"] == 1
+    assert metrics["running"] == 1
+
+    async with scheduler.slot("fast"):
+        assert scheduler._metrics["fast"]["running"] == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert order == ["first", "second"]
+    assert metrics["waiting"] == 0
+    assert metrics["running"] == 0
+    assert metrics["started"] == 2
+    assert metrics["wait_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_slot_limits():
+    """Test Scheduler.slot applies keyed limits before taking a lane slot."""
+    scheduler = Scheduler(2, 1)
+    release = asyncio.Event()
+    running = []
+
+    async def run(name, key):
+        limits = ((key, 1), ("unlimited", None))
+        async with scheduler.slot("default", limits):
+            running.append(name)
+            await release.wait()
+
+    tasks = [
+        asyncio.create_task(run("a1", "A")),
+        asyncio.create_task(run("a2", "A")),
+        asyncio.create_task(run("b1", "B"))]
+    await asyncio.sleep(0)
+    assert running == ["a1", "b1"]
+    assert set(scheduler._limits) == {"A", "B"}
+    assert scheduler._metrics["default"]["waiting"] == 1
+    assert scheduler._users == dict(A=2, B=1)
+    release.set()
+    await asyncio.gather(*tasks)
+    assert running == ["a1", "b1", "a2"]
+    assert scheduler._limits == {}
+    assert scheduler._users == {}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_slot_cancelled():
+    """Test Scheduler.slot releases its place in the queue if cancelled."""
+    scheduler = Scheduler(1, 1)
+    metrics = scheduler._metrics["default"]
+
+    async with scheduler.slot("default"):
+        task = asyncio.create_task(
+            scheduler.slot("default").__aenter__())
+        await asyncio.sleep(0)
+        assert metrics["waiting"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert metrics["waiting"] == 0
+
+    assert metrics["started"] == 1
+    assert not scheduler._lanes["default"].locked()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_slot_limits_cancelled():
+    """Test a keyed limit is dropped once a run waiting on it is
+    cancelled, and the run holding it is done.
+    """
+    scheduler = Scheduler(2, 1)
+    limits = (("A", 1), )
+
+    async with scheduler.slot("default", limits):
+        task = asyncio.create_task(
+            scheduler.slot("default", limits).__aenter__())
+        await asyncio.sleep(0)
+        assert scheduler._users == dict(A=2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert scheduler._users == dict(A=1)
+        assert set(scheduler._limits) == {"A"}
+
+    assert scheduler._limits == {}
+    assert scheduler._users == {}
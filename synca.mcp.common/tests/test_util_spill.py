@@ -0,0 +1,468 @@
+"""Isolated tests for synca.mcp.common.util.spill."""
+
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import time
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.common import errors
+from synca.mcp.common.util import Spill
+
+
+@pytest.mark.parametrize("budget", [None, 0, 23])
+@pytest.mark.parametrize("directory", [None, "DIR"])
+@pytest.mark.parametrize(
+    "env",
+    [{},
+     dict(SYNCA_MCP_OUTPUT_BUDGET="7"),
+     dict(SYNCA_MCP_SPILL_DIR="ENVDIR")])
+def test_spill_constructor(patches, budget, directory, env):
+    """Test Spill class initialization."""
+    patched = patches(
+        "os",
+        ("Spill.default_directory",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.spill")
+
+    with patched as (m_os, m_default):
+        m_os.environ = env
+        m_default.return_value = "DEFAULT"
+        spill = Spill(budget, directory)
+
+    assert (
+        spill.budget
+        == (budget
+            if budget is not None
+            else int(env.get("SYNCA_MCP_OUTPUT_BUDGET", 64 * 1024))))
+    assert (
+        spill.directory
+        == pathlib.Path(
+            directory
+            or env.get("SYNCA_MCP_SPILL_DIR")
+            or "DEFAULT"))
+    assert spill.max_files == 64
+    assert spill.line_limit == 2048
+    assert spill.max_age == 24 * 60 * 60
+    assert spill.written == collections.OrderedDict()
+
+
+@pytest.mark.parametrize(
+    "env, expected",
+    [(dict(XDG_RUNTIME_DIR="/RUN", XDG_CACHE_HOME="/CACHE"),
+      "/RUN/synca-mcp/spill"),
+     (dict(XDG_RUNTIME_DIR="", XDG_CACHE_HOME="/CACHE"),
+      "/CACHE/synca-mcp/spill"),
+     ({}, "HOME/.cache/synca-mcp/spill")])
+def test_spill_default_directory(monkeypatch, env, expected):
+    """Test spill files go to the user's runtime dir, or else their cache
+    dir.
+    """
+    for name in ("XDG_RUNTIME_DIR", "XDG_CACHE_HOME"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(pathlib.Path, "home", lambda: pathlib.Path("HOME"))
+    spill = Spill(directory="DIR")
+    assert spill.default_directory == pathlib.Path(expected)
+    assert "default_directory" not in spill.__dict__
+
+
+def test_spill_ensure_directory(tmp_path):
+    """Test the spill dir is created private to the user."""
+    directory = tmp_path / "parent" / "spill"
+    spill = Spill(directory=str(directory))
+    spill.ensure_directory()
+    spill.ensure_directory()
+    assert directory.stat().st_mode & 0o777 == 0o700
+
+
+@pytest.mark.parametrize("kind", ["mode", "owner", "symlink", "file"])
+def test_spill_ensure_directory_unsafe(tmp_path, monkeypatch, kind):
+    """Test spill dirs that others could read or write to are refused."""
+    directory = tmp_path / "spill"
+    if kind == "symlink":
+        (tmp_path / "target").mkdir(mode=0o700)
+        directory.symlink_to(tmp_path / "target")
+    elif kind == "file":
+        directory.write_text("")
+    else:
+        directory.mkdir(mode=0o700)
+    if kind == "mode":
+        directory.chmod(0o777)
+    elif kind == "owner":
+        monkeypatch.setattr(os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+    spill = Spill(directory=str(directory))
+    if kind == "file":
+        with pytest.raises(FileExistsError):
+            spill.ensure_directory()
+        return
+    with pytest.raises(PermissionError) as e:
+        spill.ensure_directory()
+    assert (
+        e.value.args[0]
+        == (f"Spill dir '{directory}' must be a dir owned by the current "
+            "user, with mode 0700"))
+
+
+@pytest.mark.parametrize(
+    "budget, output, expected",
+    [(0, "x" * 100, True),
+     (3, "abc", True),
+     (3, "abcd", False),
+     (3, "é", True),
+     (3, "éé", False)])
+def test_spill_fits(budget, output, expected):
+    """Test outputs fit if they are within the budget in bytes."""
+    assert Spill(budget=budget).fits(output) is expected
+
+
+@pytest.mark.parametrize(
+    "sizes,budget,expected",
+    [([], 10, []),
+     ([3, 3, 3], 8, [0, 1]),
+     ([3, 3, 3], 9, [0, 1, 2]),
+     ([3, 1, 3], 5, [0, 1]),
+     ([12, 3], 10, [])])
+def test_spill_fitting(sizes, budget, expected):
+    """Test fitting takes lines while they fit in the budget."""
+    spill = Spill(budget=100)
+    lines = ["x" * (size - 1) for size in sizes]
+    assert (
+        spill.fitting(lines, iter(range(len(lines))), budget)
+        == expected)
+
+
+@pytest.mark.parametrize(
+    "lines,expected",
+    [([], []),
+     (["a" * 10] * 2, [0, 1]),
+     (["a" * 10] * 4, [0, 3]),
+     (["a" * 10] * 10, [0, 9]),
+     (["a" * 10, "b", "error: x", "c", "failed", "a" * 10],
+      [0, 2, 4, 5]),
+     (["a" * 10, "error " * 10, "warning", "a" * 10],
+      [0, 3])])
+def test_spill_kept(lines, expected):
+    """Test kept keeps the head, tail and relevant lines in budget."""
+    spill = Spill(budget=44)
+    assert spill.kept(lines) == expected
+
+
+@pytest.mark.parametrize(
+    "budget,expected",
+    [(0, 64 * 1024),
+     (10, 10),
+     (128 * 1024, 128 * 1024)])
+def test_spill_page_size(budget, expected):
+    """Test pages are at most the budget, if there is one."""
+    assert Spill(budget=budget).page_size == expected
+
+
+@pytest.mark.parametrize(
+    "handle",
+    ["0" * 32, "0123456789abcdef" * 2, "nope", "0" * 31, "A" * 32,
+     "../" + "0" * 29, "0" * 32 + "\n"])
+def test_spill_path(handle):
+    """Test path validates the handle."""
+    spill = Spill(directory="DIR")
+    valid = len(handle) == 32 and all(c in "0123456789abcdef" for c in handle)
+    if not valid:
+        with pytest.raises(errors.ArgValueError) as e:
+            spill.path(handle)
+        assert e.value.args[0] == f"Invalid output handle: {handle}"
+        return
+    assert spill.path(handle) == pathlib.Path("DIR") / f"{handle}.txt"
+
+
+@pytest.mark.parametrize("files", [0, 2, 3, 5])
+def test_spill_prune(tmp_path, files):
+    """Test prune removes the oldest spill files of this process, and
+    expired spill files of any process.
+    """
+    spill = Spill(directory=str(tmp_path), max_files=3, max_age=60)
+    handles = [f"{i:032x}" for i in range(files)]
+    for handle in handles:
+        (tmp_path / f"{handle}.txt").write_text("")
+        spill.written[handle] = None
+    (tmp_path / "other.txt").write_text("")
+    expired = tmp_path / "expired.txt"
+    expired.write_text("")
+    os.utime(expired, (time.time() - 120, time.time() - 120))
+    (tmp_path / ".tmp.txt.tmp").write_text("")
+    spill.prune()
+    kept = handles[max(0, files - 3):]
+    assert list(spill.written) == kept
+    assert (
+        sorted(path.name for path in tmp_path.iterdir())
+        == sorted([".tmp.txt.tmp",
+                   "other.txt",
+                   *(f"{handle}.txt" for handle in kept)]))
+
+
+def test_spill_prune_removed(tmp_path):
+    """Test files removed by another process as they are pruned are
+    skipped.
+    """
+    spill = Spill(directory=str(tmp_path))
+    path = MagicMock()
+    path.stat.side_effect = FileNotFoundError
+    spill.directory = MagicMock()
+    spill.directory.glob.return_value = [path]
+    spill.prune()
+    assert not path.unlink.called
+
+
+@pytest.mark.parametrize(
+    "budget,content,offset,limit,expected",
+    [(100, "a\nb\nc\n", 0, 4, ("a\nb\n", 4, True)),
+     (100, "a\nb\nc\n", 0, None, ("a\nb\nc\n", 6, False)),
+     (100, "a\nb\nc\n", 0, 3, ("a\n", 2, True)),
+     (100, "a\nb\nc\n", 2, 4, ("b\nc\n", 4, False)),
+     (100, "a\nb\nc\n", 5, 1, ("\n", 1, False)),
+     (100, "a\nb\nc\n", 6, 2, ("", 0, False)),
+     (4, "a\nb\nc\n", 0, None, ("a\nb\n", 4, True)),
+     (4, "a\nb\nc\n", 0, 100, ("a\nb\n", 4, True)),
+     (4, "abcdefgh", 0, None, ("abcd", 4, True)),
+     (0, "abcdefgh", 2, None, ("cdefgh", 6, False)),
+     (100, "\u00e9" * 5, 0, 3, ("\u00e9", 2, True)),
+     (100, "\u00e9" * 5, 0, None, ("\u00e9" * 5, 10, False)),
+     (100, "\u00e9" * 5, 1, 4, ("\ufffd\u00e9", 3, True)),
+     (100, "\u00e9" * 5, 0, 1, ("\ufffd", 1, True)),
+     (100, "\u00e9" * 5, 9, None, ("\ufffd", 1, False)),
+     (100, '{"a": "\u00e9\u00e9"}', 0, 9, ('{"a": "\u00e9', 9, True))])
+def test_spill_read(tmp_path, budget, content, offset, limit, expected):
+    """Test read returns a page of the spill file, from a byte offset,
+    of at most the budget, and of whole lines or characters."""
+    spill = Spill(budget=budget, directory=str(tmp_path))
+    handle = spill.write(content)
+    output, size, more = expected
+    assert (
+        spill.read(handle, offset, limit)
+        == dict(
+            handle=handle,
+            offset=offset,
+            bytes=size,
+            output=output,
+            more=more))
+
+
+def test_spill_read_missing(tmp_path):
+    """Test read of a missing spill file."""
+    spill = Spill(directory=str(tmp_path))
+    with pytest.raises(errors.ArgValueError) as e:
+        spill.read("0" * 32)
+    assert (
+        e.value.args[0]
+        == f"Unknown or expired output handle: {'0' * 32}")
+
+
+@pytest.mark.parametrize(
+    "kept,expected",
+    [([], ["[... 5 lines omitted ...]"]),
+     ([0, 1, 2, 3, 4],
+      ["0", "1", "x" * 8 + " [... line truncated ...]", "3", "4"]),
+     ([0, 4], ["0", "[... 3 lines omitted ...]", "4"]),
+     ([1, 3],
+      ["[... 1 lines omitted ...]", "1",
+       "[... 1 lines omitted ...]", "3",
+       "[... 1 lines omitted ...]"]),
+     ([2],
+      ["[... 2 lines omitted ...]",
+       "x" * 8 + " [... line truncated ...]",
+       "[... 2 lines omitted ...]"])])
+def test_spill_render(kept, expected):
+    """Test render marks the lines left out."""
+    spill = Spill(line_limit=8)
+    lines = ["0", "1", "x" * 9, "3", "4"]
+    assert (
+        spill.render(lines, kept)
+        == "\n".join(expected))
+
+
+@pytest.mark.parametrize("budget", [0, 5, 6, 100])
+@pytest.mark.parametrize("output", ["", "AB\nCD\n", "AB\nCD\nEF\n"])
+@pytest.mark.parametrize("structured", [True, False])
+def test_spill_shape(patches, budget, output, structured):
+    """Test shape spills outputs over the budget."""
+    spill = Spill(budget=budget)
+    patched = patches(
+        "Spill.kept",
+        "Spill.render",
+        "Spill.structured",
+        "Spill.write",
+        prefix="synca.mcp.common.util.spill")
+
+    with patched as (m_kept, m_render, m_structured, m_write):
+        m_structured.return_value = structured
+        result = spill.shape(output)
+
+    if not budget or len(output) <= budget:
+        assert result == (output, None)
+        assert not m_write.called
+        assert not m_render.called
+        return
+    lines = output.splitlines()
+    assert (
+        result
+        == ("" if structured else m_render.return_value,
+            dict(
+                handle=m_write.return_value,
+                bytes=len(output),
+                lines=len(lines))))
+    assert (
+        m_write.call_args
+        == [(output, ), {}])
+    assert (
+        m_structured.call_args
+        == [(output, ), {}])
+    if structured:
+        assert not m_kept.called
+        assert not m_render.called
+        return
+    assert (
+        m_kept.call_args
+        == [(lines, ), {}])
+    assert (
+        m_render.call_args
+        == [(lines, m_kept.return_value), {}])
+
+
+@pytest.mark.parametrize("error", [OSError, PermissionError])
+def test_spill_shape_fails(patches, caplog, error):
+    """Test an output that cannot be spilled is returned unshaped."""
+    spill = Spill(budget=2)
+    patched = patches(
+        "Spill.render",
+        "Spill.write",
+        prefix="synca.mcp.common.util.spill")
+
+    with patched as (m_render, m_write):
+        m_write.side_effect = error("BOOM")
+        assert spill.shape("AB\nCD\n") == ("AB\nCD\n", None)
+
+    assert not m_render.called
+    assert "Unable to spill output, not shaping it: BOOM" in caplog.text
+
+
+def test_spill_shape_json(tmp_path):
+    """Test a JSON output is spilled whole, and paged by bytes."""
+    spill = Spill(budget=1024, directory=str(tmp_path / "spill"))
+    output = json.dumps(
+        dict(runs=[dict(id=i, name="caf\u00e9" * 20) for i in range(200)]))
+    shaped, info = spill.shape(output)
+    assert shaped == ""
+    assert info
+    assert info["lines"] == 1
+    assert info["bytes"] == len(output.encode())
+    pages = []
+    offset = 0
+    while True:
+        page = spill.read(info["handle"], offset)
+        assert page["bytes"] <= 1024
+        pages.append(page["output"])
+        offset += page["bytes"]
+        if not page["more"]:
+            break
+    assert len(pages) > 1
+    assert json.loads("".join(pages)) == json.loads(output)
+
+
+def test_spill_shape_output(tmp_path):
+    """Test a shaped output keeps its head, tail and errors."""
+    spill = Spill(budget=4096, directory=str(tmp_path / "spill"))
+    lines = [f"compiling crate {i}" for i in range(10000)]
+    lines[5000] = "error[E0308]: mismatched types"
+    output = "\n".join(lines)
+    shaped, info = spill.shape(output)
+    assert info
+    assert len(shaped.encode()) < 4096 + 100
+    shaped_lines = shaped.splitlines()
+    assert shaped_lines[0] == "compiling crate 0"
+    assert shaped_lines[-1] == "compiling crate 9999"
+    assert "error[E0308]: mismatched types" in shaped_lines
+    offset = len("\n".join(lines[:5000]).encode()) + 1
+    assert (
+        spill.read(info["handle"], offset, 31)["output"]
+        == "error[E0308]: mismatched types\n")
+    assert info["lines"] == 10000
+
+
+@pytest.mark.parametrize(
+    "output,expected",
+    [("", False),
+     ("plain", False),
+     ("{", False),
+     ("[1, 2", False),
+     ("{}", True),
+     ("  [1, 2]\n", True),
+     ('{"a": "\u00e9"}', True),
+     ('"string"', False),
+     ("1", False)])
+def test_spill_structured(output, expected):
+    """Test structured outputs are JSON objects or arrays."""
+    assert Spill().structured(output) == expected
+
+
+@pytest.mark.parametrize(
+    "line,expected",
+    [("", 1),
+     ("abc", 4),
+     ("é", 3),
+     ("x" * 9, 9)])
+def test_spill_size(line, expected):
+    """Test size of a line in the shaped output."""
+    spill = Spill(line_limit=8)
+    assert spill.size(line) == expected
+
+
+def test_spill_write(patches, tmp_path):
+    """Test write spills the output to a file named by its hash."""
+    directory = tmp_path / "spill"
+    spill = Spill(directory=str(directory))
+    output = "OUTéPUT"
+    spill.written["OTHER"] = None
+    patched = patches(
+        "Spill.prune",
+        prefix="synca.mcp.common.util.spill")
+
+    with patched as (m_prune, ):
+        handle = spill.write(output)
+        spill.written["LATER"] = None
+        assert spill.write(output) == handle
+
+    assert handle == hashlib.sha256(output.encode()).hexdigest()[:32]
+    assert (
+        [path.name for path in directory.iterdir()]
+        == [f"{handle}.txt"])
+    assert (
+        (directory / f"{handle}.txt").read_text(encoding="utf-8")
+        == output)
+    assert directory.stat().st_mode & 0o777 == 0o700
+    assert list(spill.written) == ["OTHER", "LATER", handle]
+    assert (
+        m_prune.call_args_list
+        == [[(), {}], [(), {}]])
+
+
+def test_spill_write_fail(patches, tmp_path):
+    """Test the temp file is removed if the output cannot be written."""
+    directory = tmp_path / "spill"
+    spill = Spill(directory=str(directory))
+    patched = patches(
+        "os.replace",
+        "Spill.prune",
+        prefix="synca.mcp.common.util.spill")
+
+    with patched as (m_replace, m_prune):
+        m_replace.side_effect = OSError
+        with pytest.raises(OSError):
+            spill.write("OUTPUT")
+
+    assert list(directory.iterdir()) == []
+    assert not spill.written
+    assert not m_prune.called
@@ -0,0 +1,241 @@
+"""Isolated tests for synca.mcp.common.util.stream."""
+
+from unittest.mock import AsyncMock, MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.common.util import OutputBuffer, OutputStream
+
+
+# OutputBuffer
+
+@pytest.mark.parametrize("limit", [None, 0, 7, 20])
+def test_output_buffer_constructor(limit):
+    """Test OutputBuffer class initialization."""
+    buffer = OutputBuffer(limit)
+    assert buffer.limit == limit
+    assert buffer.dropped == 0
+    assert buffer.head_limit == (limit or 0) // 2
+    assert buffer.tail_limit == (limit or 0) - (limit or 0) // 2
+    assert buffer.text == ""
+    assert "head_limit" not in buffer.__dict__
+    assert "tail_limit" not in buffer.__dict__
+
+
+@pytest.mark.parametrize(
+    "limit,lines,expected,dropped",
+    [(None,
+      ["a\n", "b\n", "c\n"],
+      "a\nb\nc\n",
+      0),
+     (100,
+      ["a\n", "b\n", "c\n"],
+      "a\nb\nc\n",
+      0),
+     (8,
+      ["aa\n", "bb\n", "cc\n", "dd\n"],
+      "aa\n\n... [5 characters truncated] ...\n\ndd\n",
+      5),
+     (8,
+      ["a\n", "bbbbbbbbbb\n", "c\n"],
+      "a\n\n... [9 characters truncated] ...\nb\nc\n",
+      9),
+     (4,
+      ["xxxxxxxxxx"],
+      "\n... [8 characters truncated] ...\nxx",
+      8),
+     (6,
+      ["a\n", "bbbb\n", "c\n"],
+      "a\n\n... [4 characters truncated] ...\n\nc\n",
+      4)])
+def test_output_buffer_append(limit, lines, expected, dropped):
+    """Test OutputBuffer.append retains the head and tail of the output."""
+    buffer = OutputBuffer(limit)
+    for line in lines:
+        assert not buffer.append(line)
+    assert buffer.text == expected
+    assert buffer.dropped == dropped
+    if limit:
+        assert (
+            len("".join(buffer._head)) + len("".join(buffer._tail))
+            <= limit)
+
+
+# OutputStream
+
+def test_output_stream_constructor(patches):
+    """Test OutputStream class initialization."""
+    name = MagicMock()
+    on_line = MagicMock()
+    limit = MagicMock()
+    patched = patches(
+        "codecs",
+        "OutputBuffer",
+        prefix="synca.mcp.common.util.stream")
+
+    with patched as (m_codecs, m_buffer):
+        stream = OutputStream(name, on_line, limit)
+
+    assert stream.name == name
+    assert stream.on_line == on_line
+    assert stream.on_chunk is None
+    assert stream.chunk_size == 65536
+    assert stream.max_line == 1024 * 1024
+    assert stream.buffer == m_buffer.return_value
+    assert stream._partial == ""
+    assert (
+        stream._decoder
+        == m_codecs.getincrementaldecoder.return_value.return_value)
+    assert (
+        m_buffer.call_args
+        == [(limit, ), {}])
+    assert (
+        m_codecs.getincrementaldecoder.call_args
+        == [("utf-8", ), {}])
+    assert (
+        m_codecs.getincrementaldecoder.return_value.call_args
+        == [(), dict(errors="replace")])
+
+
+def test_output_stream_text():
+    """Test OutputStream.text property."""
+    stream = OutputStream(MagicMock())
+    stream.buffer = MagicMock()
+    assert stream.text == stream.buffer.text
+    assert "text" not in stream.__dict__
+
+
+@pytest.mark.parametrize("partial", ["", "PARTIAL"])
+@pytest.mark.parametrize("remaining", ["", "REMAINING"])
+def test_output_stream_close(patches, partial, remaining):
+    """Test OutputStream.close flushes trailing output."""
+    stream = OutputStream(MagicMock())
+    stream._partial = partial
+    stream._decoder = MagicMock()
+    stream._decoder.decode.return_value = remaining
+    patched = patches(
+        "OutputStream._dispatch",
+        prefix="synca.mcp.common.util.stream")
+
+    with patched as (m_dispatch, ):
+        assert not stream.close()
+
+    assert stream._partial == ""
+    assert (
+        stream._decoder.decode.call_args
+        == [(b"", ), dict(final=True)])
+    if not (partial or remaining):
+        assert not m_dispatch.called
+        return
+    assert (
+        m_dispatch.call_args
+        == [(partial + remaining, ), {}])
+
+
+@pytest.mark.parametrize("has_chunk_handler", [True, False])
+@pytest.mark.asyncio
+async def test_output_stream_consume(patches, has_chunk_handler):
+    """Test OutputStream.consume reads the stream to EOF."""
+    on_chunk = AsyncMock() if has_chunk_handler else None
+    stream = OutputStream(MagicMock(), on_chunk=on_chunk)
+    reader = MagicMock()
+    chunks = [b"CHUNK1", b"CHUNK2", b""]
+    reader.read = AsyncMock(side_effect=chunks)
+    patched = patches(
+        "OutputStream.close",
+        "OutputStream.feed",
+        ("OutputStream.text",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.stream")
+
+    with patched as (m_close, m_feed, m_text):
+        assert (
+            await stream.consume(reader)
+            == m_text.return_value)
+
+    assert (
+        reader.read.call_args_list
+        == [[(stream.chunk_size, ), {}]] * 3)
+    assert (
+        m_feed.call_args_list
+        == [[(b"CHUNK1", ), {}], [(b"CHUNK2", ), {}]])
+    assert (
+        m_close.call_args
+        == [(), {}])
+    if has_chunk_handler:
+        assert (
+            on_chunk.call_args_list
+            == [[(), {}]] * 2)
+
+
+@pytest.mark.parametrize(
+    "partial,chunk,dispatched,remaining",
+    [("", "", [], ""),
+     ("", "abc", [], "abc"),
+     ("ab", "c\nd", ["abc\n"], "d"),
+     ("", "a\nb\n", ["a\n", "b\n"], ""),
+     ("", "abcdefghij", ["abcd", "efgh"], "ij"),
+     ("", "a\nbcdefghi", ["a\n", "bcde"], "fghi")])
+def test_output_stream_feed(patches, partial, chunk, dispatched, remaining):
+    """Test OutputStream.feed splits decoded output into lines."""
+    stream = OutputStream(MagicMock(), max_line=4)
+    stream._partial = partial
+    stream._decoder = MagicMock()
+    stream._decoder.decode.return_value = chunk
+    data = MagicMock()
+    patched = patches(
+        "OutputStream._dispatch",
+        prefix="synca.mcp.common.util.stream")
+
+    with patched as (m_dispatch, ):
+        assert not stream.feed(data)
+
+    assert stream._partial == remaining
+    assert (
+        stream._decoder.decode.call_args
+        == [(data, ), {}])
+    assert (
+        m_dispatch.call_args_list
+        == [[(line, ), {}] for line in dispatched])
+
+
+@pytest.mark.parametrize("has_handler", [True, False])
+@pytest.mark.parametrize("line", ["LINE", "LINE\n"])
+def test_output_stream_dispatch(has_handler, line):
+    """Test OutputStream._dispatch buffers and handles a line."""
+    name = MagicMock()
+    on_line = MagicMock() if has_handler else None
+    stream = OutputStream(name, on_line)
+    stream.buffer = MagicMock()
+
+    assert not stream._dispatch(line)
+
+    assert (
+        stream.buffer.append.call_args
+        == [(line, ), {}])
+    if has_handler:
+        assert (
+            on_line.call_args
+            == [(name, "LINE"), {}])
+
+
+@pytest.mark.asyncio
+async def test_output_stream_roundtrip():
+    """Test OutputStream decodes split multibyte output."""
+    lines = []
+    stream = OutputStream(
+        "stdout",
+        lambda name, line: lines.append((name, line)),
+        chunk_size=3)
+    reader = MagicMock()
+    data = "héllo\nwörld\nend".encode()
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)] + [b""]
+    reader.read = AsyncMock(side_effect=chunks)
+    assert (
+        await stream.consume(reader)
+        == "héllo\nwörld\nend")
+    assert (
+        lines
+        == [("stdout", "héllo"),
+            ("stdout", "wörld"),
+            ("stdout", "end")])
@@ -0,0 +1,416 @@
+"""Isolated tests for synca.mcp.common.util.timing."""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.common.util import Timings
+from synca.mcp.common.util.timing import (
+    Histogram, PhaseTimer, _timer, add_phase, phase)
+
+
+# Histogram
+
+def test_histogram_constructor():
+    """Test Histogram class initialization."""
+    histogram = Histogram()
+    assert histogram.counts == [0] * (len(Histogram.buckets) + 1)
+    assert histogram.count == 0
+    assert histogram.sum == 0.0
+    assert list(Histogram.buckets) == sorted(Histogram.buckets)
+
+
+@pytest.mark.parametrize(
+    "values,expected",
+    [([], [0, 0, 0]),
+     ([0.5], [1, 1, 1]),
+     ([1.0, 0.2], [2, 2, 2]),
+     ([3.0, 0.1, 100.0], [1, 2, 3])])
+def test_histogram_observe(values, expected):
+    """Test Histogram.observe counts values into buckets."""
+    histogram = Histogram()
+    histogram.buckets = (1.0, 5.0)
+    histogram.counts = [0, 0, 0]
+    for value in values:
+        assert not histogram.observe(value)
+    assert histogram.cumulative == expected
+    assert histogram.count == len(values)
+    assert histogram.sum == sum(values)
+
+
+def test_histogram_as_dict(patches):
+    """Test Histogram.as_dict property."""
+    histogram = Histogram()
+    histogram.count = 23
+    histogram.sum = 7.0
+    patched = patches(
+        ("Histogram.cumulative",
+         dict(new_callable=PropertyMock)),
+        ("Histogram.labels",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.timing")
+
+    with patched as (m_cumulative, m_labels):
+        m_cumulative.return_value = [1, 2]
+        m_labels.return_value = ["A", "B"]
+        assert (
+            histogram.as_dict
+            == dict(count=23, sum=7.0, buckets=dict(A=1, B=2)))
+
+    assert "as_dict" not in histogram.__dict__
+
+
+def test_histogram_cumulative():
+    """Test Histogram.cumulative property."""
+    histogram = Histogram()
+    histogram.counts = [1, 0, 3, 2]
+    assert histogram.cumulative == [1, 1, 4, 6]
+    assert "cumulative" not in histogram.__dict__
+
+
+def test_histogram_labels():
+    """Test Histogram.labels property."""
+    histogram = Histogram()
+    histogram.buckets = (0.5, 1.0, 10.0)
+    assert histogram.labels == ["0.5", "1.0", "10.0", "+Inf"]
+    assert "labels" not in histogram.__dict__
+
+
+# PhaseTimer
+
+def test_phase_timer_constructor():
+    """Test PhaseTimer class initialization."""
+    timer = PhaseTimer()
+    assert timer.phases == {}
+
+
+def test_phase_timer_add():
+    """Test PhaseTimer.add accumulates phase times."""
+    timer = PhaseTimer()
+    assert not timer.add("A", 1.5)
+    assert not timer.add("B", 2.0)
+    assert not timer.add("A", 0.5)
+    assert timer.phases == dict(A=2.0, B=2.0)
+
+
+@pytest.mark.parametrize("raises", [True, False])
+def test_phase_timer_phase(patches, raises):
+    """Test PhaseTimer.phase times its body."""
+    timer = PhaseTimer()
+    patched = patches(
+        "time",
+        "PhaseTimer.add",
+        prefix="synca.mcp.common.util.timing")
+
+    with patched as (m_time, m_add):
+        m_time.perf_counter.side_effect = [2.0, 5.5]
+        if raises:
+            with pytest.raises(ValueError):
+                with timer.phase("NAME"):
+                    raise ValueError
+        else:
+            with timer.phase("NAME"):
+                pass
+
+    assert (
+        m_add.call_args
+        == [("NAME", 3.5), {}])
+
+
+# Timings
+
+@pytest.mark.parametrize("path", [None, "PATH"])
+@pytest.mark.parametrize("report", [None, True, False])
+@pytest.mark.parametrize(
+    "env",
+    [{},
+     dict(SYNCA_MCP_METRICS_FILE="ENV_PATH", SYNCA_MCP_TIMING_INFO="1")])
+def test_timings_constructor(patches, path, report, env):
+    """Test Timings class initialization."""
+    patched = patches(
+        "os",
+        prefix="synca.mcp.common.util.timing")
+
+    with patched as (m_os, ):
+        m_os.environ = env
+        timings = Timings(path, report)
+
+    assert timings.path == (path or env.get("SYNCA_MCP_METRICS_FILE"))
+    assert (
+        timings.report
+        == (report
+            if report is not None
+            else bool(env)))
+    assert timings.histograms == {}
+    assert timings.metric == "synca_mcp_tool_phase_seconds"
+    assert timings.write_interval == 5.0
+    assert isinstance(timings.lock, type(threading.Lock()))
+    assert timings.written == float("-inf")
+    assert timings.pending is None
+    assert timings.writing is None
+
+
+def test_timings_as_dict():
+    """Test Timings.as_dict groups histograms by tool and phase."""
+    timings = Timings()
+    histograms = {
+        ("B", "total"): MagicMock(),
+        ("A", "total"): MagicMock(),
+        ("A", "parse"): MagicMock()}
+    timings.histograms = histograms
+    assert (
+        timings.as_dict
+        == dict(
+            A=dict(
+                parse=histograms[("A", "parse")].as_dict,
+                total=histograms[("A", "total")].as_dict),
+            B=dict(total=histograms[("B", "total")].as_dict)))
+    assert list(timings.as_dict) == ["A", "B"]
+    assert "as_dict" not in timings.__dict__
+
+
+def test_timings_prometheus():
+    """Test Timings.prometheus renders the text exposition format."""
+    timings = Timings()
+    timings.record("Tool", dict(total=0.5))
+    timings.record("Tool", dict(total=2.0))
+    lines = timings.prometheus.splitlines()
+    metric = "synca_mcp_tool_phase_seconds"
+    labels = 'tool="Tool",phase="total"'
+    assert lines[0].startswith(f"# HELP {metric} ")
+    assert lines[1] == f"# TYPE {metric} histogram"
+    assert f'{metric}_bucket{{{labels},le="0.25"}} 0' in lines
+    assert f'{metric}_bucket{{{labels},le="0.5"}} 1' in lines
+    assert f'{metric}_bucket{{{labels},le="2.5"}} 2' in lines
+    assert f'{metric}_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert lines[-2] == f"{metric}_sum{{{labels}}} 2.5"
+    assert lines[-1] == f"{metric}_count{{{labels}}} 2"
+    assert len(lines) == 2 + len(Histogram.buckets) + 1 + 2
+    assert timings.prometheus.endswith("\n")
+    assert "prometheus" not in timings.__dict__
+
+
+@pytest.mark.parametrize("path", [None, "PATH"])
+def test_timings_record(patches, path):
+    """Test Timings.record observes each phase."""
+    timings = Timings(report=False)
+    timings.path = path
+    existing = MagicMock()
+    timings.histograms[("TOOL", "A")] = existing
+    patched = patches(
+        "pathlib",
+        "Histogram",
+        "Timings.schedule",
+        prefix="synca.mcp.common.util.timing")
+
+    with patched as (m_pathlib, m_histogram, m_schedule):
+        assert not timings.record("TOOL", dict(A=1.0, B=2.0))
+
+    assert (
+        timings.histograms
+        == {("TOOL", "A"): existing,
+            ("TOOL", "B"): m_histogram.return_value})
+    assert (
+        existing.observe.call_args
+        == [(1.0, ), {}])
+    assert (
+        m_histogram.return_value.observe.call_args
+        == [(2.0, ), {}])
+    if not path:
+        assert not m_schedule.called
+        return
+    assert (
+        m_pathlib.Path.call_args
+        == [(path, ), {}])
+    assert (
+        m_schedule.call_args
+        == [(m_pathlib.Path.return_value, ), {}])
+
+
+def test_timings_flush(patches):
+    """Test Timings.flush writes the metrics as they are in a thread."""
+    timings = Timings()
+    timings.pending = MagicMock()
+    patched = patches(
+        "asyncio",
+        "time",
+        ("Timings.prometheus",
+         dict(new_callable=PropertyMock)),
+        "Timings.write",
+        prefix="synca.mcp.common.util.timing")
+
+    with patched as (m_asyncio, m_time, m_prom, m_write):
+        assert not timings.flush("PATH")
+
+    assert timings.pending is None
+    assert timings.written == m_time.monotonic.return_value
+    assert timings.writing == m_asyncio.ensure_future.return_value
+    assert (
+        m_asyncio.ensure_future.call_args
+        == [(m_asyncio.to_thread.return_value, ), {}])
+    assert (
+        m_asyncio.to_thread.call_args
+        == [(m_write, "PATH", m_prom.return_value), {}])
+
+
+@pytest.mark.parametrize("pending", [True, False])
+@pytest.mark.parametrize("loop", [True, False])
+@pytest.mark.parametrize("written", [float("-inf"), 98.0, 103.0])
+def test_timings_schedule(patches, pending, loop, written):
+    """Test Timings.schedule writes once the interval has passed, unless
+    a write is waiting, or at once without a loop.
+    """
+    timings = Timings()
+    timings.pending = MagicMock() if pending else None
+    timings.written = written
+    pending_write = timings.pending
+    patched = patches(
+        "asyncio",
+        "time",
+        ("Timings.prometheus",
+         dict(new_callable=PropertyMock)),
+        "Timings.write",
+        prefix="synca.mcp.common.util.timing")
+
+    with patched as (m_asyncio, m_time, m_prom, m_write):
+        m_time.monotonic.return_value = 100.0
+        if not loop:
+            m_asyncio.get_running_loop.side_effect = RuntimeError
+        assert not timings.schedule("PATH")
+
+    if pending:
+        assert timings.pending is pending_write
+        assert not m_asyncio.get_running_loop.called
+        assert not m_write.called
+        return
+    if not loop:
+        assert timings.pending is None
+        assert (
+            m_write.call_args
+            == [("PATH", m_prom.return_value), {}])
+        return
+    assert not m_write.called
+    m_loop = m_asyncio.get_running_loop.return_value
+    assert timings.pending == m_loop.call_later.return_value
+    assert (
+        m_loop.call_later.call_args
+        == [(max(0.0, written + 5.0 - 100.0), timings.flush, "PATH"), {}])
+
+
+@pytest.mark.asyncio
+async def test_timings_schedule_throttled(tmp_path, monkeypatch):
+    """Test runs in quick succession write the metrics once, in a
+    thread.
+    """
+    monkeypatch.setattr(Timings, "write_interval", 0.05)
+    path = tmp_path / "metrics.prom"
+    timings = Timings(str(path))
+    timings.record("Tool", dict(total=0.5))
+    await asyncio.sleep(0.01)
+    assert timings.writing
+    await timings.writing
+    assert path.read_text() == timings.prometheus
+    for _ in range(3):
+        timings.record("Tool", dict(total=0.5))
+    assert timings.pending
+    written = timings.writing
+    await asyncio.sleep(0.1)
+    assert timings.pending is None
+    assert timings.writing is not written
+    await timings.writing
+    assert "_count{tool=\"Tool\",phase=\"total\"} 4" in path.read_text()
+
+
+@pytest.mark.parametrize("raises", [True, False])
+def test_timings_timer(patches, raises):
+    """Test Timings.timer times a run and records its phases."""
+    timings = Timings()
+    patched = patches(
+        "Timings.record",
+        prefix="synca.mcp.common.util.timing")
+
+    with patched as (m_record, ):
+        if raises:
+            with pytest.raises(ValueError):
+                with timings.timer("TOOL") as timer:
+                    raise ValueError
+        else:
+            with timings.timer("TOOL") as timer:
+                assert _timer.get() is timer
+                add_phase("queue", 2.0)
+                with phase("parse"):
+                    pass
+
+    assert isinstance(timer, PhaseTimer)
+    assert _timer.get() is None
+    assert (
+        m_record.call_args
+        == [("TOOL", timer.phases), {}])
+    assert (
+        sorted(timer.phases)
+        == (["total"]
+            if raises
+            else ["parse", "queue", "total"]))
+    if not raises:
+        assert timer.phases["queue"] == 2.0
+
+
+def test_timings_write(tmp_path):
+    """Test Timings.write writes the metrics file atomically."""
+    timings = Timings()
+    path = tmp_path / "metrics.prom"
+    assert not timings.write(path, "METRICS")
+    assert path.read_text() == "METRICS"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_timings_write_fails(tmp_path, caplog):
+    """Test failing to write the metrics is logged."""
+    timings = Timings()
+    path = tmp_path / "missing" / "metrics.prom"
+    assert not timings.write(path, "METRICS")
+    assert not path.exists()
+    assert "Failed to write metrics to" in caplog.text
+
+
+# Module functions
+
+@pytest.mark.parametrize("has_timer", [True, False])
+def test_add_phase(has_timer):
+    """Test add_phase adds to the current timer, if there is one."""
+    timer = PhaseTimer()
+    token = _timer.set(timer if has_timer else None)
+    try:
+        assert not add_phase("NAME", 2.0)
+    finally:
+        _timer.reset(token)
+    assert (
+        timer.phases
+        == (dict(NAME=2.0)
+            if has_timer
+            else {}))
+
+
+@pytest.mark.parametrize("has_timer", [True, False])
+@pytest.mark.parametrize("raises", [True, False])
+def test_phase(has_timer, raises):
+    """Test phase times its body on the current timer, if there is one."""
+    timer = PhaseTimer()
+    token = _timer.set(timer if has_timer else None)
+    try:
+        if raises:
+            with pytest.raises(ValueError):
+                with phase("NAME"):
+                    raise ValueError
+        else:
+            with phase("NAME"):
+                pass
+    finally:
+        _timer.reset(token)
+    assert (
+        list(timer.phases)
+        == (["NAME"]
+            if has_timer
+            else []))
@@ -0,0 +1,705 @@
+"""Isolated tests for synca.mcp.common.util.watch."""
+
+import errno
+import os
+import pathlib
+import shutil
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.common.util import Watcher
+from synca.mcp.common.util.fingerprint import EXCLUDED_DIRS
+from synca.mcp.common.util.watch import (
+    EVENT,
+    IN_CREATE,
+    IN_IGNORED,
+    IN_ISDIR,
+    IN_MODIFY,
+    IN_Q_OVERFLOW,
+    Inotify,
+    Poller,
+    Root)
+
+
+@pytest.fixture
+def inotify():
+    inotify = Inotify(EXCLUDED_DIRS)
+    yield inotify
+    inotify.close()
+
+
+def event(wd, mask, name=b""):
+    """An inotify event, with its name padded as the kernel does."""
+    name = name + b"\0" * (-len(name) % 16) if name else b""
+    return EVENT.pack(wd, mask, 0, len(name)) + name
+
+
+def tree(path):
+    """Create a tree with an excluded dir."""
+    (path / "src" / "deep").mkdir(parents=True)
+    (path / "target").mkdir()
+    (path / "a.py").write_text("A")
+    (path / "src" / "b.py").write_text("B")
+    (path / "src" / "deep" / "c.py").write_text("C")
+    return path
+
+
+def test_root_constructor():
+    """Test Root class initialization."""
+    path = MagicMock()
+    root = Root(path, True)
+    assert root.path == path
+    assert root.exact is True
+    assert root.max_dirty == 4096
+    assert root.generation == 0
+    assert root.forgotten == 0
+    assert root.dirty == {}
+    assert root.memo == {}
+    assert root.swept is False
+
+
+@pytest.mark.parametrize("exact", [True, False])
+@pytest.mark.parametrize("swept", [True, False])
+def test_root_current(exact, swept):
+    """Test changes are current if exact, or if the tree was swept."""
+    root = Root(MagicMock(), exact)
+    root.swept = swept
+    assert root.current is (exact or swept)
+    assert "current" not in root.__dict__
+
+
+def test_root_change():
+    """Test change records the path, forgetting the oldest."""
+    root = Root(MagicMock(), True, max_dirty=2)
+    root.change("A")
+    root.change("B")
+    root.change("A")
+    assert root.generation == 3
+    assert root.dirty == dict(B=2, A=3)
+    assert root.forgotten == 0
+    root.change("C")
+    assert root.dirty == dict(A=3, C=4)
+    assert root.forgotten == 2
+
+
+@pytest.mark.parametrize(
+    "since,path,expected",
+    [(0, None, True),
+     (3, None, False),
+     (1, "A", True),
+     (2, "A", False),
+     (2, "B", True),
+     (3, "B", False),
+     (3, "C", False),
+     (0, "C", True)])
+def test_root_changed(since, path, expected):
+    """Test changed tells if anything, or a path, changed since."""
+    root = Root(MagicMock(), True)
+    root.generation = 3
+    root.forgotten = 1
+    root.dirty = dict(A=2, B=3)
+    assert root.changed(since, path) is expected
+
+
+@pytest.mark.parametrize("current", [True, False])
+@pytest.mark.parametrize("generation", [None, 2, 3])
+def test_root_recall(patches, current, generation):
+    """Test recall returns values remembered since the last change."""
+    root = Root(MagicMock(), True)
+    root.generation = 3
+    if generation is not None:
+        root.remember("KEY", generation, "VALUE")
+        assert root.memo == dict(KEY=(generation, "VALUE"))
+    patched = patches(
+        ("Root.current",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_current, ):
+        m_current.return_value = current
+        assert (
+            root.recall("KEY")
+            == ("VALUE"
+                if current and generation == 3
+                else None))
+
+
+def test_root_reset():
+    """Test reset takes every path to have changed."""
+    root = Root(MagicMock(), True)
+    root.change("A")
+    root.reset()
+    assert root.generation == 2
+    assert root.dirty == {}
+    assert root.forgotten == 2
+    assert root.changed(1, "B")
+    assert not root.changed(2, "B")
+
+
+def test_inotify_constructor(inotify):
+    """Test Inotify class initialization."""
+    assert inotify.excluded == EXCLUDED_DIRS
+    assert inotify.fd >= 0
+    assert inotify.watches == {}
+
+
+def test_inotify_constructor_fails(patches):
+    """Test Inotify raises if inotify cannot be initialized."""
+    patched = patches(
+        "ctypes",
+        "Inotify.load",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_ctypes, m_load):
+        m_load.return_value.inotify_init1.return_value = -1
+        m_ctypes.get_errno.return_value = errno.EMFILE
+        with pytest.raises(OSError) as e:
+            Inotify(EXCLUDED_DIRS)
+
+    assert e.value.errno == errno.EMFILE
+
+
+@pytest.mark.parametrize("platform", ["linux", "darwin"])
+@pytest.mark.parametrize("has_inotify", [True, False])
+def test_inotify_load(patches, platform, has_inotify):
+    """Test load loads the C library, if it has inotify."""
+    patched = patches(
+        "ctypes",
+        "sys",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_ctypes, m_sys):
+        m_sys.platform = platform
+        if not has_inotify:
+            del m_ctypes.CDLL.return_value.inotify_init1
+        if platform == "linux" and has_inotify:
+            assert Inotify.load() == m_ctypes.CDLL.return_value
+        else:
+            with pytest.raises(OSError):
+                Inotify.load()
+
+    if platform != "linux":
+        assert not m_ctypes.CDLL.called
+        return
+    assert (
+        m_ctypes.CDLL.call_args
+        == [(m_ctypes.util.find_library.return_value, ),
+            dict(use_errno=True)])
+
+
+def test_inotify_add(inotify, tmp_path):
+    """Test add watches the dirs of a tree, except excluded dirs."""
+    root = Root(tree(tmp_path), True)
+    inotify.add(root)
+    assert (
+        sorted(path for _, path in inotify.watches.values())
+        == [tmp_path, tmp_path / "src", tmp_path / "src" / "deep"])
+    assert root.generation == 0
+
+
+def test_inotify_add_missing(inotify, tmp_path):
+    """Test add of a missing dir."""
+    with pytest.raises(NotADirectoryError):
+        inotify.add(Root(tmp_path / "missing", True))
+    assert inotify.watches == {}
+
+
+@pytest.mark.parametrize(
+    "error",
+    [errno.ENOENT, errno.ENOTDIR, errno.ENOSPC])
+def test_inotify_add_fails(patches, inotify, tmp_path, error):
+    """Test add skips dirs that are gone, and undoes the watches if they
+    run out.
+    """
+    root = Root(tree(tmp_path), True)
+    add_watch = inotify.libc.inotify_add_watch
+    inotify.libc = MagicMock()
+    inotify.libc.inotify_add_watch.side_effect = (
+        lambda fd, path, mask: (
+            -1
+            if path.endswith(b"deep")
+            else add_watch(fd, path, mask)))
+    patched = patches(
+        "ctypes",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_ctypes, ):
+        m_ctypes.get_errno.return_value = error
+        if error == errno.ENOSPC:
+            with pytest.raises(OSError) as e:
+                inotify.add(root)
+        else:
+            inotify.add(root)
+
+    if error != errno.ENOSPC:
+        assert len(inotify.watches) == 2
+        return
+    assert e.value.errno == errno.ENOSPC
+    assert inotify.watches == {}
+    assert inotify.libc.inotify_rm_watch.call_count == 2
+
+
+def test_inotify_add_tree(inotify, tmp_path):
+    """Test add_tree records the files of dirs added to a tree."""
+    root = Root(tmp_path, True)
+    tree(tmp_path)
+    inotify.add_tree(root, tmp_path / "src")
+    assert (
+        set(root.dirty)
+        == {str(tmp_path / "src" / "b.py"),
+            str(tmp_path / "src" / "deep" / "c.py")})
+
+
+def test_inotify_close(inotify):
+    """Test close closes the inotify fd."""
+    inotify.watches[1] = MagicMock()
+    fd = inotify.fd
+    inotify.close()
+    assert inotify.watches == {}
+    with pytest.raises(OSError):
+        os.fstat(fd)
+    inotify.fd = os.open(os.devnull, os.O_RDONLY)
+
+
+@pytest.mark.parametrize(
+    "wd,mask,name,expected,lost",
+    [(9, IN_MODIFY, "a.py", None, False),
+     (1, IN_MODIFY, "a.py", "a.py", False),
+     (2, IN_MODIFY, "", "src", False),
+     (1, IN_IGNORED, "", None, True),
+     (2, IN_IGNORED, "", None, False),
+     (1, IN_CREATE | IN_ISDIR, "target", None, False),
+     (1, IN_CREATE, "target", "target", False),
+     (1, IN_CREATE | IN_ISDIR, "new", "new", False)])
+def test_inotify_handle(
+        inotify, tmp_path, wd, mask, name, expected, lost):
+    """Test handle records the change of an event."""
+    root = Root(tmp_path, True)
+    inotify.watches = {1: (root, tmp_path), 2: (root, tmp_path / "src")}
+    (tmp_path / "new" / "sub").mkdir(parents=True)
+    (tmp_path / "new" / "sub" / "n.py").write_text("N")
+    assert (
+        inotify.handle(wd, mask, name)
+        == (root if lost else None))
+    if mask & IN_IGNORED:
+        assert wd not in inotify.watches
+    if expected is None:
+        assert root.dirty == {}
+        return
+    changed = {str(tmp_path / expected)}
+    if expected == "new":
+        changed.add(str(tmp_path / "new" / "sub" / "n.py"))
+        assert (
+            {path for _, path in inotify.watches.values()}
+            >= {tmp_path / "new", tmp_path / "new" / "sub"})
+    assert set(root.dirty) == changed
+
+
+def test_inotify_handle_unwatchable(patches, inotify, tmp_path):
+    """Test handle returns the tree if a new dir cannot be watched."""
+    root = Root(tmp_path, True)
+    inotify.watches = {1: (root, tmp_path)}
+    patched = patches(
+        "Inotify.add_tree",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_add, ):
+        m_add.side_effect = OSError
+        assert inotify.handle(1, IN_CREATE | IN_ISDIR, "new") is root
+
+    assert (
+        m_add.call_args
+        == [(root, tmp_path / "new"), {}])
+
+
+def test_inotify_read(inotify, tmp_path):
+    """Test read handles the queued events."""
+    root = Root(tree(tmp_path), True)
+    inotify.add(root)
+    assert inotify.read() == set()
+    (tmp_path / "a.py").write_text("AA")
+    (tmp_path / "src" / "deep" / "d.py").write_text("D")
+    (tmp_path / "target" / "t.o").write_text("T")
+    assert inotify.read() == set()
+    assert (
+        set(root.dirty)
+        == {str(tmp_path / "a.py"),
+            str(tmp_path / "src" / "deep" / "d.py")})
+    shutil.rmtree(tmp_path / "src")
+    assert inotify.read() == set()
+    assert str(tmp_path / "src") in root.dirty
+    assert (
+        sorted(path for _, path in inotify.watches.values())
+        == [tmp_path])
+    other = Root(tmp_path / "other", True)
+    other.path.mkdir()
+    inotify.add(other)
+    other.path.rmdir()
+    assert inotify.read() == {other}
+
+
+def test_inotify_read_overflow(patches, inotify):
+    """Test read returns every tree if the queue overflowed."""
+    roots = [Root(MagicMock(), True), Root(MagicMock(), True)]
+    inotify.watches = {1: (roots[0], None), 2: (roots[1], None)}
+    patched = patches(
+        "os",
+        "Inotify.handle",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_os, m_handle):
+        m_os.read.side_effect = [
+            event(1, IN_MODIFY, b"a.py") + event(-1, IN_Q_OVERFLOW),
+            BlockingIOError]
+        m_os.fsdecode.side_effect = lambda name: name.decode()
+        m_handle.return_value = None
+        assert inotify.read() == set(roots)
+
+    assert (
+        m_handle.call_args_list
+        == [[(1, IN_MODIFY, "a.py"), {}]])
+
+
+def test_inotify_remove(inotify, tmp_path):
+    """Test remove stops watching a tree."""
+    root = Root(tree(tmp_path), True)
+    other = Root(tmp_path / "target", True)
+    inotify.add(root)
+    inotify.add(other)
+    inotify.remove(root)
+    assert list(inotify.watches.values()) == [(other, other.path)]
+    (tmp_path / "a.py").write_text("AA")
+    assert inotify.read() == set()
+    assert root.dirty == {}
+
+
+def test_poller_constructor():
+    """Test Poller class initialization."""
+    poller = Poller(EXCLUDED_DIRS, 7)
+    assert poller.excluded == EXCLUDED_DIRS
+    assert poller.batch == 7
+    assert poller.passes == {}
+    assert poller.listings == {}
+    assert poller.scanned == set()
+
+
+@pytest.mark.parametrize("batch", [1, 2, 100])
+def test_poller_poll(tmp_path, batch):
+    """Test poll sees the changes made since a tree was scanned."""
+    poller = Poller(EXCLUDED_DIRS, batch)
+    root = Root(tree(tmp_path), False)
+    poller.add(root)
+    for _ in range(10):
+        poller.poll(root)
+    assert root in poller.scanned
+    assert root.swept is (batch == 100)
+    assert (
+        set(poller.listings[root])
+        == {str(tmp_path),
+            str(tmp_path / "src"),
+            str(tmp_path / "src" / "deep")})
+    assert root.generation == 0
+    (tmp_path / "src" / "b.py").write_text("BB")
+    (tmp_path / "src" / "new" / "sub").mkdir(parents=True)
+    (tmp_path / "src" / "new" / "n.py").write_text("N")
+    (tmp_path / "target" / "t.o").write_text("T")
+    shutil.rmtree(tmp_path / "src" / "deep")
+    for _ in range(10):
+        poller.poll(root)
+    assert (
+        set(root.dirty)
+        == {str(tmp_path / "src" / "b.py"),
+            str(tmp_path / "src" / "deep"),
+            str(tmp_path / "src" / "new"),
+            str(tmp_path / "src" / "new" / "n.py"),
+            str(tmp_path / "src" / "new" / "sub")})
+    assert str(tmp_path / "src" / "deep") not in poller.listings[root]
+    generation = root.generation
+    for _ in range(10):
+        poller.poll(root)
+    assert root.generation == generation
+
+
+@pytest.mark.parametrize("batch", [1, 2, 3, 4])
+def test_poller_poll_swept(tmp_path, batch):
+    """Test a tree is swept by a poll that scans a whole pass, and only
+    then.
+    """
+    poller = Poller(EXCLUDED_DIRS, batch)
+    root = Root(tree(tmp_path), False)
+    poller.add(root)
+    swept = []
+    for _ in range(6):
+        poller.poll(root)
+        swept.append(root.swept)
+    # the tree has 3 dirs to scan, and each pass starts on a new poll
+    assert swept == [batch >= 3] * 6
+
+
+def test_poller_poll_gone(tmp_path):
+    """Test poll of a tree that is gone."""
+    poller = Poller(EXCLUDED_DIRS, 2)
+    root = Root(tmp_path / "project", False)
+    root.path.mkdir()
+    poller.add(root)
+    poller.poll(root)
+    root.path.rmdir()
+    poller.poll(root)
+    assert root.dirty == {str(root.path): 1}
+    poller.poll(root)
+    assert root.generation == 1
+
+
+def test_poller_remove():
+    """Test remove stops polling a tree."""
+    poller = Poller(EXCLUDED_DIRS, 2)
+    root = Root(MagicMock(), False)
+    poller.add(root)
+    poller.scanned.add(root)
+    poller.remove(root)
+    poller.remove(root)
+    assert poller.passes == {}
+    assert poller.listings == {}
+    assert poller.scanned == set()
+
+
+@pytest.mark.parametrize("method", [None, "poll"])
+@pytest.mark.parametrize(
+    "env",
+    [{}, dict(SYNCA_MCP_WATCH="off"), dict(SYNCA_MCP_WATCH="nope")])
+def test_watcher_constructor(patches, method, env):
+    """Test Watcher class initialization."""
+    patched = patches(
+        "os",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_os, ):
+        m_os.environ = env
+        if not method and env.get("SYNCA_MCP_WATCH") == "nope":
+            with pytest.raises(ValueError) as e:
+                Watcher(method)
+            assert (
+                e.value.args[0]
+                == ("Unknown watch method 'nope', must be in "
+                    "['auto', 'inotify', 'poll', 'off']"))
+            return
+        watcher = Watcher(method)
+
+    assert (
+        watcher.method
+        == (method
+            or env.get("SYNCA_MCP_WATCH")
+            or "auto"))
+    assert watcher.max_roots == 16
+    assert watcher.batch == 64
+    assert watcher.excluded == EXCLUDED_DIRS
+    assert watcher.roots == {}
+    assert watcher._inotify is None
+    assert watcher._poller is None
+
+
+@pytest.mark.parametrize("method", ["auto", "inotify", "poll", "off"])
+@pytest.mark.parametrize("fails", [True, False])
+def test_watcher_inotify(patches, method, fails):
+    """Test inotify is created when first used, if allowed."""
+    watcher = Watcher(method)
+    patched = patches(
+        "Inotify",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_inotify, ):
+        if fails:
+            m_inotify.side_effect = OSError
+        inotify = watcher.inotify
+        assert watcher.inotify is inotify
+
+    if method not in ("auto", "inotify"):
+        assert inotify is None
+        assert not m_inotify.called
+        assert watcher.method == method
+        return
+    if fails:
+        assert inotify is None
+        assert watcher.method == "poll"
+        assert m_inotify.call_count == 1
+        return
+    assert inotify == m_inotify.return_value
+    assert (
+        m_inotify.call_args_list
+        == [[(EXCLUDED_DIRS, ), {}]])
+
+
+def test_watcher_poller():
+    """Test poller is created when first used."""
+    watcher = Watcher(batch=7)
+    poller = watcher.poller
+    assert isinstance(poller, Poller)
+    assert poller.batch == 7
+    assert watcher.poller is poller
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_watcher_close(inotify):
+    """Test close stops watching all trees."""
+    watcher = Watcher()
+    watcher.roots["A"] = MagicMock()
+    watcher._poller = MagicMock()
+    _inotify = watcher._inotify = MagicMock() if inotify else None
+    watcher.close()
+    assert watcher.roots == {}
+    assert watcher._inotify is None
+    assert watcher._poller is None
+    if inotify:
+        assert (
+            _inotify.close.call_args
+            == [(), {}])
+
+
+@pytest.mark.parametrize("method", ["inotify", "poll"])
+def test_watcher_root(tmp_path, method):
+    """Test root watches a dir, and syncs the changes to it."""
+    watcher = Watcher(method, max_roots=2)
+    path = tree(tmp_path / "project")
+    try:
+        root = watcher.root(path)
+        assert root.exact is (method == "inotify")
+        assert root.current
+        assert watcher.root(path) is root
+        assert root.generation == 0
+        (path / "a.py").write_text("AA")
+        for _ in range(3):
+            assert watcher.root(path) is root
+        assert root.dirty == {str(path / "a.py"): 1}
+        others = [tmp_path / "other1", tmp_path / "other2"]
+        for other in others:
+            other.mkdir()
+            watcher.root(other)
+        assert list(watcher.roots) == [str(other) for other in others]
+        assert watcher.root(path) is not root
+    finally:
+        watcher.close()
+
+
+def test_watcher_root_lost(tmp_path):
+    """Test root watches a tree again once its watches are lost."""
+    watcher = Watcher("inotify")
+    path = tmp_path / "project"
+    path.mkdir()
+    try:
+        root = watcher.root(path)
+        path.rmdir()
+        path.mkdir()
+        again = watcher.root(path)
+        assert again is not root
+        assert again.exact
+        assert root.generation == 2
+        assert watcher.roots == {str(path): again}
+        (path / "a.py").write_text("A")
+        assert watcher.root(path) is again
+        assert list(again.dirty) == [str(path / "a.py")]
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("method", ["poll", "off"])
+def test_watcher_sync_polled(patches, method):
+    """Test sync polls trees not watched with inotify."""
+    watcher = Watcher(method)
+    root = Root(MagicMock(), False)
+    patched = patches(
+        ("Watcher.poller",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_poller, ):
+        assert not watcher.sync(root)
+
+    if method == "off":
+        assert not m_poller.called
+        return
+    assert (
+        m_poller.return_value.poll.call_args
+        == [(root, ), {}])
+
+
+def test_watcher_sync(patches):
+    """Test sync drops the trees that inotify lost."""
+    watcher = Watcher()
+    lost = Root(pathlib.Path("LOST"), True)
+    kept = Root(pathlib.Path("KEPT"), True)
+    watcher.roots.update(LOST=lost, KEPT=kept)
+    watcher._inotify = MagicMock()
+    watcher._inotify.read.return_value = {lost}
+    patched = patches(
+        "Watcher.unwatch",
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_unwatch, ):
+        assert not watcher.sync(kept)
+
+    assert watcher.roots == dict(KEPT=kept)
+    assert lost.generation == 1
+    assert (
+        m_unwatch.call_args_list
+        == [[(lost, ), {}]])
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+@pytest.mark.parametrize("poller", [True, False])
+def test_watcher_unwatch(inotify, poller):
+    """Test unwatch stops watching a tree."""
+    watcher = Watcher()
+    _inotify = watcher._inotify = MagicMock() if inotify else None
+    _poller = watcher._poller = MagicMock() if poller else None
+    root = MagicMock()
+    assert not watcher.unwatch(root)
+    if _inotify:
+        assert (
+            _inotify.remove.call_args
+            == [(root, ), {}])
+    if _poller:
+        assert (
+            _poller.remove.call_args
+            == [(root, ), {}])
+
+
+@pytest.mark.parametrize("method", ["auto", "poll", "off"])
+@pytest.mark.parametrize("fails", [True, False])
+def test_watcher_watch(patches, method, fails):
+    """Test watch watches a dir with inotify if possible, or else polls
+    it.
+    """
+    watcher = Watcher(method)
+    path = MagicMock()
+    patched = patches(
+        ("Watcher.inotify",
+         dict(new_callable=PropertyMock)),
+        ("Watcher.poller",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.common.util.watch")
+
+    with patched as (m_inotify, m_poller):
+        if method == "poll":
+            m_inotify.return_value = None
+        elif fails:
+            m_inotify.return_value.add.side_effect = OSError
+        root = watcher.watch(path)
+
+    assert root.path == path
+    inotify = method == "auto"
+    if method == "off":
+        assert not m_inotify.called
+    if inotify:
+        added = m_inotify.return_value.add.call_args[0][0]
+        assert added.path == path
+        assert added.exact is True
+        assert (added is root) is not fails
+    exact = inotify and not fails
+    assert root.exact is exact
+    if exact or method == "off":
+        assert not m_poller.called
+        return
+    assert (
+        m_poller.return_value.add.call_args
+        == [(root, ), {}])
@@ -2,13 +2,15 @@
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from synca.mcp.common.server import register
 from synca.mcp.common.types import ResultDict
 from synca.mcp.fs_extra.tool.head import HeadTool
 from synca.mcp.fs_extra.tool.tail import TailTool
 from synca.mcp.fs_extra.tool.grep import GrepTool
+from synca.mcp.fs_extra.tool.lines import LinesTool
 from synca.mcp.fs_extra.tool.sed import SedTool
 
-mcp = FastMCP("FS-Extra")
+mcp = register(FastMCP("FS-Extra"))
 
 
 # TOOLS
@@ -67,7 +69,11 @@ async def fs_head(
 async def fs_tail(
         ctx: Context,
         cwd: str,
-        tail_args: tuple[str, ...]) -> ResultDict:
+        tail_args: tuple[str, ...],
+        max_lines: int | None = None,
+        max_bytes: int | None = None,
+        idle_timeout: float | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Display the end of a file.
 
     Wraps the Unix 'tail' command to display the last part of files.
@@ -84,7 +90,10 @@ async def fs_tail(
         lines
       - Byte limits: pass args=["-c", "1000", "filename.txt"] to see last
         1000 bytes
-      - Follow mode: pass args=["-f", "filename.txt"] to follow file updates
+      - Follow mode: pass args=["-f", "filename.txt"] to follow file updates.
+        Only a single file, with `-n` or `-c`, can be followed. The lines
+        appended are sent as progress notifications as they are read, and
+        returned once following stops.
 
     Args:
         cwd: Directory path from which to run the tail command
@@ -94,6 +103,13 @@ async def fs_tail(
                    These arguments are passed through exactly as provided
                    The file path should be included in the args parameter
                    See 'man tail' for all available options
+        max_lines: In follow mode, stop after this many lines are appended
+        max_bytes: In follow mode, stop after this many bytes are appended
+                   (default 1 MiB)
+        idle_timeout: In follow mode, stop once nothing is appended for
+                      this many seconds (default 10)
+        timeout: Optional timeout in seconds, after which the run is
+                 stopped
 
     Returns:
         A dictionary with the following structure:
@@ -110,14 +126,23 @@ async def fs_tail(
             "error": str | None
         }
     """
-    return await TailTool(ctx, cwd, dict(args=tail_args)).run()
+    return await TailTool(
+        ctx,
+        cwd,
+        dict(args=tail_args,
+             max_lines=max_lines,
+             max_bytes=max_bytes,
+             idle_timeout=idle_timeout,
+             timeout=timeout)).run()
 
 
 @mcp.tool()
 async def fs_grep(
         ctx: Context,
         cwd: str,
-        grep_args: tuple[str, ...]) -> ResultDict:
+        grep_args: tuple[str, ...],
+        gitignore: bool = False,
+        index: bool = False) -> ResultDict:
     """Search for patterns in a file or directory.
 
     Wraps the Unix 'grep' command to search for patterns in files.
@@ -148,6 +173,16 @@ async def fs_grep(
                    These arguments are passed through exactly as provided
                    The file or directory to search should be included in the
                    args parameter
+        gitignore: Skip paths ignored by `.gitignore` files, and `.git`
+                   dirs, when searching dirs recursively. Only applies to
+                   the searches that are run in process, ie using only
+                   the -r, -n, -i, -F, -E, -l, -H, -h, -e and -m options,
+                   so other searches match `grep -r` whether set or not
+        index: Narrow recursive searches in process that skip ignored
+               paths, with `gitignore` set, with a trigram index of cwd,
+               kept up to date and saved between calls. Speeds up
+               repeated searches of the same tree, reporting the index
+               in the result info
 
     Returns:
         A dictionary with the following structure:
@@ -163,7 +198,10 @@ async def fs_grep(
             "error": str | None
         }
     """
-    return await GrepTool(ctx, cwd, dict(args=grep_args)).run()
+    return await GrepTool(
+        ctx,
+        cwd,
+        dict(args=grep_args, gitignore=gitignore, index=index)).run()
 
 
 @mcp.tool()
@@ -220,3 +258,56 @@ async def fs_sed(
         }
     """
     return await SedTool(ctx, cwd, dict(args=sed_args)).run()
+
+
+@mcp.tool()
+async def fs_lines(
+        ctx: Context,
+        cwd: str,
+        file: str,
+        start: int,
+        end: int | None = None) -> ResultDict:
+    """Read a range of lines of a file.
+
+    Lines of a regular file are read through an index of its line offsets,
+    built on the first read of the file and extended as it grows, so that
+    a range deep in a large file, eg lines 2000000 to 2000050, is read
+    without reading the lines before it. Other files are read with the
+    Unix 'sed' command.
+
+    A file that has grown is taken to have been appended to if the first
+    and last blocks that its index counted are unchanged. A file rewritten
+    to grow, with only lines between those blocks changed, can be read
+    with stale line offsets.
+
+    Common usages:
+      - Read a range: file="filename.txt", start=10, end=20 to read lines
+        10 through 20
+      - Read to the end: file="filename.txt", start=100 to read from line
+        100 to the end of the file
+
+    Args:
+        cwd: Directory path from which to read the file
+              (working directory)
+        file: Path of the file to read, relative to `cwd`
+        start: First line to read, counting from 1
+        end: Last line to read, or None to read to the end of the file
+
+    Returns:
+        A dictionary with the following structure:
+        {
+            "success": bool,
+            "data": {
+                "message": str,
+                "output": str,
+                "lines_read": int,
+                "bytes_read": int,
+                "info": dict
+            },
+            "error": str | None
+        }
+    """
+    return await LinesTool(
+        ctx,
+        cwd,
+        dict(file=file, start=start, end=end)).run()
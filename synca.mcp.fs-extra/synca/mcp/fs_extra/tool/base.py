@@ -1,9 +1,21 @@
 """Base Tool class for Unix file tools."""
 
+import asyncio
+import pathlib
+
 from synca.mcp.common.tool import CLITool
-from synca.mcp.common.types import ArgTuple, OutputTuple
+from synca.mcp.common.types import (
+    ArgTuple, CommandTuple, OutputTuple, ResponseTuple)
+from synca.mcp.common.util.timing import phase
 from synca.mcp.fs_extra.errors import FSCommandError
 
+# flag: unit, of the slices that are read in process
+SLICE_FLAGS = {
+    "-n": "lines",
+    "--lines": "lines",
+    "-c": "bytes",
+    "--bytes": "bytes"}
+
 
 class UnixTool(CLITool):
     """Base class for Unix filesystem tools.
@@ -11,6 +23,7 @@ class UnixTool(CLITool):
     failure_message = ""
     success_message = ""
     flags_with_args: tuple[str, ...] = ()
+    lane = "fast"
 
     @property
     def args(self) -> ArgTuple:
@@ -74,7 +87,104 @@ class UnixTool(CLITool):
 
 
 class UnixSliceTool(UnixTool):
+    """Base class for tools reading a slice of a file.
+
+    Plain `-n`/`-c` slices of a single file are read in process by
+    `read_slice` where the tool implements it, rather than paying for
+    running the command. Any other args, or files that cannot be read
+    in process, are left to the command.
+    """
     success_message = "Command succeeded"
+    # Flags that the tool handles itself, which are skipped as slices are
+    # parsed
+    follow_flags: tuple[str, ...] = ()
+    # Slices of this many bytes or more, counting lines at `line_size`
+    # bytes each, are read in a thread
+    read_threshold: int | None = 256 * 1024
+    line_size = 256
+
+    @property
+    def slice_args(self) -> tuple[str, str, int] | None:
+        """The file, unit and count of a plain slice of one file, or
+        `None` if the args need the command.
+        """
+        unit, count, files = "lines", 10, []
+        short_follow = "".join(
+            flag[1]
+            for flag
+            in self.follow_flags
+            if len(flag) == 2)
+        args = iter(self.args)
+        for arg in args:
+            if len(arg) > 1 and arg[0] == "-" and arg[1] in short_follow:
+                # Follow flags clustered with others, eg `-fn 20`
+                if not (rest := arg[1:].lstrip(short_follow)):
+                    continue
+                arg = f"-{rest}"
+            flag, equals, value = arg.partition("=")
+            if flag in self.follow_flags:
+                continue
+            if flag.startswith("--") and flag in SLICE_FLAGS:
+                unit = SLICE_FLAGS[flag]
+                if not equals:
+                    value = next(args, "")
+            elif arg[:2] in SLICE_FLAGS:
+                unit = SLICE_FLAGS[arg[:2]]
+                value = arg[2:] or next(args, "")
+            elif arg.startswith("-"):
+                return None
+            else:
+                files.append(arg)
+                continue
+            if not (value.isascii() and value.isdigit()):
+                return None
+            count = int(value)
+        if len(files) != 1:
+            return None
+        return files[0], unit, count
+
+    async def execute(self, cmd: CommandTuple) -> ResponseTuple:
+        """Read a plain slice of a file in process if possible, or else
+        run the command.
+
+        Small slices are read on the event loop, as they are cheaper to
+        read than to hand to a thread. Slices of `read_threshold` bytes
+        or more are read in a thread, timed as the `read_thread` phase,
+        so that the loop can serve other requests meanwhile.
+        """
+        if args := self.slice_args:
+            file, unit, count = args
+            if self.threaded(unit, count):
+                with phase("read_thread"):
+                    data = await asyncio.to_thread(
+                        self.read_slice,
+                        self.path / file,
+                        unit,
+                        count)
+            else:
+                with phase("read"):
+                    data = self.read_slice(self.path / file, unit, count)
+            if data is not None:
+                with phase("decode"):
+                    return data.decode(), "", 0
+        return await super().execute(cmd)
+
+    def read_slice(
+            self,
+            path: pathlib.Path,
+            unit: str,
+            count: int) -> bytes | None:
+        """Read a slice of a file in process, or return `None` to run the
+        command.
+        """
+        return None
+
+    def threaded(self, unit: str, count: int) -> bool:
+        """Whether a slice may be large enough to read in a thread."""
+        if self.read_threshold is None:
+            return False
+        size = count * self.line_size if unit == "lines" else count
+        return size >= self.read_threshold
 
     def validate_args(self, args: ArgTuple) -> None:
         """Validate command line arguments.
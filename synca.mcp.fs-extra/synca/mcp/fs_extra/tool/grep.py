@@ -1,18 +1,187 @@
 """Grep tool implementation for MCP server."""
 
+import asyncio
+
+from mcp.server.fastmcp import Context
+
+from synca.mcp.common.types import (
+    CommandTuple, IndexInfoDict, OutputTuple, ResponseTuple)
+from synca.mcp.common.util.timing import phase
 from synca.mcp.fs_extra.errors import FSCommandError
 from synca.mcp.fs_extra.tool.base import UnixTool
+from synca.mcp.fs_extra.types import GrepArgDict
+from synca.mcp.fs_extra.util import (
+    GrepSearch, TrigramIndex, compile_pattern)
+
+# Short flags that are searched in process, `e` and `m` taking a value
+GREP_FLAGS = frozenset("rniFElHhem")
+# long flag: short flag
+GREP_LONG_FLAGS = {
+    "--recursive": "r",
+    "--line-number": "n",
+    "--ignore-case": "i",
+    "--fixed-strings": "F",
+    "--extended-regexp": "E",
+    "--files-with-matches": "l",
+    "--with-filename": "H",
+    "--no-filename": "h",
+    "--regexp": "e",
+    "--max-count": "m"}
 
 
 class GrepTool(UnixTool):
-    """Grep tool implementation using Unix grep command."""
+    """Grep tool implementation using Unix grep command.
+
+    Searches using only the flags in `GREP_FLAGS`, and a pattern that
+    `compile_pattern` supports, are run in process by `GrepSearch`,
+    skipping any paths ignored by `.gitignore` files if `gitignore` is
+    set. Any other args are left to the command, which skips nothing.
+
+    If `index` is set, recursive searches that skip ignored paths are
+    narrowed by the `TrigramIndex` of the path, and report the index in
+    the result info.
+    """
     _recursive_flags = ('-r', '-R', '--recursive')
+    _args: GrepArgDict
+    index_info: IndexInfoDict | None = None
+
+    def __init__(self, ctx: Context, path: str, args: GrepArgDict) -> None:
+        super().__init__(ctx, path, args)
+
+    @property
+    def gitignore(self) -> bool:
+        """Whether in process searches skip ignored paths."""
+        return bool(self._args.get("gitignore"))
+
+    @property
+    def index(self) -> bool:
+        """Whether recursive searches are narrowed by an index."""
+        return bool(self._args.get("index"))
+
+    @property
+    def search(self) -> GrepSearch | None:
+        """The search of the args in process, or `None` if they need the
+        command.
+        """
+        flags: list[str] = []
+        values: dict[str, list[str | None]] = dict(e=[], m=[])
+        operands: list[str] = []
+        args = iter(self.args)
+        for arg in args:
+            name, equals, value = arg.partition("=")
+            if name in GREP_LONG_FLAGS:
+                flag = GREP_LONG_FLAGS[name]
+                if flag in values:
+                    values[flag].append(value if equals else next(args, None))
+                elif equals:
+                    return None
+                else:
+                    flags.append(flag)
+            elif arg.startswith("--") or arg == "-":
+                return None
+            elif arg.startswith("-"):
+                for i, flag in enumerate(arg[1:], 1):
+                    if flag not in GREP_FLAGS:
+                        return None
+                    if flag in values:
+                        values[flag].append(arg[i + 1:] or next(args, None))
+                        break
+                    flags.append(flag)
+            else:
+                operands.append(arg)
+        patterns, counts = values["e"], values["m"]
+        if not patterns:
+            patterns.extend(operands[:1])
+            operands = operands[1:]
+        if len(patterns) != 1 or len(counts) > 1:
+            return None
+        if (pattern := patterns[0]) is None:
+            return None
+        if not (operands or "r" in flags) or ("E" in flags and "F" in flags):
+            return None
+        count = counts[0] if counts else ""
+        if counts and not (count and count.isascii() and count.isdigit()):
+            return None
+        matcher = compile_pattern(
+            pattern,
+            ("extended"
+             if "E" in flags
+             else "fixed"
+             if "F" in flags
+             else "basic"),
+            "i" in flags)
+        if not matcher:
+            return None
+        filenames = [flag for flag in flags if flag in "Hh"]
+        return GrepSearch(
+            matcher,
+            operands,
+            recursive="r" in flags,
+            line_number="n" in flags,
+            files_only="l" in flags,
+            max_count=int(count) if count else None,
+            with_filename=filenames[-1] == "H" if filenames else None,
+            gitignore=self.gitignore)
 
     @property
     def tool_name(self) -> str:
         """Return the name of the tool."""
         return "grep"
 
+    async def execute(self, cmd: CommandTuple) -> ResponseTuple:
+        """Search in process if possible, narrowed by the index if it is
+        used, or else run the command.
+        """
+        if not (search := self.search):
+            return await super().execute(cmd)
+        refreshed: tuple[bool, float, int] | None = None
+        if self.index and search.recursive and search.gitignore:
+            with phase("index"):
+                search.index, refreshed = await asyncio.to_thread(
+                    self.refresh_index)
+        with phase("search"):
+            response = await asyncio.to_thread(search.run, self.path)
+        if refreshed:
+            self.index_info = self.index_stats(search, *refreshed)
+        return response
+
+    def index_stats(
+            self,
+            search: GrepSearch,
+            built: bool,
+            seconds: float,
+            indexed: int) -> IndexInfoDict:
+        """Info of the index that narrowed a search."""
+        return dict(
+            files=search.index_files,
+            candidates=search.index_candidates,
+            candidate_ratio=(
+                round(search.index_candidates / search.index_files, 4)
+                if search.index_files
+                else 1.0),
+            build_time=round(seconds, 6) if built else None,
+            refresh_time=None if built else round(seconds, 6),
+            indexed=indexed)
+
+    def parse_output(
+            self,
+            stdout: str,
+            stderr: str,
+            return_code: int) -> OutputTuple:
+        """Parse the output, adding the info of any index used."""
+        output = super().parse_output(stdout, stderr, return_code)
+        if self.index_info:
+            output[3]["index"] = self.index_info
+        return output
+
+    def refresh_index(
+            self) -> tuple[TrigramIndex, tuple[bool, float, int]]:
+        """The index of the path, brought up to date with the changes the
+        watcher saw, and how it was refreshed.
+        """
+        index = TrigramIndex.for_dir(self.path)
+        return index, index.refresh(self.watcher.root(self.path))
+
     def validate_args(self, args):
         """Check if grep arguments appear to be complete or might
         require stdin.
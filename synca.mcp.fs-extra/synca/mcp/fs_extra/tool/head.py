@@ -1,6 +1,9 @@
 """Head tool implementation for MCP server."""
 
+import pathlib
+
 from synca.mcp.fs_extra.tool.base import UnixSliceTool
+from synca.mcp.fs_extra.util import FileSlice
 
 
 class HeadTool(UnixSliceTool):
@@ -8,7 +11,7 @@ class HeadTool(UnixSliceTool):
 
     This tool displays the beginning of a file using the Unix 'head' command.
     It follows the direct argument passthrough pattern, allowing all head
-    options to be used.
+    options to be used. Plain `-n`/`-c` slices are read in process.
 
     Note:
         The file path to process should be included as part of the args
@@ -21,3 +24,10 @@ class HeadTool(UnixSliceTool):
     def tool_name(self) -> str:
         """Return the name of the tool."""
         return "head"
+
+    def read_slice(
+            self,
+            path: pathlib.Path,
+            unit: str,
+            count: int) -> bytes | None:
+        return FileSlice(path).head(count, unit)
@@ -0,0 +1,106 @@
+"""Lines tool implementation for MCP server."""
+
+import asyncio
+
+from mcp.server.fastmcp import Context
+
+from synca.mcp.common.types import (
+    ArgTuple, CommandTuple, LineIndexInfoDict, OutputTuple, ResponseTuple)
+from synca.mcp.common.util.timing import phase
+from synca.mcp.fs_extra.errors import FSCommandError
+from synca.mcp.fs_extra.tool.base import UnixTool
+from synca.mcp.fs_extra.types import LinesArgDict
+from synca.mcp.fs_extra.util import LineIndex
+
+
+class LinesTool(UnixTool):
+    """Tool reading a range of lines of a file.
+
+    Lines of a regular file are read in process through its `LineIndex`,
+    which is built on the first read of the file and kept up to date on
+    later reads, so that a range deep in a large file is read by seeking
+    to it rather than by reading every line before it. Other files are
+    left to `sed`, eg `sed -n '10,20p;20q' FILE`.
+    """
+    success_message = "Successfully read the lines of file"
+    index_info: LineIndexInfoDict | None = None
+    _args: LinesArgDict
+
+    def __init__(self, ctx: Context, path: str, args: LinesArgDict) -> None:
+        super().__init__(ctx, path, args)
+
+    @property
+    def args(self) -> ArgTuple:
+        """The `sed` args printing the lines, and stopping after them."""
+        script = (
+            f"{self.start},$p"
+            if self.end is None
+            else f"{self.start},{self.end}p;{self.end}q")
+        args = ("-n", script, self.file)
+        self.validate_args(args)
+        return args
+
+    @property
+    def end(self) -> int | None:
+        """Last line to read, counting from 1, or `None` to read to the
+        end of the file.
+        """
+        return self._args.get("end")
+
+    @property
+    def err_range(self) -> str:
+        return (
+            "Lines are counted from 1, and the end of the range cannot be "
+            f"before its start: {self.start}-{self.end}")
+
+    @property
+    def file(self) -> str:
+        return self._args["file"]
+
+    @property
+    def start(self) -> int:
+        """First line to read, counting from 1."""
+        return self._args["start"]
+
+    @property
+    def tool_name(self) -> str:
+        """Return the name of the tool."""
+        return "sed"
+
+    async def execute(self, cmd: CommandTuple) -> ResponseTuple:
+        """Read the lines through the line index of the file, or else run
+        the command.
+
+        Lines are read in a thread, as indexing a file reads all of it.
+        """
+        with phase("read"):
+            read = await asyncio.to_thread(
+                LineIndex.read,
+                self.path / self.file,
+                self.start,
+                self.end)
+        if read is None:
+            return await super().execute(cmd)
+        data, refresh, refresh_time, lines = read
+        self.index_info = dict(
+            lines=lines,
+            refresh=refresh,
+            refresh_time=refresh_time)
+        with phase("decode"):
+            return data.decode(errors="replace"), "", 0
+
+    def parse_output(
+            self,
+            stdout: str,
+            stderr: str,
+            return_code: int) -> OutputTuple:
+        """Parse the output, adding the info of the line index."""
+        output = super().parse_output(stdout, stderr, return_code)
+        if self.index_info:
+            output[3]["line_index"] = self.index_info
+        return output
+
+    def validate_args(self, args: ArgTuple) -> None:
+        """Check the range of lines is valid."""
+        if self.start < 1 or (self.end is not None and self.end < self.start):
+            raise FSCommandError(self.err_range)
@@ -1,6 +1,24 @@
 """Tail tool implementation for MCP server."""
 
+import asyncio
+import pathlib
+import re
+
+from mcp.server.fastmcp import Context
+
+from synca.mcp.common.types import (
+    CommandTuple, FollowInfoDict, OutputTuple, ResponseTuple)
+from synca.mcp.common.util.timing import phase
+from synca.mcp.fs_extra.errors import FSCommandError
 from synca.mcp.fs_extra.tool.base import UnixSliceTool
+from synca.mcp.fs_extra.types import TailArgDict
+from synca.mcp.fs_extra.util import FileFollow, FileSlice
+
+# A line, or the partial line ending some data
+LINE = re.compile(b"[^\n]*\n|[^\n]+")
+# A cluster of short flags that follows, before any flag taking a value,
+# eg `-fn`
+FOLLOW_CLUSTER = re.compile(r"-[^-ncs]*[fF]")
 
 
 class TailTool(UnixSliceTool):
@@ -8,16 +26,152 @@ class TailTool(UnixSliceTool):
 
     This tool displays the end of a file using the Unix 'tail' command.
     It follows the direct argument passthrough pattern, allowing all tail
-    options to be used including -f for following file changes.
+    options to be used. Plain `-n`/`-c` slices are read in process,
+    seeking backward from the end of the file.
+
+    With `-f`, `-F` or `--follow`, a plain slice of one file is followed
+    in process by `FileFollow`, rather than by a command that would never
+    exit. The lines appended to the file are sent to the client as
+    progress notifications of at most `batch_lines` lines, and returned
+    after the slice once following stops: after `max_lines` lines or
+    `max_bytes` bytes, once nothing is appended for `idle_timeout`
+    seconds, or once the run times out.
 
     Note:
         The file path to process should be included as part of the args
         parameter.
     """
     success_message = "Successfully read the end of file"
-    flags_with_args = ('-n', '--lines', '-c', '--bytes', '-f', '--follow')
+    flags_with_args = ('-n', '--lines', '-c', '--bytes')
+    follow_flags = ('-f', '-F', '--follow')
+    batch_lines = 100
+    default_max_bytes = 1024 * 1024
+    default_idle_timeout = 10.0
+    follow_info: FollowInfoDict | None = None
+    _args: TailArgDict
+
+    def __init__(self, ctx: Context, path: str, args: TailArgDict) -> None:
+        super().__init__(ctx, path, args)
+
+    @property
+    def err_follow(self) -> str:
+        return (
+            "Tail can only follow a single file, with no options other "
+            "than -n or -c, eg `-f -n 20 FILE`.")
+
+    @property
+    def follow(self) -> bool:
+        """Whether the args follow the file, with a follow flag of its own,
+        in a cluster of short flags, eg `-fn 20`, or abbreviated, eg
+        `--fol`.
+        """
+        for arg in self.args:
+            flag = arg.partition("=")[0]
+            if flag in self.follow_flags or FOLLOW_CLUSTER.match(arg):
+                return True
+            if flag.startswith("--f") and "--follow".startswith(flag):
+                return True
+        return False
+
+    @property
+    def idle_timeout(self) -> float:
+        """Seconds without anything appended after which following
+        stops.
+        """
+        return self._args.get("idle_timeout") or self.default_idle_timeout
+
+    @property
+    def max_bytes(self) -> int:
+        """Bytes read while following after which it stops."""
+        return self._args.get("max_bytes") or self.default_max_bytes
+
+    @property
+    def max_lines(self) -> int | None:
+        """Lines read while following after which it stops, if any."""
+        return self._args.get("max_lines")
 
     @property
     def tool_name(self) -> str:
         """Return the name of the tool."""
         return "tail"
+
+    async def execute(self, cmd: CommandTuple) -> ResponseTuple:
+        """Follow the file in process if the args follow it, or else read
+        the slice.
+
+        Follows that cannot be run in process are refused, rather than
+        left to a command that would never exit.
+        """
+        if not self.follow:
+            return await super().execute(cmd)
+        if not (args := self.slice_args):
+            raise FSCommandError(self.err_follow)
+        file, unit, count = args
+        follow = FileFollow(
+            self.path / file,
+            max_lines=self.max_lines,
+            max_bytes=self.max_bytes,
+            idle_timeout=self.idle_timeout)
+        if (data := follow.open(count, unit)) is None:
+            return "", f"tail: cannot open '{file}' for reading\n", 1
+        try:
+            with phase("follow"):
+                followed = await self.follow_file(follow)
+        finally:
+            follow.close()
+        with phase("decode"):
+            return (data + followed).decode(errors="replace"), "", 0
+
+    async def follow_file(self, follow: FileFollow) -> bytes:
+        """Follow the file until following stops, sending the lines read
+        to the client as they are read, and returning them.
+        """
+        chunks: list[bytes] = []
+        notifications = sent = 0
+
+        async def notify(data: bytes) -> None:
+            nonlocal notifications, sent
+            chunks.append(data)
+            lines = LINE.findall(data)
+            for start in range(0, len(lines), self.batch_lines):
+                batch = lines[start:start + self.batch_lines]
+                notifications += 1
+                sent += len(batch)
+                await self.send_progress(
+                    sent,
+                    self.max_lines,
+                    b"".join(batch).decode(errors="replace"))
+
+        try:
+            async with asyncio.timeout(self.timeout):
+                await follow.follow(notify)
+        except TimeoutError:
+            follow.stopped = "timeout"
+        if partial := follow.flush():
+            await notify(partial)
+        self.follow_info = dict(
+            lines=follow.lines,
+            bytes=follow.bytes,
+            rotations=follow.rotations,
+            truncations=follow.truncations,
+            notifications=notifications,
+            stopped=follow.stopped or "timeout")
+        return b"".join(chunks)
+
+    def parse_output(
+            self,
+            stdout: str,
+            stderr: str,
+            return_code: int) -> OutputTuple:
+        """Parse the output, adding the info of any follow."""
+        output = super().parse_output(stdout, stderr, return_code)
+        if self.follow_info:
+            output[3]["follow"] = self.follow_info
+        return output
+
+    def read_slice(
+            self,
+            path: pathlib.Path,
+            unit: str,
+            count: int) -> bytes | None:
+        return FileSlice(path).tail(count, unit)
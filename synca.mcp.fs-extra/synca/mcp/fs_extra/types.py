@@ -0,0 +1,22 @@
+"""Type definitions for the FS Extra MCP package."""
+
+from typing import NotRequired
+
+from synca.mcp.common.types import CLIArgDict
+
+
+class GrepArgDict(CLIArgDict):
+    gitignore: NotRequired[bool | None]
+    index: NotRequired[bool | None]
+
+
+class LinesArgDict(CLIArgDict):
+    file: str
+    start: int
+    end: NotRequired[int | None]
+
+
+class TailArgDict(CLIArgDict):
+    max_lines: NotRequired[int | None]
+    max_bytes: NotRequired[int | None]
+    idle_timeout: NotRequired[float | None]
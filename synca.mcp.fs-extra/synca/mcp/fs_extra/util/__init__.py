@@ -0,0 +1,19 @@
+"""Utility modules for FS Extra MCP."""
+
+from synca.mcp.fs_extra.util.follow import FileFollow
+from synca.mcp.fs_extra.util.grep import GrepSearch, Matcher, compile_pattern
+from synca.mcp.fs_extra.util.ignore import GitIgnore, IgnoreRules
+from synca.mcp.fs_extra.util.lines import LineIndex
+from synca.mcp.fs_extra.util.slice import FileSlice
+from synca.mcp.fs_extra.util.trigram import TrigramIndex
+
+__all__ = (
+    "compile_pattern",
+    "FileFollow",
+    "FileSlice",
+    "GitIgnore",
+    "GrepSearch",
+    "IgnoreRules",
+    "LineIndex",
+    "Matcher",
+    "TrigramIndex")
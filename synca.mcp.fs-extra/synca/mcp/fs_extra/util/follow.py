@@ -0,0 +1,163 @@
+"""In-process following of files as they grow."""
+
+import asyncio
+import os
+import pathlib
+import stat
+import time
+from typing import Awaitable, Callable
+
+from synca.mcp.fs_extra.util.slice import FileSlice
+
+
+class FileFollow:
+    """The data appended to a regular file, followed by name.
+
+    The file is checked with `stat` every `interval` seconds. If its name
+    comes to refer to another file, eg once a log is rotated, the rest of
+    the old file is read before the new one is followed from its start.
+    If the file shrinks, it is taken to have been truncated, and is
+    followed from its start again.
+
+    Only whole lines are passed on while following, so that lines are not
+    split between reads. Following stops once `max_lines` lines or
+    `max_bytes` bytes have been read, or once nothing has been appended
+    for `idle_timeout` seconds, leaving any partial line to `flush`.
+    """
+    interval = 0.1
+
+    def __init__(
+            self,
+            path: pathlib.Path,
+            max_lines: int | None = None,
+            max_bytes: int | None = None,
+            idle_timeout: float | None = None) -> None:
+        self.path = path
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.slice = FileSlice(path)
+        self.fd: int | None = None
+        # device and inode of the file followed
+        self.identity: tuple[int, int] | None = None
+        self.partial = b""
+        self.lines = 0
+        self.bytes = 0
+        self.rotations = 0
+        self.truncations = 0
+        # why following stopped: "lines", "bytes" or "idle"
+        self.stopped: str | None = None
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def flush(self) -> bytes:
+        """The partial line left unread when following stopped."""
+        data, self.partial = self.partial, b""
+        self.lines += bool(data)
+        self.bytes += len(data)
+        return data
+
+    async def follow(
+            self,
+            on_data: Callable[[bytes], Awaitable[None]]) -> None:
+        """Pass the lines appended to the file to `on_data` as they are
+        read, until following stops.
+        """
+        active = time.monotonic()
+        while True:
+            if data := self.read():
+                active = time.monotonic()
+                await on_data(data)
+            if self.stopped:
+                return
+            if (self.idle_timeout is not None
+                    and time.monotonic() - active >= self.idle_timeout):
+                self.stopped = "idle"
+                return
+            await asyncio.sleep(self.interval)
+
+    def open(self, count: int, unit: str = "lines") -> bytes | None:
+        """Start following the file, returning its last `count` lines or
+        bytes, or `None` if it cannot be opened or is not a regular file.
+        """
+        if (fd := self.open_file()) is None:
+            return None
+        self.fd = fd
+        data = (
+            self.slice.tail_lines(fd, count)
+            if unit == "lines"
+            else self.slice.tail_bytes(fd, count))
+        if not count:
+            os.lseek(fd, 0, os.SEEK_END)
+        return data
+
+    def open_file(self) -> int | None:
+        """Open the file the path refers to now, if it is a regular file.
+        """
+        try:
+            # Opened non-blocking, so that opening a fifo does not wait
+            # for a writer
+            fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return None
+        info = os.fstat(fd)
+        if not stat.S_ISREG(info.st_mode):
+            os.close(fd)
+            return None
+        self.identity = (info.st_dev, info.st_ino)
+        return fd
+
+    def poll(self, limit: int | None = None) -> bytes:
+        """Read up to `limit` bytes appended to the file, switching to a
+        new file of the same name once the old one has been read.
+        """
+        assert self.fd is not None
+        try:
+            info: os.stat_result | None = os.stat(self.path)
+        except OSError:
+            # The file may be gone for a moment as it is rotated
+            info = None
+        if info and (info.st_dev, info.st_ino) == self.identity:
+            if info.st_size < os.lseek(self.fd, 0, os.SEEK_CUR):
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                self.truncations += 1
+            return self.slice.read_to(self.fd, limit)
+        data = self.slice.read_to(self.fd, limit)
+        if info and (limit is None or len(data) < limit):
+            if (fd := self.open_file()) is not None:
+                os.close(self.fd)
+                self.fd = fd
+                self.rotations += 1
+        return data
+
+    def read(self) -> bytes:
+        """The whole lines appended to the file since the last read, up
+        to the lines and bytes left to read.
+        """
+        partial, self.partial = self.partial, b""
+        left = (
+            None
+            if self.max_bytes is None
+            else self.max_bytes - self.bytes)
+        data = partial + self.poll(
+            None
+            if left is None
+            else left - len(partial))
+        if left is not None and len(data) >= left:
+            self.stopped = "bytes"
+        else:
+            end = data.rfind(b"\n") + 1
+            data, self.partial = data[:end], data[end:]
+        if self.max_lines is not None and (
+                data.count(b"\n") >= (lines := self.max_lines - self.lines)):
+            end = -1
+            for _ in range(lines):
+                end = data.index(b"\n", end + 1)
+            data, self.partial = data[:end + 1], b""
+            self.stopped = "lines"
+        self.lines += data.count(b"\n")
+        self.bytes += len(data)
+        return data
@@ -0,0 +1,496 @@
+"""In-process searching of files for lines matching a pattern."""
+
+import concurrent.futures
+import errno
+import functools
+import mmap
+import os
+import pathlib
+import re
+import stat
+from typing import ClassVar
+
+from synca.mcp.common.types import ResponseTuple
+from synca.mcp.fs_extra.util.ignore import GitIgnore
+from synca.mcp.fs_extra.util.trigram import TrigramIndex
+
+# Characters special in basic (BRE) and extended (ERE) regexes
+BRE_SPECIAL = frozenset(".[]*^$\\")
+ERE_SPECIAL = BRE_SPECIAL | frozenset("+?|(){}")
+# Escapes of the characters that are literal in BREs, but special in
+# Python regexes
+BRE_LITERAL = {char: f"\\{char}" for char in "+?|(){}"}
+# GNU escapes of word and buffer anchors, eg `\<`, which Python regexes
+# lack or spell differently
+GNU_ANCHORS = frozenset("<>`'")
+# ERE intervals, eg `{2}` or `{2,5}`
+INTERVAL = re.compile(r"\{\d+(,\d*)?\}")
+# Result of searching a binary file that matches
+BINARY = "\0binary"
+
+Buffer = bytes | mmap.mmap
+# Matches and errors of the files of a dir by name, the name and path of
+# its subdirs, and the ignore files that apply to them
+Walked = tuple[
+    dict[str, str],
+    dict[str, str],
+    list[tuple[str, str]],
+    GitIgnore | None]
+
+
+class Matcher:
+    """A compiled search pattern, found with `find` if it is a literal,
+    or else with a regex.
+
+    `required` holds the (lowercase) literals that every match contains.
+    """
+    __slots__ = ("literal", "regex", "required")
+
+    def __init__(
+            self,
+            literal: bytes | None = None,
+            regex: re.Pattern[bytes] | None = None,
+            required: tuple[bytes, ...] = ()) -> None:
+        self.literal = literal
+        self.regex = regex
+        self.required = required
+
+    def find(self, data: Buffer, start: int) -> int:
+        """The position of the next match from `start`, or -1."""
+        if self.literal is not None:
+            return data.find(self.literal, start)
+        assert self.regex
+        match = self.regex.search(data, start)
+        return match.start() if match else -1
+
+    def matches(self, data: Buffer, start: int, end: int) -> bool:
+        """Whether the line between `start` and `end` matches, as a regex
+        match found from a line may end on a later line.
+        """
+        if self.literal is not None:
+            return True
+        assert self.regex
+        return bool(self.regex.search(data, start, end))
+
+
+@functools.lru_cache(maxsize=256)
+def compile_pattern(
+        pattern: str,
+        syntax: str = "basic",
+        ignore_case: bool = False) -> Matcher | None:
+    """Compile a grep pattern of `basic`, `extended` or `fixed` syntax,
+    or return `None` if it uses features that are not supported in
+    process.
+
+    Patterns that are not ASCII are left to `grep`, as bytes regexes
+    match, and case fold, bytes rather than the characters of the locale.
+
+    Compiled patterns are kept in an LRU cache.
+    """
+    if not pattern or "\n" in pattern or not pattern.isascii():
+        return None
+    special = BRE_SPECIAL if syntax == "basic" else ERE_SPECIAL
+    if syntax == "fixed" or not special & set(pattern):
+        required: tuple[bytes, ...] = (pattern.encode().lower(), )
+        if not ignore_case:
+            return Matcher(literal=pattern.encode(), required=required)
+        regex: str | None = re.escape(pattern)
+    else:
+        regex = translate(pattern, syntax == "extended")
+        required = literals(pattern, syntax == "extended") if regex else ()
+    if regex is None:
+        return None
+    try:
+        return Matcher(
+            regex=re.compile(
+                regex.encode(),
+                re.MULTILINE | (re.IGNORECASE if ignore_case else 0)),
+            required=required)
+    except re.error:
+        return None
+
+
+def literals(pattern: str, extended: bool) -> tuple[bytes, ...]:
+    """The literals of three or more chars, lowercased, that every match
+    of a POSIX regex supported by `translate` contains.
+
+    Only runs of literal chars are taken, leaving out any char that a
+    repeat makes optional. EREs with groups or alternatives are taken to
+    require nothing.
+    """
+    if extended and ("(" in pattern or "|" in pattern):
+        return ()
+    found: list[str] = []
+    run: list[str] = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            run.append(pattern[i + 1])
+            i += 2
+            continue
+        optional = char == "*" or (extended and char in "?{")
+        if optional and run:
+            run.pop()
+        if optional or char in "^$" or (extended and char == "+"):
+            found.append("".join(run))
+            run = []
+        else:
+            run.append(char)
+        if char == "{" and extended:
+            i = pattern.index("}", i)
+        i += 1
+    found.append("".join(run))
+    return tuple(
+        literal.encode().lower()
+        for literal
+        in found
+        if len(literal) >= 3)
+
+
+def translate(pattern: str, extended: bool) -> str | None:
+    """Translate a POSIX basic or extended regex to a Python one, or
+    return `None` if it uses features that differ between them, eg
+    backreferences, `\\w` or `\\<`, or intervals in basic regexes.
+
+    Patterns with `.` or bracket expressions are not translated either, as
+    a bytes regex matches them to a single byte, while `grep` matches a
+    character of the locale, eg `é` in UTF-8.
+    """
+    regex: list[str] = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if not escaped or escaped.isalnum() or escaped in GNU_ANCHORS:
+                return None
+            if not extended and escaped in BRE_LITERAL:
+                return None
+            regex.append(re.escape(escaped))
+            i += 2
+            continue
+        if char in ".[":
+            return None
+        if char == "*" and (not regex or regex[-1] in ("^", "(", "|")):
+            return None
+        if extended and char == "{" and not INTERVAL.match(pattern, i):
+            return None
+        # BREs only anchor at the start or end of the pattern
+        anchor = (
+            (char == "^" and i > 0)
+            or (char == "$" and i < len(pattern) - 1))
+        if not extended and (anchor or char in BRE_LITERAL):
+            char = re.escape(char)
+        regex.append(char)
+        i += 1
+    return "".join(regex)
+
+
+class GrepSearch:
+    """A search of files for lines matching a pattern, with the output
+    and return code of the equivalent `grep`.
+
+    Dirs are walked, and their files searched, in a shared thread pool.
+    Files are mapped into memory to be searched, unless they are small
+    enough to read. When recursing, symlinks are not followed and only
+    regular files are searched. If `gitignore` is set, `.git` dirs and the paths
+    ignored by `.gitignore` files are skipped too.
+
+    With an `index`, dirs that it covers are not walked, and only the
+    files it has as candidates for the pattern are searched, in batches
+    of `batch`, along with walking the excluded dirs that it lists. The
+    files that the index has under the dirs searched, and the candidates
+    of them, are counted in `index_files` and `index_candidates`.
+
+    Output is ordered by path, rather than the order that dirs happen to
+    list their files in.
+    """
+    executor: ClassVar[concurrent.futures.ThreadPoolExecutor] = (
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 1),
+            thread_name_prefix="grep"))
+    # Files smaller than this are read rather than mapped
+    mmap_threshold = 64 * 1024
+    batch = 64
+
+    def __init__(
+            self,
+            matcher: Matcher,
+            operands: list[str],
+            recursive: bool = False,
+            line_number: bool = False,
+            files_only: bool = False,
+            max_count: int | None = None,
+            with_filename: bool | None = None,
+            gitignore: bool = True,
+            index: TrigramIndex | None = None) -> None:
+        self.matcher = matcher
+        self.operands = operands or ["."]
+        # Files found under an implicit `.` are shown without a `./`
+        self.implicit = not operands
+        self.recursive = recursive
+        self.line_number = line_number
+        self.files_only = files_only
+        self.max_count = max_count
+        self.with_filename = with_filename
+        self.gitignore = gitignore
+        self.index = index
+        self.index_files = 0
+        self.index_candidates = 0
+
+    def display(self, index: int, relative: str) -> str:
+        """The path of a file as grep shows it."""
+        operand = self.operands[index]
+        if not relative:
+            return operand
+        if self.implicit:
+            return relative
+        return f"{operand.rstrip('/')}/{relative}"
+
+    def indexed(self, path: str) -> tuple[list[str], list[str]] | None:
+        """The paths, relative to a dir, of the files in it that the index
+        leaves to search and of the excluded dirs left to walk, or `None`
+        if the dir is to be walked as the index has no files under it.
+        """
+        if not self.index:
+            return None
+        relative = os.path.relpath(os.path.realpath(path), self.index.path)
+        if relative == ".." or relative.startswith("../"):
+            return None
+        prefix = "" if relative == "." else f"{relative}/"
+        total, found, excluded = self.index.candidates(
+            self.matcher.required,
+            prefix)
+        if not total:
+            return None
+        self.index_files += total
+        self.index_candidates += len(found)
+        return (
+            [name[len(prefix):] for name in found],
+            [name[len(prefix):] for name in excluded])
+
+    def lines(self, data: Buffer) -> list[tuple[int, int, int]]:
+        """The line number, start and end of the lines that match, up to
+        `max_count` of them, or just the first for `files_only`.
+        """
+        found: list[tuple[int, int, int]] = []
+        limit = 1 if self.files_only else self.max_count
+        number = 1
+        counted = position = 0
+        while limit is None or len(found) < limit:
+            if (start := self.matcher.find(data, position)) < 0:
+                break
+            line_start = data.rfind(b"\n", 0, start) + 1
+            if (line_end := data.find(b"\n", start)) < 0:
+                line_end = len(data)
+            position = line_end + 1
+            if not self.matcher.matches(data, line_start, line_end):
+                continue
+            if self.line_number:
+                number += data[counted:line_start].count(b"\n")
+                counted = line_start
+            found.append((number, line_start, line_end))
+        return found
+
+    def operand(
+            self,
+            index: int,
+            cwd: pathlib.Path) -> tuple[bool, GitIgnore | None]:
+        """Whether an operand is a dir to recurse into, and the ignore
+        files that apply to it.
+        """
+        path = cwd / self.operands[index]
+        if not stat.S_ISDIR(os.stat(path).st_mode):
+            return False, None
+        if not self.recursive:
+            raise IsADirectoryError(
+                errno.EISDIR,
+                os.strerror(errno.EISDIR))
+        return (
+            True,
+            GitIgnore.for_dir(path)
+            if self.gitignore
+            else None)
+
+    def output(
+            self,
+            results: dict[tuple[int, str], str],
+            errors: dict[tuple[int, str], str],
+            with_filename: bool) -> ResponseTuple:
+        """Format the matches and errors as grep would."""
+        def order(key: tuple[int, str]) -> tuple[int, list[str]]:
+            return key[0], key[1].split("/")
+
+        stdout: list[str] = []
+        stderr = [
+            f"grep: {self.display(*key)}: {errors[key]}"
+            for key
+            in sorted(errors, key=order)]
+        for key in sorted(results, key=order):
+            display = self.display(*key)
+            if self.files_only:
+                stdout.append(display)
+            elif results[key] is BINARY:
+                stderr.append(f"grep: {display}: binary file matches")
+            elif with_filename:
+                stdout.extend(
+                    f"{display}:{line}"
+                    for line
+                    in results[key].split("\n"))
+            else:
+                stdout.append(results[key])
+        return (
+            "".join(f"{line}\n" for line in stdout),
+            "".join(f"{line}\n" for line in stderr),
+            2 if errors else 0 if results else 1)
+
+    def run(self, cwd: pathlib.Path) -> ResponseTuple:
+        """Search the operands, returning the output and return code."""
+        if self.max_count == 0:
+            # grep stops before reading any files
+            return "", "", 1
+        results: dict[tuple[int, str], str] = {}
+        errors: dict[tuple[int, str], str] = {}
+        # future: (operand index, path relative to the operand)
+        pending: dict[concurrent.futures.Future, tuple[int, str]] = {}
+        recursing = False
+        for index, operand in enumerate(self.operands):
+            try:
+                is_dir, ignore = self.operand(index, cwd)
+            except OSError as e:
+                errors[(index, "")] = e.strerror or str(e)
+                continue
+            recursing = recursing or is_dir
+            path = str((cwd / operand).absolute())
+            if not is_dir:
+                pending[self.executor.submit(self.scan, path)] = (index, "")
+            elif (indexed := self.indexed(path)) is None:
+                future = self.executor.submit(self.walk, path, ignore)
+                pending[future] = (index, "")
+            else:
+                names, excluded = indexed
+                for start in range(0, len(names), self.batch):
+                    future = self.executor.submit(
+                        self.search_files,
+                        path,
+                        names[start:start + self.batch])
+                    pending[future] = (index, "")
+                for name in excluded:
+                    subdir = os.path.join(path, name)
+                    future = self.executor.submit(
+                        self.walk,
+                        subdir,
+                        GitIgnore.for_dir(pathlib.Path(subdir)))
+                    pending[future] = (index, name)
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index, relative = pending.pop(future)
+                try:
+                    result: str | Walked | None = future.result()
+                except OSError as e:
+                    errors[(index, relative)] = e.strerror or str(e)
+                    continue
+                if not isinstance(result, tuple):
+                    if result is not None:
+                        results[(index, relative)] = result
+                    continue
+                found, failed, subdirs, ignore = result
+                prefix = f"{relative}/" if relative else ""
+                results.update(
+                    ((index, prefix + name), value)
+                    for name, value
+                    in found.items())
+                errors.update(
+                    ((index, prefix + name), value)
+                    for name, value
+                    in failed.items())
+                for name, path in subdirs:
+                    future = self.executor.submit(self.walk, path, ignore)
+                    pending[future] = (index, prefix + name)
+        return self.output(
+            results,
+            errors,
+            (self.with_filename
+             if self.with_filename is not None
+             else recursing or len(self.operands) > 1))
+
+    def scan(self, path: str) -> str | None:
+        """Search a file, returning its matching lines, `BINARY` if it
+        is binary, or `None` if no lines match.
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < self.mmap_threshold:
+                return self.search(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self.search(data)
+
+    def search(self, data: Buffer) -> str | None:
+        """The matching lines of a file's contents, `BINARY` if it is
+        binary, or `None` if no lines match.
+        """
+        binary = data.find(b"\0") >= 0
+        if binary and self.matcher.literal is None:
+            # grep also ends the lines of binary files at NULs, which
+            # only matters to regexes
+            data = data[:].replace(b"\0", b"\n")
+        if not (lines := self.lines(data)):
+            return None
+        if self.files_only:
+            return ""
+        if binary:
+            return BINARY
+        try:
+            return "\n".join(
+                (f"{number}:" if self.line_number else "")
+                + data[start:end].decode()
+                for number, start, end
+                in lines)
+        except UnicodeDecodeError:
+            return BINARY
+
+    def search_files(self, path: str, names: list[str]) -> Walked:
+        """Search files by their paths relative to a dir."""
+        found: dict[str, str] = {}
+        failed: dict[str, str] = {}
+        for name in names:
+            try:
+                result = self.scan(os.path.join(path, name))
+            except OSError as e:
+                failed[name] = e.strerror or str(e)
+                continue
+            if result is not None:
+                found[name] = result
+        return found, failed, [], None
+
+    def walk(self, path: str, ignore: GitIgnore | None) -> Walked:
+        """Search the files of a dir, and list the subdirs left to walk.
+
+        Files are searched together with listing their dir, rather than
+        each in their own task, which would cost more to schedule than
+        most files cost to search.
+        """
+        with os.scandir(path) as scanned:
+            entries = list(scanned)
+        if ignore and any(entry.name == ".gitignore" for entry in entries):
+            ignore = ignore.child(pathlib.Path(path))
+        names: list[str] = []
+        subdirs: list[tuple[str, str]] = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not (is_dir or entry.is_file(follow_symlinks=False)):
+                    continue
+            except OSError:
+                continue
+            if ignore and ignore.ignored(entry.path, is_dir):
+                continue
+            if is_dir:
+                subdirs.append((entry.name, entry.path))
+            else:
+                names.append(entry.name)
+        found, failed, _, _ = self.search_files(path, names)
+        return found, failed, subdirs, ignore
@@ -0,0 +1,160 @@
+"""Matching of paths against `.gitignore` files."""
+
+import pathlib
+import re
+
+
+class IgnoreRules:
+    """The patterns of a `.gitignore` file, matched against paths relative
+    to its dir.
+
+    Follows the gitignore pattern format: blank lines and `#` comments
+    are skipped, `!` re-includes, a trailing `/` only matches dirs, a
+    pattern with any other `/` is anchored to the dir of the file, and
+    `*`, `?`, `[...]` and `**` glob as they do for git. The last
+    pattern that matches a path decides whether it is ignored.
+    """
+
+    def __init__(self, lines: list[str]) -> None:
+        # (regex, whether it re-includes, whether it only matches dirs)
+        self.rules: list[tuple[re.Pattern[str], bool, bool]] = []
+        for line in lines:
+            if rule := self.parse(line):
+                self.rules.append(rule)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    @classmethod
+    def from_file(cls, path: pathlib.Path) -> "IgnoreRules":
+        """Rules of an ignore file, which are empty if it cannot be read.
+        """
+        try:
+            return cls(path.read_text(errors="surrogateescape").splitlines())
+        except OSError:
+            return cls([])
+
+    @staticmethod
+    def translate(pattern: str) -> str:
+        """Translate a glob to a regex matching the path, or the path of
+        a dir under it if it ends with `/**`.
+        """
+        regex = []
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            globstar = (
+                pattern.startswith("**", i)
+                and (not i or pattern[i - 1] == "/"))
+            if globstar and pattern.startswith("**/", i):
+                regex.append("(?:.*/)?")
+                i += 3
+                continue
+            if globstar and i + 2 == len(pattern):
+                regex.append(".*")
+                break
+            if char == "*":
+                regex.append("[^/]*")
+            elif char == "?":
+                regex.append("[^/]")
+            elif char == "\\" and i + 1 < len(pattern):
+                i += 1
+                regex.append(re.escape(pattern[i]))
+            elif char == "[" and (end := pattern.find("]", i + 2)) > 0:
+                chars = pattern[i + 1:end]
+                if chars[0] == "!":
+                    chars = "^" + chars[1:]
+                regex.append(
+                    "["
+                    + chars.replace("\\", "\\\\").replace("[", "\\[")
+                    + "]")
+                i = end
+            else:
+                regex.append(re.escape(char))
+            i += 1
+        return "".join(regex)
+
+    def match(self, path: str, is_dir: bool) -> bool | None:
+        """Whether a path is ignored, or `None` if no pattern matches it.
+        """
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(path):
+                return not negate
+        return None
+
+    def parse(self, line: str) -> tuple[re.Pattern[str], bool, bool] | None:
+        """Parse a line of an ignore file, or `None` if it has no
+        pattern.
+        """
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            return None
+        negate = line.startswith("!")
+        if negate or line.startswith(("\\!", "\\#")):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+        anchored = "/" in line
+        regex = self.translate(line.lstrip("/"))
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        try:
+            return re.compile(regex), negate, dir_only
+        except re.error:
+            return None
+
+
+class GitIgnore:
+    """The `.gitignore` files that apply to a dir, from the dir itself up
+    to the root of its git work tree.
+
+    Rules of deeper files take precedence over those of the files above
+    them. The `.git` dir is always ignored.
+    """
+
+    def __init__(
+            self,
+            rules: tuple[tuple[str, IgnoreRules], ...] = ()) -> None:
+        # (dir, rules), deepest first
+        self.rules = rules
+
+    @classmethod
+    def for_dir(cls, path: pathlib.Path) -> "GitIgnore":
+        """The ignore files of the parents of a dir within its work tree,
+        which are none if it is not in a work tree. The dir's own file is
+        left to be added with `child` as it is walked.
+        """
+        path = path.absolute()
+        parents = []
+        for parent in (path, *path.parents):
+            if (parent / ".git").exists():
+                break
+            parents.append(parent.parent)
+        else:
+            return cls()
+        ignore = cls()
+        for parent in reversed(parents):
+            ignore = ignore.child(parent)
+        return ignore
+
+    def child(self, path: pathlib.Path) -> "GitIgnore":
+        """The ignore files that apply to a subdir."""
+        rules = IgnoreRules.from_file(path / ".gitignore")
+        if not rules:
+            return self
+        return self.__class__(((str(path), rules), *self.rules))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """Whether an absolute path is ignored."""
+        if is_dir and path.endswith("/.git"):
+            return True
+        for base, rules in self.rules:
+            matched = rules.match(path[len(base) + 1:], is_dir)
+            if matched is not None:
+                return matched
+        return False
@@ -0,0 +1,184 @@
+"""Sparse indexes of the line offsets of files."""
+
+import array
+import bisect
+import collections
+import os
+import pathlib
+import stat
+import threading
+import time
+import zlib
+from typing import ClassVar
+
+
+class LineIndex:
+    """Index of the lines of a regular file, to read a range of its lines
+    without reading the lines before it.
+
+    The number of newlines before every `block_size` bytes of the file is
+    kept, so a line is found by reading the one block it starts in. The
+    file is counted `read_size` bytes at a time.
+
+    Indexes are kept by the device and inode of their file, for the
+    `max_indexes` files most recently read. An index is reused while the
+    file's size and mtime are unchanged. If the file has grown, and the
+    checksums of the first and last whole blocks counted are unchanged,
+    the index is taken to have been appended to, and is extended from its
+    last block. Any other change rebuilds it. This is a heuristic: a file
+    rewritten to grow, with only the blocks between those changed, keeps
+    the stale counts of those blocks.
+    """
+    indexes: ClassVar[collections.OrderedDict[tuple[int, int], "LineIndex"]]
+    indexes = collections.OrderedDict()
+    registry_lock: ClassVar[threading.Lock] = threading.Lock()
+    max_indexes = 64
+    block_size = 64 * 1024
+    read_size = 16 * block_size
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # newlines before each block
+        self.counts = array.array("Q", [0])
+        # newlines before `scanned`, the bytes counted
+        self.lines = 0
+        self.scanned = 0
+        # crc32 of the first and the last whole blocks
+        self.head_checksum = 0
+        self.checksum = 0
+        # size and mtime of the file when it was counted
+        self.size: int | None = None
+        self.mtime: int | None = None
+
+    @classmethod
+    def for_file(cls, key: tuple[int, int]) -> "LineIndex":
+        """The index of a file by its device and inode, keeping the most
+        recently used in memory.
+        """
+        with cls.registry_lock:
+            if not (index := cls.indexes.get(key)):
+                index = cls.indexes[key] = cls()
+                while len(cls.indexes) > cls.max_indexes:
+                    cls.indexes.popitem(last=False)
+            cls.indexes.move_to_end(key)
+            return index
+
+    @classmethod
+    def read(
+            cls,
+            path: pathlib.Path,
+            start: int,
+            end: int | None = None) -> tuple[bytes, str, float, int] | None:
+        """Lines `start` to `end` of a file, counting from 1, how its index
+        was refreshed, the seconds taken, and the lines it has, or `None`
+        if the file cannot be opened or is not a regular file.
+        """
+        try:
+            # Opened non-blocking, so that opening a fifo does not wait
+            # for a writer
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return None
+        try:
+            info = os.fstat(fd)
+            if not stat.S_ISREG(info.st_mode):
+                return None
+            index = cls.for_file((info.st_dev, info.st_ino))
+            with index.lock:
+                started = time.monotonic()
+                refreshed = index.refresh(fd, info)
+                seconds = time.monotonic() - started
+                return (
+                    index.slice(fd, start, end),
+                    refreshed,
+                    seconds,
+                    index.lines)
+        finally:
+            os.close(fd)
+
+    def appended(self, fd: int, info: os.stat_result) -> bool:
+        """Whether the file has only been appended to since it was
+        counted, as far as the first and last whole blocks counted show.
+        """
+        if info.st_size < self.scanned:
+            return False
+        if (blocks := len(self.counts) - 1) < 1:
+            return True
+        last = os.pread(fd, self.block_size, (blocks - 1) * self.block_size)
+        if zlib.crc32(last) != self.checksum:
+            return False
+        return (
+            blocks == 1
+            or (zlib.crc32(os.pread(fd, self.block_size, 0))
+                == self.head_checksum))
+
+    def offset(self, fd: int, count: int) -> int | None:
+        """The offset just after the `count`th newline of the file, or
+        `None` if it has fewer.
+        """
+        if not count:
+            return 0
+        if count > self.lines:
+            return None
+        block = bisect.bisect_left(self.counts, count) - 1
+        position = block * self.block_size
+        data = os.pread(fd, self.block_size, position)
+        end = -1
+        for _ in range(count - self.counts[block]):
+            end = data.index(b"\n", end + 1)
+        return position + end + 1
+
+    def refresh(self, fd: int, info: os.stat_result) -> str:
+        """Bring the index up to date with the file, returning whether it
+        was `cached`, `extended` or `built`.
+        """
+        if (info.st_size, info.st_mtime_ns) == (self.size, self.mtime):
+            return "cached"
+        refreshed = "extended"
+        if (self.size is None
+                or info.st_size <= self.size
+                or not self.appended(fd, info)):
+            self.counts = array.array("Q", [0])
+            refreshed = "built"
+        self.scan(fd, info.st_size)
+        self.size, self.mtime = info.st_size, info.st_mtime_ns
+        return refreshed
+
+    def scan(self, fd: int, size: int) -> None:
+        """Count the newlines of the file from its last whole block
+        counted up to `size`.
+        """
+        position = (len(self.counts) - 1) * self.block_size
+        lines = self.counts[-1]
+        last: memoryview | None = None
+        while position < size:
+            data = os.pread(
+                fd,
+                min(self.read_size, size - position),
+                position)
+            for start in range(0, len(data), self.block_size):
+                end = min(start + self.block_size, len(data))
+                lines += data.count(b"\n", start, end)
+                if end - start == self.block_size:
+                    self.counts.append(lines)
+                    last = memoryview(data)[start:end]
+                    if len(self.counts) == 2:
+                        self.head_checksum = zlib.crc32(last)
+            position += len(data)
+            if len(data) < self.read_size:
+                break
+        if last is not None:
+            self.checksum = zlib.crc32(last)
+        self.lines, self.scanned = lines, position
+
+    def slice(self, fd: int, start: int, end: int | None = None) -> bytes:
+        """Lines `start` to `end` of the file as counted, or to its end
+        if `end` is `None`.
+        """
+        if (first := self.offset(fd, start - 1)) is None:
+            return b""
+        last = None if end is None else self.offset(fd, end)
+        return os.pread(
+            fd,
+            (self.scanned if last is None else last) - first,
+            first)
@@ -0,0 +1,119 @@
+"""In-process reading of the start or end of files."""
+
+import os
+import pathlib
+import stat
+from typing import Callable
+
+
+class FileSlice:
+    """The first or last lines or bytes of a regular file.
+
+    The start of a file is read forward in blocks until enough lines
+    have been seen, and the end is read backward in blocks from the end
+    of the file, so only about as much of the file as is returned is
+    read.
+
+    Files that cannot be opened, or are not regular files, are not read,
+    so that the caller can leave them to the command.
+    """
+    block_size = 64 * 1024
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+
+    def head(self, count: int, unit: str = "lines") -> bytes | None:
+        """The first `count` lines or bytes of the file."""
+        return self.read(
+            self.head_lines
+            if unit == "lines"
+            else self.head_bytes,
+            count)
+
+    def head_bytes(self, fd: int, count: int) -> bytes:
+        return self.read_to(fd, count)
+
+    def head_lines(self, fd: int, count: int) -> bytes:
+        chunks: list[bytes] = []
+        while count and (block := os.read(fd, self.block_size)):
+            if (found := block.count(b"\n")) < count:
+                count -= found
+                chunks.append(block)
+                continue
+            end = -1
+            for _ in range(count):
+                end = block.index(b"\n", end + 1)
+            chunks.append(block[:end + 1])
+            break
+        return b"".join(chunks)
+
+    def read(
+            self,
+            reader: Callable[[int, int], bytes],
+            count: int) -> bytes | None:
+        """Read the file with `reader`, or return `None` if it cannot be
+        opened or is not a regular file.
+        """
+        try:
+            # Opened non-blocking, so that opening a fifo does not wait
+            # for a writer
+            fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return None
+        try:
+            if not stat.S_ISREG(os.fstat(fd).st_mode):
+                return None
+            return reader(fd, count)
+        finally:
+            os.close(fd)
+
+    def read_to(self, fd: int, count: int | None = None) -> bytes:
+        """Read from the file offset, up to `count` bytes or to the end
+        of the file.
+        """
+        chunks: list[bytes] = []
+        while count is None or count > 0:
+            size = (
+                self.block_size
+                if count is None
+                else min(count, self.block_size))
+            if not (block := os.read(fd, size)):
+                break
+            chunks.append(block)
+            if count is not None:
+                count -= len(block)
+        return b"".join(chunks)
+
+    def tail(self, count: int, unit: str = "lines") -> bytes | None:
+        """The last `count` lines or bytes of the file."""
+        return self.read(
+            self.tail_lines
+            if unit == "lines"
+            else self.tail_bytes,
+            count)
+
+    def tail_bytes(self, fd: int, count: int) -> bytes:
+        if not count:
+            return b""
+        os.lseek(fd, max(0, os.fstat(fd).st_size - count), os.SEEK_SET)
+        return self.read_to(fd)
+
+    def tail_lines(self, fd: int, count: int) -> bytes:
+        if not count:
+            return b""
+        position = os.fstat(fd).st_size
+        # A newline ending the file ends the last line, rather than
+        # starting another
+        if position and os.pread(fd, 1, position - 1) == b"\n":
+            position -= 1
+        while position:
+            start = max(0, position - self.block_size)
+            block = os.pread(fd, position - start, start)
+            end = len(block)
+            while (end := block.rfind(b"\n", 0, end)) >= 0:
+                count -= 1
+                if not count:
+                    os.lseek(fd, start + end + 1, os.SEEK_SET)
+                    return self.read_to(fd)
+            position = start
+        return self.read_to(fd)
@@ -0,0 +1,444 @@
+"""Persistent trigram indexes of the files under a dir."""
+
+import array
+import collections
+import contextlib
+import hashlib
+import itertools
+import marshal
+import os
+import pathlib
+import re
+import stat
+import threading
+import time
+from typing import ClassVar, Iterable
+
+from synca.mcp.common.util.fingerprint import EXCLUDED_DIRS
+from synca.mcp.common.util.watch import Root
+from synca.mcp.fs_extra.util.ignore import GitIgnore
+from synca.mcp.fs_extra.util.slice import FileSlice
+
+# Three bytes, matched from each offset to find the trigrams of a file
+TRIGRAM = re.compile(b"...", re.DOTALL)
+# Version of the saved index format
+VERSION = 1
+EMPTY = array.array("I")
+
+
+def trigrams(data: bytes) -> set[bytes]:
+    """The distinct trigrams of some data, with ASCII case folded."""
+    data = data.lower()
+    found: set[bytes] = set()
+    for offset in range(3):
+        found.update(TRIGRAM.findall(data, offset))
+    return found
+
+
+class TrigramIndex:
+    """Index of the trigrams of the files under a dir, to narrow the files
+    that a search scans to those with every trigram of the literals that
+    its matches require.
+
+    Dirs are walked as recursive searches walk them with `gitignore` set.
+    The dirs that the watcher does not watch (`EXCLUDED_DIRS`) are not
+    indexed, but listed for searches to walk. Files larger than
+    `max_size` are not indexed, and are always candidates.
+
+    The index is refreshed before each search. If the watcher sees the
+    changes to the tree as they are made, only the paths that changed
+    since the last refresh are checked, or else every file is checked
+    by its mtime and size. Either way only new and changed files are
+    read. Changed files are indexed with a new id, and the stale ids
+    left in the postings are dropped once they outnumber the files.
+
+    Indexes are saved in `SYNCA_MCP_INDEX_DIR`, by default in the user's
+    cache dir, once built and then at most every `save_interval` seconds
+    when they change. Setting `SYNCA_MCP_INDEX_DIR` to an empty string
+    keeps indexes in memory only. The `max_indexes` most recently used
+    indexes are kept in memory.
+    """
+    indexes: ClassVar[collections.OrderedDict[str, "TrigramIndex"]] = (
+        collections.OrderedDict())
+    registry_lock: ClassVar[threading.Lock] = threading.Lock()
+    max_indexes = 4
+    max_size = 1024 * 1024
+    save_interval = 60.0
+
+    def __init__(
+            self,
+            path: pathlib.Path,
+            directory: str | None = None) -> None:
+        self.path = path
+        self.directory = (
+            directory
+            if directory is not None
+            else os.environ.get(
+                "SYNCA_MCP_INDEX_DIR",
+                str(self.default_directory)))
+        self.lock = threading.Lock()
+        # path relative to the dir: (id, mtime, size)
+        self.files: dict[str, tuple[int, int, int]] = {}
+        # id: path, or `None` once stale
+        self.paths: list[str | None] = []
+        self.postings: dict[bytes, array.array] = {}
+        # ids of the files that are too large to index
+        self.unindexed: set[int] = set()
+        # paths relative to the dir of the excluded dirs that are searched
+        self.excluded: set[str] = set()
+        self.stale = 0
+        self.loaded = False
+        self.unsaved = False
+        self.saved: float | None = None
+        # the watched tree, and its generation, as of the last refresh
+        self.root: Root | None = None
+        self.generation = 0
+
+    @property
+    def default_directory(self) -> pathlib.Path:
+        """Index dir in the user's cache dir."""
+        cache = (
+            os.environ.get("XDG_CACHE_HOME")
+            or pathlib.Path.home() / ".cache")
+        return pathlib.Path(cache) / "synca-mcp" / "index"
+
+    @property
+    def file(self) -> pathlib.Path | None:
+        """File the index is saved in, if indexes are saved."""
+        if not self.directory:
+            return None
+        digest = hashlib.sha256(os.fsencode(self.path)).hexdigest()[:32]
+        return pathlib.Path(self.directory) / f"{digest}.trigrams"
+
+    @classmethod
+    def for_dir(cls, path: pathlib.Path) -> "TrigramIndex":
+        """The index of a dir, keeping the most recently used in memory.
+        """
+        key = os.path.realpath(path)
+        with cls.registry_lock:
+            if not (index := cls.indexes.get(key)):
+                index = cls.indexes[key] = cls(pathlib.Path(key))
+                while len(cls.indexes) > cls.max_indexes:
+                    cls.indexes.popitem(last=False)
+            cls.indexes.move_to_end(key)
+            return index
+
+    def add(self, relative: str, mtime: int, size: int) -> None:
+        """Index a file, replacing any earlier version of it."""
+        self.remove(relative)
+        id_ = len(self.paths)
+        self.paths.append(relative)
+        self.files[relative] = (id_, mtime, size)
+        self.unsaved = True
+        data = (
+            FileSlice(self.path / relative).head(self.max_size + 1, "bytes")
+            if size <= self.max_size
+            else None)
+        if data is None or len(data) > self.max_size:
+            self.unindexed.add(id_)
+            return
+        for key in trigrams(data):
+            if (ids := self.postings.get(key)) is None:
+                ids = self.postings[key] = array.array("I")
+            ids.append(id_)
+
+    def candidates(
+            self,
+            literals: tuple[bytes, ...],
+            prefix: str = "") -> tuple[int, list[str], list[str]]:
+        """The number of files indexed under a prefix, the paths of those
+        that may contain all the (lowercase) literals, and the paths of the
+        excluded dirs under it.
+        """
+        with self.lock:
+            keys = {
+                literal[i:i + 3]
+                for literal
+                in literals
+                for i
+                in range(len(literal) - 2)}
+            found: Iterable[str | None] = self.files
+            if keys:
+                postings = sorted(
+                    (self.postings.get(key, EMPTY) for key in keys),
+                    key=len)
+                ids = set(postings[0])
+                for more in postings[1:]:
+                    if not ids:
+                        break
+                    ids.intersection_update(more)
+                found = [self.paths[id_] for id_ in ids | self.unindexed]
+            total = (
+                sum(1 for path in self.files if path.startswith(prefix))
+                if prefix
+                else len(self.files))
+            return total, [
+                path
+                for path
+                in found
+                if path is not None and path.startswith(prefix)], sorted(
+                    path
+                    for path
+                    in self.excluded
+                    if path.startswith(prefix))
+
+    def check(
+            self,
+            relative: str,
+            ignores: dict[str, GitIgnore | None]) -> None:
+        """Bring the index up to date with a path that changed."""
+        path = os.path.join(self.path, relative)
+        ignore = self.ignore(os.path.dirname(relative), ignores)
+        try:
+            info = os.lstat(path) if ignore else None
+        except OSError:
+            info = None
+        if not (info and ignore):
+            self.remove_tree(relative)
+        elif stat.S_ISDIR(info.st_mode):
+            if ignore.ignored(path, True):
+                self.remove_tree(relative)
+            elif os.path.basename(relative) in EXCLUDED_DIRS:
+                self.remove_tree(relative)
+                self.excluded.add(relative)
+                self.unsaved = True
+            else:
+                self.scan(relative, ignore)
+        elif stat.S_ISREG(info.st_mode) and not ignore.ignored(path, False):
+            self.check_file(relative, info)
+        else:
+            self.remove_tree(relative)
+
+    def check_file(self, relative: str, info: os.stat_result) -> None:
+        """Index a file if it is new or has changed."""
+        known = self.files.get(relative)
+        if not known or known[1:] != (info.st_mtime_ns, info.st_size):
+            self.add(relative, info.st_mtime_ns, info.st_size)
+
+    def compact(self) -> None:
+        """Drop the stale ids from the postings."""
+        live = bytearray(len(self.paths))
+        for id_, _, _ in self.files.values():
+            live[id_] = 1
+        for key, ids in list(self.postings.items()):
+            kept = array.array(
+                "I",
+                itertools.compress(ids, map(live.__getitem__, ids)))
+            if kept:
+                self.postings[key] = kept
+            else:
+                del self.postings[key]
+        self.stale = 0
+
+    def ignore(
+            self,
+            relative: str,
+            ignores: dict[str, GitIgnore | None]) -> GitIgnore | None:
+        """The ignore files that apply to the entries of a dir, or `None`
+        if the dir is not walked.
+        """
+        if relative in ignores:
+            return ignores[relative]
+        ignore: GitIgnore | None
+        if not relative:
+            ignore = GitIgnore.for_dir(self.path).child(self.path)
+        else:
+            path = os.path.join(self.path, relative)
+            parent = self.ignore(os.path.dirname(relative), ignores)
+            ignore = (
+                parent.child(pathlib.Path(path))
+                if (parent
+                    and os.path.basename(relative) not in EXCLUDED_DIRS
+                    and not parent.ignored(path, True))
+                else None)
+        ignores[relative] = ignore
+        return ignore
+
+    def load(self) -> bool:
+        """Load the saved index, returning whether it could be loaded."""
+        self.loaded = True
+        if not (file := self.file):
+            return False
+        try:
+            with file.open("rb") as f:
+                saved = marshal.load(f)
+            if saved["version"] != VERSION or saved["path"] != str(self.path):
+                return False
+            files = {
+                path: (id_, mtime, size)
+                for path, (id_, mtime, size)
+                in saved["files"].items()}
+            paths: list[str | None] = [None] * saved["ids"]
+            for path, (id_, _, _) in files.items():
+                paths[id_] = path
+            postings = {
+                key: array.array("I", ids)
+                for key, ids
+                in saved["postings"].items()}
+            unindexed = set(saved["unindexed"])
+            excluded = set(saved["excluded"])
+        except (OSError, EOFError, ValueError, TypeError, KeyError,
+                IndexError, AttributeError):
+            return False
+        self.files, self.paths = files, paths
+        self.postings, self.unindexed = postings, unindexed
+        self.excluded = excluded
+        self.saved = time.monotonic()
+        return True
+
+    def refresh(self, root: Root | None = None) -> tuple[bool, float, int]:
+        """Bring the index up to date with the files under its dir,
+        returning whether it was built rather than loaded or updated,
+        the seconds taken, and the number of files read.
+        """
+        started = time.monotonic()
+        with self.lock:
+            built = not self.loaded and not self.load()
+            indexed = len(self.paths)
+            generation = root.generation if root else 0
+            if not (root and self.incremental(root) and self.update(root)):
+                self.scan()
+            self.root, self.generation = root, generation
+            if self.stale > len(self.files):
+                self.compact()
+            if self.unsaved and (
+                    self.saved is None
+                    or time.monotonic() - self.saved >= self.save_interval):
+                self.save()
+            return built, time.monotonic() - started, (
+                len(self.paths) - indexed)
+
+    def incremental(self, root: Root) -> bool:
+        """Whether the index can be refreshed with the paths the watcher
+        saw change since the last refresh.
+        """
+        return (
+            root is self.root
+            and root.current
+            and root.forgotten <= self.generation)
+
+    def remove(self, relative: str) -> None:
+        """Drop a file from the index."""
+        if not (known := self.files.pop(relative, None)):
+            return
+        self.paths[known[0]] = None
+        self.unindexed.discard(known[0])
+        self.stale += 1
+        self.unsaved = True
+
+    def remove_tree(self, relative: str) -> None:
+        """Drop a file, or the files and excluded dirs under a dir, from
+        the index.
+        """
+        self.remove(relative)
+        prefix = f"{relative}/"
+        for path in [path for path in self.files if path.startswith(prefix)]:
+            self.remove(path)
+        for path in [
+                path
+                for path
+                in self.excluded
+                if path == relative or path.startswith(prefix)]:
+            self.excluded.discard(path)
+            self.unsaved = True
+
+    def save(self) -> None:
+        """Save the index, replacing the saved file atomically.
+
+        Failing to save the index is not an error of the search.
+        """
+        if not (file := self.file):
+            return
+        saved = dict(
+            version=VERSION,
+            path=str(self.path),
+            ids=len(self.paths),
+            files=self.files,
+            unindexed=sorted(self.unindexed),
+            excluded=sorted(self.excluded),
+            postings={
+                key: ids.tobytes()
+                for key, ids
+                in self.postings.items()})
+        partial = file.with_name(f"{file.name}.{os.getpid()}.partial")
+        with contextlib.suppress(OSError):
+            file.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with partial.open("wb") as f:
+                    marshal.dump(saved, f)
+                os.replace(partial, file)
+            finally:
+                partial.unlink(missing_ok=True)
+        self.saved = time.monotonic()
+        self.unsaved = False
+
+    def scan(
+            self,
+            relative: str = "",
+            ignore: GitIgnore | None = None) -> None:
+        """Check the files under a dir by their mtime and size, dropping
+        those that are gone.
+        """
+        seen: set[str] = set()
+        excluded: set[str] = set()
+        pending = [(relative, ignore or GitIgnore.for_dir(self.path))]
+        while pending:
+            parent, ignore = pending.pop()
+            path = os.path.join(self.path, parent)
+            try:
+                with os.scandir(path) as scanned:
+                    entries = list(scanned)
+            except OSError:
+                continue
+            if any(entry.name == ".gitignore" for entry in entries):
+                ignore = ignore.child(pathlib.Path(path))
+            for entry in entries:
+                child = f"{parent}/{entry.name}" if parent else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir:
+                        if ignore.ignored(entry.path, True):
+                            continue
+                        if entry.name in EXCLUDED_DIRS:
+                            excluded.add(child)
+                        else:
+                            pending.append((child, ignore))
+                    elif (entry.is_file(follow_symlinks=False)
+                          and not ignore.ignored(entry.path, False)):
+                        self.check_file(
+                            child,
+                            entry.stat(follow_symlinks=False))
+                        seen.add(child)
+                except OSError:
+                    continue
+        prefix = f"{relative}/" if relative else ""
+        for known in [
+                path
+                for path
+                in self.files
+                if path.startswith(prefix) and path not in seen]:
+            self.remove(known)
+        kept = {
+            path
+            for path
+            in self.excluded
+            if not path.startswith(prefix)}
+        if kept | excluded != self.excluded:
+            self.excluded = kept | excluded
+            self.unsaved = True
+
+    def update(self, root: Root) -> bool:
+        """Check the paths that the watcher saw change since the last
+        refresh, returning `False` if the whole tree has to be scanned
+        as ignore files changed.
+        """
+        ignores: dict[str, GitIgnore | None] = {}
+        for path, generation in list(root.dirty.items()):
+            if generation <= self.generation:
+                continue
+            relative = os.path.relpath(path, root.path)
+            if relative == "." or os.path.basename(path) == ".gitignore":
+                return False
+            if relative != ".." and not relative.startswith("../"):
+                self.check(relative, ignores)
+        return True
@@ -14,7 +14,7 @@ def test_fastmcp_initialization():
     assert isinstance(server.mcp, FastMCP)
     assert server.mcp.name == "FS-Extra"
     assert (
-        set(["fs_head", "fs_tail", "fs_grep", "fs_sed"])
+        set(["fs_head", "fs_tail", "fs_grep", "fs_sed", "fs_lines"])
         <= set(f[0] for f in inspect.getmembers(server, inspect.isfunction)))
 
 
@@ -50,13 +50,23 @@ async def test_fs_head(patches, head_args):
 @pytest.mark.parametrize(
     "tail_args",
     [[], ["ARG1", "ARG2"], ["-n", "10", "file.txt"]])
+@pytest.mark.parametrize(
+    "follow",
+    [{},
+     dict(max_lines=23),
+     dict(max_bytes=1000, idle_timeout=2.5, timeout=7.0)])
 @pytest.mark.asyncio
-async def test_fs_tail(patches, tail_args):
+async def test_fs_tail(patches, tail_args, follow):
     """Test the fs_tail tool function to ensure it uses the right tool class."""
     ctx = MagicMock()
     path = MagicMock()
-    kwargs = dict(tail_args=tail_args)
-    expected = dict(args=tail_args)
+    kwargs = dict(tail_args=tail_args, **follow)
+    expected = dict(
+        args=tail_args,
+        max_lines=None,
+        max_bytes=None,
+        idle_timeout=None,
+        timeout=None) | follow
     mock_run = AsyncMock()
     patched = patches(
         "TailTool",
@@ -81,13 +91,22 @@ async def test_fs_tail(patches, tail_args):
     [[],
      ["ARG1", "ARG2"],
      ["s/old/new/g", "file.txt"]])
+@pytest.mark.parametrize("gitignore", [None, True, False])
+@pytest.mark.parametrize("index", [None, True, False])
 @pytest.mark.asyncio
-async def test_fs_grep(patches, grep_args):
+async def test_fs_grep(patches, grep_args, gitignore, index):
     """Test the fs_grep tool function to ensure it uses the right tool class."""
     ctx = MagicMock()
     path = MagicMock()
     kwargs = dict(grep_args=grep_args)
-    expected = dict(args=grep_args)
+    if gitignore is not None:
+        kwargs["gitignore"] = gitignore
+    if index is not None:
+        kwargs["index"] = index
+    expected = dict(
+        args=grep_args,
+        gitignore=bool(gitignore),
+        index=bool(index))
     mock_run = AsyncMock()
     patched = patches(
         "GrepTool",
@@ -136,3 +155,35 @@ async def test_fs_sed(patches, sed_args):
     assert (
         mock_run.call_args
         == [(), {}])
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [dict(file="file.txt", start=10),
+     dict(file="file.txt", start=10, end=20)])
+@pytest.mark.asyncio
+async def test_fs_lines(patches, kwargs):
+    """Test the fs_lines tool function to ensure it uses the right tool
+    class.
+    """
+    ctx = MagicMock()
+    path = MagicMock()
+    expected = dict(end=None)
+    expected.update(kwargs)
+    mock_run = AsyncMock()
+    patched = patches(
+        "LinesTool",
+        prefix="synca.mcp.fs_extra.server")
+
+    with patched as (m_tool, ):
+        m_tool.return_value.run = mock_run
+        assert (
+            await server.fs_lines(ctx, path, **kwargs)
+            == m_tool.return_value.run.return_value)
+
+    assert (
+        m_tool.call_args
+        == [(ctx, path, expected), {}])
+    assert (
+        mock_run.call_args
+        == [(), {}])
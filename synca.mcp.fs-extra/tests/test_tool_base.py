@@ -1,6 +1,6 @@
 """Isolated tests for synca.mcp.fs_extra.tool.base."""
 
-from unittest.mock import MagicMock, PropertyMock
+from unittest.mock import AsyncMock, MagicMock, PropertyMock
 
 import pytest
 
@@ -50,6 +50,7 @@ def test_unix_tool_constructor():
     assert tool.ctx == ctx
     assert tool._path_str == path
     assert tool._args == args
+    assert tool.lane == "fast"
 
 
 def test_unix_tool_err_stdin(patches):
@@ -211,3 +212,173 @@ def test_unix_slice_tool_validate_args(patches, empty_args, has_path):
         assert (
             e.value.args[0]
             == m_err_stdin.return_value)
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [((), None),
+     (("FILE", ), ("FILE", "lines", 10)),
+     (("-n", "5", "FILE"), ("FILE", "lines", 5)),
+     (("-n5", "FILE"), ("FILE", "lines", 5)),
+     (("FILE", "--lines", "0"), ("FILE", "lines", 0)),
+     (("--lines=7", "FILE"), ("FILE", "lines", 7)),
+     (("-c", "12", "FILE"), ("FILE", "bytes", 12)),
+     (("-c12", "FILE"), ("FILE", "bytes", 12)),
+     (("--bytes=3", "FILE"), ("FILE", "bytes", 3)),
+     (("--bytes", "3", "-n", "2", "FILE"), ("FILE", "lines", 2)),
+     (("-n", "FILE"), None),
+     (("-n", ), None),
+     (("-n=5", "FILE"), None),
+     (("-n", "-5", "FILE"), None),
+     (("-n", "+5", "FILE"), None),
+     (("-n", "5K", "FILE"), None),
+     (("-n", "²", "FILE"), None),
+     (("--lines", "FILE"), None),
+     (("--lin=5", "FILE"), None),
+     (("-f", "FILE"), None),
+     (("-q", "FILE"), None),
+     (("-", ), None),
+     (("--", "FILE"), None),
+     (("-n", "5", "FILE", "OTHER"), None)])
+def test_unix_slice_tool_slice_args(patches, args, expected):
+    """Test slice_args parses plain slices of one file."""
+    tool = UnixSliceTool(MagicMock(), MagicMock(), MagicMock())
+    patched = patches(
+        ("UnixSliceTool.args",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.fs_extra.tool.base")
+
+    with patched as (m_args, ):
+        m_args.return_value = args
+        assert tool.slice_args == expected
+
+    assert "slice_args" not in tool.__dict__
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [(("-f", "FILE"), ("FILE", "lines", 10)),
+     (("--follow=name", "-c", "3", "FILE"), ("FILE", "bytes", 3)),
+     (("-n", "2", "--follow", "FILE"), ("FILE", "lines", 2)),
+     (("-F", "FILE"), None),
+     (("-f", "-q", "FILE"), None),
+     (("-fn", "20", "FILE"), ("FILE", "lines", 20)),
+     (("-ffc5", "FILE"), ("FILE", "bytes", 5)),
+     (("-fn", ), None),
+     (("-fq", "FILE"), None),
+     (("-Fn", "20", "FILE"), None),
+     (("-nf", "FILE"), None)])
+def test_unix_slice_tool_slice_args_follow(patches, args, expected):
+    """Test slice_args skips the flags the tool handles itself."""
+    tool = UnixSliceTool(MagicMock(), MagicMock(), MagicMock())
+    tool.follow_flags = ("-f", "--follow")
+    patched = patches(
+        ("UnixSliceTool.args",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.fs_extra.tool.base")
+
+    with patched as (m_args, ):
+        m_args.return_value = args
+        assert tool.slice_args == expected
+
+    assert UnixSliceTool.follow_flags == ()
+
+
+@pytest.mark.parametrize("slice_args", [True, False])
+@pytest.mark.parametrize("read", [True, False])
+@pytest.mark.parametrize("threaded", [True, False])
+@pytest.mark.asyncio
+async def test_unix_slice_tool_execute(patches, slice_args, read, threaded):
+    """Test execute reads plain slices in process, in a thread if they
+    may be large, or else runs the command.
+    """
+    tool = UnixSliceTool(MagicMock(), MagicMock(), MagicMock())
+    cmd = MagicMock()
+    args = ("FILE", "UNIT", 23) if slice_args else None
+    data = "DATÄ".encode() if read else None
+    patched = patches(
+        "super",
+        "phase",
+        "asyncio.to_thread",
+        ("UnixSliceTool.path",
+         dict(new_callable=PropertyMock)),
+        ("UnixSliceTool.slice_args",
+         dict(new_callable=PropertyMock)),
+        "UnixSliceTool.read_slice",
+        "UnixSliceTool.threaded",
+        prefix="synca.mcp.fs_extra.tool.base")
+
+    with patched as patchy:
+        (m_super, m_phase, m_thread, m_path, m_args,
+         m_read, m_threaded) = patchy
+        m_super.return_value.execute = AsyncMock()
+        m_args.return_value = args
+        m_read.return_value = data
+        m_thread.return_value = data
+        m_threaded.return_value = threaded
+        result = await tool.execute(cmd)
+
+    read_phase = "read_thread" if threaded else "read"
+    if not slice_args:
+        assert not m_threaded.called
+        assert not m_read.called
+        assert not m_thread.called
+    else:
+        assert (
+            m_threaded.call_args
+            == [("UNIT", 23), {}])
+        called = (
+            m_thread.call_args
+            if threaded
+            else m_read.call_args)
+        expected = (
+            m_path.return_value.__truediv__.return_value,
+            "UNIT",
+            23)
+        assert (
+            called
+            == [((m_read, *expected)
+                 if threaded
+                 else expected),
+                {}])
+        assert not (m_read if threaded else m_thread).called
+        assert (
+            m_path.return_value.__truediv__.call_args
+            == [("FILE", ), {}])
+    if slice_args and read:
+        assert result == ("DATÄ", "", 0)
+        assert (
+            m_phase.call_args_list
+            == [[(read_phase, ), {}], [("decode", ), {}]])
+        assert not m_super.called
+        return
+    assert result == m_super.return_value.execute.return_value
+    assert (
+        m_super.return_value.execute.call_args
+        == [(cmd, ), {}])
+
+
+@pytest.mark.parametrize(
+    "threshold, unit, count, expected",
+    [(None, "bytes", 10 ** 9, False),
+     (1024, "bytes", 1023, False),
+     (1024, "bytes", 1024, True),
+     (1024, "lines", 3, False),
+     (1024, "lines", 4, True),
+     (1024, "UNIT", 1024, True)])
+def test_unix_slice_tool_threaded(
+        monkeypatch, threshold, unit, count, expected):
+    """Test slices are threaded from the threshold, counting lines at
+    their expected size.
+    """
+    tool = UnixSliceTool(MagicMock(), MagicMock(), MagicMock())
+    assert UnixSliceTool.read_threshold == 256 * 1024
+    assert UnixSliceTool.line_size == 256
+    monkeypatch.setattr(UnixSliceTool, "read_threshold", threshold)
+    assert tool.threaded(unit, count) is expected
+
+
+def test_unix_slice_tool_read_slice():
+    """Test read_slice leaves slices to the command by default."""
+    tool = UnixSliceTool(MagicMock(), MagicMock(), MagicMock())
+    assert tool.read_slice(MagicMock(), "lines", 10) is None
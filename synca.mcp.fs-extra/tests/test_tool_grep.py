@@ -1,7 +1,7 @@
 """Isolated tests for synca.mcp.fs_extra.tool.grep."""
 
 import types
-from unittest.mock import MagicMock, PropertyMock
+from unittest.mock import AsyncMock, MagicMock, PropertyMock
 
 import pytest
 
@@ -24,6 +24,299 @@ def test_grep_tool_constructor():
     assert "tool_name" not in tool.__dict__
 
 
+@pytest.mark.parametrize("gitignore", [None, True, False, "unset"])
+def test_grep_tool_gitignore(gitignore):
+    """Test ignored paths are only skipped if gitignore is set."""
+    args = dict(args=("foo", ))
+    if gitignore != "unset":
+        args["gitignore"] = gitignore
+    tool = GrepTool(MagicMock(), MagicMock(), args)
+    assert tool.gitignore is (gitignore is True)
+    assert "gitignore" not in tool.__dict__
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [(("foo", "file"), (("foo", "basic", False), ["file"], {})),
+     (("-r", "foo"), (("foo", "basic", False), [], dict(recursive=True))),
+     (("-rniHl", "foo", "a", "b"),
+      (("foo", "basic", True),
+       ["a", "b"],
+       dict(recursive=True,
+            line_number=True,
+            files_only=True,
+            with_filename=True))),
+     (("--recursive", "--line-number", "--ignore-case",
+       "--files-with-matches", "--no-filename", "foo", "."),
+      (("foo", "basic", True),
+       ["."],
+       dict(recursive=True,
+            line_number=True,
+            files_only=True,
+            with_filename=False))),
+     (("-H", "-h", "foo", "a"),
+      (("foo", "basic", False), ["a"], dict(with_filename=False))),
+     (("-h", "--with-filename", "foo", "a"),
+      (("foo", "basic", False), ["a"], dict(with_filename=True))),
+     (("-E", "a|b", "file"), (("a|b", "extended", False), ["file"], {})),
+     (("--extended-regexp", "a|b", "file"),
+      (("a|b", "extended", False), ["file"], {})),
+     (("-F", "a.b", "file"), (("a.b", "fixed", False), ["file"], {})),
+     (("--fixed-strings", "a.b", "file"),
+      (("a.b", "fixed", False), ["file"], {})),
+     (("-e", "-foo", "file"), (("-foo", "basic", False), ["file"], {})),
+     (("-efoo", "file"), (("foo", "basic", False), ["file"], {})),
+     (("-rne", "foo", "a"),
+      (("foo", "basic", False),
+       ["a"],
+       dict(recursive=True, line_number=True))),
+     (("--regexp", "foo", "file"), (("foo", "basic", False), ["file"], {})),
+     (("--regexp=foo", "a", "b"),
+      (("foo", "basic", False), ["a", "b"], {})),
+     (("-m", "3", "foo", "file"),
+      (("foo", "basic", False), ["file"], dict(max_count=3))),
+     (("-m0", "foo", "file"),
+      (("foo", "basic", False), ["file"], dict(max_count=0))),
+     (("-rm2", "foo"),
+      (("foo", "basic", False), [], dict(recursive=True, max_count=2))),
+     (("--max-count=10", "foo", "file"),
+      (("foo", "basic", False), ["file"], dict(max_count=10))),
+     (("--max-count", "10", "foo", "file"),
+      (("foo", "basic", False), ["file"], dict(max_count=10))),
+     (("foo", ), None),
+     (("-n", "foo"), None),
+     (("-e", "foo"), None),
+     ((), None),
+     (("-e", ), None),
+     (("file", "-e"), None),
+     (("-e", "a", "-e", "b", "file"), None),
+     (("-m", "1", "-m", "2", "foo", "file"), None),
+     (("-m", "-1", "foo", "file"), None),
+     (("-m", "x", "foo", "file"), None),
+     (("--max-count=", "foo", "file"), None),
+     (("-m", "١", "foo", "file"), None),
+     (("foo", "file", "-m"), None),
+     (("-E", "-F", "foo", "file"), None),
+     (("-R", "foo", "dir"), None),
+     (("-c", "foo", "file"), None),
+     (("-rC2", "foo", "file"), None),
+     (("--count", "foo", "file"), None),
+     (("--recursive=x", "foo", "file"), None),
+     (("--", "foo", "file"), None),
+     (("foo", "-"), None),
+     (("NOPATTERN", "file"), None)])
+def test_grep_tool_search(patches, args, expected):
+    """Test searches with supported args are run in process."""
+    tool = GrepTool(MagicMock(), MagicMock(), MagicMock())
+    patched = patches(
+        "compile_pattern",
+        "GrepSearch",
+        ("GrepTool.args",
+         dict(new_callable=PropertyMock)),
+        ("GrepTool.gitignore",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.fs_extra.tool.grep")
+
+    with patched as (m_compile, m_search, m_args, m_gitignore):
+        m_args.return_value = args
+        m_compile.side_effect = (
+            lambda pattern, *_: (
+                None
+                if pattern == "NOPATTERN"
+                else m_compile.return_value))
+        result = tool.search
+
+    assert "search" not in tool.__dict__
+    if expected is None:
+        assert result is None
+        assert not m_search.called
+        return
+    compiled, operands, kwargs = expected
+    assert result == m_search.return_value
+    assert (
+        m_compile.call_args
+        == [compiled, {}])
+    assert (
+        m_search.call_args
+        == [(m_compile.return_value, operands),
+            dict(recursive=False,
+                 line_number=False,
+                 files_only=False,
+                 max_count=None,
+                 with_filename=None,
+                 gitignore=m_gitignore.return_value)
+            | kwargs])
+
+
+@pytest.mark.parametrize("native", [True, False])
+@pytest.mark.parametrize("index", [True, False])
+@pytest.mark.parametrize("recursive", [True, False])
+@pytest.mark.parametrize("gitignore", [True, False])
+@pytest.mark.asyncio
+async def test_grep_tool_execute(
+        patches, native, index, recursive, gitignore):
+    """Test execute searches in process if possible, narrowed by the index
+    if it is used, or else runs the command.
+    """
+    tool = GrepTool(MagicMock(), MagicMock(), MagicMock())
+    cmd = MagicMock()
+    search = MagicMock() if native else None
+    if search:
+        search.recursive = recursive
+        search.gitignore = gitignore
+    refreshed = ("BUILT", "SECONDS", "INDEXED")
+    patched = patches(
+        "super",
+        "phase",
+        "asyncio.to_thread",
+        ("GrepTool.index",
+         dict(new_callable=PropertyMock)),
+        ("GrepTool.path",
+         dict(new_callable=PropertyMock)),
+        ("GrepTool.search",
+         dict(new_callable=PropertyMock)),
+        "GrepTool.index_stats",
+        prefix="synca.mcp.fs_extra.tool.grep")
+
+    with patched as patchy:
+        (m_super, m_phase, m_thread,
+         m_index, m_path, m_search, m_stats) = patchy
+        m_super.return_value.execute = AsyncMock()
+        m_search.return_value = search
+        m_index.return_value = index
+        m_thread.side_effect = [("INDEX", refreshed), "RESPONSE"]
+        result = await tool.execute(cmd)
+
+    if not native:
+        assert result == m_super.return_value.execute.return_value
+        assert (
+            m_super.return_value.execute.call_args
+            == [(cmd, ), {}])
+        assert not m_thread.called
+        assert not m_phase.called
+        assert tool.index_info is None
+        return
+    indexed = index and recursive and gitignore
+    assert (
+        result
+        == ("RESPONSE"
+            if indexed
+            else ("INDEX", refreshed)))
+    assert (
+        m_thread.call_args_list
+        == ([[(tool.refresh_index, ), {}]]
+            if indexed
+            else [])
+        + [[(search.run, m_path.return_value), {}]])
+    assert (
+        m_phase.call_args_list
+        == ([[("index", ), {}]]
+            if indexed
+            else [])
+        + [[("search", ), {}]])
+    assert not m_super.called
+    if not indexed:
+        assert not m_stats.called
+        assert tool.index_info is None
+        return
+    assert search.index == "INDEX"
+    assert tool.index_info == m_stats.return_value
+    assert (
+        m_stats.call_args
+        == [(search, *refreshed), {}])
+
+
+@pytest.mark.parametrize("index", [None, True, False, "unset"])
+def test_grep_tool_index(index):
+    """Test searches are narrowed by an index only if it is set."""
+    args = dict(args=("foo", ))
+    if index != "unset":
+        args["index"] = index
+    tool = GrepTool(MagicMock(), MagicMock(), args)
+    assert tool.index is (index is True)
+    assert "index" not in tool.__dict__
+
+
+@pytest.mark.parametrize("built", [True, False])
+@pytest.mark.parametrize(
+    "files, candidates, ratio",
+    [(0, 0, 1.0),
+     (3, 1, 0.3333),
+     (4, 4, 1.0)])
+def test_grep_tool_index_stats(built, files, candidates, ratio):
+    """Test the index info has the candidate ratio and the time taken to
+    build or refresh the index.
+    """
+    tool = GrepTool(MagicMock(), MagicMock(), MagicMock())
+    search = MagicMock()
+    search.index_files = files
+    search.index_candidates = candidates
+    assert (
+        tool.index_stats(search, built, 0.12345678, 7)
+        == dict(
+            files=files,
+            candidates=candidates,
+            candidate_ratio=ratio,
+            build_time=0.123457 if built else None,
+            refresh_time=None if built else 0.123457,
+            indexed=7))
+
+
+@pytest.mark.parametrize("index_info", [None, dict(files=1)])
+def test_grep_tool_parse_output(patches, index_info):
+    """Test parse_output adds the info of any index used."""
+    tool = GrepTool(MagicMock(), MagicMock(), MagicMock())
+    tool.index_info = index_info
+    info: dict = dict(returncode=0)
+    patched = patches(
+        "super",
+        prefix="synca.mcp.fs_extra.tool.grep")
+
+    with patched as (m_super, ):
+        m_super.return_value.parse_output.return_value = (
+            "OUT", "ERR", 0, info)
+        assert (
+            tool.parse_output("STDOUT", "STDERR", 0)
+            == ("OUT", "ERR", 0, info))
+
+    assert (
+        m_super.return_value.parse_output.call_args
+        == [("STDOUT", "STDERR", 0), {}])
+    assert (
+        info
+        == (dict(returncode=0, index=index_info)
+            if index_info
+            else dict(returncode=0)))
+
+
+def test_grep_tool_refresh_index(patches):
+    """Test the index of the path is refreshed with its watched tree."""
+    tool = GrepTool(MagicMock(), MagicMock(), MagicMock())
+    patched = patches(
+        "TrigramIndex",
+        ("GrepTool.path",
+         dict(new_callable=PropertyMock)),
+        ("GrepTool.watcher",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.fs_extra.tool.grep")
+
+    with patched as (m_index, m_path, m_watcher):
+        index = m_index.for_dir.return_value
+        assert (
+            tool.refresh_index()
+            == (index, index.refresh.return_value))
+
+    assert (
+        m_index.for_dir.call_args
+        == [(m_path.return_value, ), {}])
+    assert (
+        m_watcher.return_value.root.call_args
+        == [(m_path.return_value, ), {}])
+    assert (
+        index.refresh.call_args
+        == [(m_watcher.return_value.root.return_value, ), {}])
+
+
 @pytest.mark.parametrize("empty_args", [True, False])
 @pytest.mark.parametrize("has_recursive", [True, False])
 @pytest.mark.parametrize("has_path_arg", [True, False])
@@ -27,3 +27,24 @@ def test_head_tool_tool_name():
     tool = HeadTool(ctx, path, args)
     assert tool.tool_name == "head"
     assert "tool_name" not in tool.__dict__
+
+
+def test_head_tool_read_slice(patches):
+    """Test read_slice reads the slice in process."""
+    tool = HeadTool(MagicMock(), MagicMock(), MagicMock())
+    path = MagicMock()
+    patched = patches(
+        "FileSlice",
+        prefix="synca.mcp.fs_extra.tool.head")
+
+    with patched as (m_slice, ):
+        assert (
+            tool.read_slice(path, "UNIT", 23)
+            == m_slice.return_value.head.return_value)
+
+    assert (
+        m_slice.call_args
+        == [(path, ), {}])
+    assert (
+        m_slice.return_value.head.call_args
+        == [(23, "UNIT"), {}])
@@ -0,0 +1,184 @@
+"""Isolated tests for synca.mcp.fs_extra.tool.lines."""
+
+from unittest.mock import AsyncMock, MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.fs_extra.errors import FSCommandError
+from synca.mcp.fs_extra.tool.base import UnixTool
+from synca.mcp.fs_extra.tool.lines import LinesTool
+
+
+def test_lines_tool_constructor():
+    """Test LinesTool class initialization."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = LinesTool(ctx, path, args)
+    assert isinstance(tool, UnixTool)
+    assert tool.ctx == ctx
+    assert tool._path_str == path
+    assert tool._args == args
+    assert tool.success_message == "Successfully read the lines of file"
+    assert tool.index_info is None
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [(dict(file="FILE", start=3),
+      ("-n", "3,$p", "FILE")),
+     (dict(file="FILE", start=3, end=None),
+      ("-n", "3,$p", "FILE")),
+     (dict(file="FILE", start=3, end=7),
+      ("-n", "3,7p;7q", "FILE"))])
+def test_lines_tool_args(patches, args, expected):
+    """Test the args print the range of lines, and are validated."""
+    tool = LinesTool(MagicMock(), MagicMock(), args)
+    patched = patches(
+        "LinesTool.validate_args",
+        prefix="synca.mcp.fs_extra.tool.lines")
+
+    with patched as (m_validate, ):
+        assert tool.args == expected
+
+    assert (
+        m_validate.call_args
+        == [(expected, ), {}])
+    assert "args" not in tool.__dict__
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [(dict(file="FILE", start=3), ("FILE", 3, None)),
+     (dict(file="FILE", start=3, end=7), ("FILE", 3, 7))])
+def test_lines_tool_range(args, expected):
+    """Test the file and range are read from the args."""
+    tool = LinesTool(MagicMock(), MagicMock(), args)
+    assert (tool.file, tool.start, tool.end) == expected
+    for name in ("file", "start", "end"):
+        assert name not in tool.__dict__
+
+
+def test_lines_tool_tool_name():
+    """Test the tool_name property returns the correct tool name."""
+    tool = LinesTool(MagicMock(), MagicMock(), MagicMock())
+    assert tool.tool_name == "sed"
+    assert "tool_name" not in tool.__dict__
+
+
+@pytest.mark.parametrize(
+    "read",
+    [None,
+     ("DATÄ".encode() + b"\xff", "built", 0.5, 23)])
+@pytest.mark.asyncio
+async def test_lines_tool_execute(patches, read):
+    """Test execute reads the lines through the line index, or else runs
+    the command.
+    """
+    tool = LinesTool(MagicMock(), MagicMock(), MagicMock())
+    cmd = MagicMock()
+    patched = patches(
+        "super",
+        "phase",
+        "asyncio.to_thread",
+        "LineIndex",
+        ("LinesTool.path",
+         dict(new_callable=PropertyMock)),
+        ("LinesTool.file",
+         dict(new_callable=PropertyMock)),
+        ("LinesTool.start",
+         dict(new_callable=PropertyMock)),
+        ("LinesTool.end",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.fs_extra.tool.lines")
+
+    with patched as patchy:
+        (m_super, m_phase, m_thread, m_index, m_path, m_file,
+         m_start, m_end) = patchy
+        m_super.return_value.execute = AsyncMock()
+        m_thread.return_value = read
+        result = await tool.execute(cmd)
+
+    assert (
+        m_thread.call_args
+        == [(m_index.read,
+             m_path.return_value.__truediv__.return_value,
+             m_start.return_value,
+             m_end.return_value),
+            {}])
+    assert (
+        m_path.return_value.__truediv__.call_args
+        == [(m_file.return_value, ), {}])
+    if not read:
+        assert result == m_super.return_value.execute.return_value
+        assert (
+            m_super.return_value.execute.call_args
+            == [(cmd, ), {}])
+        assert tool.index_info is None
+        assert (
+            m_phase.call_args_list
+            == [[("read", ), {}]])
+        return
+    assert not m_super.called
+    assert result == ("DATÄ\ufffd", "", 0)
+    assert (
+        tool.index_info
+        == dict(lines=23, refresh="built", refresh_time=0.5))
+    assert (
+        m_phase.call_args_list
+        == [[("read", ), {}], [("decode", ), {}]])
+
+
+@pytest.mark.parametrize("index_info", [None, dict(lines=1)])
+def test_lines_tool_parse_output(patches, index_info):
+    """Test parse_output adds the info of the line index."""
+    tool = LinesTool(MagicMock(), MagicMock(), MagicMock())
+    tool.index_info = index_info
+    info: dict = dict(lines_read=1)
+    patched = patches(
+        "super",
+        prefix="synca.mcp.fs_extra.tool.lines")
+
+    with patched as (m_super, ):
+        m_super.return_value.parse_output.return_value = (
+            0, "MESSAGE", "OUTPUT", info)
+        assert (
+            tool.parse_output("STDOUT", "STDERR", 0)
+            == (0, "MESSAGE", "OUTPUT", info))
+
+    assert (
+        m_super.return_value.parse_output.call_args
+        == [("STDOUT", "STDERR", 0), {}])
+    assert (
+        info
+        == (dict(lines_read=1, line_index=index_info)
+            if index_info
+            else dict(lines_read=1)))
+
+
+@pytest.mark.parametrize(
+    "start, end, valid",
+    [(1, None, True),
+     (1, 1, True),
+     (5, 10, True),
+     (0, None, False),
+     (0, 5, False),
+     (-1, 5, False),
+     (5, 4, False)])
+def test_lines_tool_validate_args(start, end, valid):
+    """Test ranges start at line 1 or later, and do not end before they
+    start.
+    """
+    tool = LinesTool(
+        MagicMock(),
+        MagicMock(),
+        dict(file="FILE", start=start, end=end))
+    if valid:
+        assert not tool.validate_args(MagicMock())
+        return
+    with pytest.raises(FSCommandError) as e:
+        tool.validate_args(MagicMock())
+    assert e.value.args[0] == tool.err_range
+    assert e.value.args[0] == (
+        "Lines are counted from 1, and the end of the range cannot be "
+        f"before its start: {start}-{end}")
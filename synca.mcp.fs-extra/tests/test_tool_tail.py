@@ -1,7 +1,11 @@
 """Isolated tests for synca.mcp.fs_extra.tool.tail."""
 
-from unittest.mock import MagicMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, PropertyMock
 
+import pytest
+
+from synca.mcp.fs_extra.errors import FSCommandError
 from synca.mcp.fs_extra.tool.base import UnixSliceTool
 from synca.mcp.fs_extra.tool.tail import TailTool
 
@@ -17,6 +21,56 @@ def test_tail_tool_constructor():
     assert tool._path_str == path
     assert tool._args == args
     assert tool.success_message == "Successfully read the end of file"
+    assert tool.flags_with_args == ('-n', '--lines', '-c', '--bytes')
+    assert tool.follow_flags == ('-f', '-F', '--follow')
+    assert tool.batch_lines == 100
+    assert tool.default_max_bytes == 1024 * 1024
+    assert tool.default_idle_timeout == 10.0
+    assert tool.follow_info is None
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [(("-n", "5", "FILE"), False),
+     (("-f", "FILE"), True),
+     (("-F", "FILE"), True),
+     (("FILE", "--follow"), True),
+     (("--follow=name", "FILE"), True),
+     (("--foll", "FILE"), True),
+     (("--f=name", "FILE"), True),
+     (("--", "FILE"), False),
+     (("--fast", "FILE"), False),
+     (("-fn", "20", "FILE"), True),
+     (("-Fn20", "FILE"), True),
+     (("-qf", "FILE"), True),
+     (("-nf", "FILE"), False),
+     (("-n5f", "FILE"), False),
+     (("-s", "1", "FILE"), False),
+     (("-", "FILE"), False)])
+def test_tail_tool_follow(args, expected):
+    """Test the args follow the file if they have a follow flag, of its
+    own, clustered or abbreviated.
+    """
+    tool = TailTool(MagicMock(), MagicMock(), dict(args=args))
+    assert tool.follow is expected
+    assert "follow" not in tool.__dict__
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [({}, (None, 1024 * 1024, 10.0)),
+     (dict(max_lines=None, max_bytes=None, idle_timeout=None),
+      (None, 1024 * 1024, 10.0)),
+     (dict(max_lines=5, max_bytes=100, idle_timeout=0.5),
+      (5, 100, 0.5))])
+def test_tail_tool_follow_limits(args, expected):
+    """Test following is limited as set, or by default."""
+    tool = TailTool(MagicMock(), MagicMock(), args)
+    assert (
+        (tool.max_lines, tool.max_bytes, tool.idle_timeout)
+        == expected)
+    for name in ("max_lines", "max_bytes", "idle_timeout"):
+        assert name not in tool.__dict__
 
 
 def test_tail_tool_tool_name():
@@ -27,3 +81,221 @@ def test_tail_tool_tool_name():
     tool = TailTool(ctx, path, args)
     assert tool.tool_name == "tail"
     assert "tool_name" not in tool.__dict__
+
+
+def test_tail_tool_read_slice(patches):
+    """Test read_slice reads the slice in process."""
+    tool = TailTool(MagicMock(), MagicMock(), MagicMock())
+    path = MagicMock()
+    patched = patches(
+        "FileSlice",
+        prefix="synca.mcp.fs_extra.tool.tail")
+
+    with patched as (m_slice, ):
+        assert (
+            tool.read_slice(path, "UNIT", 23)
+            == m_slice.return_value.tail.return_value)
+
+    assert (
+        m_slice.call_args
+        == [(path, ), {}])
+    assert (
+        m_slice.return_value.tail.call_args
+        == [(23, "UNIT"), {}])
+
+
+@pytest.mark.parametrize(
+    "follow, slice_args, opened, raises",
+    [(False, None, None, None),
+     (True, None, None, None),
+     (True, ("FILE", "UNIT", 23), None, None),
+     (True, ("FILE", "UNIT", 23), "DATA", None),
+     (True, ("FILE", "UNIT", 23), "DATA", Exception)])
+@pytest.mark.asyncio
+async def test_tail_tool_execute(
+        patches, follow, slice_args, opened, raises):
+    """Test execute follows the file if the args follow it, or else reads
+    the slice.
+    """
+    tool = TailTool(MagicMock(), MagicMock(), MagicMock())
+    cmd = MagicMock()
+    patched = patches(
+        "super",
+        "phase",
+        "FileFollow",
+        ("TailTool.follow",
+         dict(new_callable=PropertyMock)),
+        ("TailTool.path",
+         dict(new_callable=PropertyMock)),
+        ("TailTool.slice_args",
+         dict(new_callable=PropertyMock)),
+        ("TailTool.max_lines",
+         dict(new_callable=PropertyMock)),
+        ("TailTool.max_bytes",
+         dict(new_callable=PropertyMock)),
+        ("TailTool.idle_timeout",
+         dict(new_callable=PropertyMock)),
+        "TailTool.follow_file",
+        prefix="synca.mcp.fs_extra.tool.tail")
+
+    with patched as patchy:
+        (m_super, m_phase, m_follow, m_is_follow, m_path, m_args,
+         m_lines, m_bytes, m_idle, m_file) = patchy
+        m_super.return_value.execute = AsyncMock()
+        m_is_follow.return_value = follow
+        m_args.return_value = slice_args
+        m_follow.return_value.open.return_value = (
+            "DATÄ".encode()
+            if opened
+            else None)
+        m_file.return_value = "FOLLOWED\xff".encode("latin-1")
+        m_file.side_effect = raises
+        if not follow:
+            result = await tool.execute(cmd)
+        elif not slice_args:
+            with pytest.raises(FSCommandError) as e:
+                await tool.execute(cmd)
+        elif raises:
+            with pytest.raises(Exception):
+                await tool.execute(cmd)
+        else:
+            result = await tool.execute(cmd)
+
+    if not follow:
+        assert result == m_super.return_value.execute.return_value
+        assert (
+            m_super.return_value.execute.call_args
+            == [(cmd, ), {}])
+        assert not m_follow.called
+        return
+    assert not m_super.called
+    if not slice_args:
+        assert e.value.args[0] == tool.err_follow
+        assert not m_follow.called
+        return
+    assert (
+        m_follow.call_args
+        == [(m_path.return_value.__truediv__.return_value, ),
+            dict(max_lines=m_lines.return_value,
+                 max_bytes=m_bytes.return_value,
+                 idle_timeout=m_idle.return_value)])
+    assert (
+        m_path.return_value.__truediv__.call_args
+        == [("FILE", ), {}])
+    assert (
+        m_follow.return_value.open.call_args
+        == [(23, "UNIT"), {}])
+    if not opened:
+        assert result == ("", "tail: cannot open 'FILE' for reading\n", 1)
+        assert not m_file.called
+        assert not m_follow.return_value.close.called
+        return
+    assert (
+        m_file.call_args
+        == [(m_follow.return_value, ), {}])
+    assert (
+        m_follow.return_value.close.call_args
+        == [(), {}])
+    if raises:
+        assert (
+            m_phase.call_args_list
+            == [[("follow", ), {}]])
+        return
+    assert result == ("DATÄFOLLOWED\ufffd", "", 0)
+    assert (
+        m_phase.call_args_list
+        == [[("follow", ), {}], [("decode", ), {}]])
+
+
+@pytest.mark.parametrize("timeout", [None, 0.01])
+@pytest.mark.parametrize("partial", [b"", b"PARTIAL"])
+@pytest.mark.parametrize("max_lines", [None, 7])
+@pytest.mark.asyncio
+async def test_tail_tool_follow_file(patches, timeout, partial, max_lines):
+    """Test the lines read while following are sent to the client in
+    batches, and returned once following stops.
+    """
+    ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
+    tool = TailTool(ctx, MagicMock(), dict(timeout=timeout))
+    tool.batch_lines = 2
+    follow = MagicMock()
+    follow.stopped = None
+    follow.flush.return_value = partial
+
+    async def _follow(on_data):
+        await on_data(b"a\nb\nc\n")
+        await on_data(b"d\xff\n")
+        if timeout:
+            await asyncio.sleep(1)
+        follow.stopped = "idle"
+
+    follow.follow.side_effect = _follow
+    patched = patches(
+        ("TailTool.max_lines",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.fs_extra.tool.tail")
+
+    with patched as (m_lines, ):
+        m_lines.return_value = max_lines
+        assert (
+            await tool.follow_file(follow)
+            == b"a\nb\nc\nd\xff\n" + partial)
+
+    batches = [(2, "a\nb\n"), (3, "c\n"), (4, "d\ufffd\n")]
+    if partial:
+        batches.append((5, "PARTIAL"))
+    assert (
+        ctx.report_progress.call_args_list
+        == [[(sent, max_lines, message), {}]
+            for sent, message
+            in batches])
+    assert (
+        tool.follow_info
+        == dict(
+            lines=follow.lines,
+            bytes=follow.bytes,
+            rotations=follow.rotations,
+            truncations=follow.truncations,
+            notifications=len(batches),
+            stopped="timeout" if timeout else "idle"))
+
+
+@pytest.mark.asyncio
+async def test_tail_tool_follow_file_stopped(patches):
+    """Test following that never stopped is taken to have timed out."""
+    tool = TailTool(MagicMock(), MagicMock(), {})
+    follow = MagicMock()
+    follow.stopped = None
+    follow.follow = AsyncMock()
+    follow.flush.return_value = b""
+    assert await tool.follow_file(follow) == b""
+    assert tool.follow_info["stopped"] == "timeout"
+    assert tool.follow_info["notifications"] == 0
+
+
+@pytest.mark.parametrize("follow_info", [None, dict(lines=1)])
+def test_tail_tool_parse_output(patches, follow_info):
+    """Test parse_output adds the info of any follow."""
+    tool = TailTool(MagicMock(), MagicMock(), MagicMock())
+    tool.follow_info = follow_info
+    info: dict = dict(lines_read=1)
+    patched = patches(
+        "super",
+        prefix="synca.mcp.fs_extra.tool.tail")
+
+    with patched as (m_super, ):
+        m_super.return_value.parse_output.return_value = (
+            0, "MESSAGE", "OUTPUT", info)
+        assert (
+            tool.parse_output("STDOUT", "STDERR", 0)
+            == (0, "MESSAGE", "OUTPUT", info))
+
+    assert (
+        m_super.return_value.parse_output.call_args
+        == [("STDOUT", "STDERR", 0), {}])
+    assert (
+        info
+        == (dict(lines_read=1, follow=follow_info)
+            if follow_info
+            else dict(lines_read=1)))
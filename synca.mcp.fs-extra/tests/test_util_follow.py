@@ -0,0 +1,276 @@
+"""Isolated tests for synca.mcp.fs_extra.util.follow."""
+
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from synca.mcp.fs_extra.util import FileFollow, FileSlice
+
+
+def append(path, data):
+    """Append data to a file."""
+    with path.open("ab") as f:
+        f.write(data)
+
+
+def test_file_follow_constructor():
+    """Test FileFollow class initialization."""
+    path = MagicMock()
+    follow = FileFollow(path)
+    assert follow.path is path
+    assert follow.max_lines is None
+    assert follow.max_bytes is None
+    assert follow.idle_timeout is None
+    assert isinstance(follow.slice, FileSlice)
+    assert follow.slice.path is path
+    assert follow.fd is None
+    assert follow.identity is None
+    assert follow.partial == b""
+    assert follow.lines == 0
+    assert follow.bytes == 0
+    assert follow.rotations == 0
+    assert follow.truncations == 0
+    assert follow.stopped is None
+    assert FileFollow.interval == 0.1
+    follow = FileFollow(path, 1, 2, 3.0)
+    assert follow.max_lines == 1
+    assert follow.max_bytes == 2
+    assert follow.idle_timeout == 3.0
+
+
+def test_file_follow_close(tmp_path):
+    """Test the file followed is closed, once."""
+    (tmp_path / "log").write_bytes(b"")
+    follow = FileFollow(tmp_path / "log")
+    follow.close()
+    follow.open(10)
+    fd = follow.fd
+    follow.close()
+    assert follow.fd is None
+    with pytest.raises(OSError):
+        os.fstat(fd)
+    follow.close()
+
+
+@pytest.mark.parametrize("partial", [b"", b"PARTIAL"])
+def test_file_follow_flush(partial):
+    """Test the partial line left is counted and returned once."""
+    follow = FileFollow(MagicMock())
+    follow.partial = partial
+    follow.lines = 2
+    follow.bytes = 5
+    assert follow.flush() == partial
+    assert follow.partial == b""
+    assert follow.lines == 2 + bool(partial)
+    assert follow.bytes == 5 + len(partial)
+    assert follow.flush() == b""
+
+
+@pytest.mark.parametrize(
+    "count, unit, expected",
+    [(2, "lines", b"b\nc\n"),
+     (0, "lines", b""),
+     (3, "bytes", b"\nc\n"),
+     (0, "bytes", b"")])
+def test_file_follow_open(tmp_path, count, unit, expected):
+    """Test the end of the file is returned, and following starts after
+    it.
+    """
+    path = tmp_path / "log"
+    path.write_bytes(b"a\nb\nc\n")
+    follow = FileFollow(path)
+    assert follow.open(count, unit) == expected
+    info = path.stat()
+    assert follow.identity == (info.st_dev, info.st_ino)
+    append(path, b"d\n")
+    assert follow.poll() == b"d\n"
+    follow.close()
+
+
+@pytest.mark.parametrize("kind", ["missing", "fifo", "dir"])
+def test_file_follow_open_fail(tmp_path, kind):
+    """Test files that cannot be opened, or are not regular files, are
+    not followed.
+    """
+    path = tmp_path / "log"
+    if kind == "fifo":
+        os.mkfifo(path)
+    elif kind == "dir":
+        path.mkdir()
+    follow = FileFollow(path)
+    assert follow.open(10) is None
+    assert follow.fd is None
+    assert follow.identity is None
+
+
+def test_file_follow_poll(tmp_path):
+    """Test the data appended is read, from the start of the file again
+    if it is truncated.
+    """
+    path = tmp_path / "log"
+    path.write_bytes(b"a\n")
+    follow = FileFollow(path)
+    follow.open(10)
+    assert follow.poll() == b""
+    append(path, b"bcdef")
+    assert follow.poll(3) == b"bcd"
+    assert follow.poll() == b"ef"
+    path.write_bytes(b"x\n")
+    assert follow.poll() == b"x\n"
+    assert follow.truncations == 1
+    assert follow.rotations == 0
+    follow.close()
+
+
+@pytest.mark.parametrize("limit", [None, 2, 3, 100])
+def test_file_follow_poll_rotated(tmp_path, limit):
+    """Test the rest of a rotated file is read before the new file of the
+    same name is followed.
+    """
+    path = tmp_path / "log"
+    path.write_bytes(b"a\n")
+    follow = FileFollow(path)
+    follow.open(10)
+    path.rename(tmp_path / "log.1")
+    assert follow.poll(limit) == b""
+    assert follow.rotations == 0
+    append(tmp_path / "log.1", b"old")
+    path.write_bytes(b"new")
+    data = follow.poll(limit)
+    assert data == b"old"[:limit]
+    if limit is not None and limit <= 3:
+        assert follow.rotations == 0
+        assert follow.poll(limit) == b"old"[limit:]
+    assert follow.rotations == 1
+    info = path.stat()
+    assert follow.identity == (info.st_dev, info.st_ino)
+    assert follow.poll() == b"new"
+    follow.close()
+
+
+def test_file_follow_poll_rotated_fifo(tmp_path):
+    """Test a rotated file is followed until its name is a regular file
+    again.
+    """
+    path = tmp_path / "log"
+    path.write_bytes(b"")
+    follow = FileFollow(path)
+    follow.open(10)
+    path.unlink()
+    os.mkfifo(path)
+    assert follow.poll() == b""
+    assert follow.rotations == 0
+    path.unlink()
+    path.write_bytes(b"new\n")
+    assert follow.poll() == b""
+    assert follow.rotations == 1
+    assert follow.poll() == b"new\n"
+    follow.close()
+
+
+@pytest.mark.parametrize(
+    "max_lines, max_bytes, appended, expected",
+    [(None, None,
+      [b"a\nb", b"c\n", b"", b"d"],
+      [(b"a\n", b"b", None),
+       (b"bc\n", b"", None),
+       (b"", b"", None),
+       (b"", b"d", None)]),
+     (2, None,
+      [b"a\n", b"b\nc\nd"],
+      [(b"a\n", b"", None),
+       (b"b\n", b"", "lines")]),
+     (None, 6,
+      [b"ab\ncd", b"efgh\n"],
+      [(b"ab\n", b"cd", None),
+       (b"cde", b"", "bytes")]),
+     (1, 3,
+      [b"a\nb\n"],
+      [(b"a\n", b"", "lines")]),
+     (0, None,
+      [b"a\n"],
+      [(b"", b"", "lines")]),
+     (None, 0,
+      [b"a\n"],
+      [(b"", b"", "bytes")])])
+def test_file_follow_read(tmp_path, max_lines, max_bytes, appended, expected):
+    """Test whole lines are read, up to the lines and bytes left."""
+    path = tmp_path / "log"
+    path.write_bytes(b"")
+    follow = FileFollow(path, max_lines, max_bytes)
+    follow.open(10)
+    lines = count = 0
+    for data, (read, partial, stopped) in zip(appended, expected):
+        append(path, data)
+        assert follow.read() == read
+        assert follow.partial == partial
+        assert follow.stopped == stopped
+        lines += read.count(b"\n")
+        count += len(read)
+        assert follow.lines == lines
+        assert follow.bytes == count
+    follow.close()
+
+
+@pytest.mark.parametrize("idle_timeout", [None, 0.0])
+@pytest.mark.asyncio
+async def test_file_follow_follow(patches, idle_timeout):
+    """Test the lines read are passed on until following stops."""
+    follow = FileFollow(MagicMock(), idle_timeout=idle_timeout)
+    on_data = AsyncMock()
+    reads = [b"a\n", b"", b"b\n", b""]
+    patched = patches(
+        "asyncio.sleep",
+        "FileFollow.read",
+        prefix="synca.mcp.fs_extra.util.follow")
+
+    def _read():
+        data = reads.pop(0)
+        if not reads:
+            follow.stopped = "lines"
+        return data
+
+    with patched as (m_sleep, m_read):
+        m_read.side_effect = _read
+        assert not await follow.follow(on_data)
+
+    if idle_timeout is None:
+        assert (
+            on_data.call_args_list
+            == [[(b"a\n", ), {}], [(b"b\n", ), {}]])
+        assert m_read.call_count == 4
+        assert (
+            m_sleep.call_args_list
+            == [[(follow.interval, ), {}]] * 3)
+        assert follow.stopped == "lines"
+        return
+    assert (
+        on_data.call_args_list
+        == [[(b"a\n", ), {}]])
+    assert m_read.call_count == 1
+    assert not m_sleep.called
+    assert follow.stopped == "idle"
+
+
+@pytest.mark.asyncio
+async def test_file_follow_follow_file(tmp_path):
+    """Test a file is followed as it is written to, until it is idle."""
+    path = tmp_path / "log"
+    path.write_bytes(b"a\n")
+    follow = FileFollow(path, idle_timeout=0.2)
+    follow.interval = 0.01
+    follow.open(10)
+    read = []
+
+    async def on_data(data):
+        read.append(data)
+        if len(read) == 1:
+            append(path, b"c\nd")
+
+    append(path, b"b\n")
+    await follow.follow(on_data)
+    follow.close()
+    assert read == [b"b\n", b"c\n"]
+    assert follow.flush() == b"d"
+    assert follow.stopped == "idle"
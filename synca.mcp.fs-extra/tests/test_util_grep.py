@@ -0,0 +1,708 @@
+"""Isolated tests for synca.mcp.fs_extra.util.grep."""
+
+import concurrent.futures
+import errno
+import mmap
+import os
+import re
+import shutil
+import subprocess
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.fs_extra.util import (
+    GitIgnore, GrepSearch, Matcher, TrigramIndex, compile_pattern)
+from synca.mcp.fs_extra.util.grep import BINARY, literals, translate
+
+DATA = b"foo bar\nbaz\nFoo\nxfoo\n"
+
+
+def tree(path):
+    """Create a tree of files to search."""
+    for name, content in (
+            ("a.txt", b"foo bar\nbaz\n"),
+            ("src/b.txt", b"x\nfoo\n"),
+            ("src/sub/c.txt", b"no match\nfoo\nfoo\n"),
+            ("src/bin.dat", b"foo\0bin\n"),
+            ("src/e.log", b"foo\n"),
+            ("build/d.txt", b"foo\n"),
+            (".git/HEAD", b"foo\n"),
+            (".gitignore", b"build/\n*.log\n")):
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_bytes(content)
+    (path / "src/link.txt").symlink_to(path / "a.txt")
+    os.mkfifo(path / "src/fifo")
+
+
+def test_matcher_constructor():
+    """Test Matcher class initialization."""
+    matcher = Matcher()
+    assert matcher.literal is None
+    assert matcher.regex is None
+    regex = re.compile(b"x")
+    matcher = Matcher(b"LITERAL", regex)
+    assert matcher.literal == b"LITERAL"
+    assert matcher.regex is regex
+    assert not hasattr(matcher, "__dict__")
+
+
+@pytest.mark.parametrize(
+    "matcher, start, expected",
+    [(Matcher(literal=b"foo"), 0, 0),
+     (Matcher(literal=b"foo"), 1, 17),
+     (Matcher(literal=b"nope"), 0, -1),
+     (Matcher(regex=re.compile(b"^F", re.M)), 0, 12),
+     (Matcher(regex=re.compile(b"ba.", re.M)), 5, 8),
+     (Matcher(regex=re.compile(b"nope")), 0, -1)])
+def test_matcher_find(matcher, start, expected):
+    """Test the position of the next match is found."""
+    assert matcher.find(DATA, start) == expected
+
+
+@pytest.mark.parametrize(
+    "matcher, start, end, expected",
+    [(Matcher(literal=b"foo"), 8, 11, True),
+     (Matcher(regex=re.compile(b"baz")), 8, 11, True),
+     (Matcher(regex=re.compile(b"bar.baz")), 4, 7, False),
+     (Matcher(regex=re.compile(b"^baz$", re.M)), 8, 11, True)])
+def test_matcher_matches(matcher, start, end, expected):
+    """Test regex matches are confirmed within a line."""
+    assert matcher.matches(DATA, start, end) is expected
+
+
+@pytest.mark.parametrize(
+    "pattern, syntax, ignore_case, expected",
+    [("", "basic", False, None),
+     ("a\nb", "fixed", False, None),
+     ("fö", "basic", True, None),
+     ("fö", "basic", False, None),
+     ("fö", "fixed", False, None),
+     ("a.b", "fixed", False, b"a.b"),
+     ("a+b", "basic", False, b"a+b"),
+     ("a+b", "extended", False, (b"a+b", 0)),
+     ("ab*", "basic", False, (b"ab*", 0)),
+     ("a.b", "basic", False, None),
+     ("a[bc]", "extended", False, None),
+     ("a.b", "fixed", True, (b"a\\.b", re.I)),
+     ("ab", "basic", True, (b"ab", re.I)),
+     ("a\\1", "basic", False, None),
+     ("a{1,0}", "extended", False, None)])
+def test_compile_pattern(pattern, syntax, ignore_case, expected):
+    """Test patterns are compiled to literals or regexes."""
+    matcher = compile_pattern(pattern, syntax, ignore_case)
+    if expected is None:
+        assert matcher is None
+    elif isinstance(expected, bytes):
+        assert matcher.literal == expected
+        assert matcher.regex is None
+    else:
+        assert matcher.literal is None
+        assert matcher.regex.pattern == expected[0]
+        assert matcher.regex.flags & (re.I | re.M) == re.M | expected[1]
+
+
+@pytest.mark.parametrize(
+    "pattern, syntax, ignore_case, expected",
+    [("Foo", "basic", False, (b"foo", )),
+     ("a.b", "fixed", True, (b"a.b", )),
+     ("Foo *Bar", "basic", True, (b"foo", b"bar")),
+     ("fo+bar", "extended", False, (b"bar", ))])
+def test_compile_pattern_required(pattern, syntax, ignore_case, expected):
+    """Test the literals that matches require are kept lowercased."""
+    assert compile_pattern(pattern, syntax, ignore_case).required == expected
+
+
+def test_compile_pattern_cache():
+    """Test compiled patterns are cached."""
+    compile_pattern.cache_clear()
+    matcher = compile_pattern("a+b", "extended")
+    assert compile_pattern("a+b", "extended") is matcher
+    assert compile_pattern("a+b", "basic") is not matcher
+    info = compile_pattern.cache_info()
+    assert info.hits == 1
+    assert info.maxsize == 256
+
+
+@pytest.mark.parametrize(
+    "pattern, extended, expected",
+    [("ab*", False, "ab*"),
+     ("a.b*", False, None),
+     ("a.b", True, None),
+     ("^a$", False, "^a$"),
+     ("a^b$c", False, "a\\^b\\$c"),
+     ("a^b$c", True, "a^b$c"),
+     ("a+?|(b){2}", False, "a\\+\\?\\|\\(b\\)\\{2\\}"),
+     ("a+?|(b){2}", True, "a+?|(b){2}"),
+     ("a\\.\\*", False, "a\\.\\*"),
+     ("a\\+", True, "a\\+"),
+     ("a\\+", False, None),
+     ("a\\(b\\)", False, None),
+     ("a\\1", True, None),
+     ("\\w", False, None),
+     ("\\<a\\>", False, None),
+     ("\\<a\\>", True, None),
+     ("\\`a", False, None),
+     ("a\\'", True, None),
+     ("a\\", False, None),
+     ("[a-z]", False, None),
+     ("[^]a]", False, None),
+     ("x[ab]", True, None),
+     ("[[:alpha:]]", False, None),
+     ("*a", False, None),
+     ("^*a", False, None),
+     ("(*a)", True, None),
+     ("a|*", True, None),
+     ("a{2,}", True, "a{2,}"),
+     ("a{x}", True, None)])
+def test_translate(pattern, extended, expected):
+    """Test POSIX regexes are translated to Python regexes."""
+    assert translate(pattern, extended) == expected
+
+
+@pytest.mark.skipif(not shutil.which("grep"), reason="needs grep")
+@pytest.mark.parametrize(
+    "pattern",
+    ["foo", "fo*", "^foo", "foo$", "f.o", "[fx]oo", "a\\.b", "a+b",
+     "a\\+b", "(foo)", "fo\\{2\\}", "\\<foo\\>", "\\<foo", "foo\\>",
+     "\\`foo", "foo\\'", "\\bfoo", "a|b", "x\\?", "caf", "^x", "y$",
+     "fo*o$"])
+@pytest.mark.parametrize("syntax", ["basic", "extended"])
+def test_compile_pattern_grep(tmp_path, pattern, syntax):
+    """Test patterns compiled in process match the lines that `grep`
+    matches, or are left to it.
+    """
+    data = (
+        b"foo\nfoo bar\nxfoo\nfooy\nfoo.bar\na.b\naxb\na+b\naab\n"
+        b"(foo)\nfoo|bar\na|b\nx?\nx\n<foo>\nfoo'\n`foo\n"
+        + "caf\u00e9\nx\u00e9y\nfo\u00e9o\n".encode())
+    path = tmp_path / "data.txt"
+    path.write_bytes(data)
+    grep = subprocess.run(
+        ["grep", "-n", "-G" if syntax == "basic" else "-E", pattern,
+         str(path)],
+        capture_output=True,
+        check=False)
+    if not (matcher := compile_pattern(pattern, syntax)):
+        # left to `grep`
+        return
+    expected = [
+        line.split(b":", 1)[1]
+        for line
+        in grep.stdout.splitlines()]
+    assert [
+        line
+        for line
+        in data.splitlines()
+        if matcher.find(line, 0) >= 0] == expected
+
+
+@pytest.mark.skipif(not shutil.which("grep"), reason="needs grep")
+@pytest.mark.parametrize(
+    "pattern, syntax",
+    [("caf.$", "basic"),
+     ("x.y", "extended"),
+     ("na[ïi]ve", "basic"),
+     ("[^a]y", "extended"),
+     ("café", "fixed"),
+     ("é+", "extended")])
+def test_compile_pattern_unicode(tmp_path, pattern, syntax):
+    """Test patterns that `grep` matches to the characters of a UTF-8
+    locale, rather than bytes, are left to it.
+    """
+    path = tmp_path / "data.txt"
+    path.write_text("café\nxéy\nnaïve\néé\n", encoding="utf-8")
+    grep = subprocess.run(
+        ["grep", dict(basic="-G", extended="-E", fixed="-F")[syntax],
+         pattern, str(path)],
+        capture_output=True,
+        check=False,
+        env=dict(os.environ, LC_ALL="C.UTF-8"))
+    assert grep.returncode == 0
+    assert compile_pattern(pattern, syntax) is None
+
+
+@pytest.mark.parametrize(
+    "pattern, extended, expected",
+    [("ab", False, ()),
+     ("abc", False, (b"abc", )),
+     ("ABC$def", False, (b"abc", b"def")),
+     ("abcd*efg", False, (b"abc", b"efg")),
+     ("*abc", False, (b"abc", )),
+     ("abc+def", False, (b"abc+def", )),
+     ("abc+def", True, (b"abc", b"def")),
+     ("abcd?efg", True, (b"abc", b"efg")),
+     ("abcd{0,2}efg", True, (b"abc", b"efg")),
+     ("^abc$", False, (b"abc", )),
+     ("a\\.bc\\*", False, (b"a.bc*", )),
+     ("(abc)", True, ()),
+     ("abc|def", True, ())])
+def test_literals(pattern, extended, expected):
+    """Test the literals that every match of a regex contains are found."""
+    assert literals(pattern, extended) == expected
+
+
+def test_grep_search_constructor():
+    """Test GrepSearch class initialization."""
+    matcher = MagicMock()
+    search = GrepSearch(matcher, [])
+    assert search.matcher is matcher
+    assert search.operands == ["."]
+    assert search.implicit is True
+    assert search.recursive is False
+    assert search.line_number is False
+    assert search.files_only is False
+    assert search.max_count is None
+    assert search.with_filename is None
+    assert search.gitignore is True
+    assert search.index is None
+    assert search.index_files == 0
+    assert search.index_candidates == 0
+    assert search.mmap_threshold == 64 * 1024
+    assert search.batch == 64
+    assert isinstance(
+        GrepSearch.executor,
+        concurrent.futures.ThreadPoolExecutor)
+    search = GrepSearch(
+        matcher, ["OPERAND"], True, True, True, 23, False, False, "INDEX")
+    assert search.operands == ["OPERAND"]
+    assert search.implicit is False
+    assert search.recursive is True
+    assert search.line_number is True
+    assert search.files_only is True
+    assert search.max_count == 23
+    assert search.with_filename is False
+    assert search.gitignore is False
+    assert search.index == "INDEX"
+
+
+@pytest.mark.parametrize(
+    "operands, index, relative, expected",
+    [([], 0, "", "."),
+     ([], 0, "a/b", "a/b"),
+     (["src"], 0, "", "src"),
+     (["x", "src/"], 1, "a/b", "src/a/b"),
+     (["."], 0, "a", "./a")])
+def test_grep_search_display(operands, index, relative, expected):
+    """Test paths are shown as grep shows them."""
+    assert (
+        GrepSearch(MagicMock(), operands).display(index, relative)
+        == expected)
+
+
+@pytest.mark.parametrize(
+    "pattern, max_count, files_only, line_number, expected",
+    [("foo", None, False, False, [(1, 0, 7), (1, 16, 20)]),
+     ("foo", None, False, True, [(1, 0, 7), (4, 16, 20)]),
+     ("foo", 1, False, True, [(1, 0, 7)]),
+     ("foo", None, True, True, [(1, 0, 7)]),
+     ("o", None, False, True, [(1, 0, 7), (3, 12, 15), (4, 16, 20)]),
+     ("nope", None, False, True, []),
+     ("ba*", None, False, True, [(1, 0, 7), (2, 8, 11)]),
+     ("o$", None, False, True, [(3, 12, 15), (4, 16, 20)]),
+     ("r*b", None, False, True, [(1, 0, 7), (2, 8, 11)]),
+     (Matcher(regex=re.compile(b"r[^x]b", re.M)), None, False, True, []),
+     ("f*oo", None, False, True, [(1, 0, 7), (3, 12, 15), (4, 16, 20)])])
+def test_grep_search_lines(
+        pattern, max_count, files_only, line_number, expected):
+    """Test matching lines are found, up to the limit, skipping regex
+    matches across lines.
+    """
+    search = GrepSearch(
+        compile_pattern(pattern) if isinstance(pattern, str) else pattern,
+        ["FILE"],
+        line_number=line_number,
+        files_only=files_only,
+        max_count=max_count)
+    assert search.lines(DATA) == expected
+    assert search.lines(DATA.rstrip()) == expected
+
+
+@pytest.mark.parametrize(
+    "kind", ["missing", "file", "dir", "dir_recursive", "dir_no_ignore"])
+def test_grep_search_operand(patches, tmp_path, kind):
+    """Test operands are checked, with the ignore files of dirs."""
+    path = tmp_path / "path"
+    if kind == "file":
+        path.write_text("")
+    elif kind != "missing":
+        path.mkdir()
+    search = GrepSearch(
+        MagicMock(),
+        ["path"],
+        recursive=kind != "dir",
+        gitignore=kind != "dir_no_ignore")
+    patched = patches(
+        "GitIgnore",
+        prefix="synca.mcp.fs_extra.util.grep")
+
+    with patched as (m_ignore, ):
+        if kind in ("missing", "dir"):
+            error = (
+                FileNotFoundError
+                if kind == "missing"
+                else IsADirectoryError)
+            with pytest.raises(error) as e:
+                search.operand(0, tmp_path)
+            assert not m_ignore.for_dir.called
+            if kind == "dir":
+                assert e.value.errno == errno.EISDIR
+                assert e.value.strerror == "Is a directory"
+            return
+        result = search.operand(0, tmp_path)
+
+    if kind == "file":
+        assert result == (False, None)
+    elif kind == "dir_no_ignore":
+        assert result == (True, None)
+    else:
+        assert result == (True, m_ignore.for_dir.return_value)
+        assert (
+            m_ignore.for_dir.call_args
+            == [(path, ), {}])
+
+
+@pytest.mark.parametrize("files_only", [True, False])
+@pytest.mark.parametrize("with_filename", [True, False])
+@pytest.mark.parametrize("errors", [{}, {(1, ""): "No such file"}])
+@pytest.mark.parametrize("found", [True, False])
+def test_grep_search_output(files_only, with_filename, errors, found):
+    """Test output is sorted by path, and formatted as grep's."""
+    search = GrepSearch(
+        MagicMock(),
+        ["src", "nosuch", "other"],
+        files_only=files_only)
+    results = (
+        {(2, ""): "" if files_only else "a",
+         (0, "z"): "" if files_only else "b\nc",
+         (0, "a/b"): BINARY,
+         (0, "a"): "" if files_only else "d",
+         (0, "a-b"): "" if files_only else "e"}
+        if found
+        else {})
+    stdout, stderr, return_code = search.output(
+        results, errors, with_filename)
+    assert (
+        return_code
+        == (2
+            if errors
+            else 0
+            if found
+            else 1))
+    expected_err = ["grep: nosuch: No such file"] if errors else []
+    if not found:
+        assert stdout == ""
+        assert stderr.splitlines() == expected_err
+        return
+    if files_only:
+        assert stdout == "src/a\nsrc/a/b\nsrc/a-b\nsrc/z\nother\n"
+        assert stderr.splitlines() == expected_err
+        return
+    assert (
+        stderr.splitlines()
+        == [*expected_err, "grep: src/a/b: binary file matches"])
+    assert (
+        stdout
+        == ("src/a:d\nsrc/a-b:e\nsrc/z:b\nsrc/z:c\nother:a\n"
+            if with_filename
+            else "d\ne\nb\nc\na\n"))
+
+
+@pytest.mark.parametrize(
+    "args, gitignore, expected",
+    [(dict(operands=["a.txt"]),
+      True,
+      ("foo bar\n", "", 0)),
+     (dict(operands=["a.txt"], with_filename=True, line_number=True),
+      True,
+      ("a.txt:1:foo bar\n", "", 0)),
+     (dict(operands=["a.txt", "src/b.txt"]),
+      True,
+      ("a.txt:foo bar\nsrc/b.txt:foo\n", "", 0)),
+     (dict(operands=["a.txt", "src/b.txt"], with_filename=False),
+      True,
+      ("foo bar\nfoo\n", "", 0)),
+     (dict(operands=["nosuch", "a.txt"]),
+      True,
+      ("a.txt:foo bar\n", "grep: nosuch: No such file or directory\n", 2)),
+     (dict(operands=["src"]),
+      True,
+      ("", "grep: src: Is a directory\n", 2)),
+     (dict(operands=["src/b.txt"], max_count=0),
+      True,
+      ("", "", 1)),
+     (dict(operands=["src/sub"], recursive=True, line_number=True),
+      True,
+      ("src/sub/c.txt:2:foo\nsrc/sub/c.txt:3:foo\n", "", 0)),
+     (dict(operands=["src/"], recursive=True, max_count=1),
+      True,
+      ("src/b.txt:foo\nsrc/sub/c.txt:foo\n",
+       "grep: src/bin.dat: binary file matches\n",
+       0)),
+     (dict(operands=[], recursive=True, files_only=True),
+      True,
+      ("a.txt\nsrc/b.txt\nsrc/bin.dat\nsrc/sub/c.txt\n", "", 0)),
+     (dict(operands=[], recursive=True, files_only=True),
+      False,
+      (".git/HEAD\na.txt\nbuild/d.txt\nsrc/b.txt\nsrc/bin.dat\n"
+       "src/e.log\nsrc/sub/c.txt\n",
+       "",
+       0)),
+     (dict(operands=["."], recursive=True, files_only=True),
+      True,
+      ("./a.txt\n./src/b.txt\n./src/bin.dat\n./src/sub/c.txt\n", "", 0)),
+     (dict(operands=["src", "a.txt"], recursive=True, files_only=True),
+      True,
+      ("src/b.txt\nsrc/bin.dat\nsrc/sub/c.txt\na.txt\n", "", 0))])
+def test_grep_search_run(tmp_path, args, gitignore, expected):
+    """Test operands are searched as grep would."""
+    tree(tmp_path)
+    search = GrepSearch(
+        compile_pattern("foo"),
+        gitignore=gitignore,
+        **args)
+    assert search.run(tmp_path) == expected
+
+
+@pytest.mark.parametrize(
+    "relative, total, expected",
+    [(None, 0, None),
+     ("..", 3, None),
+     ("../other", 3, None),
+     (".", 0, None),
+     (".", 3, ["a.txt", "src/b.txt"]),
+     ("src", 2, ["b.txt"])])
+def test_grep_search_indexed(patches, relative, total, expected):
+    """Test the candidates of the index under a dir are listed relative to
+    it, unless it has no files there.
+    """
+    search = GrepSearch(MagicMock(), ["."])
+    if relative is not None:
+        search.index = MagicMock()
+        search.index.candidates.return_value = (
+            total,
+            [f"{prefix}{name}"
+             for prefix, name
+             in ((("", "a.txt"), ("", "src/b.txt"))
+                 if relative == "."
+                 else (("src/", "b.txt"), ))],
+            ["venv" if relative == "." else "src/venv"])
+    search.index_files = 1
+    search.index_candidates = 1
+    patched = patches(
+        "os.path.realpath",
+        "os.path.relpath",
+        prefix="synca.mcp.fs_extra.util.grep")
+
+    with patched as (m_realpath, m_relpath):
+        m_relpath.return_value = relative
+        assert (
+            search.indexed("PATH")
+            == ((expected, ["venv"])
+                if expected
+                else None))
+
+    if relative is None:
+        assert not m_relpath.called
+        return
+    assert (
+        m_relpath.call_args
+        == [(m_realpath.return_value, search.index.path), {}])
+    assert (
+        m_realpath.call_args
+        == [("PATH", ), {}])
+    if relative.startswith(".."):
+        assert not search.index.candidates.called
+        return
+    assert (
+        search.index.candidates.call_args
+        == [(search.matcher.required,
+             "" if relative == "." else f"{relative}/"),
+            {}])
+    assert search.index_files == 1 + total
+    assert (
+        search.index_candidates
+        == 1 + (len(expected) if expected else 0))
+
+
+@pytest.mark.parametrize("pattern", ["foo", "fo*", "zzz", "o"])
+@pytest.mark.parametrize(
+    "operands, files",
+    [([], 5),
+     (["src"], 3),
+     (["src/sub", "a.txt"], 1)])
+@pytest.mark.parametrize("batch", [1, 64])
+def test_grep_search_run_indexed(
+        tmp_path, pattern, operands, files, batch):
+    """Test searches narrowed by an index find what walking finds."""
+    root = tmp_path / "root"
+    tree(root)
+    (root / "src/venv/lib").mkdir(parents=True)
+    (root / "src/venv/lib/f.txt").write_text("foo\n")
+    (root / "src/venv/.gitignore").write_text("*.log\n")
+    (root / "src/venv/lib/g.log").write_text("foo\n")
+    index = TrigramIndex(root, directory="")
+    index.refresh()
+    walked = GrepSearch(
+        compile_pattern(pattern),
+        operands,
+        recursive=True,
+        line_number=True)
+    search = GrepSearch(
+        compile_pattern(pattern),
+        operands,
+        recursive=True,
+        line_number=True,
+        index=index)
+    search.batch = batch
+    assert search.run(root) == walked.run(root)
+    assert search.index_files == files
+    assert (
+        search.index_candidates
+        == (0
+            if pattern == "zzz"
+            else files - 1
+            if pattern == "foo" and not operands
+            else files))
+
+
+def test_grep_search_run_errors(patches, tmp_path):
+    """Test errors searching the files of a walked dir are reported."""
+    tree(tmp_path)
+    (tmp_path / "src/sub/deeper").mkdir()
+    search = GrepSearch(
+        compile_pattern("foo"),
+        ["src", "a.txt"],
+        recursive=True)
+    scan = search.scan
+    walk = search.walk
+
+    def _scan(path):
+        if path.endswith("b.txt"):
+            raise PermissionError(errno.EACCES, "Permission denied")
+        if path.endswith("c.txt"):
+            raise OSError("BOOM")
+        if path.endswith("a.txt"):
+            raise IsADirectoryError(errno.EISDIR, "Is a directory")
+        return scan(path)
+
+    def _walk(path, ignore):
+        if path.endswith("deeper"):
+            raise PermissionError(errno.EACCES, "Permission denied")
+        return walk(path, ignore)
+
+    search.scan = _scan
+    search.walk = _walk
+    assert (
+        search.run(tmp_path)
+        == ("",
+            "grep: src/b.txt: Permission denied\n"
+            "grep: src/sub/c.txt: BOOM\n"
+            "grep: src/sub/deeper: Permission denied\n"
+            "grep: a.txt: Is a directory\n"
+            "grep: src/bin.dat: binary file matches\n",
+            2))
+
+
+@pytest.mark.parametrize("size", [0, 10, 64 * 1024, 100 * 1024])
+def test_grep_search_scan(patches, tmp_path, size):
+    """Test small files are read, and larger ones mapped."""
+    path = tmp_path / "file"
+    path.write_bytes(b"x" * size)
+    search = GrepSearch(MagicMock(), ["file"])
+    patched = patches(
+        "GrepSearch.search",
+        prefix="synca.mcp.fs_extra.util.grep")
+
+    with patched as (m_search, ):
+        assert search.scan(str(path)) == m_search.return_value
+
+    data = m_search.call_args[0][0]
+    if size < search.mmap_threshold:
+        assert data == b"x" * size
+    else:
+        assert isinstance(data, mmap.mmap)
+        assert data.closed
+
+
+@pytest.mark.parametrize(
+    "data, pattern, files_only, line_number, expected",
+    [(b"foo\nbar\n", "nope", False, False, None),
+     (b"foo\nbar\n", "foo", True, False, ""),
+     (b"foo\nbar\nfoo", "foo", False, False, "foo\nfoo"),
+     (b"foo\nbar\nfoo", "foo", False, True, "1:foo\n3:foo"),
+     (b"f\xc3\xb6o\n", "o", False, False, "föo"),
+     (b"f\xffo\n", "o", False, False, BINARY),
+     (b"f\xffo\n", "o", True, False, ""),
+     (b"foo\0bar\n", "foo", False, False, BINARY),
+     (b"foo\0bar\n", "foo", True, False, ""),
+     (b"foo\0bar\n", "o$", False, False, BINARY),
+     (b"foo\0bar\n", "^bar", True, False, ""),
+     (b"foo\0bar\n", "nope", False, False, None)])
+def test_grep_search_search(data, pattern, files_only, line_number, expected):
+    """Test matching lines are returned, unless the file is binary."""
+    search = GrepSearch(
+        compile_pattern(pattern),
+        ["FILE"],
+        files_only=files_only,
+        line_number=line_number)
+    assert search.search(data) == expected
+
+
+@pytest.mark.parametrize("gitignore", [True, False])
+def test_grep_search_walk(tmp_path, gitignore):
+    """Test the files of a dir are searched, and its subdirs listed."""
+    tree(tmp_path)
+    (tmp_path / "src/.gitignore").write_text("sub/\n")
+    ignore = GitIgnore.for_dir(tmp_path) if gitignore else None
+    search = GrepSearch(compile_pattern("foo"), ["."], recursive=True)
+    found, failed, subdirs, walked = search.walk(str(tmp_path), ignore)
+    assert found == {"a.txt": "foo bar"}
+    assert failed == {}
+    assert (
+        sorted(subdirs)
+        == sorted(
+            [("src", str(tmp_path / "src"))]
+            + ([]
+               if gitignore
+               else [(".git", str(tmp_path / ".git")),
+                     ("build", str(tmp_path / "build"))])))
+    if gitignore:
+        assert walked.rules[0][0] == str(tmp_path)
+    else:
+        assert walked is None
+    found, failed, subdirs, walked = search.walk(
+        str(tmp_path / "src"), walked)
+    assert (
+        found
+        == ({"b.txt": "foo", "bin.dat": BINARY}
+            if gitignore
+            else {"b.txt": "foo", "bin.dat": BINARY, "e.log": "foo"}))
+    assert (
+        subdirs
+        == ([]
+            if gitignore
+            else [("sub", str(tmp_path / "src/sub"))]))
+    if gitignore:
+        assert walked.rules[0][0] == str(tmp_path / "src")
+        assert walked.rules[1][0] == str(tmp_path)
+    else:
+        assert walked is None
+
+
+def test_grep_search_walk_stat_error(patches, tmp_path):
+    """Test entries that cannot be checked are skipped."""
+    (tmp_path / "a.txt").write_text("foo\n")
+    search = GrepSearch(compile_pattern("foo"), ["."], recursive=True)
+    patched = patches(
+        "os.scandir",
+        prefix="synca.mcp.fs_extra.util.grep")
+    entry = MagicMock()
+    entry.name = "entry"
+    entry.is_dir.side_effect = OSError
+
+    with patched as (m_scandir, ):
+        m_scandir.return_value.__enter__.return_value = [entry]
+        assert (
+            search.walk(str(tmp_path), None)
+            == ({}, {}, [], None))
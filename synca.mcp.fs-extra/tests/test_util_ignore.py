@@ -0,0 +1,199 @@
+"""Isolated tests for synca.mcp.fs_extra.util.ignore."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.fs_extra.util import GitIgnore, IgnoreRules
+
+
+def test_ignore_rules_constructor(patches):
+    """Test IgnoreRules class initialization."""
+    lines = [MagicMock(), MagicMock(), MagicMock()]
+    patched = patches(
+        "IgnoreRules.parse",
+        prefix="synca.mcp.fs_extra.util.ignore")
+
+    with patched as (m_parse, ):
+        m_parse.side_effect = ["RULE1", None, "RULE2"]
+        rules = IgnoreRules(lines)
+
+    assert rules.rules == ["RULE1", "RULE2"]
+    assert (
+        m_parse.call_args_list
+        == [[(line, ), {}] for line in lines])
+
+
+@pytest.mark.parametrize("lines", [[], ["#"], ["foo"]])
+def test_ignore_rules_bool(lines):
+    """Test IgnoreRules are truthy if they have rules."""
+    assert bool(IgnoreRules(lines)) == bool(lines and lines[0] != "#")
+
+
+@pytest.mark.parametrize("exists", [True, False])
+def test_ignore_rules_from_file(tmp_path, exists):
+    """Test rules are read from a file, or are empty if it is missing."""
+    path = tmp_path / ".gitignore"
+    if exists:
+        path.write_bytes(b"foo\n\xff\n!bar\n")
+    rules = IgnoreRules.from_file(path)
+    assert (
+        [(regex.pattern, negate)
+         for regex, negate, _
+         in rules.rules]
+        == ([("(?:.*/)?foo", False),
+             ("(?:.*/)?\udcff", False),
+             ("(?:.*/)?bar", True)]
+            if exists
+            else []))
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [("foo", "foo"),
+     ("foo.txt", "foo\\.txt"),
+     ("*.py", "[^/]*\\.py"),
+     ("a?c", "a[^/]c"),
+     ("**/foo", "(?:.*/)?foo"),
+     ("a/**/b", "a/(?:.*/)?b"),
+     ("a/**", "a/.*"),
+     ("a**b", "a[^/]*[^/]*b"),
+     ("\\*", "\\*"),
+     ("a\\", "a\\\\"),
+     ("[abc]", "[abc]"),
+     ("[!ab]", "[^ab]"),
+     ("[]a]", "[]a]"),
+     ("[a\\[]", "[a\\\\\\[]"),
+     ("[", "\\["),
+     ("[]", "\\[\\]")])
+def test_ignore_rules_translate(pattern, expected):
+    """Test globs are translated to regexes."""
+    assert IgnoreRules.translate(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "lines, path, is_dir, expected",
+    [(["foo"], "foo", False, True),
+     (["foo"], "a/b/foo", True, True),
+     (["foo"], "foobar", False, None),
+     (["foo/"], "foo", False, None),
+     (["foo/"], "a/foo", True, True),
+     (["/foo"], "a/foo", False, None),
+     (["a/foo"], "a/foo", False, True),
+     (["a/foo"], "b/a/foo", False, None),
+     (["*.log", "!keep.log"], "keep.log", False, False),
+     (["*.log", "!keep.log"], "a/other.log", False, True),
+     (["!keep.log", "*.log"], "keep.log", False, True),
+     (["build/", "!build"], "build", True, False)])
+def test_ignore_rules_match(lines, path, is_dir, expected):
+    """Test the last rule to match a path decides if it is ignored."""
+    assert IgnoreRules(lines).match(path, is_dir) is expected
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [("", None),
+     ("   ", None),
+     ("# comment", None),
+     ("/", None),
+     ("!", None),
+     ("[z-a]", None),
+     ("foo  ", ("(?:.*/)?foo", False, False)),
+     ("foo\\ ", ("(?:.*/)?foo\\ ", False, False)),
+     ("\\#foo", ("(?:.*/)?\\#foo", False, False)),
+     ("\\!foo", ("(?:.*/)?!foo", False, False)),
+     ("!foo", ("(?:.*/)?foo", True, False)),
+     ("foo/", ("(?:.*/)?foo", False, True)),
+     ("/foo", ("foo", False, False)),
+     ("a/b/", ("a/b", False, True)),
+     ("!/a/*/", ("a/[^/]*", True, True))])
+def test_ignore_rules_parse(line, expected):
+    """Test lines of an ignore file are parsed to rules."""
+    rule = IgnoreRules([]).parse(line)
+    assert (
+        ((rule[0].pattern, *rule[1:])
+         if rule
+         else rule)
+        == expected)
+
+
+@pytest.mark.parametrize("rules", [(), ("RULES", )])
+def test_git_ignore_constructor(rules):
+    """Test GitIgnore class initialization."""
+    assert GitIgnore(rules).rules == rules
+    assert GitIgnore().rules == ()
+
+
+@pytest.mark.parametrize("repo", [None, "root", "sub", "dir"])
+def test_git_ignore_for_dir(tmp_path, repo):
+    """Test the ignore files of the parents of a dir are read up to its
+    work tree.
+    """
+    sub = tmp_path / "sub"
+    path = sub / "dir"
+    path.mkdir(parents=True)
+    for parent in (tmp_path, sub, path):
+        (parent / ".gitignore").write_text(f"{parent.name}\n")
+    if repo:
+        dict(root=tmp_path, sub=sub, dir=path)[repo].joinpath(".git").mkdir()
+    ignore = GitIgnore.for_dir(path)
+    expected = (
+        []
+        if repo in (None, "dir")
+        else [sub, tmp_path]
+        if repo == "root"
+        else [sub])
+    assert (
+        [base for base, _ in ignore.rules]
+        == [str(parent) for parent in expected])
+    assert (
+        [rules.rules[0][0].pattern for _, rules in ignore.rules]
+        == [f"(?:.*/)?{parent.name}" for parent in expected])
+
+
+@pytest.mark.parametrize("has_rules", [True, False])
+def test_git_ignore_child(patches, has_rules):
+    """Test the ignore file of a subdir is added first, if it has rules."""
+    ignore = GitIgnore((("PARENT", "RULES"), ))
+    path = MagicMock()
+    patched = patches(
+        "IgnoreRules",
+        prefix="synca.mcp.fs_extra.util.ignore")
+
+    with patched as (m_rules, ):
+        rules = m_rules.from_file.return_value
+        rules.__bool__.return_value = has_rules
+        child = ignore.child(path)
+
+    assert (
+        m_rules.from_file.call_args
+        == [(path.__truediv__.return_value, ), {}])
+    assert (
+        path.__truediv__.call_args
+        == [(".gitignore", ), {}])
+    if not has_rules:
+        assert child is ignore
+        return
+    assert isinstance(child, GitIgnore)
+    assert (
+        child.rules
+        == ((str(path), rules), ("PARENT", "RULES")))
+
+
+@pytest.mark.parametrize(
+    "path, is_dir, expected",
+    [("/repo/.git", True, True),
+     ("/repo/.git", False, False),
+     ("/repo/a.log", False, True),
+     ("/repo/keep.log", False, False),
+     ("/repo/sub/keep.log", False, True),
+     ("/repo/sub/other.log", False, True),
+     ("/repo/sub/build", True, False),
+     ("/repo/build", True, True),
+     ("/repo/src", True, False)])
+def test_git_ignore_ignored(path, is_dir, expected):
+    """Test deeper ignore files take precedence."""
+    ignore = GitIgnore(
+        (("/repo/sub", IgnoreRules(["keep.log", "!build"])),
+         ("/repo", IgnoreRules(["*.log", "!keep.log", "build/"]))))
+    assert ignore.ignored(path, is_dir) is expected
@@ -0,0 +1,326 @@
+"""Isolated tests for synca.mcp.fs_extra.util.lines."""
+
+import array
+import collections
+import os
+import threading
+import zlib
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.fs_extra.util import LineIndex
+
+DATA = b"".join(
+    b"line %d%s\n" % (i, b"x" * (i % 7))
+    for i in range(1, 41))
+
+
+def expected_lines(data, start, end=None):
+    """Lines `start` to `end` of data, split the slow way."""
+    lines = data.splitlines(keepends=True)
+    return b"".join(lines[start - 1:end])
+
+
+@pytest.fixture
+def small(monkeypatch):
+    """Index in blocks of a few bytes, to cross many of them."""
+    monkeypatch.setattr(LineIndex, "block_size", 8)
+    monkeypatch.setattr(LineIndex, "read_size", 24)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Keep the indexes of each test to itself."""
+    monkeypatch.setattr(LineIndex, "indexes", collections.OrderedDict())
+
+
+def test_line_index_constructor():
+    """Test LineIndex class initialization."""
+    index = LineIndex()
+    assert isinstance(index.lock, type(threading.Lock()))
+    assert index.counts == array.array("Q", [0])
+    assert index.lines == 0
+    assert index.scanned == 0
+    assert index.head_checksum == 0
+    assert index.checksum == 0
+    assert index.size is None
+    assert index.mtime is None
+    assert LineIndex.max_indexes == 64
+    assert LineIndex.block_size == 64 * 1024
+    assert LineIndex.read_size == 16 * LineIndex.block_size
+
+
+def test_line_index_for_file(monkeypatch, registry):
+    """Test indexes are kept by file, for the files most recently read."""
+    monkeypatch.setattr(LineIndex, "max_indexes", 2)
+    first = LineIndex.for_file((1, 1))
+    assert LineIndex.for_file((1, 1)) is first
+    second = LineIndex.for_file((1, 2))
+    assert LineIndex.for_file((1, 1)) is first
+    LineIndex.for_file((1, 3))
+    assert list(LineIndex.indexes) == [(1, 1), (1, 3)]
+    assert LineIndex.for_file((1, 2)) is not second
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"",
+     b"\n",
+     b"a",
+     b"a\nb",
+     b"abcdefgh\n",
+     b"\n" * 30,
+     DATA,
+     DATA + b"partial"])
+def test_line_index_scan(tmp_path, small, data):
+    """Test the newlines before each block are counted."""
+    path = tmp_path / "file"
+    path.write_bytes(data)
+    index = LineIndex()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        index.scan(fd, len(data))
+    finally:
+        os.close(fd)
+    assert (
+        list(index.counts)
+        == [data[:offset].count(b"\n")
+            for offset
+            in range(0, len(data) + 1, 8)])
+    assert index.lines == data.count(b"\n")
+    assert index.scanned == len(data)
+    whole = len(data) // 8 * 8
+    assert (
+        index.checksum
+        == (zlib.crc32(data[whole - 8:whole])
+            if whole
+            else 0))
+    assert (
+        index.head_checksum
+        == (zlib.crc32(data[:8])
+            if whole
+            else 0))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"a", DATA, DATA + b"partial", b"\n" * 30])
+def test_line_index_offset(tmp_path, small, data):
+    """Test the offset after each newline is found, and none past the
+    last.
+    """
+    path = tmp_path / "file"
+    path.write_bytes(data)
+    index = LineIndex()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        index.scan(fd, len(data))
+        offsets = [
+            index.offset(fd, count)
+            for count
+            in range(data.count(b"\n") + 2)]
+    finally:
+        os.close(fd)
+    assert (
+        offsets
+        == [0,
+            *[i + 1
+              for i, byte
+              in enumerate(data)
+              if byte == ord("\n")],
+            None])
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [(1, None), (1, 1), (1, 40), (3, 3), (5, 17), (17, None),
+     (40, 40), (40, None), (41, None), (41, 50), (39, 50), (100, 200)])
+@pytest.mark.parametrize("partial", [b"", b"partial"])
+def test_line_index_read(tmp_path, small, registry, start, end, partial):
+    """Test ranges of lines are read as they would be split."""
+    data = DATA + partial
+    path = tmp_path / "file"
+    path.write_bytes(data)
+    read, refresh, refresh_time, lines = LineIndex.read(path, start, end)
+    assert read == expected_lines(data, start, end)
+    assert refresh == "built"
+    assert refresh_time >= 0
+    assert lines == 40
+    assert LineIndex.read(path, start, end)[:2] == (read, "cached")
+
+
+@pytest.mark.parametrize("kind", ["missing", "fifo", "dir"])
+def test_line_index_read_fail(tmp_path, registry, kind):
+    """Test files that cannot be opened, or are not regular files, are
+    not read.
+    """
+    path = tmp_path / "file"
+    if kind == "fifo":
+        os.mkfifo(path)
+    elif kind == "dir":
+        path.mkdir()
+    assert LineIndex.read(path, 1) is None
+    assert not LineIndex.indexes
+
+
+def test_line_index_read_grown(tmp_path, small, registry):
+    """Test the index of a file that only grows is extended, and rebuilt
+    once it is rewritten or truncated.
+    """
+    path = tmp_path / "file"
+    path.write_bytes(DATA[:50])
+    assert LineIndex.read(path, 1)[:2] == (DATA[:50], "built")
+    info = path.stat()
+    index = LineIndex.indexes[(info.st_dev, info.st_ino)]
+    with path.open("ab") as f:
+        f.write(DATA[50:])
+    read, refresh, _, lines = LineIndex.read(path, 30, 35)
+    assert read == expected_lines(DATA, 30, 35)
+    assert refresh == "extended"
+    assert lines == 40
+    assert (
+        list(index.counts)
+        == [DATA[:offset].count(b"\n")
+            for offset
+            in range(0, len(DATA) + 1, 8)])
+    rewritten = DATA.replace(b"line", b"LINE\n")
+    path.write_bytes(rewritten)
+    read, refresh, _, lines = LineIndex.read(path, 30, 35)
+    assert read == expected_lines(rewritten, 30, 35)
+    assert refresh == "built"
+    assert lines == 80
+    path.write_bytes(DATA[:20])
+    read, refresh, _, lines = LineIndex.read(path, 1)
+    assert read == DATA[:20]
+    assert refresh == "built"
+
+
+def test_line_index_read_rewritten(tmp_path, small, registry):
+    """Test the index of a file rewritten in place, at the same size, is
+    rebuilt.
+    """
+    path = tmp_path / "file"
+    path.write_bytes(DATA)
+    assert LineIndex.read(path, 1)[:2] == (DATA, "built")
+    info = path.stat()
+    # join the first two lines, in the first block
+    rewritten = DATA.replace(b"\n", b" ", 1)
+    assert len(rewritten) == len(DATA)
+    path.write_bytes(rewritten)
+    os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 1))
+    read, refresh, _, lines = LineIndex.read(path, 30, 35)
+    assert read == expected_lines(rewritten, 30, 35)
+    assert read != expected_lines(DATA, 30, 35)
+    assert refresh == "built"
+    assert lines == 39
+
+
+def test_line_index_read_head_rewritten(tmp_path, small, registry):
+    """Test the index of a file rewritten to grow, with its first block
+    changed but not its last, is rebuilt.
+    """
+    path = tmp_path / "file"
+    path.write_bytes(DATA)
+    assert LineIndex.read(path, 1)[:2] == (DATA, "built")
+    # join the first two lines, in the first block, and append a line
+    rewritten = DATA.replace(b"\n", b" ", 1) + b"more\n"
+    path.write_bytes(rewritten)
+    read, refresh, _, lines = LineIndex.read(path, 30, 35)
+    assert read == expected_lines(rewritten, 30, 35)
+    assert refresh == "built"
+    assert lines == 40
+
+
+@pytest.mark.parametrize(
+    "counts, size, last, head, expected",
+    [([0], 8, b"", b"", True),
+     ([0], 7, b"", b"", False),
+     ([0, 1], 7, b"", b"", False),
+     ([0, 1], 16, b"abc", b"", False),
+     ([0, 1], 16, b"abc\nefgi", b"", False),
+     ([0, 1], 16, b"abc\nefgh", b"", True),
+     ([0, 1, 2], 16, b"abc\nefgh", b"ijk\nlmno", True),
+     ([0, 1, 2], 16, b"abc\nefgh", b"ijk\nlmnp", False),
+     ([0, 1, 2], 16, b"abc\nefgi", b"ijk\nlmno", False)])
+def test_line_index_appended(
+        small, patches, counts, size, last, head, expected):
+    """Test a file is taken to be appended to if it has not shrunk, and
+    its first and last whole blocks counted are unchanged.
+    """
+    index = LineIndex()
+    index.counts = array.array("Q", counts)
+    index.scanned = 8
+    index.checksum = zlib.crc32(b"abc\nefgh")
+    index.head_checksum = zlib.crc32(b"ijk\nlmno")
+    info = MagicMock()
+    info.st_size = size
+    position = (len(counts) - 2) * 8
+    patched = patches(
+        "os.pread",
+        prefix="synca.mcp.fs_extra.util.lines")
+
+    with patched as (m_pread, ):
+        m_pread.side_effect = (
+            lambda fd, size, offset: last if offset == position else head)
+        assert index.appended("FD", info) is expected
+
+    if size < 8 or len(counts) < 2:
+        assert not m_pread.called
+        return
+    calls = [[("FD", 8, position), {}]]
+    if len(counts) > 2 and zlib.crc32(last) == index.checksum:
+        calls.append([("FD", 8, 0), {}])
+    assert m_pread.call_args_list == calls
+
+
+@pytest.mark.parametrize(
+    "indexed, size, mtime, appended, expected",
+    [(True, 23, 7, True, "cached"),
+     (True, 24, 7, True, "extended"),
+     (True, 24, 8, True, "extended"),
+     (True, 23, 8, True, "built"),
+     (True, 22, 8, True, "built"),
+     (True, 24, 7, False, "built"),
+     (False, 23, 7, True, "built")])
+def test_line_index_refresh(
+        patches, indexed, size, mtime, appended, expected):
+    """Test the index is kept, extended if the file grew, or else
+    rebuilt.
+    """
+    index = LineIndex()
+    if indexed:
+        index.size, index.mtime = 23, 7
+    counts = index.counts = array.array("Q", [0, 5])
+    info = MagicMock()
+    info.st_size = size
+    info.st_mtime_ns = mtime
+    patched = patches(
+        "LineIndex.appended",
+        "LineIndex.scan",
+        prefix="synca.mcp.fs_extra.util.lines")
+
+    with patched as (m_appended, m_scan):
+        m_appended.return_value = appended
+        assert index.refresh("FD", info) == expected
+
+    if expected == "cached":
+        assert not m_appended.called
+        assert not m_scan.called
+        assert index.counts is counts
+        return
+    assert (
+        m_scan.call_args
+        == [("FD", size), {}])
+    assert (index.size, index.mtime) == (size, mtime)
+    assert (
+        index.counts
+        == (counts
+            if expected == "extended"
+            else array.array("Q", [0])))
+    if not indexed or size <= 23:
+        assert not m_appended.called
+        return
+    assert (
+        m_appended.call_args
+        == [("FD", info), {}])
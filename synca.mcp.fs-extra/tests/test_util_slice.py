@@ -0,0 +1,123 @@
+"""Isolated tests for synca.mcp.fs_extra.util.slice."""
+
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from synca.mcp.fs_extra.util import FileSlice
+
+CONTENTS = (
+    b"",
+    b"\n",
+    b"\n\n\n",
+    b"a",
+    b"a\n",
+    b"a\nb\nc",
+    b"".join(b"x" * (i % 7) + b"\n" for i in range(40)),
+    b"".join(b"y" * (i % 11) + b"\n" for i in range(30)) + b"end")
+COUNTS = (0, 1, 2, 3, 10, 29, 30, 31, 40, 1000)
+
+
+def lines(content, count, end):
+    """The first or last lines of the content."""
+    split = content.splitlines(keepends=True)
+    if not count:
+        return b""
+    return b"".join(
+        split[:count]
+        if end == "head"
+        else split[-count:])
+
+
+def test_file_slice_constructor():
+    """Test FileSlice class initialization."""
+    path = MagicMock()
+    file = FileSlice(path)
+    assert file.path == path
+    assert file.block_size == 64 * 1024
+
+
+@pytest.mark.parametrize("end", ["head", "tail"])
+@pytest.mark.parametrize("unit", ["lines", "bytes", None])
+def test_file_slice_ends(patches, end, unit):
+    """Test head and tail read the file with the reader for the unit."""
+    file = FileSlice(MagicMock())
+    patched = patches(
+        "FileSlice.read",
+        f"FileSlice.{end}_lines",
+        f"FileSlice.{end}_bytes",
+        prefix="synca.mcp.fs_extra.util.slice")
+    kwargs = dict(unit=unit) if unit else {}
+
+    with patched as (m_read, m_lines, m_bytes):
+        assert (
+            getattr(file, end)(23, **kwargs)
+            == m_read.return_value)
+
+    assert (
+        m_read.call_args
+        == [(m_bytes if unit == "bytes" else m_lines, 23), {}])
+
+
+@pytest.mark.parametrize("content", CONTENTS)
+@pytest.mark.parametrize("count", COUNTS)
+@pytest.mark.parametrize("end", ["head", "tail"])
+@pytest.mark.parametrize("unit", ["lines", "bytes"])
+def test_file_slice_read_ends(tmp_path, content, count, end, unit):
+    """Test the first or last lines or bytes of a file are read, across
+    blocks.
+    """
+    path = tmp_path / "file"
+    path.write_bytes(content)
+    file = FileSlice(path)
+    file.block_size = 4
+    expected = (
+        lines(content, count, end)
+        if unit == "lines"
+        else (content[:count]
+              if end == "head"
+              else content[len(content) - min(count, len(content)):]))
+    assert getattr(file, end)(count, unit) == expected
+
+
+@pytest.mark.parametrize("kind", ["missing", "dir", "fifo", "file"])
+def test_file_slice_read(tmp_path, kind):
+    """Test read only reads regular files."""
+    path = tmp_path / "path"
+    if kind == "dir":
+        path.mkdir()
+    elif kind == "fifo":
+        os.mkfifo(path)
+    elif kind == "file":
+        path.write_bytes(b"CONTENT")
+    reader = MagicMock()
+    result = FileSlice(path).read(reader, 23)
+    if kind != "file":
+        assert result is None
+        assert not reader.called
+        return
+    assert result == reader.return_value
+    fd, count = reader.call_args[0]
+    assert count == 23
+    with pytest.raises(OSError):
+        os.fstat(fd)
+
+
+@pytest.mark.parametrize("count", [None, 0, 3, 100])
+def test_file_slice_read_to(tmp_path, count):
+    """Test read_to reads from the file offset."""
+    path = tmp_path / "file"
+    path.write_bytes(b"0123456789" * 3)
+    file = FileSlice(path)
+    file.block_size = 4
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.lseek(fd, 5, os.SEEK_SET)
+        assert (
+            file.read_to(fd, count)
+            == (b"56789" + b"0123456789" * 2
+                if count in (None, 100)
+                else b"56789"[:count]))
+    finally:
+        os.close(fd)
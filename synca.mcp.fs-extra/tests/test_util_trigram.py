@@ -0,0 +1,558 @@
+"""Isolated tests for synca.mcp.fs_extra.util.trigram."""
+
+import array
+import collections
+import marshal
+import os
+import pathlib
+import threading
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from synca.mcp.common.util.watch import Root
+from synca.mcp.fs_extra.util import GitIgnore, TrigramIndex
+from synca.mcp.fs_extra.util.trigram import VERSION, trigrams
+
+
+def tree(path):
+    """Create a tree of files to index."""
+    for name, content in (
+            ("a.txt", b"foo bar\n"),
+            ("src/b.txt", b"Foo\n"),
+            ("src/sub/c.txt", b"baz\n"),
+            ("src/e.log", b"foo\n"),
+            ("src/venv/d.txt", b"foo\n"),
+            ("build/d.txt", b"foo\n"),
+            ("build/venv/d.txt", b"foo\n"),
+            (".git/HEAD", b"foo\n"),
+            (".gitignore", b"build/\n*.log\n")):
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_bytes(content)
+    (path / "src/link.txt").symlink_to(path / "a.txt")
+
+
+def contents(index):
+    """The files of an index with the trigrams of each."""
+    return {
+        path: sorted(
+            key
+            for key, ids
+            in index.postings.items()
+            if id_ in ids)
+        for path, (id_, _, _)
+        in index.files.items()}
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [(b"", set()),
+     (b"ab", set()),
+     (b"abc", {b"abc"}),
+     (b"aBcD", {b"abc", b"bcd"}),
+     (b"a\nbcb\nbc", {b"a\nb", b"\nbc", b"bcb", b"cb\n", b"b\nb"})])
+def test_trigrams(data, expected):
+    """Test the distinct trigrams of data are found, case folded."""
+    assert trigrams(data) == expected
+
+
+@pytest.mark.parametrize("directory", [None, "", "DIRECTORY"])
+@pytest.mark.parametrize("env", [None, "ENV"])
+def test_trigram_index_constructor(patches, monkeypatch, directory, env):
+    """Test TrigramIndex class initialization."""
+    if env is None:
+        monkeypatch.delenv("SYNCA_MCP_INDEX_DIR", raising=False)
+    else:
+        monkeypatch.setenv("SYNCA_MCP_INDEX_DIR", env)
+    patched = patches(
+        ("TrigramIndex.default_directory",
+         dict(new_callable=PropertyMock)),
+        prefix="synca.mcp.fs_extra.util.trigram")
+
+    with patched as (m_default, ):
+        m_default.return_value = "DEFAULT"
+        index = TrigramIndex("PATH", directory)
+
+    assert index.path == "PATH"
+    assert (
+        index.directory
+        == (directory
+            if directory is not None
+            else env or "DEFAULT"))
+    assert isinstance(index.lock, type(threading.Lock()))
+    assert index.files == {}
+    assert index.paths == []
+    assert index.postings == {}
+    assert index.unindexed == set()
+    assert index.excluded == set()
+    assert index.stale == 0
+    assert index.loaded is False
+    assert index.unsaved is False
+    assert index.saved is None
+    assert index.root is None
+    assert index.generation == 0
+    assert TrigramIndex.max_indexes == 4
+    assert TrigramIndex.max_size == 1024 * 1024
+    assert TrigramIndex.save_interval == 60.0
+
+
+@pytest.mark.parametrize("cache", [None, "", "/CACHE"])
+def test_trigram_index_default_directory(patches, monkeypatch, cache):
+    """Test indexes are saved in the user's cache dir by default."""
+    if cache is None:
+        monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    else:
+        monkeypatch.setenv("XDG_CACHE_HOME", cache)
+    index = TrigramIndex(pathlib.Path("PATH"), "")
+    patched = patches(
+        "pathlib.Path.home",
+        prefix="synca.mcp.fs_extra.util.trigram")
+
+    with patched as (m_home, ):
+        m_home.return_value = pathlib.Path("/HOME")
+        assert (
+            index.default_directory
+            == (pathlib.Path(cache or "/HOME/.cache")
+                / "synca-mcp"
+                / "index"))
+
+
+@pytest.mark.parametrize("directory", ["", "/DIRECTORY"])
+def test_trigram_index_file(directory):
+    """Test indexes are saved in a file named by a digest of their path,
+    unless they are not saved.
+    """
+    index = TrigramIndex(pathlib.Path("/PATH"), directory)
+    other = TrigramIndex(pathlib.Path("/OTHER"), directory)
+    if not directory:
+        assert index.file is None
+        return
+    assert index.file.parent == pathlib.Path(directory)
+    assert index.file.suffix == ".trigrams"
+    assert len(index.file.stem) == 32
+    assert other.file != index.file
+
+
+def test_trigram_index_for_dir(monkeypatch, tmp_path):
+    """Test the most recently used indexes are kept by real path."""
+    monkeypatch.setattr(TrigramIndex, "indexes", collections.OrderedDict())
+    paths = []
+    for name in "abcde":
+        (tmp_path / name).mkdir()
+        paths.append(tmp_path / name)
+    (tmp_path / "link").symlink_to(paths[0])
+    first = TrigramIndex.for_dir(paths[0])
+    assert first.path == paths[0]
+    assert TrigramIndex.for_dir(tmp_path / "link") is first
+    for path in paths[1:4]:
+        TrigramIndex.for_dir(path)
+    assert TrigramIndex.for_dir(paths[0]) is first
+    TrigramIndex.for_dir(paths[4])
+    assert (
+        list(TrigramIndex.indexes)
+        == [str(path) for path in (*paths[2:4], paths[0], paths[4])])
+
+
+@pytest.mark.parametrize(
+    "content, size, expected",
+    [(b"abcd", 4, [b"abc", b"bcd"]),
+     (b"abcd", 10, None),
+     (b"abcdefghijk", 4, None)])
+def test_trigram_index_add(tmp_path, content, size, expected):
+    """Test files are indexed with a new id, unless they are larger than
+    `max_size`.
+    """
+    (tmp_path / "file").write_bytes(content)
+    index = TrigramIndex(tmp_path, "")
+    index.max_size = 8
+    index.add("file", 23, 4)
+    index.add("file", 23, size)
+    assert index.paths == [None, "file"]
+    assert index.files == {"file": (1, 23, size)}
+    assert index.stale == 1
+    assert index.unsaved is True
+    if expected is None:
+        assert index.unindexed == {1}
+        assert (
+            index.postings
+            == ({key: array.array("I", [0]) for key in (b"abc", b"bcd")}
+                if content == b"abcd"
+                else {}))
+        return
+    assert index.unindexed == set()
+    assert (
+        index.postings
+        == {key: array.array("I", [0, 1]) for key in expected})
+
+
+def test_trigram_index_add_missing(tmp_path):
+    """Test files that cannot be read are left unindexed."""
+    index = TrigramIndex(tmp_path, "")
+    index.add("missing", 23, 4)
+    assert index.unindexed == {0}
+    assert index.postings == {}
+
+
+@pytest.mark.parametrize(
+    "literals, prefix, expected",
+    [((), "", (4, ["a.txt", "src/b.txt", "src/sub/c.txt", "big"])),
+     ((), "src/", (2, ["src/b.txt", "src/sub/c.txt"])),
+     ((b"fo", ), "", (4, ["a.txt", "src/b.txt", "src/sub/c.txt", "big"])),
+     ((b"foo", ), "", (4, ["a.txt", "src/b.txt", "big"])),
+     ((b"foo", b"bar"), "", (4, ["a.txt", "big"])),
+     ((b"foo bar", ), "", (4, ["a.txt", "big"])),
+     ((b"zzz", b"foo"), "", (4, ["big"])),
+     ((b"foo", ), "src/", (2, ["src/b.txt"])),
+     ((b"foo", ), "nope/", (0, []))])
+def test_trigram_index_candidates(tmp_path, literals, prefix, expected):
+    """Test the files that may contain the literals are found, with the
+    large files and excluded dirs under the prefix.
+    """
+    tree(tmp_path)
+    index = TrigramIndex(tmp_path, "")
+    for path in ("a.txt", "src/e.log", "src/b.txt", "src/sub/c.txt"):
+        index.add(path, 0, 0)
+    index.add("big", 0, index.max_size + 1)
+    index.add("gone", 0, index.max_size + 1)
+    index.remove("src/e.log")
+    index.remove("gone")
+    index.excluded = {"src/venv", "venv"}
+    total, found, excluded = index.candidates(literals, prefix)
+    assert (total, sorted(found)) == (expected[0], sorted(expected[1]))
+    assert (
+        excluded
+        == ([]
+            if prefix == "nope/"
+            else ["src/venv"]
+            if prefix
+            else ["src/venv", "venv"]))
+
+
+@pytest.mark.parametrize("repo", [True, False])
+def test_trigram_index_scan(tmp_path, repo):
+    """Test the files under a dir are indexed as recursive searches walk
+    them, listing the excluded dirs and dropping the files that are gone.
+    """
+    tree(tmp_path)
+    if not repo:
+        os.rename(tmp_path / ".git", tmp_path / "git")
+    index = TrigramIndex(tmp_path, "")
+    index.add("gone.txt", 0, 0)
+    index.excluded = {"gone"}
+    index.unsaved = False
+    index.scan()
+    assert (
+        contents(index)
+        == {name: sorted(trigrams((tmp_path / name).read_bytes()))
+            for name
+            in (".gitignore", "a.txt", "src/b.txt", "src/sub/c.txt",
+                *(() if repo else ("git/HEAD", )))})
+    assert index.excluded == {"src/venv"}
+    assert index.unsaved is True
+    files = dict(index.files)
+    index.unsaved = False
+    index.scan()
+    assert index.files == files
+    assert index.unsaved is False
+
+
+def test_trigram_index_scan_subdir(tmp_path):
+    """Test scanning a subdir leaves the rest of the index."""
+    tree(tmp_path)
+    index = TrigramIndex(tmp_path, "")
+    index.scan()
+    files = dict(index.files)
+    (tmp_path / "src/sub/c.txt").unlink()
+    (tmp_path / "src/sub/venv").mkdir()
+    (tmp_path / "a.txt").unlink()
+    index.scan("src/sub", GitIgnore.for_dir(tmp_path / "src/sub"))
+    del files["src/sub/c.txt"]
+    assert index.files == files
+    assert index.excluded == {"src/venv", "src/sub/venv"}
+
+
+def test_trigram_index_scan_errors(patches, tmp_path):
+    """Test dirs and entries that cannot be read are skipped."""
+    index = TrigramIndex(tmp_path, "")
+    entry = MagicMock()
+    entry.name = "entry"
+    entry.is_dir.side_effect = OSError
+    patched = patches(
+        "os.scandir",
+        prefix="synca.mcp.fs_extra.util.trigram")
+
+    with patched as (m_scandir, ):
+        m_scandir.return_value.__enter__.return_value = [entry]
+        index.scan()
+        m_scandir.side_effect = OSError
+        index.scan()
+
+    assert index.files == {}
+
+
+@pytest.mark.parametrize(
+    "relative, change, expected",
+    [("a.txt", "write", "add"),
+     ("a.txt", "same", None),
+     ("a.txt", "delete", "remove"),
+     ("a.txt", "fifo", "remove"),
+     ("src/e.log", "write", "remove"),
+     ("build/d.txt", "write", "remove"),
+     ("src/venv/d.txt", "write", "remove"),
+     ("src/venv", "dir", "excluded"),
+     ("build", "dir", "remove"),
+     ("src/sub", "dir", "scan"),
+     ("nope/a.txt", "delete", "remove")])
+def test_trigram_index_check(tmp_path, relative, change, expected):
+    """Test a path that changed is indexed, dropped, or scanned."""
+    tree(tmp_path)
+    index = TrigramIndex(tmp_path, "")
+    index.scan()
+    index.add(relative, 0, 0)
+    index.add(f"{relative}/x", 0, 0)
+    index.excluded.add(f"{relative}/venv")
+    path = tmp_path / relative
+    if change == "write":
+        path.write_text("changed\n")
+    elif change == "same":
+        info = path.stat()
+        index.files[relative] = (
+            index.files[relative][0], info.st_mtime_ns, info.st_size)
+    elif change == "delete":
+        path.unlink(missing_ok=True)
+    elif change == "fifo":
+        path.unlink()
+        os.mkfifo(path)
+    files = dict(index.files)
+    ignores: dict[str, GitIgnore | None] = {}
+    index.check(relative, ignores)
+    if expected == "add":
+        assert index.files[relative] != files[relative]
+        assert contents(index)[relative] == [
+            b"ang", b"cha", b"ed\n", b"ged", b"han", b"nge"]
+    elif expected is None:
+        assert index.files == files
+    elif expected == "scan":
+        assert f"{relative}/x" not in index.files
+        assert f"{relative}/c.txt" in index.files
+        assert f"{relative}/venv" not in index.excluded
+    else:
+        assert relative not in index.files
+        assert f"{relative}/x" not in index.files
+        assert f"{relative}/venv" not in index.excluded
+        assert (relative in index.excluded) == (expected == "excluded")
+    assert "" in ignores
+
+
+def test_trigram_index_compact(tmp_path):
+    """Test stale ids are dropped from the postings."""
+    (tmp_path / "a").write_text("abcd")
+    (tmp_path / "b").write_text("abcx")
+    index = TrigramIndex(tmp_path, "")
+    index.add("a", 0, 0)
+    index.add("b", 0, 0)
+    index.add("a", 1, 0)
+    index.remove("b")
+    index.compact()
+    assert (
+        index.postings
+        == {b"abc": array.array("I", [2]),
+            b"bcd": array.array("I", [2])})
+    assert index.stale == 0
+
+
+def test_trigram_index_ignore(tmp_path):
+    """Test the ignore files of the dirs are read once, and dirs that are
+    not walked have none.
+    """
+    tree(tmp_path)
+    (tmp_path / "src/.gitignore").write_text("sub\n")
+    index = TrigramIndex(tmp_path, "")
+    ignores: dict[str, GitIgnore | None] = {}
+    ignore = index.ignore("src", ignores)
+    assert (
+        [base for base, _ in ignore.rules]
+        == [str(tmp_path / "src"), str(tmp_path)])
+    assert index.ignore("src", ignores) is ignore
+    assert index.ignore("src/sub", ignores) is None
+    assert index.ignore("src/sub/deeper", ignores) is None
+    assert index.ignore("src/venv", ignores) is None
+    assert index.ignore("build", ignores) is None
+    assert (
+        sorted(ignores)
+        == ["", "build", "src", "src/sub", "src/sub/deeper", "src/venv"])
+
+
+def test_trigram_index_save_load(tmp_path):
+    """Test a saved index loads as it was saved."""
+    tree(tmp_path / "tree")
+    index = TrigramIndex(tmp_path / "tree", str(tmp_path / "index"))
+    index.scan()
+    index.add("big", 0, index.max_size + 1)
+    index.remove("a.txt")
+    index.save()
+    assert index.unsaved is False
+    assert isinstance(index.saved, float)
+    assert list((tmp_path / "index").iterdir()) == [index.file]
+    loaded = TrigramIndex(tmp_path / "tree", str(tmp_path / "index"))
+    assert loaded.load() is True
+    assert loaded.loaded is True
+    assert isinstance(loaded.saved, float)
+    assert loaded.files == index.files
+    assert loaded.paths == index.paths
+    assert loaded.postings == index.postings
+    assert loaded.unindexed == index.unindexed == {len(index.paths) - 1}
+    assert loaded.excluded == index.excluded == {"src/venv"}
+
+
+@pytest.mark.parametrize(
+    "saved",
+    [None,
+     b"",
+     b"garbage",
+     dict(version=VERSION + 1),
+     dict(path="/other"),
+     dict(files=None),
+     dict(ids=0)])
+def test_trigram_index_load_fail(tmp_path, saved):
+    """Test indexes that are missing, bad, or of another version or dir
+    are not loaded.
+    """
+    index = TrigramIndex(tmp_path, str(tmp_path))
+    if isinstance(saved, bytes):
+        index.file.write_bytes(saved)
+    elif saved is not None:
+        (tmp_path / "a.txt").write_text("abc")
+        index.add("a.txt", 0, 0)
+        index.save()
+        data = marshal.loads(index.file.read_bytes())
+        index.file.write_bytes(marshal.dumps(data | saved))
+    index = TrigramIndex(tmp_path, str(tmp_path))
+    assert index.load() is False
+    assert index.loaded is True
+    assert index.files == {}
+    assert index.saved is None
+
+
+def test_trigram_index_load_unsaved(tmp_path):
+    """Test indexes that are not saved are not loaded."""
+    index = TrigramIndex(tmp_path, "")
+    assert index.load() is False
+    assert index.loaded is True
+
+
+def test_trigram_index_save_unsaved(tmp_path):
+    """Test indexes that are not saved are left unsaved."""
+    index = TrigramIndex(tmp_path, "")
+    index.unsaved = True
+    index.save()
+    assert index.unsaved is True
+    assert index.saved is None
+
+
+def test_trigram_index_save_error(tmp_path):
+    """Test failing to save an index is not an error."""
+    (tmp_path / "index").write_text("not a dir")
+    index = TrigramIndex(tmp_path, str(tmp_path / "index"))
+    index.unsaved = True
+    index.save()
+    assert index.unsaved is False
+    assert (tmp_path / "index").read_text() == "not a dir"
+
+
+@pytest.mark.parametrize(
+    "same, exact, swept, forgotten, expected",
+    [(True, True, False, 0, True),
+     (True, True, False, 3, True),
+     (True, True, False, 4, False),
+     (True, False, False, 0, False),
+     (True, False, True, 0, True),
+     (False, True, False, 0, False)])
+def test_trigram_index_incremental(
+        same, exact, swept, forgotten, expected):
+    """Test only current changes to the same tree, none of which were
+    forgotten since the last refresh, are used to refresh it.
+    """
+    index = TrigramIndex(pathlib.Path("PATH"), "")
+    root = Root(pathlib.Path("PATH"), exact)
+    root.swept = swept
+    root.forgotten = forgotten
+    index.root = root if same else Root(pathlib.Path("PATH"), exact)
+    index.generation = 3
+    assert index.incremental(root) is expected
+
+
+@pytest.mark.parametrize(
+    "dirty, expected",
+    [({"src/b.txt": 1}, True),
+     ({"src/b.txt": 3, "a.txt": 4, "../x": 5, "..": 6}, True),
+     ({"src/.gitignore": 4}, False),
+     ({"": 4}, False)])
+def test_trigram_index_update(patches, tmp_path, dirty, expected):
+    """Test the paths changed since the last refresh are checked, unless
+    the tree has to be scanned.
+    """
+    root = Root(tmp_path, True)
+    root.dirty = {
+        os.path.normpath(tmp_path / path): generation
+        for path, generation
+        in dirty.items()}
+    index = TrigramIndex(tmp_path, "")
+    index.generation = 3
+    patched = patches(
+        "TrigramIndex.check",
+        prefix="synca.mcp.fs_extra.util.trigram")
+
+    with patched as (m_check, ):
+        assert index.update(root) is expected
+
+    assert (
+        m_check.call_args_list
+        == ([[("a.txt", {}), {}]]
+            if "a.txt" in dirty
+            else []))
+
+
+@pytest.mark.parametrize("saved", [True, False])
+@pytest.mark.parametrize("watched", [True, False])
+def test_trigram_index_refresh(tmp_path, saved, watched):
+    """Test indexes are built, loaded, and updated with the changes to the
+    tree, and saved when they change.
+    """
+    tree(tmp_path / "tree")
+    path = tmp_path / "tree"
+    directory = str(tmp_path / "index")
+    if saved:
+        built = TrigramIndex(path, directory)
+        built.refresh()
+    root = Root(path, True) if watched else None
+    index = TrigramIndex(path, directory)
+    refreshed = index.refresh(root)
+    assert refreshed[0] is not saved
+    assert refreshed[2] == (0 if saved else 4)
+    assert index.root is root
+    assert index.unsaved is False
+    assert index.file.exists()
+    (path / "a.txt").write_text("changed\n")
+    (path / "new.txt").write_text("new\n")
+    if root:
+        root.change(str(path / "a.txt"))
+        root.change(str(path / "new.txt"))
+    index.save_interval = 0.0 if saved else 60.0
+    refreshed = index.refresh(root)
+    assert refreshed[0] is False
+    assert refreshed[2] == 2
+    assert index.generation == (2 if root else 0)
+    assert index.unsaved is not saved
+    assert contents(index)["new.txt"] == [b"ew\n", b"new"]
+    assert index.stale == 1
+    for i in range(5):
+        (path / "a.txt").write_text(f"changed {i}\n")
+        os.utime(path / "a.txt", ns=(i, i))
+        if root:
+            root.change(str(path / "a.txt"))
+        index.refresh(root)
+    assert index.stale == 0
+    assert (
+        contents(index)["a.txt"]
+        == sorted(trigrams(b"changed 4\n")))
@@ -1,7 +1,9 @@
 from mcp.server.fastmcp import FastMCP
 
+from synca.mcp.common.server import register
 
-mcp = FastMCP(name="GitHub extra")
+
+mcp = register(FastMCP(name="GitHub extra"))
 
 DEBUGGING_WORKFLOW = """
 DEBUGGING WORKFLOW:
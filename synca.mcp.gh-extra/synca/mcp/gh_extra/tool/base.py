@@ -3,15 +3,13 @@
 import os
 import pathlib
 from functools import cached_property
-from typing import Any
+from typing import Any, ClassVar
 
-import aiohttp
-from gidgethub import GitHubException
 from mcp.server.fastmcp import Context
 
 from synca.mcp.common.tool import HTTPTool
 from synca.mcp.common.types import APIRequestDict, OutputTuple, ResponseTuple
-from synca.mcp.common.util import ArgParser, JQFilter
+from synca.mcp.common.util import ArgParser
 from synca.mcp.gh_extra import errors, util
 
 
@@ -20,6 +18,7 @@ class GitHubTool(HTTPTool[APIRequestDict]):
     _api_method: str | None = None
     endpoint_tpl = ""
     iterable_key: str | None = None
+    _arg_parsers: ClassVar[dict[type, ArgParser]] = {}
 
     def __init__(self, ctx: Context, args: dict) -> None:
         """Initialize with context and arguments."""
@@ -35,8 +34,10 @@ class GitHubTool(HTTPTool[APIRequestDict]):
 
     @property
     def arg_parser(self) -> ArgParser:
-        """Create an argument parser for this tool."""
-        parser = ArgParser()
+        """Argument parser for this tool class, created on first use."""
+        if parser := self._arg_parsers.get(self.__class__):
+            return parser
+        parser = self._arg_parsers[self.__class__] = ArgParser()
         self.add_arguments(parser)
         return parser
 
@@ -45,6 +46,13 @@ class GitHubTool(HTTPTool[APIRequestDict]):
         """Parse and validate arguments."""
         return self.arg_parser.parse_dict(self._args)
 
+    @property
+    def api_url(self) -> str:
+        """GitHub API URL, which can be set with `GITHUB_API_URL` eg for
+        GitHub Enterprise.
+        """
+        return os.environ.get("GITHUB_API_URL", util.API_URL)
+
     @property
     def endpoint(self) -> str:
         """GitHub API endpoint to call."""
@@ -55,7 +63,8 @@ class GitHubTool(HTTPTool[APIRequestDict]):
         """Parse and validate arguments."""
         return util.GitHubAPI(
             self.gh_token,
-            write_path=self.write_path)
+            write_path=self.write_path,
+            api_url=self.api_url)
 
     @property
     def gh_token(self) -> str:
@@ -75,6 +84,7 @@ class GitHubTool(HTTPTool[APIRequestDict]):
             iterable_key=self.iterable_key,
             pages=self.args.get("pages", 1),
             endpoint=self.endpoint,
+            jq=self.args.get("jq"),
             params=self.args)
 
     @property
@@ -86,18 +96,24 @@ class GitHubTool(HTTPTool[APIRequestDict]):
             stdout: str,
             stderr: str,
             returncode: int) -> OutputTuple:
-        """Parse and filter the GitHub API response for workflow runs.
+        """Parse the GitHub API response.
+
+        Any jq filter has already been applied to the parsed response by
+        the API request.
         """
         return (
             returncode,
             stderr,
-            JQFilter.apply(stdout, self.args.get("jq")),
+            stdout,
             {})
 
     async def request(
             self,
             request: APIRequestDict) -> ResponseTuple:
         """Execute a GitHub API request."""
+        import aiohttp
+        from gidgethub import GitHubException
+
         try:
             async with self.gh_api as api:
                 return await self._handle_request(api, request)
@@ -122,12 +138,14 @@ class GitHubTool(HTTPTool[APIRequestDict]):
             case "getitem":
                 return await api.getitem(
                     request["endpoint"],
-                    request["params"])
+                    request["params"],
+                    jq_filter=request.get("jq"))
             case "getitems":
                 return await api.getitems(
                     request["endpoint"],
                     request["params"],
-                    iterable_key=request.get("iterable_key"))
+                    iterable_key=request.get("iterable_key"),
+                    jq_filter=request.get("jq"))
         raise errors.GitHubRequestError(
             f"Unsupported HTTP method: {request['method']}",
             status_code=400)
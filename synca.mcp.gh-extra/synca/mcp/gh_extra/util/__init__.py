@@ -1,6 +1,7 @@
 """Utility modules for GitHub Extra MCP."""
 
-from synca.mcp.gh_extra.util.gh import GitHubAPI  # noqa: F401
+from synca.mcp.gh_extra.util.gh import API_URL, GitHubAPI  # noqa: F401
 
 __all__ = (
+    "API_URL",
     "GitHubAPI")
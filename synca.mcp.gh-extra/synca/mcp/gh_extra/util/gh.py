@@ -3,29 +3,35 @@
 import io
 import json
 import pathlib
-import zipfile
 from functools import cached_property
-from typing import cast
-
-import aiohttp
-from gidgethub.aiohttp import GitHubAPI as _GitHubAPI
-from uritemplate import variable
+from typing import TYPE_CHECKING, cast
 
 from synca.mcp.common.types import FileInfoDict, ResponseTuple
-from synca.mcp.common.util import FileInfo
+from synca.mcp.common.util import FileInfo, JQFilter
 from synca.mcp.gh_extra import errors
 
+# The HTTP client libraries are slow to import, so are only imported at
+# runtime once a request is made.
+if TYPE_CHECKING:
+    import aiohttp
+    from gidgethub.aiohttp import GitHubAPI as _GitHubAPI
+    from uritemplate import variable
+
+API_URL = "https://api.github.com"
+
 
 class GitHubDownloader:
 
     def __init__(
             self,
             write_path: pathlib.Path,
-            session: aiohttp.ClientSession,
-            token: str) -> None:
+            session: "aiohttp.ClientSession",
+            token: str,
+            api_url: str = API_URL) -> None:
         self.write_path = write_path
         self.session = session
         self.token = token
+        self.api_url = api_url
 
     @property
     def api_headers(self) -> dict[str, str]:
@@ -45,7 +51,7 @@ class GitHubDownloader:
     async def download(
             self,
             endpoint: str,
-            params: aiohttp.typedefs.Query) -> ResponseTuple:
+            params: "aiohttp.typedefs.Query") -> ResponseTuple:
         run_id = endpoint.strip("/").split("/")[-2]
         target_dir = self.write_path / run_id
         if target_dir.exists():
@@ -54,7 +60,7 @@ class GitHubDownloader:
                 json.dumps(fileinfo),
                 f"Logs ({len(fileinfo)}) for {run_id} already downloaded",
                 304)
-        url = f"https://api.github.com{endpoint}"
+        url = f"{self.api_url}{endpoint}"
         download = self.session.get(
             url,
             headers=self.api_headers,
@@ -76,6 +82,8 @@ class GitHubDownloader:
             self,
             write_dir: pathlib.Path,
             zip_data: bytes) -> list[FileInfoDict]:
+        import zipfile
+
         with io.BytesIO(zip_data) as zip_buffer:
             with zipfile.ZipFile(zip_buffer) as zip_file:
                 all_files = zip_file.namelist()
@@ -135,9 +143,11 @@ class GitHubAPI:
     def __init__(
             self,
             token: str,
-            write_path: pathlib.Path | None = None) -> None:
+            write_path: pathlib.Path | None = None,
+            api_url: str = API_URL) -> None:
         self.token = token
         self.write_path = write_path
+        self.api_url = api_url
 
     async def __aenter__(self):
         return self
@@ -148,12 +158,15 @@ class GitHubAPI:
             del self.__dict__["session"]
 
     @cached_property
-    def api(self) -> _GitHubAPI:
+    def api(self) -> "_GitHubAPI":
         """Get authenticated GitHub API client."""
-        return _GitHubAPI(
+        from gidgethub.aiohttp import GitHubAPI
+
+        return GitHubAPI(
             self.session,
             "synca-mcp-gh-extra",
-            oauth_token=self.token)
+            oauth_token=self.token,
+            base_url=self.api_url)
 
     @cached_property
     def downloader(self) -> GitHubDownloader:
@@ -161,39 +174,52 @@ class GitHubAPI:
             raise errors.GitHubToolError(
                 f"`write_path` must be set on {self.__class__.__name__} "
                 "to use download")
-        return GitHubDownloader(write_path, self.session, self.token)
+        return GitHubDownloader(
+            write_path,
+            self.session,
+            self.token,
+            self.api_url)
 
     @cached_property
-    def session(self) -> aiohttp.ClientSession:
+    def session(self) -> "aiohttp.ClientSession":
         """Get authenticated GitHub API client."""
+        import aiohttp
+
         return aiohttp.ClientSession()
 
     async def download(
             self,
             endpoint: str,
-            params: variable.VariableValueDict) -> ResponseTuple:
+            params: "variable.VariableValueDict") -> ResponseTuple:
         """Handle download requests."""
         return await self.downloader.download(
             endpoint,
-            cast(aiohttp.typedefs.Query, params))
+            cast("aiohttp.typedefs.Query", params))
 
     async def getitem(
             self,
             endpoint: str,
-            params: variable.VariableValueDict) -> ResponseTuple:
-        """Handle GET requests."""
+            params: "variable.VariableValueDict",
+            jq_filter: str | None = None) -> ResponseTuple:
+        """Handle GET requests, applying the jq filter (if any) to the
+        parsed response.
+        """
         return (
-            json.dumps(await self.api.getitem(endpoint, url_vars=params)),
+            JQFilter.apply_data(
+                await self.api.getitem(endpoint, url_vars=params),
+                jq_filter),
             "Successfully retrieved item",
             200)
 
     async def getitems(
             self,
             endpoint: str,
-            params: variable.VariableValueDict,
+            params: "variable.VariableValueDict",
             pages: int | None = 1,
-            iterable_key: str | None = "items") -> ResponseTuple:
-        """Handle iterating GET requests.
+            iterable_key: str | None = "items",
+            jq_filter: str | None = None) -> ResponseTuple:
+        """Handle iterating GET requests, applying the jq filter (if any)
+        to the collected items.
         """
         # TODO: add total available (ie pagination)
         results = []
@@ -210,6 +236,6 @@ class GitHubAPI:
             if i >= result_count:
                 break
         return (
-            json.dumps({iterable_key: results}),
+            JQFilter.apply_data({iterable_key: results}, jq_filter),
             f"Successfully retrieved {i} items",
             200)
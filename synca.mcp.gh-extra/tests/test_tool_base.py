@@ -2,7 +2,9 @@
 
 from unittest.mock import MagicMock, PropertyMock, AsyncMock
 
+import aiohttp
 import pytest
+from gidgethub import GitHubException
 
 from synca.mcp.gh_extra.tool import base
 
@@ -17,6 +19,7 @@ def test_github_tool_constructor():
     assert tool.endpoint_tpl == ""
     assert tool.iterable_key is None
     assert tool._api_method is None
+    assert tool._arg_parsers is base.GitHubTool._arg_parsers
     assert tool.write_path is None
     assert "write_path" not in tool.__dict__
 
@@ -43,11 +46,17 @@ def test_github_tool_api_method(api_method):
         == f"_api_method must be set for: {tool.__class__.__name__}")
 
 
-def test_github_tool_arg_parser(patches):
+@pytest.mark.parametrize("cached", [True, False])
+def test_github_tool_arg_parser(patches, cached):
     """Test the GitHubTool arg_parser property."""
     ctx = MagicMock()
     args = MagicMock()
     tool = base.GitHubTool(ctx, args)
+    parser = MagicMock()
+    tool._arg_parsers = (
+        {base.GitHubTool: parser}
+        if cached
+        else {})
     patched = patches(
         "ArgParser",
         "GitHubTool.add_arguments",
@@ -56,15 +65,32 @@ def test_github_tool_arg_parser(patches):
     with patched as (m_parser, m_add_arguments):
         assert (
             tool.arg_parser
-            == m_parser.return_value)
+            == (parser
+                if cached
+                else m_parser.return_value))
 
+    assert "arg_parser" not in tool.__dict__
+    if cached:
+        assert not m_parser.called
+        assert not m_add_arguments.called
+        return
+    assert (
+        tool._arg_parsers
+        == {base.GitHubTool: m_parser.return_value})
     assert (
         m_parser.call_args
         == [(), {}])
     assert (
         m_add_arguments.call_args
         == [(m_parser.return_value,), {}])
-    assert "arg_parser" not in tool.__dict__
+
+
+def test_github_tool_arg_parser_per_class():
+    """Test the GitHubTool arg_parser is shared by instances of a class."""
+    parser = base.GitHubTool(MagicMock(), {}).arg_parser
+    assert base.GitHubTool(MagicMock(), {}).arg_parser is parser
+    assert base.GitHubTool._arg_parsers[base.GitHubTool] is parser
+    assert list(parser.arguments) == ["jq"]
 
 
 def test_github_tool_args(patches):
@@ -128,6 +154,25 @@ def test_github_tool_endpoint(patches, iters):
     assert "endpoint" not in tool.__dict__
 
 
+@pytest.mark.parametrize(
+    "env",
+    [{}, dict(GITHUB_API_URL="http://localhost:8000")])
+def test_github_tool_api_url(patches, env):
+    """Test the GitHubTool api_url property."""
+    tool = base.GitHubTool(MagicMock(), MagicMock())
+    patched = patches(
+        "os",
+        prefix="synca.mcp.gh_extra.tool.base")
+
+    with patched as (m_os,):
+        m_os.environ = env
+        assert (
+            tool.api_url
+            == env.get("GITHUB_API_URL", "https://api.github.com"))
+
+    assert "api_url" not in tool.__dict__
+
+
 def test_github_tool_gh_api(patches):
     """Test the GitHubTool gh_api cached property."""
     ctx = MagicMock()
@@ -139,9 +184,11 @@ def test_github_tool_gh_api(patches):
          dict(new_callable=PropertyMock)),
         ("GitHubTool.write_path",
          dict(new_callable=PropertyMock)),
+        ("GitHubTool.api_url",
+         dict(new_callable=PropertyMock)),
         prefix="synca.mcp.gh_extra.tool.base")
 
-    with patched as (m_api, m_token, m_write):
+    with patched as (m_api, m_token, m_write, m_url):
         assert (
             tool.gh_api
             == m_api.return_value)
@@ -149,7 +196,9 @@ def test_github_tool_gh_api(patches):
     assert (
         m_api.call_args
         == [(m_token.return_value,),
-            dict(write_path=m_write.return_value)])
+            dict(
+                write_path=m_write.return_value,
+                api_url=m_url.return_value)])
     assert "gh_api" in tool.__dict__
 
 
@@ -207,15 +256,17 @@ def test_github_tool_request_data(patches):
                 iterable_key=tool.iterable_key,
                 pages=m_args.return_value.get.return_value,
                 endpoint=m_endpoint.return_value,
+                jq=m_args.return_value.get.return_value,
                 params=m_args.return_value))
 
     assert (
-        m_args.return_value.get.call_args
-        == [("pages", 1), {}])
+        m_args.return_value.get.call_args_list
+        == [[("pages", 1), {}],
+            [("jq",), {}]])
     assert "request_data" not in tool.__dict__
 
 
-def test_github_tool_parse_output(patches):
+def test_github_tool_parse_output():
     """Test the GitHubTool parse_output method."""
     ctx = MagicMock()
     args = MagicMock()
@@ -223,27 +274,12 @@ def test_github_tool_parse_output(patches):
     stdout = MagicMock()
     stderr = MagicMock()
     returncode = MagicMock()
-    patched = patches(
-        ("JQFilter.apply",
-         dict(new_callable=MagicMock)),
-        ("GitHubTool.args",
-         dict(new_callable=PropertyMock)),
-        prefix="synca.mcp.gh_extra.tool.base")
-
-    with patched as (m_apply, m_args):
-        assert (
-            tool.parse_output(stdout, stderr, returncode)
-            == (returncode,
-                stderr,
-                m_apply.return_value,
-                {}))
-
-    assert (
-        m_apply.call_args
-        == [(stdout, m_args.return_value.get.return_value), {}])
     assert (
-        m_args.return_value.get.call_args
-        == [("jq",), {}])
+        tool.parse_output(stdout, stderr, returncode)
+        == (returncode,
+            stderr,
+            stdout,
+            {}))
 
 
 @pytest.mark.asyncio
@@ -251,8 +287,8 @@ def test_github_tool_parse_output(patches):
     "error",
     [None,
      BaseException,
-     base.GitHubException,
-     base.aiohttp.ClientError])
+     GitHubException,
+     aiohttp.ClientError])
 async def test_github_tool_request(patches, error):
     """Test the GitHubTool request method."""
     ctx = MagicMock()
@@ -268,7 +304,7 @@ async def test_github_tool_request(patches, error):
     with patched as (m_handle_request, m_api):
         if error:
             err = error("test error")
-            if error == base.GitHubException:
+            if error == GitHubException:
                 err.status_code = 500
                 err.data = "response_data"
                 m_handle_request.side_effect = err
@@ -276,7 +312,7 @@ async def test_github_tool_request(patches, error):
                 m_api.return_value.__aenter__.side_effect = err
             expected_error = (
                 base.errors.GitHubRequestError
-                if error in [base.GitHubException, base.aiohttp.ClientError]
+                if error in [GitHubException, aiohttp.ClientError]
                 else error)
             with pytest.raises(expected_error) as e:
                 await tool.request(request)
@@ -292,11 +328,11 @@ async def test_github_tool_request(patches, error):
         assert (
             m_handle_request.call_args
             == [(m_api.return_value.__aenter__.return_value, request), {}])
-    elif error == base.GitHubException:
+    elif error == GitHubException:
         assert e.value.status_code == 500
         assert e.value.response_data == "response_data"
         assert f"GitHub API error: {err}" in str(e)
-    elif error == base.aiohttp.ClientError:
+    elif error == aiohttp.ClientError:
         assert f"HTTP client error: {err}" in str(e)
 
 
@@ -343,7 +379,20 @@ async def test_github_tool_handle_request(patches, method):
         request.__getitem__.call_args_list
         == [(("method",), {}), (("endpoint",), {}), (("params",), {})])
     if method == "getitems":
-        assert "iterable_key" in getattr(api, method).call_args[1]
-        assert request.get.call_args == [("iterable_key",), {}]
+        assert (
+            getattr(api, method).call_args[1]
+            == dict(
+                iterable_key=request.get.return_value,
+                jq_filter=request.get.return_value))
+        assert (
+            request.get.call_args_list
+            == [[("iterable_key",), {}], [("jq",), {}]])
+    elif method == "getitem":
+        assert (
+            getattr(api, method).call_args[1]
+            == dict(jq_filter=request.get.return_value))
+        assert (
+            request.get.call_args_list
+            == [[("jq",), {}]])
     else:
         assert not getattr(api, method).call_args[1]
@@ -3,7 +3,6 @@
 from unittest.mock import AsyncMock, MagicMock, PropertyMock
 
 import pytest
-import aiohttp
 
 from synca.mcp.gh_extra import errors
 from synca.mcp.gh_extra.util import gh
@@ -14,6 +13,10 @@ def test_github_api_constructor():
     token = MagicMock()
     github_api = gh.GitHubAPI(token=token)
     assert github_api.token is token
+    assert github_api.write_path is None
+    assert github_api.api_url == "https://api.github.com"
+    api_url = MagicMock()
+    assert gh.GitHubAPI(token, api_url=api_url).api_url is api_url
 
 
 @pytest.mark.asyncio
@@ -54,10 +57,9 @@ def test_github_api_api(patches):
     token = MagicMock()
     github_api = gh.GitHubAPI(token)
     patched = patches(
-        "_GitHubAPI",
-        ("GitHubAPI.session",
-         dict(new_callable=PropertyMock)),
-        prefix="synca.mcp.gh_extra.util.gh")
+        "gidgethub.aiohttp.GitHubAPI",
+        ("synca.mcp.gh_extra.util.gh.GitHubAPI.session",
+         dict(new_callable=PropertyMock)))
 
     with patched as (m_ghapi, m_session):
         assert (
@@ -68,7 +70,8 @@ def test_github_api_api(patches):
     assert (
         m_ghapi.call_args
         == [(m_session.return_value, "synca-mcp-gh-extra"),
-            {"oauth_token": token}])
+            {"oauth_token": token,
+             "base_url": github_api.api_url}])
 
 
 @pytest.mark.parametrize(
@@ -105,7 +108,26 @@ def test_github_api_downloader(patches, has_write_path):
     assert "downloader" in github_api.__dict__
     assert (
         m_downloader.call_args
-        == [(write_path, m_session.return_value, token), {}])
+        == [(write_path,
+             m_session.return_value,
+             token,
+             github_api.api_url), {}])
+
+
+def test_github_downloader_constructor():
+    """Test the GitHubDownloader constructor."""
+    write_path = MagicMock()
+    session = MagicMock()
+    token = MagicMock()
+    downloader = gh.GitHubDownloader(write_path, session, token)
+    assert downloader.write_path is write_path
+    assert downloader.session is session
+    assert downloader.token is token
+    assert downloader.api_url == "https://api.github.com"
+    api_url = MagicMock()
+    assert (
+        gh.GitHubDownloader(write_path, session, token, api_url).api_url
+        is api_url)
 
 
 @pytest.mark.asyncio
@@ -132,7 +154,7 @@ async def test_github_api_download(patches):
 
     assert (
         m_cast.call_args
-        == [(aiohttp.typedefs.Query, params), {}])
+        == [("aiohttp.typedefs.Query", params), {}])
     assert (
         m_downloader.return_value.download.call_args
         == [(endpoint, m_cast.return_value), {}])
@@ -141,9 +163,7 @@ async def test_github_api_download(patches):
 def test_github_api_session(patches):
     """Test the GitHubAPI session property."""
     github_api = gh.GitHubAPI(MagicMock())
-    patched = patches(
-        "aiohttp.ClientSession",
-        prefix="synca.mcp.gh_extra.util.gh")
+    patched = patches("aiohttp.ClientSession")
 
     with patched as (m_session, ):
         assert (
@@ -157,36 +177,44 @@ def test_github_api_session(patches):
 
 
 @pytest.mark.asyncio
-async def test_github_api_getitem(patches):
+@pytest.mark.parametrize("jq_filter", [None, "FILTER"])
+async def test_github_api_getitem(patches, jq_filter):
     """Test the GitHubAPI getitem method."""
     token = MagicMock()
     github_api = gh.GitHubAPI(token)
     endpoint = MagicMock()
     params = MagicMock()
+    kwargs = (
+        dict(jq_filter=jq_filter)
+        if jq_filter
+        else {})
     patched = patches(
         ("GitHubAPI.api",
          dict(new_callable=PropertyMock)),
-        "json.dumps",
+        "JQFilter",
         prefix="synca.mcp.gh_extra.util.gh")
 
-    with patched as (m_api, m_dumps):
+    with patched as (m_api, m_jq):
         m_api.return_value.getitem = AsyncMock()
         assert (
-            await github_api.getitem(endpoint, params)
-            == (m_dumps.return_value, "Successfully retrieved item", 200))
+            await github_api.getitem(endpoint, params, **kwargs)
+            == (m_jq.apply_data.return_value,
+                "Successfully retrieved item",
+                200))
 
     assert (
         m_api.return_value.getitem.call_args
         == [(endpoint,), {"url_vars": params}])
     assert (
-        m_dumps.call_args
-        == [(m_api.return_value.getitem.return_value,), {}])
+        m_jq.apply_data.call_args
+        == [(m_api.return_value.getitem.return_value, jq_filter), {}])
 
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize("per_page", [1, 3, 5, 10])
 @pytest.mark.parametrize("pages", [None, 1, 2, 3])
-async def test_github_api_getitems(patches, iters, per_page, pages):
+@pytest.mark.parametrize("jq_filter", [None, "FILTER"])
+async def test_github_api_getitems(patches, iters, per_page, pages, jq_filter):
     """Test the GitHubAPI getitems method."""
     token = MagicMock()
     github_api = gh.GitHubAPI(token)
@@ -196,20 +224,24 @@ async def test_github_api_getitems(patches, iters, per_page, pages):
     items = iters()
     result_count = (pages or 1) * per_page
     total = min(result_count, 5)
+    kwargs = (
+        dict(jq_filter=jq_filter)
+        if jq_filter
+        else {})
     patched = patches(
         ("GitHubAPI.api",
          dict(new_callable=PropertyMock)),
-        "json.dumps",
+        "JQFilter",
         "cast",
         prefix="synca.mcp.gh_extra.util.gh")
 
-    with patched as (m_api, m_dumps, m_cast):
+    with patched as (m_api, m_jq, m_cast):
         m_api.return_value.getiter.return_value.__aiter__.return_value = items
         m_cast.return_value = per_page
         assert (
             await github_api.getitems(
-                endpoint, params, pages, iterable_key)
-            == (m_dumps.return_value,
+                endpoint, params, pages, iterable_key, **kwargs)
+            == (m_jq.apply_data.return_value,
                 f"Successfully retrieved {total} items",
                 200))
 
@@ -224,8 +256,9 @@ async def test_github_api_getitems(patches, iters, per_page, pages):
         == [(endpoint,),
             {"url_vars": params, "iterable_key": iterable_key}])
     assert (
-        m_dumps.call_args
-        == [({iterable_key: ["I0", "I1", "I2", "I3", "I4"][:result_count]},),
+        m_jq.apply_data.call_args
+        == [({iterable_key: ["I0", "I1", "I2", "I3", "I4"][:result_count]},
+             jq_filter),
             {}])
 
 
@@ -308,10 +341,9 @@ def test_github_downloader_extract(patches):
     zip_data = MagicMock()
     test_files = ["file1.txt", "file2.txt", "logs/file3.log"]
     patched = patches(
-        "io.BytesIO",
+        "synca.mcp.gh_extra.util.gh.io.BytesIO",
         "zipfile.ZipFile",
-        "FileInfo",
-        prefix="synca.mcp.gh_extra.util.gh")
+        "synca.mcp.gh_extra.util.gh.FileInfo")
 
     with patched as (m_bytesio, m_zipfile, m_fileinfo):
         m_zip_instance = MagicMock()
@@ -526,7 +558,8 @@ async def test_github_downloader_download(patches, target_exists):
     write_path = MagicMock()
     session = MagicMock()
     token = MagicMock()
-    downloader = gh.GitHubDownloader(write_path, session, token)
+    api_url = "http://localhost:8000/api/v3"
+    downloader = gh.GitHubDownloader(write_path, session, token, api_url)
     endpoint = MagicMock()
     params = MagicMock()
     patched = patches(
@@ -573,7 +606,7 @@ async def test_github_downloader_download(patches, target_exists):
         return
     assert (
         session.get.call_args
-        == [(f"https://api.github.com{endpoint}",),
+        == [(f"{api_url}{endpoint}",),
             {"headers": m_api_headers.return_value,
              "params": params}])
     assert (
@@ -582,5 +615,5 @@ async def test_github_downloader_download(patches, target_exists):
     assert (
         m_handle_response.call_args
         == [(target_dir,
-             f"https://api.github.com{endpoint}",
+             f"{api_url}{endpoint}",
              session.get.return_value.__aenter__.return_value), {}])
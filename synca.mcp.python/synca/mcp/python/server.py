@@ -2,12 +2,13 @@
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from synca.mcp.common.server import register
 from synca.mcp.common.types import ResultDict
 from synca.mcp.python.tool.pytest import PytestTool
 from synca.mcp.python.tool.mypy import MypyTool
 from synca.mcp.python.tool.flake8 import Flake8Tool
 
-mcp = FastMCP("Python")
+mcp = register(FastMCP("Python"))
 
 # TOOL
 
@@ -16,7 +17,8 @@ mcp = FastMCP("Python")
 async def pytest(
         ctx: Context,
         cwd: str,
-        pytest_args: tuple[str, ...] | None = None) -> ResultDict:
+        pytest_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run pytest on a Python project
 
     Executes pytest test runner on the specified project path.
@@ -24,6 +26,8 @@ async def pytest(
     Args:
         cwd: Directory path from which to run pytest (working directory)
         pytest_args: Optional list of additional arguments to pass to pytest
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -49,14 +53,18 @@ async def pytest(
             "error": str | None
         }
     """
-    return await PytestTool(ctx, cwd, dict(args=pytest_args)).run()
+    return await PytestTool(
+        ctx,
+        cwd,
+        dict(args=pytest_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def mypy(
         ctx: Context,
         cwd: str,
-        mypy_args: tuple[str, ...] | None = None) -> ResultDict:
+        mypy_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run mypy type checker on a Python project
 
     Executes mypy type checker on the specified project path.
@@ -66,6 +74,8 @@ async def mypy(
         mypy_args: Optional list of additional arguments to pass to mypy
              Examples: ["--no-implicit-optional", "--disallow-untyped-defs",
                         "--disallow-incomplete-defs"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -81,14 +91,18 @@ async def mypy(
             "error": str | None
         }
     """
-    return await MypyTool(ctx, cwd, dict(args=mypy_args)).run()
+    return await MypyTool(
+        ctx,
+        cwd,
+        dict(args=mypy_args, timeout=timeout)).run()
 
 
 @mcp.tool()
 async def flake8(
         ctx: Context,
         cwd: str,
-        flake8_args: tuple[str, ...] | None = None) -> ResultDict:
+        flake8_args: tuple[str, ...] | None = None,
+        timeout: float | None = None) -> ResultDict:
     """Run flake8 linter on a Python project
 
     Executes flake8 linter on the specified project path.
@@ -97,6 +111,8 @@ async def flake8(
         path: Directory path from which to run flake8 (working directory)
         flake8_args: Optional list of additional arguments to pass to flake8
              Examples: ["--ignore=E203", "--exclude=.git"]
+        timeout: Optional timeout in seconds, after which the run is killed
+             and the output captured so far is returned
 
     Returns:
         A dictionary with the following structure:
@@ -113,4 +129,7 @@ async def flake8(
         }
 
     """
-    return await Flake8Tool(ctx, cwd, dict(args=flake8_args)).run()
+    return await Flake8Tool(
+        ctx,
+        cwd,
+        dict(args=flake8_args, timeout=timeout)).run()
@@ -4,6 +4,16 @@ from synca.mcp.common.tool import CLICheckTool
 
 
 class PythonTool(CLICheckTool):
+    fingerprint_patterns = (
+        "*.py",
+        "*.pyi",
+        "py.typed",
+        ".flake8",
+        "mypy.ini",
+        ".mypy.ini",
+        "pyproject.toml",
+        "setup.cfg",
+        "tox.ini")
 
     def parse_output(
             self,
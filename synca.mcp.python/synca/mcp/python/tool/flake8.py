@@ -5,6 +5,7 @@ from synca.mcp.python.tool.base import PythonTool
 
 class Flake8Tool(PythonTool):
     """Flake8 linter tool implementation."""
+    cacheable = True
 
     @property
     def tool_name(self) -> str:
@@ -5,6 +5,7 @@ from synca.mcp.python.tool.base import PythonTool
 
 class MypyTool(PythonTool):
     """Mypy type checker tool implementation."""
+    cacheable = True
 
     @property
     def tool_name(self) -> str:
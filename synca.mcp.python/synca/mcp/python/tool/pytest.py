@@ -4,9 +4,12 @@ import re
 from typing import cast
 
 from synca.mcp.common.types import CoverageDict, OutputInfoDict, OutputTuple
+from synca.mcp.common.types import ProgressTuple
 from synca.mcp.python.tool.base import PythonTool
 from synca.mcp.python.util.coverage import CoverageParser
 
+PROGRESS_RE = re.compile(r"^(.*?)\s*\[\s*(\d+)%\]$")
+
 
 class PytestTool(PythonTool):
     """Pytest runner tool implementation."""
@@ -43,6 +46,17 @@ class PytestTool(PythonTool):
              else ""),
             data)
 
+    def parse_progress(
+            self,
+            stream: str,
+            line: str) -> ProgressTuple | None:
+        """Extract the percentage marker pytest prints after each test
+        file (or test, in verbose mode).
+        """
+        if not (match := PROGRESS_RE.match(line.rstrip())):
+            return None
+        return float(match.group(2)), 100.0, match.group(1)
+
     def _parse_coverage(
             self,
             output: str
@@ -19,10 +19,11 @@ def test_fastmcp_initialization():
 
 
 @pytest.mark.parametrize("pytest_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
 async def test_tool_pytest(
         patches,
-        pytest_args):
+        pytest_args, timeout):
     """Test each tool function to ensure it uses the right tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -30,7 +31,9 @@ async def test_tool_pytest(
         dict(pytest_args=pytest_args)
         if pytest_args is not None
         else {})
-    expected = dict(args=pytest_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=pytest_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "PytestTool",
@@ -51,8 +54,9 @@ async def test_tool_pytest(
 
 
 @pytest.mark.parametrize("mypy_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_tool_mypy(patches, mypy_args):
+async def test_tool_mypy(patches, mypy_args, timeout):
     """Test the mypy tool function to ensure it uses the right tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -60,7 +64,9 @@ async def test_tool_mypy(patches, mypy_args):
         dict(mypy_args=mypy_args)
         if mypy_args is not None
         else {})
-    expected = dict(args=mypy_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=mypy_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "MypyTool",
@@ -81,8 +87,9 @@ async def test_tool_mypy(patches, mypy_args):
 
 
 @pytest.mark.parametrize("flake8_args", [[], ["ARG1", "ARG2"], None])
+@pytest.mark.parametrize("timeout", [None, 23.0])
 @pytest.mark.asyncio
-async def test_tool_flake8(patches, flake8_args):
+async def test_tool_flake8(patches, flake8_args, timeout):
     """Test the flake8 tool function to ensure it uses the right tool class."""
     ctx = MagicMock()
     path = MagicMock()
@@ -90,7 +97,9 @@ async def test_tool_flake8(patches, flake8_args):
         dict(flake8_args=flake8_args)
         if flake8_args is not None
         else {})
-    expected = dict(args=flake8_args)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    expected = dict(args=flake8_args, timeout=timeout)
     mock_run = AsyncMock()
     patched = patches(
         "Flake8Tool",
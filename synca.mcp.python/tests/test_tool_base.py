@@ -1,10 +1,14 @@
 
+import asyncio
 from unittest.mock import MagicMock, PropertyMock
 
 import pytest
 
 from synca.mcp.python.tool.base import PythonTool
+from synca.mcp.python.tool.flake8 import Flake8Tool
+from synca.mcp.python.tool.mypy import MypyTool
 from synca.mcp.common.tool import CLICheckTool
+from synca.mcp.common.util.scheduler import Scheduler
 
 
 def test_tool_python_constructor():
@@ -18,6 +22,8 @@ def test_tool_python_constructor():
     assert tool.ctx == ctx
     assert tool._path_str == path
     assert tool._args == args
+    assert tool.cacheable is False
+    assert "*.py" in tool.fingerprint_patterns
 
 
 @pytest.mark.parametrize("stdout", ["", "OUT", "a:1\nb:2"])
@@ -75,3 +81,31 @@ def test_tool_python_parse_issues(stdout, stderr):
         == (len(stdout.strip().splitlines())
             if stdout.strip()
             else 0))
+
+
+@pytest.mark.asyncio
+async def test_tool_python_execute_overlaps(monkeypatch, tmp_path):
+    """Test different tools on one project run at once, as in a batch of
+    `mypy` and `flake8`, while runs of the same tool there take turns.
+    """
+    monkeypatch.setattr(CLICheckTool, "scheduler", Scheduler(slots=4))
+    running: set[str] = set()
+    overlaps: list[set[str]] = []
+
+    async def spawn(self, cmd):
+        running.add(cmd[0])
+        overlaps.append(set(running))
+        await asyncio.sleep(0.05)
+        running.discard(cmd[0])
+        return "", "", 0
+
+    monkeypatch.setattr(CLICheckTool, "spawn", spawn)
+    await asyncio.gather(
+        *(tool(MagicMock(), str(tmp_path), dict(args=())).execute(
+            (tool.__name__, ))
+          for tool
+          in (MypyTool, Flake8Tool, MypyTool)))
+    assert overlaps == [
+        {"MypyTool"},
+        {"MypyTool", "Flake8Tool"},
+        {"MypyTool"}]
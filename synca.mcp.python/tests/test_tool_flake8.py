@@ -19,3 +19,4 @@ def test_tool_flake8_constructor():
     assert tool.tool_name == "flake8"
     assert "tool_name" not in tool.__dict__
     assert tool._args == args
+    assert tool.cacheable is True
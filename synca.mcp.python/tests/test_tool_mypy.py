@@ -21,6 +21,7 @@ def test_tool_mypy_constructor():
     assert tool.tool_name == "mypy"
     assert "tool_name" not in tool.__dict__
     assert tool._args == args
+    assert tool.cacheable is True
 
 
 @pytest.mark.parametrize("stdout", ["", "single line", "line1\nline2\nline3"])
@@ -167,3 +167,24 @@ def test_tool_pytest_parse_summary(output, expected_summary):
     tool = PytestTool(ctx, path, args)
     result = tool._parse_summary(output)
     assert result == expected_summary
+
+
+@pytest.mark.parametrize(
+    "line,expected",
+    [("tests/test_foo.py ....F..                     [ 42%]",
+      (42.0, 100.0, "tests/test_foo.py ....F..")),
+     ("tests/test_foo.py::test_bar PASSED           [100%]\n",
+      (100.0, 100.0, "tests/test_foo.py::test_bar PASSED")),
+     ("[  3%]", (3.0, 100.0, "")),
+     ("============ 1 passed in 0.1s ============", None),
+     ("tests/test_foo.py [ 42%] more", None),
+     ("", None)])
+def test_tool_pytest_parse_progress(line, expected):
+    """Test parse_progress extracts the pytest percentage markers."""
+    ctx = MagicMock()
+    path = MagicMock()
+    args = MagicMock()
+    tool = PytestTool(ctx, path, args)
+    assert (
+        tool.parse_progress(MagicMock(), line)
+        == expected)